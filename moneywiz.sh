@@ -12,6 +12,9 @@
 
 set -euo pipefail
 
+# Launch time for MONEYWIZ_TTFO reporting (bash 5+; empty on older bash)
+export MONEYWIZ_T0="${EPOCHREALTIME-}"
+
 SCRIPT_DIR="$(cd "$(dirname "$0")" && pwd)"
 
 # Default DB path (test database)
@@ -113,65 +116,172 @@ fi
 # Default DB path used unless overridden via global --db
 DB_PATH="${CONFIG_DB_PATH:-${DEFAULT_DB_PATH}}"
 
-# Use local uv cache dir to avoid permission issues
-export UV_CACHE_DIR="${SCRIPT_DIR}/.uv-cache"
-mkdir -p "${UV_CACHE_DIR}"
-
-# Require uv
-if ! command -v uv >/dev/null 2>&1; then
-  echo "Error: 'uv' is not installed." >&2
-  echo "Install uv (see https://docs.astral.sh/uv/getting-started/), e.g.:" >&2
-  echo "  curl -LsSf https://astral.sh/uv/install.sh | sh" >&2
-  exit 127
-fi
-
-# Create or reuse local venv
 VENV_DIR="${SCRIPT_DIR}/.venv"
 PY_REQ="3.11"
-if [[ ! -d "${VENV_DIR}" ]]; then
-  uv venv --python "${PY_REQ}" "${VENV_DIR}"
-else
-  # Recreate venv if Python version is too old (< 3.11)
-  if ! "${VENV_DIR}/bin/python" - <<'PY'
-import sys
-sys.exit(0 if sys.version_info >= (3, 11) else 1)
-PY
-  then
-    echo "Refreshing virtualenv with Python ${PY_REQ} (found older Python)."
-    rm -rf "${VENV_DIR}"
+BOOTSTRAP_STAMP="${VENV_DIR}/.moneywiz-bootstrap"
+
+# The helpers below only use bash builtins (plus one cksum) so that an
+# up-to-date environment costs no Python start-up or resolver call.
+
+VENV_PY_VERSION=""
+read_venv_python_version() {
+  # Python version recorded by `uv venv` / `python -m venv` in pyvenv.cfg
+  VENV_PY_VERSION=""
+  local cfg="${VENV_DIR}/pyvenv.cfg" line key value
+  [[ -f "${cfg}" ]] || return 0
+  while IFS= read -r line || [[ -n "${line}" ]]; do
+    key="${line%%=*}"; key="${key// /}"
+    value="${line#*=}"; value="${value// /}"
+    case "${key}" in
+      version|version_info) VENV_PY_VERSION="${value}" ;;
+    esac
+  done <"${cfg}"
+}
+
+venv_python_ok() {
+  # True when the venv Python is >= PY_REQ
+  local major="${VENV_PY_VERSION%%.*}" rest="${VENV_PY_VERSION#*.}" minor
+  minor="${rest%%.*}"
+  [[ "${major}" =~ ^[0-9]+$ && "${minor}" =~ ^[0-9]+$ ]] || return 1
+  (( major > 3 || (major == 3 && minor >= ${PY_REQ#*.}) ))
+}
+
+API_HEAD=""
+read_api_head() {
+  # Commit checked out in moneywiz-api (reads .git directly; no git process)
+  API_HEAD="none"
+  local gitdir="${SCRIPT_DIR}/moneywiz-api/.git" line ref sha name
+  if [[ -f "${gitdir}" ]]; then
+    IFS= read -r line <"${gitdir}" || true
+    gitdir="${line#gitdir: }"
+    [[ "${gitdir}" == /* ]] || gitdir="${SCRIPT_DIR}/moneywiz-api/${gitdir}"
+  fi
+  [[ -f "${gitdir}/HEAD" ]] || return 0
+  IFS= read -r line <"${gitdir}/HEAD" || true
+  if [[ "${line}" != "ref: "* ]]; then
+    API_HEAD="${line}"
+    return 0
+  fi
+  ref="${line#ref: }"
+  API_HEAD="${ref}"
+  if [[ -f "${gitdir}/${ref}" ]]; then
+    IFS= read -r sha <"${gitdir}/${ref}" || true
+    API_HEAD="${sha}"
+  elif [[ -f "${gitdir}/packed-refs" ]]; then
+    while read -r sha name || [[ -n "${sha}" ]]; do
+      if [[ "${name}" == "${ref}" ]]; then API_HEAD="${sha}"; break; fi
+    done <"${gitdir}/packed-refs"
+  fi
+}
+
+BOOTSTRAP_KEY=""
+compute_bootstrap_key() {
+  local req="none"
+  if [[ -f "${SCRIPT_DIR}/requirements.txt" ]]; then
+    req="$(cksum <"${SCRIPT_DIR}/requirements.txt")"
+  fi
+  read_venv_python_version
+  read_api_head
+  BOOTSTRAP_KEY="v1 req=${req} python=${VENV_PY_VERSION:-none} api=${API_HEAD}"
+}
+
+bootstrap_env() {
+  # Use local uv cache dir to avoid permission issues
+  export UV_CACHE_DIR="${SCRIPT_DIR}/.uv-cache"
+  mkdir -p "${UV_CACHE_DIR}"
+
+  # Require uv
+  if ! command -v uv >/dev/null 2>&1; then
+    echo "Error: 'uv' is not installed." >&2
+    echo "Install uv (see https://docs.astral.sh/uv/getting-started/), e.g.:" >&2
+    echo "  curl -LsSf https://astral.sh/uv/install.sh | sh" >&2
+    exit 127
+  fi
+
+  # Create or reuse local venv
+  if [[ ! -d "${VENV_DIR}" ]]; then
     uv venv --python "${PY_REQ}" "${VENV_DIR}"
+  else
+    # Recreate venv if Python version is too old (< 3.11)
+    read_venv_python_version
+    if ! venv_python_ok; then
+      echo "Refreshing virtualenv with Python ${PY_REQ} (found ${VENV_PY_VERSION:-unknown})."
+      rm -rf "${VENV_DIR}"
+      uv venv --python "${PY_REQ}" "${VENV_DIR}"
+    fi
   fi
-fi
 
-# Install runtime deps
-if [[ -f "${SCRIPT_DIR}/requirements.txt" ]]; then
-  uv pip install -r "${SCRIPT_DIR}/requirements.txt" --python "${VENV_DIR}/bin/python"
+  # Install runtime deps
+  if [[ -f "${SCRIPT_DIR}/requirements.txt" ]]; then
+    uv pip install -r "${SCRIPT_DIR}/requirements.txt" --python "${VENV_DIR}/bin/python"
+  fi
+}
+
+# Validate/install only when requirements.txt, the venv Python or the
+# moneywiz-api checkout changed since the last successful bootstrap.
+# MONEYWIZ_FORCE_BOOTSTRAP=1 forces it.
+compute_bootstrap_key
+STAMP_KEY=""
+if [[ -f "${BOOTSTRAP_STAMP}" ]]; then
+  IFS= read -r STAMP_KEY <"${BOOTSTRAP_STAMP}" || true
+fi
+if [[ -n "${MONEYWIZ_FORCE_BOOTSTRAP-}" || "${STAMP_KEY}" != "${BOOTSTRAP_KEY}" || ! -x "${VENV_DIR}/bin/python" ]]; then
+  bootstrap_env
+  compute_bootstrap_key
+  printf '%s\n' "${BOOTSTRAP_KEY}" >"${BOOTSTRAP_STAMP}"
 fi
 
 # PYTHONPATH to use local source tree directly
 export PYTHONPATH="${SCRIPT_DIR}/moneywiz-api/src${PYTHONPATH:+:${PYTHONPATH}}"
 
+# Resident read server socket (see `server start`); same default as scripts/server.py
+SERVER_SOCKET="${MONEYWIZ_SOCKET:-${MONEYWIZ_CACHE_DIR:-${XDG_CACHE_HOME:-${HOME}/.cache}/moneywiz-tools}/server.sock}"
+
 usage() {
   cat <<USAGE
-Usage: ./moneywiz.sh [--db PATH] <command> [options]
+Usage: ./moneywiz.sh [--db PATH] [--profile] [--trace-sql] <command> [options]
 
 Global:
   --db PATH                           Override database path (default: tests/test_db.sqlite)
   --setup                             Clone moneywiz-api fork and scaffold ~/.moneywizrc
+  --profile                           Print per-phase timings (startup, connect, cache, load,
+                                      parse, enrich, render) to stderr after the command
+  --profile-out FILE                  Also write a cProfile dump (python -m pstats FILE)
+  --trace-sql                         Log every SQL statement with its time and row count to stderr
+  --trace-sql-out FILE                Append the SQL log to FILE as JSON lines instead
+                                      (profiling/tracing runs the command locally, not via the server)
   --help                              Show this help
 
-Reads (support --format table|json; default: table):
+Reads (support --format table|tsv|csv|json|ndjson; default: tsv):
   users                               List users
   accounts [--user ID]                List accounts (optionally for user)
-  categories --user ID [--full-name]  List categories for user
+  categories --user ID [--full-name] [--tree]
+                                      List categories for user (--tree: depth-first hierarchy)
   payees [--user ID] [--sort-by-name] List payees (optionally for user); sort by name A→Z
   tags [--user ID]                    List tags (optionally for user)
-  transactions [--account ID] [--until YYYY-MM-DD] [--limit N]
+  transactions [--account ID] [--since YYYY-MM-DD] [--until YYYY-MM-DD]
+               [--type T1,T2] [--limit N]
                [--with-categories] [--with-tags]
                [--fields f1,f2,...] [--list-fields] [--all-fields]
+               [--search TEXT [--fuzzy] [--search-in COLS]]
                                       List transactions; omit --account to list across all accounts.
                                       Use '--list-fields' to discover selectable fields for '--fields'.
+                                      Default --format table; --table-widths spool for exact widths.
   holdings --account ID               List investment holdings for an account
+  report [--by period,account,category,payee,tag,currency,type,user]
+         [--period day|week|month|quarter|year|all] [--pivot DIM]
+         [--account IDS] [--user ID] [--since DATE] [--until DATE] [--type T1,T2]
+                                      Totals per group (exact minor-unit sums)
+  balances [--as-of DATE] [--account IDS] [--user ID]
+                                      Account balances at a date (end of day; default: now)
+  export --out DIR [--by account|user] [--per-year] [--format csv|ndjson|parquet] [--jobs N]
+         [--account IDS] [--user ID] [--since DATE] [--until DATE] [--type T1,T2]
+         [--with-categories] [--with-tags]
+                                      One file per account (or user, and year), written by a
+                                      pool of worker processes; prints per-file timings
+  search QUERY [--fuzzy] [--in COLS] [--limit N] [--ids-only] [--rebuild] [transactions options]
+                                      Ranked full-text search over descriptions, notes, payee,
+                                      category and tag names (sidecar index <db>.search.sqlite)
 
 Writes (dry-run by default; add --apply to commit):
   insert --type TYPE --fields '{JSON cols}'
@@ -189,21 +299,47 @@ Writes (dry-run by default; add --apply to commit):
                                       references a payee named exactly as its description.
                                       --from-empty-payee is limited to expense/income-like rows.
 
+Resident server (keeps one DB loaded; reads above are forwarded to it while it runs):
+  server start|stop|status            Start in the background / stop / show status
+  server run                          Run in the foreground
+
 Introspection & Misc:
-  schema [--out-md PATH] [--out-json PATH]
-                                      Generate Markdown and JSON schema dumps
+  schema [--out-md PATH] [--out-json PATH] [--approx-counts]
+                                      Generate Markdown and JSON schema dumps (one pass;
+                                      structure cached by schema fingerprint)
   summary                             Show counts per manager
+  inspect-transactions [--type T1,T2] [--all-entities] [--limit N]
+                       [--sample-size N] [--samples N] [--seed N]
+                                      Per-type column profile (non-null, distinct, min/max,
+                                      top values) and relationship counts, in SQL
   stats [--out DIR]                   Write simple stats snapshots to files
   record (--id ID | --gid GID)        View a record by id or gid
+  changes [--checkpoint PATH] [--format ndjson|json|tsv|table|csv] [--ids-only]
+          [--peek] [--reset] [--summary]
+                                      Rows inserted/updated/deleted since the last run
+                                      (per-DB checkpoint; --peek leaves it in place)
   shell [--db PATH] [--demo-dump] [--log-level LEVEL]
                                       Launch interactive shell (moneywiz-cli)
-  create-test-db                      Copy the selected MoneyWiz DB into tests/test_db.sqlite
-  sanitize-test-db                    Scrub/anonymize tests/test_db.sqlite
+  create-test-db [--out PATH] [--sanitize]
+                 [--subset [--user IDS] [--accounts IDS] [--since DATE] [--until DATE]
+                           [--max-transactions N]]
+                                      Snapshot the selected MoneyWiz DB into tests/test_db.sqlite
+                                      (--sanitize scrubs the copy in the same run; --subset keeps
+                                      only the selected transactions and what they reference)
+  sanitize-test-db [--no-vacuum]      Scrub/anonymize tests/test_db.sqlite
+  generate-db --out PATH [--rows N] [--users N] [--accounts N] [--categories N]
+              [--payees N] [--tags N] [--years N] [--end DATE] [--mix K=W,...] [--seed N]
+                                      Generate a synthetic DB of N ZSYNCOBJECT rows (10k..10m)
+                                      using tests/test_db.sqlite as the schema template
+  benchmark [--scales 10k,100k] [--only T1,T2] [--repeat N] [--warm]
+            [--baseline FILE] [--save-baseline FILE] [--format table|json]
+                                      Time every read subcommand and the API load paths
+                                      (wall time, peak RSS) on generated DBs
 
 USAGE
 }
 
-# Parse optional global --db PATH (must come before subcommand)
+# Parse global options (--db PATH, --profile, --trace-sql, ...; must come before subcommand)
 GLOBAL_DB=""
 while [[ $# -gt 0 ]]; do
   case "$1" in
@@ -211,6 +347,14 @@ while [[ $# -gt 0 ]]; do
       if [[ -n "${2-}" ]]; then GLOBAL_DB="$2"; shift 2; else echo "--db requires a path" >&2; exit 2; fi ;;
     --setup)
       run_setup; exit 0 ;;
+    --profile)
+      export MONEYWIZ_PROFILE=1; shift ;;
+    --profile-out)
+      if [[ -n "${2-}" ]]; then export MONEYWIZ_PROFILE="${MONEYWIZ_PROFILE:-1}" MONEYWIZ_PSTATS="$2"; shift 2; else echo "--profile-out requires a path" >&2; exit 2; fi ;;
+    --trace-sql)
+      export MONEYWIZ_TRACE_SQL=1; shift ;;
+    --trace-sql-out)
+      if [[ -n "${2-}" ]]; then export MONEYWIZ_TRACE_SQL="$2"; shift 2; else echo "--trace-sql-out requires a path" >&2; exit 2; fi ;;
     --help|-h)
       usage; exit 0 ;;
     --*)
@@ -242,48 +386,22 @@ if [[ "${SUBCMD}" != "shell" ]]; then
   fi
 fi
 
+# Python subcommands all go through one in-process dispatcher
+# (scripts/moneywiz.py), which also offers read commands to a running
+# resident server first.
+DISPATCH="${SCRIPT_DIR}/scripts/moneywiz.py"
+export MONEYWIZ_SOCKET="${SERVER_SOCKET}"
+
 case "${SUBCMD}" in
   shell)
     DB_FOR_SHELL="${GLOBAL_DB:-${DB_PATH}}"
-    exec "${PY}" "${SCRIPT_DIR}/scripts/run_moneywiz_cli.py" "${DB_FOR_SHELL}" "$@" ;;
-  users)
-    exec "${PY}" "${SCRIPT_DIR}/scripts/users.py" "${BASE_DB_ARG[@]}" "$@" ;;
-  accounts)
-    exec "${PY}" "${SCRIPT_DIR}/scripts/accounts.py" "${BASE_DB_ARG[@]}" "$@" ;;
-  categories)
-    exec "${PY}" "${SCRIPT_DIR}/scripts/categories.py" "${BASE_DB_ARG[@]}" "$@" ;;
-  payees)
-    exec "${PY}" "${SCRIPT_DIR}/scripts/payees.py" "${BASE_DB_ARG[@]}" "$@" ;;
-  tags)
-    exec "${PY}" "${SCRIPT_DIR}/scripts/tags.py" "${BASE_DB_ARG[@]}" "$@" ;;
-  transactions)
-    exec "${PY}" "${SCRIPT_DIR}/scripts/transactions.py" "${BASE_DB_ARG[@]}" "$@" ;;
-  holdings)
-    exec "${PY}" "${SCRIPT_DIR}/scripts/holdings.py" "${BASE_DB_ARG[@]}" "$@" ;;
-  record)
-    exec "${PY}" "${SCRIPT_DIR}/scripts/record.py" "${BASE_DB_ARG[@]}" "$@" ;;
-  stats)
-    exec "${PY}" "${SCRIPT_DIR}/scripts/stats.py" "${BASE_DB_ARG[@]}" "$@" ;;
-  summary)
-    exec "${PY}" "${SCRIPT_DIR}/scripts/summary.py" "${BASE_DB_ARG[@]}" "$@" ;;
-  insert)
-    exec "${PY}" "${SCRIPT_DIR}/scripts/insert.py" "${BASE_DB_ARG[@]}" "$@" ;;
-  update)
-    exec "${PY}" "${SCRIPT_DIR}/scripts/update.py" "${BASE_DB_ARG[@]}" "$@" ;;
-  delete)
-    exec "${PY}" "${SCRIPT_DIR}/scripts/delete.py" "${BASE_DB_ARG[@]}" "$@" ;;
-  safe-delete)
-    exec "${PY}" "${SCRIPT_DIR}/scripts/safe_delete.py" "${BASE_DB_ARG[@]}" "$@" ;;
-  rename)
-    exec "${PY}" "${SCRIPT_DIR}/scripts/rename.py" "${BASE_DB_ARG[@]}" "$@" ;;
-  assign-categories)
-    exec "${PY}" "${SCRIPT_DIR}/scripts/assign_categories.py" "${BASE_DB_ARG[@]}" "$@" ;;
-  assign-tags)
-    exec "${PY}" "${SCRIPT_DIR}/scripts/assign_tags.py" "${BASE_DB_ARG[@]}" "$@" ;;
-  link-refund)
-    exec "${PY}" "${SCRIPT_DIR}/scripts/link_refund.py" "${BASE_DB_ARG[@]}" "$@" ;;
-  reassign-payees-by-id)
-    exec "${PY}" "${SCRIPT_DIR}/scripts/reassign_payees_by_id.py" "${BASE_DB_ARG[@]}" "$@" ;;
+    exec "${PY}" "${DISPATCH}" shell "${DB_FOR_SHELL}" "$@" ;;
+  server)
+    exec "${PY}" "${DISPATCH}" server "$@" "${BASE_DB_ARG[@]}" ;;
+  users|accounts|categories|payees|tags|transactions|holdings|record|stats|summary|changes|report|balances|inspect-transactions|export|search)
+    exec "${PY}" "${DISPATCH}" "${SUBCMD}" "${BASE_DB_ARG[@]}" "$@" ;;
+  insert|update|delete|safe-delete|rename|assign-categories|assign-tags|link-refund|reassign-payees-by-id)
+    exec "${PY}" "${DISPATCH}" "${SUBCMD}" "${BASE_DB_ARG[@]}" "$@" ;;
   create-test-db)
     SRC="${GLOBAL_DB}"
     if [[ -z "${SRC}" ]]; then SRC="${CONFIG_DB_PATH}"; fi
@@ -296,38 +414,59 @@ case "${SUBCMD}" in
       echo "Error: source database not found: ${SRC}" >&2
       exit 1
     fi
+    # Options: --out PATH (default tests/test_db.sqlite), --sanitize,
+    # --subset [--user IDS] [--accounts IDS] [--since DATE] [--until DATE] [--max-transactions N]
     DEST="${SCRIPT_DIR}/tests/test_db.sqlite"
-    mkdir -p "${SCRIPT_DIR}/tests"
-    cp "${SRC}" "${DEST}"
-    echo "Created test DB at ${DEST} (copied from ${SRC})"
-    exit 0 ;;
+    CREATE_ARGS=( )
+    while [[ $# -gt 0 ]]; do
+      case "$1" in
+        --out)
+          DEST="$2"; shift 2 ;;
+        --sanitize|--subset)
+          CREATE_ARGS+=("$1"); shift ;;
+        --user|--accounts|--since|--until|--max-transactions)
+          if [[ -z "${2-}" ]]; then echo "$1 requires a value" >&2; exit 2; fi
+          CREATE_ARGS+=("$1" "$2"); shift 2 ;;
+        --help|-h)
+          echo "Usage: ./moneywiz.sh [--db SRC] create-test-db [--out PATH] [--sanitize]"
+          echo "         [--subset [--user IDS] [--accounts IDS] [--since DATE] [--until DATE] [--max-transactions N]]"
+          exit 0 ;;
+        *)
+          echo "Unknown create-test-db option: $1" >&2; exit 2 ;;
+      esac
+    done
+    exec "${PY}" "${DISPATCH}" create-test-db --db "${SRC}" --out "${DEST}" ${CREATE_ARGS[@]+"${CREATE_ARGS[@]}"} ;;
   sanitize-test-db)
     TARGET_DB="${SCRIPT_DIR}/tests/test_db.sqlite"
     if [[ ! -f "${TARGET_DB}" ]]; then
       echo "Error: ${TARGET_DB} does not exist. Seed it first with create-test-db." >&2
       exit 1
     fi
-    exec "${PY}" "${SCRIPT_DIR}/scripts/sanitize_test_db.py" --db "${TARGET_DB}" ;;
+    exec "${PY}" "${DISPATCH}" sanitize-test-db --db "${TARGET_DB}" "$@" ;;
+  generate-db|benchmark)
+    # Both work on their own (generated) DBs; --db is not forwarded.
+    exec "${PY}" "${DISPATCH}" "${SUBCMD}" "$@" ;;
   schema)
-    # Options: --out-md PATH, --out-json PATH
+    # Options: --out-md PATH, --out-json PATH, --approx-counts
     OUT_MD="${SCRIPT_DIR}/doc/DB-SCHEMA.md"
     OUT_JSON="${SCRIPT_DIR}/doc/schema.json"
+    SCHEMA_ARGS=( )
     while [[ $# -gt 0 ]]; do
       case "$1" in
         --out-md)
           OUT_MD="$2"; shift 2 ;;
         --out-json)
           OUT_JSON="$2"; shift 2 ;;
+        --approx-counts)
+          SCHEMA_ARGS+=("--approx-counts"); shift ;;
         --help|-h)
-          echo "Usage: ./moneywiz.sh schema [--out-md PATH] [--out-json PATH]"; exit 0 ;;
+          echo "Usage: ./moneywiz.sh schema [--out-md PATH] [--out-json PATH] [--approx-counts]"; exit 0 ;;
         *)
           echo "Unknown schema option: $1" >&2; exit 2 ;;
       esac
     done
-    mkdir -p "$(dirname "${OUT_MD}")" "$(dirname "${OUT_JSON}")"
-    DB_TO_USE="${GLOBAL_DB:-${DB_PATH}}"
-    "${PY}" "${SCRIPT_DIR}/scripts/introspect_db.py" --db "${DB_TO_USE}" --format md > "${OUT_MD}"
-    "${PY}" "${SCRIPT_DIR}/scripts/introspect_db.py" --db "${DB_TO_USE}" --format json > "${OUT_JSON}"
+    # One read of the DB renders both files.
+    "${PY}" "${DISPATCH}" schema "${BASE_DB_ARG[@]}" --out-md "${OUT_MD}" --out-json "${OUT_JSON}" ${SCHEMA_ARGS[@]+"${SCHEMA_ARGS[@]}"}
     echo "Schema written to ${OUT_MD} and ${OUT_JSON}"
     ;;
   *)
@@ -2,11 +2,10 @@
 from __future__ import annotations
 
 import argparse
-import os
 from pathlib import Path
-import json
 
-from moneywiz_api.moneywiz_api import MoneywizApi
+from moneywiz_tools import open_api
+from moneywiz_tools.output import add_format_argument, run, write_rows
 
 
 def default_db() -> Path:
@@ -17,10 +16,10 @@ def main() -> int:
     ap = argparse.ArgumentParser(description="List MoneyWiz accounts")
     ap.add_argument("--db", type=Path, default=default_db(), help="Path to MoneyWiz sqlite DB")
     ap.add_argument("--user", type=int, help="User ID to filter accounts; if omitted, list all users")
-    ap.add_argument("--format", choices=["table", "json"], default="table")
+    add_format_argument(ap)
     args = ap.parse_args()
 
-    api = MoneywizApi(args.db)
+    api = open_api(args.db)
     users = api.accessor.get_users()
 
     def emit_for_user(uid: int):
@@ -37,14 +36,9 @@ def main() -> int:
         for uid in sorted(users.keys()):
             rows.extend(emit_for_user(uid))
 
-    if args.format == "json":
-        print(json.dumps(rows, indent=2))
-    else:
-        print("user\tid\tname\tcurrency")
-        for r in rows:
-            print(f"{r['user']}\t{r['id']}\t{r['name']}\t{r['currency']}")
+    write_rows(args.format, rows, ["user", "id", "name", "currency"], widths=args.table_widths)
     return 0
 
 
 if __name__ == "__main__":
-    raise SystemExit(main())
+    run(main)
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+from datetime import datetime, time
+from pathlib import Path
+
+from moneywiz_tools import open_api
+from moneywiz_tools.output import add_format_argument, run, write_rows
+
+
+def default_db() -> Path:
+    return Path(__file__).resolve().parents[1] / "tests/test_db.sqlite"
+
+
+def parse_as_of(val: str | None) -> datetime:
+    """ISO date or datetime; a bare date means the end of that day."""
+    if not val:
+        return datetime.now()
+    parsed = datetime.fromisoformat(val)
+    if "T" not in val and " " not in val:
+        parsed = datetime.combine(parsed.date(), time.max)
+    return parsed
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Account balances as of a date")
+    ap.add_argument("--db", type=Path, default=default_db(), help="Path to MoneyWiz sqlite DB")
+    ap.add_argument(
+        "--as-of",
+        type=str,
+        help="ISO date (end of day) or datetime to report balances at (default: now)",
+    )
+    ap.add_argument("--account", type=str, help="Comma-separated account IDs (default: all accounts)")
+    ap.add_argument("--user", type=int, help="User ID to filter accounts; if omitted, list all users")
+    ap.add_argument("--decimals", type=int, default=2, help="Minor units per currency unit (10**N; default 2)")
+    add_format_argument(ap)
+    args = ap.parse_args()
+
+    as_of = parse_as_of(args.as_of)
+    api = open_api(args.db)
+    accounts = sorted(api.account_manager.records().values(), key=lambda a: (a.user, a.id))
+    if args.user is not None:
+        accounts = [a for a in accounts if a.user == args.user]
+    if args.account:
+        wanted = {int(x) for x in args.account.split(",") if x.strip()}
+        unknown = wanted - {a.id for a in accounts}
+        if unknown:
+            ap.error(f"unknown account id(s): {', '.join(map(str, sorted(unknown)))}")
+        accounts = [a for a in accounts if a.id in wanted]
+
+    rows = []
+    for a in accounts:
+        index = api.accessor.balance_index(a.id, decimals=args.decimals)
+        rows.append(
+            {
+                "user": a.user,
+                "id": a.id,
+                "name": a.name,
+                "currency": a.currency,
+                "balance": str(index.balance_at(as_of)),
+            }
+        )
+
+    headers = ["user", "id", "name", "currency", "balance"]
+    write_rows(args.format, rows, headers, widths=args.table_widths)
+    return 0
+
+
+if __name__ == "__main__":
+    run(main)
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""Time every read subcommand and the API load paths on synthetic DBs.
+
+For each scale a DB is generated once (``generate_db.py``, cached in
+``--workdir``). Each target then runs ``--repeat`` times in a fresh process:
+subcommands through ``moneywiz.sh``, API load paths through this script's
+``--worker`` mode. The harness records the best and median wall time and
+the peak RSS (``os.wait4``). Results can be saved as a baseline and
+compared with one later.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+SCRIPTS_DIR = REPO_ROOT / "scripts"
+
+RESULTS_VERSION = 1
+
+# name -> moneywiz.sh arguments; {user}, {account}, {investment_account},
+# {transaction} and {tmp} are filled in per DB.
+BENCH_COMMANDS: Dict[str, List[str]] = {
+    "users": ["users"],
+    "accounts": ["accounts"],
+    "categories": ["categories", "--user", "{user}"],
+    "categories-tree": ["categories", "--user", "{user}", "--tree"],
+    "payees": ["payees"],
+    "tags": ["tags"],
+    "transactions": ["transactions"],
+    "transactions-json": ["transactions", "--format", "json", "--with-categories", "--with-tags"],
+    "holdings": ["holdings", "--account", "{investment_account}"],
+    "record": ["record", "--id", "{transaction}"],
+    "summary": ["summary"],
+    "stats": ["stats", "--out", "{tmp}/stats"],
+    "report": ["report"],
+    "balances": ["balances"],
+    "inspect-transactions": ["inspect-transactions"],
+    "changes": ["changes", "--checkpoint", "{tmp}/checkpoint.json", "--reset", "--peek", "--summary"],
+    "schema": ["schema", "--out-md", "{tmp}/schema.md", "--out-json", "{tmp}/schema.json"],
+    "create-test-db-subset": ["create-test-db", "--out", "{tmp}/subset.sqlite", "--subset", "--max-transactions", "1000"],
+}
+
+# name -> what the worker process does.
+API_PATHS: Dict[str, str] = {
+    "api:eager": "MoneywizApi(db), every manager loaded",
+    "api:lazy-transactions": "open_api(db).transaction_manager.records()",
+    "api:columnar-transactions": "the same with transaction_store=\"columnar\"",
+    "api:lazy-accounts": "open_api(db).account_manager.records()",
+}
+
+
+def parse_count(val: str) -> int:
+    val = val.strip().lower().replace("_", "")
+    scale = {"k": 1_000, "m": 1_000_000}.get(val[-1:], 1)
+    return int(float(val[:-1] if scale > 1 else val) * scale)
+
+
+def default_workdir() -> Path:
+    from moneywiz_tools.cache import cache_dir
+
+    return cache_dir() / "bench"
+
+
+def run_worker(name: str, db: Path) -> int:
+    if name == "api:eager":
+        from moneywiz_api import MoneywizApi
+
+        MoneywizApi(db)
+    elif name == "api:lazy-transactions":
+        from moneywiz_tools import open_api
+
+        open_api(db).transaction_manager.records()
+    elif name == "api:columnar-transactions":
+        from moneywiz_tools import open_api
+
+        open_api(db, transaction_store="columnar").transaction_manager.records()
+    elif name == "api:lazy-accounts":
+        from moneywiz_tools import open_api
+
+        open_api(db).account_manager.records()
+    else:
+        print(f"unknown worker {name}", file=sys.stderr)
+        return 2
+    return 0
+
+
+def measure(cmd: List[str], env: Dict[str, str]) -> Dict[str, Any]:
+    """Run ``cmd`` once; wall seconds, peak RSS (MiB) and exit status."""
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, env=env)
+    # Drain stderr before waiting so a chatty command cannot block on the pipe.
+    err = proc.stderr.read() if proc.stderr else b""
+    _, status, usage = os.wait4(proc.pid, 0)
+    wall = time.perf_counter() - t0
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    # ru_maxrss is KiB on Linux, bytes on macOS.
+    rss = usage.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+    return {"wall": wall, "rss": rss, "code": proc.returncode, "stderr": err.decode(errors="replace")[-500:]}
+
+
+def db_params(db: Path) -> Dict[str, str]:
+    import sqlite3
+
+    con = sqlite3.connect(f"{db.resolve().as_uri()}?mode=ro", uri=True)
+    try:
+        ents = dict(con.execute("SELECT Z_NAME, Z_ENT FROM Z_PRIMARYKEY"))
+        (user,) = con.execute("SELECT MIN(Z_PK) FROM ZUSER").fetchone()
+        (account,) = con.execute("SELECT MIN(ZACCOUNT2) FROM ZSYNCOBJECT").fetchone()
+        (investment,) = con.execute(
+            "SELECT MIN(Z_PK) FROM ZSYNCOBJECT WHERE Z_ENT = ?", (ents.get("InvestmentAccount", -1),)
+        ).fetchone()
+        (transaction,) = con.execute(
+            "SELECT MAX(Z_PK) FROM ZSYNCOBJECT WHERE Z_ENT = ?", (ents.get("WithdrawTransaction", -1),)
+        ).fetchone()
+    finally:
+        con.close()
+    return {
+        "user": str(user or 1),
+        "account": str(account or 0),
+        "investment_account": str(investment or account or 0),
+        "transaction": str(transaction or 1),
+    }
+
+
+def ensure_db(workdir: Path, rows: int, seed: int, template: Path | None) -> tuple[Path, float | None]:
+    db = workdir / f"synthetic-{rows}-s{seed}.sqlite"
+    if db.exists():
+        return db, None
+    cmd = [sys.executable, str(SCRIPTS_DIR / "generate_db.py"), "--out", str(db), "--rows", str(rows),
+           "--seed", str(seed), "--format", "json"]
+    if template is not None:
+        cmd += ["--template", str(template)]
+    print(f"Generating {db.name} ...", file=sys.stderr)
+    t0 = time.perf_counter()
+    subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL)
+    return db, time.perf_counter() - t0
+
+
+def summarize(runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    walls = [r["wall"] for r in runs]
+    ok = all(r["code"] == 0 for r in runs)
+    out = {
+        "wall_s": round(min(walls), 4),
+        "wall_median_s": round(statistics.median(walls), 4),
+        "peak_rss_mb": round(max(r["rss"] for r in runs), 1),
+        "runs": len(runs),
+        "ok": ok,
+    }
+    if not ok:
+        out["error"] = next(r["stderr"] for r in runs if r["code"] != 0).strip()
+    return out
+
+
+def compare(results: List[Dict[str, Any]], baseline: Dict[str, Any], threshold: float) -> int:
+    base = {(r["scale"], r["target"]): r for r in baseline.get("results", [])}
+    regressions = 0
+    for r in results:
+        b = base.get((r["scale"], r["target"]))
+        if not b or not b.get("ok") or not r.get("ok") or not b.get("wall_s"):
+            continue
+        r["baseline_wall_s"] = b["wall_s"]
+        r["ratio"] = round(r["wall_s"] / b["wall_s"], 3)
+        if b.get("peak_rss_mb"):
+            r["rss_ratio"] = round(r["peak_rss_mb"] / b["peak_rss_mb"], 3)
+        r["regression"] = r["ratio"] > threshold or r.get("rss_ratio", 0) > threshold
+        regressions += r["regression"]
+    return regressions
+
+
+def print_table(results: List[Dict[str, Any]]) -> None:
+    headers = ["scale", "target", "wall_s", "median_s", "rss_mb", "base_s", "ratio", ""]
+    rows = []
+    for r in results:
+        flag = "FAIL" if not r["ok"] else ("REGRESSION" if r.get("regression") else "")
+        rows.append(
+            [
+                str(r["scale"]),
+                r["target"],
+                f"{r['wall_s']:.3f}",
+                f"{r['wall_median_s']:.3f}",
+                f"{r['peak_rss_mb']:.1f}",
+                f"{r['baseline_wall_s']:.3f}" if "baseline_wall_s" in r else "",
+                f"{r['ratio']:.2f}x" if "ratio" in r else "",
+                flag,
+            ]
+        )
+    widths = [max(len(h), *(len(row[i]) for row in rows)) if rows else len(h) for i, h in enumerate(headers)]
+    print("  ".join(h.ljust(w) for h, w in zip(headers, widths)).rstrip())
+    print("  ".join("-" * w for w in widths).rstrip())
+    for row in rows:
+        print("  ".join(c.ljust(w) for c, w in zip(row, widths)).rstrip())
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Benchmark subcommands and API load paths on synthetic DBs")
+    ap.add_argument("--scales", type=str, default="10k,100k", help="Comma-separated ZSYNCOBJECT row counts (default 10k,100k)")
+    ap.add_argument("--only", type=str, help="Comma-separated targets (command names or api:* paths)")
+    ap.add_argument("--skip", type=str, help="Comma-separated targets to leave out")
+    ap.add_argument("--repeat", type=int, default=3, help="Runs per target (default 3)")
+    ap.add_argument("--warm", action="store_true", help="Keep the snapshot cache on and prime it with one unmeasured run")
+    ap.add_argument("--workdir", type=Path, help="Where generated DBs are kept (default: <cache dir>/bench)")
+    ap.add_argument("--template", type=Path, help="Template DB for generate_db.py")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--baseline", type=Path, help="Compare with results saved by --save-baseline")
+    ap.add_argument("--threshold", type=float, default=1.25, help="Flag targets slower (or bigger) than baseline x N")
+    ap.add_argument("--save-baseline", type=Path, help="Write the results here for later --baseline runs")
+    ap.add_argument("--format", choices=["table", "json"], default="table")
+    ap.add_argument("--list", action="store_true", help="List the targets and exit")
+    ap.add_argument("--db", type=Path, help=argparse.SUPPRESS)  # passed by moneywiz.sh; --worker only
+    ap.add_argument("--worker", type=str, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.worker:
+        return run_worker(args.worker, args.db)
+
+    targets = [*BENCH_COMMANDS, *API_PATHS]
+    if args.list:
+        for name in BENCH_COMMANDS:
+            print(f"{name}\tmoneywiz.sh {' '.join(BENCH_COMMANDS[name])}")
+        for name, what in API_PATHS.items():
+            print(f"{name}\t{what}")
+        return 0
+    if args.only:
+        wanted = [t.strip() for t in args.only.split(",") if t.strip()]
+        unknown = [t for t in wanted if t not in targets]
+        if unknown:
+            ap.error(f"unknown target(s): {', '.join(unknown)}")
+        targets = wanted
+    if args.skip:
+        skipped = {t.strip() for t in args.skip.split(",")}
+        targets = [t for t in targets if t not in skipped]
+
+    workdir = args.workdir or default_workdir()
+    workdir.mkdir(parents=True, exist_ok=True)
+    env = dict(os.environ)
+    env["MONEYWIZ_NO_SERVER"] = "1"
+    if not args.warm:
+        env["MONEYWIZ_NO_CACHE"] = "1"
+    env.pop("MONEYWIZ_TTFO", None)
+    env["PYTHONPATH"] = os.pathsep.join(
+        p for p in (str(SCRIPTS_DIR), str(REPO_ROOT / "moneywiz-api/src"), env.get("PYTHONPATH", "")) if p
+    )
+
+    results: List[Dict[str, Any]] = []
+    generated: Dict[str, float] = {}
+    with tempfile.TemporaryDirectory(prefix="moneywiz-bench-") as tmp:
+        for scale in [parse_count(s) for s in args.scales.split(",") if s.strip()]:
+            db, gen_s = ensure_db(workdir, scale, args.seed, args.template)
+            if gen_s is not None:
+                generated[str(scale)] = round(gen_s, 2)
+            params = {**db_params(db), "tmp": tmp}
+            for target in targets:
+                if target in API_PATHS:
+                    cmd = [sys.executable, str(Path(__file__).resolve()), "--worker", target, "--db", str(db)]
+                    kind = "api"
+                else:
+                    argv = [a.format(**params) for a in BENCH_COMMANDS[target]]
+                    cmd = ["bash", str(REPO_ROOT / "moneywiz.sh"), "--db", str(db), *argv]
+                    kind = "command"
+                if args.warm:
+                    measure(cmd, env)
+                runs = [measure(cmd, env) for _ in range(max(args.repeat, 1))]
+                result = {"scale": scale, "target": target, "kind": kind, **summarize(runs)}
+                results.append(result)
+                print(f"{scale}\t{target}\t{result['wall_s']:.3f}s\t{result['peak_rss_mb']:.1f} MiB", file=sys.stderr)
+
+    regressions = 0
+    if args.baseline:
+        with args.baseline.open("r", encoding="utf-8") as fh:
+            regressions = compare(results, json.load(fh), args.threshold)
+
+    doc = {
+        "version": RESULTS_VERSION,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "host": {
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+        },
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "warm": args.warm,
+        "generated_s": generated,
+        "results": results,
+    }
+    if args.save_baseline:
+        args.save_baseline.parent.mkdir(parents=True, exist_ok=True)
+        with args.save_baseline.open("w", encoding="utf-8") as fh:
+            json.dump(doc, fh, indent=2)
+    if args.format == "json":
+        print(json.dumps({**doc, "regressions": regressions}, indent=2))
+    else:
+        print_table(results)
+        if args.baseline:
+            print(f"\n{regressions} regression(s) beyond {args.threshold}x of {args.baseline}")
+    failed = sum(not r["ok"] for r in results)
+    return 1 if regressions or failed else 0
+
+
+if __name__ == "__main__":
+    try:
+        raise SystemExit(main())
+    except BrokenPipeError:
+        try:
+            sys.stdout.close()
+        finally:
+            raise SystemExit(0)
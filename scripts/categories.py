@@ -2,11 +2,10 @@
 from __future__ import annotations
 
 import argparse
-import os
 from pathlib import Path
-import json
 
-from moneywiz_api.moneywiz_api import MoneywizApi
+from moneywiz_tools import open_api
+from moneywiz_tools.output import add_format_argument, run, write_rows
 
 
 def default_db() -> Path:
@@ -18,11 +17,18 @@ def main() -> int:
     ap.add_argument("--db", type=Path, default=default_db(), help="Path to MoneyWiz sqlite DB")
     ap.add_argument("--user", type=int, required=True, help="User ID to list categories for")
     ap.add_argument("--full-name", action="store_true", help="Include parent→child name chain")
-    ap.add_argument("--format", choices=["table", "json"], default="table")
+    ap.add_argument(
+        "--tree",
+        action="store_true",
+        help="List categories depth-first under their parents, with depth, parent and pre/post-order numbers",
+    )
+    add_format_argument(ap)
     args = ap.parse_args()
 
-    api = MoneywizApi(args.db)
+    api = open_api(args.db)
     cats = api.category_manager.get_categories_for_user(args.user)
+    if args.tree:
+        return print_tree(api, {c.id: c for c in cats}, args)
 
     rows: list[dict] = []
     for c in cats:
@@ -31,15 +37,40 @@ def main() -> int:
             item["name_chain"] = "/".join(api.category_manager.get_name_chain(c.id))
         rows.append(item)
 
-    if args.format == "json":
-        print(json.dumps(rows, indent=2))
-    else:
-        headers = ["id", "name", "type"] + (["name_chain"] if args.full_name else [])
-        print("\t".join(headers))
-        for r in rows:
-            print("\t".join(str(r.get(h, "")) for h in headers))
+    headers = ["id", "name", "type"] + (["name_chain"] if args.full_name else [])
+    write_rows(args.format, rows, headers, widths=args.table_widths)
+    return 0
+
+
+def print_tree(api, cats: dict, args: argparse.Namespace) -> int:
+    tree = api.category_manager.tree()
+    rows: list[dict] = []
+    for cid in tree.order:
+        c = cats.get(cid)
+        if c is None:
+            continue
+        item = {
+            "id": c.id,
+            "name": c.name,
+            "type": c.type,
+            "depth": tree.depth[cid],
+            "parent_id": tree.parent[cid],
+            "pre": tree.pre[cid],
+            "post": tree.post[cid],
+            "descendants": len(tree.descendants(cid)),
+        }
+        if args.full_name:
+            item["name_chain"] = tree.path_string(cid)
+        rows.append(item)
+
+    headers = ["id", "name", "type", "depth", "parent_id", "pre", "post", "descendants"]
+    headers += ["name_chain"] if args.full_name else []
+    if args.format in ("table", "tsv"):
+        # Indent names by depth for reading; csv/json keep the plain values.
+        rows = [dict(r, name="  " * r["depth"] + r["name"]) for r in rows]
+    write_rows(args.format, rows, headers, widths=args.table_widths)
     return 0
 
 
 if __name__ == "__main__":
-    raise SystemExit(main())
+    run(main)
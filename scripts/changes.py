@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+from moneywiz_tools.changes import ChangeFeed, default_checkpoint
+from moneywiz_tools.output import add_format_argument, run, write_rows
+
+
+def default_db() -> Path:
+    return Path(__file__).resolve().parents[1] / "tests/test_db.sqlite"
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(
+        description=(
+            "List ZSYNCOBJECT rows inserted, updated (Z_OPT changed) or deleted since the "
+            "last run, then move the checkpoint forward"
+        )
+    )
+    ap.add_argument("--db", type=Path, default=default_db(), help="Path to MoneyWiz sqlite DB")
+    ap.add_argument(
+        "--checkpoint",
+        type=Path,
+        help="Checkpoint file (default: per-DB file in the cache directory)",
+    )
+    add_format_argument(ap, default="ndjson")
+    ap.add_argument("--ids-only", action="store_true", help="Omit the row columns of inserts/updates")
+    ap.add_argument("--peek", action="store_true", help="Show changes without advancing the checkpoint")
+    ap.add_argument("--reset", action="store_true", help="Discard the checkpoint first (everything is new)")
+    ap.add_argument("--summary", action="store_true", help="Print only the counts per operation")
+    args = ap.parse_args()
+
+    checkpoint = args.checkpoint or default_checkpoint(args.db)
+    if args.reset:
+        checkpoint.unlink(missing_ok=True)
+
+    with ChangeFeed(args.db, checkpoint) as feed:
+        counts = feed.counts()
+        if args.summary:
+            print(" ".join(f"{op}={n}" for op, n in counts.items()))
+        else:
+            # The columnar formats show the change itself, never row data.
+            data = args.format in ("json", "ndjson") and not args.ids_only
+            write_rows(
+                args.format,
+                feed.pending(data=data),
+                ["op", "id", "type", "gid", "opt"],
+                ensure_ascii=False,
+                widths=args.table_widths,
+            )
+        if not args.peek:
+            feed.advance()
+    if args.summary:
+        return 0
+    print(
+        "changes: " + ", ".join(f"{op}={n}" for op, n in counts.items())
+        + ("" if args.peek else f" (checkpoint: {checkpoint})"),
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    run(main)
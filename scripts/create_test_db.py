@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+from datetime import datetime
+from pathlib import Path
+
+from moneywiz_tools.sanitize import create_test_db, print_summary
+from moneywiz_tools.subset import SubsetSpec
+
+
+def parse_date(val: str | None) -> datetime | None:
+    if not val:
+        return None
+    return datetime.fromisoformat(val)
+
+
+def parse_ids(val: str | None) -> list[int]:
+    return [int(v) for v in (val or "").split(",") if v.strip()]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Snapshot a MoneyWiz DB into a test DB (SQLite backup API), optionally sanitized in the same run"
+    )
+    parser.add_argument("--db", type=Path, required=True, help="Source MoneyWiz sqlite DB (opened read-only)")
+    parser.add_argument("--out", type=Path, required=True, help="Destination test DB")
+    parser.add_argument("--sanitize", action="store_true", help="Scrub/anonymize the copy before it is put in place")
+    subset = parser.add_argument_group("subset", "Copy only selected transactions and what they reference")
+    subset.add_argument("--subset", action="store_true", help="Write a referentially closed subset instead of a full copy")
+    subset.add_argument("--user", type=str, help="Comma-separated user ids")
+    subset.add_argument("--accounts", type=str, help="Comma-separated account ids")
+    subset.add_argument("--since", type=str, help="Transactions from this ISO date (YYYY-MM-DD)")
+    subset.add_argument("--until", type=str, help="Transactions up to this ISO date (YYYY-MM-DD)")
+    subset.add_argument("--max-transactions", type=int, default=0, help="Keep only the newest N selected transactions")
+    args = parser.parse_args()
+
+    if not args.db.exists():
+        raise SystemExit(f"Database not found: {args.db}")
+    if args.db.resolve() == args.out.resolve():
+        raise SystemExit("Source and destination are the same file")
+
+    spec = None
+    selectors = (args.user, args.accounts, args.since, args.until, args.max_transactions)
+    if args.subset:
+        spec = SubsetSpec(
+            users=parse_ids(args.user),
+            accounts=parse_ids(args.accounts),
+            since=parse_date(args.since),
+            until=parse_date(args.until),
+            max_transactions=max(args.max_transactions, 0),
+        )
+    elif any(selectors):
+        parser.error("--user/--accounts/--since/--until/--max-transactions require --subset")
+
+    summary = create_test_db(args.db, args.out, sanitize=args.sanitize, subset=spec)
+    what = "subset of" if spec is not None else "copied from"
+    if summary is None:
+        print(f"Created test DB at {args.out} ({what} {args.db})")
+        return 0
+    total = print_summary(summary)
+    print(f"\nCreated sanitized test DB at {args.out} ({what} {args.db}; total entries touched: {total})")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
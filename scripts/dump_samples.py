@@ -7,7 +7,7 @@ from pathlib import Path
 
 import pandas as pd
 
-from moneywiz_api.moneywiz_api import MoneywizApi
+from moneywiz_tools import open_api
 from moneywiz_api.cli.helpers import ShellHelper
 
 
@@ -22,7 +22,7 @@ def main() -> int:
     account_id = int(os.getenv("MW_ACCOUNT", "5309"))  # Monzo Personal per prior dump
     tx_limit = int(os.getenv("MW_TX_LIMIT", "20"))
 
-    api = MoneywizApi(db_path)
+    api = open_api(db_path)
     helper = ShellHelper(api)
 
     pd.options.display.max_rows = None
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+
+from moneywiz_tools import open_api
+from moneywiz_tools.export import FORMATS, PARTITIONS, export_partition, parquet_available, plan
+from moneywiz_tools.output import run, write_rows
+
+
+def default_db() -> Path:
+    return Path(__file__).resolve().parents[1] / "tests/test_db.sqlite"
+
+
+def parse_date(val: str | None) -> datetime | None:
+    if not val:
+        return None
+    return datetime.fromisoformat(val)
+
+
+def parse_list(val: str | None) -> list[str]:
+    return [v.strip() for v in (val or "").split(",") if v.strip()]
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(
+        description="Export transactions into one file per account (or per user, optionally per year), in parallel"
+    )
+    ap.add_argument("--db", type=Path, default=default_db(), help="Path to MoneyWiz sqlite DB")
+    ap.add_argument("--out", type=Path, required=True, help="Directory to write the files into (created if missing)")
+    ap.add_argument("--by", choices=PARTITIONS, default="account", help="One file per account (default) or per user")
+    ap.add_argument("--per-year", action="store_true", help="Split every file further by local calendar year")
+    ap.add_argument("--format", choices=FORMATS, default="csv", help="File format (parquet needs pyarrow)")
+    ap.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Worker processes (default: one per CPU; 1 exports in this process)",
+    )
+    ap.add_argument("--account", help="Comma-separated account IDs to include")
+    ap.add_argument("--user", type=int, help="Only accounts of this user")
+    ap.add_argument("--since", type=str, help="Include transactions from this ISO date (YYYY-MM-DD)")
+    ap.add_argument("--until", type=str, help="Include transactions up to this ISO date (YYYY-MM-DD)")
+    ap.add_argument(
+        "--type",
+        type=str,
+        help="Comma-separated transaction type names to include (default: all listed types)",
+    )
+    ap.add_argument("--with-categories", action="store_true", help="Include category assignments")
+    ap.add_argument("--with-tags", action="store_true", help="Include tags for each transaction")
+    args = ap.parse_args()
+
+    if args.format == "parquet" and not parquet_available():
+        ap.error("--format parquet needs pyarrow (pip install pyarrow)")
+    api = open_api(args.db)
+    tm = api.transaction_manager
+    typenames = parse_list(args.type) or tm.listed_typenames()
+    unknown = [t for t in typenames if t not in tm.ents]
+    if unknown:
+        ap.error(f"unknown transaction type(s): {', '.join(unknown)}")
+    accounts = [int(a) for a in parse_list(args.account)] or None
+    if args.user is not None:
+        # ZUSER is the account owner column; only account ids can match.
+        con = api.accessor.connection
+        owned = {pk for (pk,) in con.execute("SELECT Z_PK FROM ZSYNCOBJECT WHERE ZUSER = ?", (args.user,))}
+        accounts = sorted(owned if accounts is None else owned.intersection(accounts))
+
+    started = time.perf_counter()
+    # Same default upper bound as `transactions`: nothing dated in the future.
+    parts = plan(
+        api.accessor,
+        typenames,
+        by=args.by,
+        per_year=args.per_year,
+        accounts=accounts,
+        since=parse_date(args.since),
+        until=parse_date(args.until) or datetime.now(),
+    )
+    args.out.mkdir(parents=True, exist_ok=True)
+    common = (str(args.out), args.format, typenames, args.with_categories, args.with_tags)
+    jobs = max(1, min(args.jobs, len(parts)))
+    results = []
+    if jobs == 1:
+        for part in parts:
+            results.append(export_partition(str(args.db), part, *common))
+    else:
+        # Partitions are queued largest first (see plan()); every worker
+        # process opens its own read-only connection on its first task.
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = [pool.submit(export_partition, str(args.db), part, *common) for part in parts]
+            try:
+                for future in as_completed(futures):
+                    results.append(future.result())
+            except BaseException:
+                pool.shutdown(wait=True, cancel_futures=True)
+                raise
+    wall = time.perf_counter() - started
+
+    results.sort(key=lambda r: r.partition)
+    rows = [
+        {"partition": r.partition, "rows": r.rows, "seconds": f"{r.seconds:.3f}", "pid": r.pid, "path": r.path}
+        for r in results
+    ]
+    write_rows("table", rows, ["partition", "rows", "seconds", "pid", "path"], widths="spool")
+    busy = sum(r.seconds for r in results)
+    print(
+        f"export: {len(results)} files, {sum(r.rows for r in results)} rows in {wall:.2f} s "
+        f"({busy:.2f} s in partitions, {jobs} worker{'s' if jobs != 1 else ''})",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    run(main)
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from datetime import date
+from pathlib import Path
+
+from moneywiz_tools.synthetic import DEFAULT_MIX, SyntheticConfig, generate, load_descriptions
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+
+def parse_count(val: str) -> int:
+    """``10000``, ``10k``, ``2.5m``."""
+    val = val.strip().lower().replace("_", "")
+    scale = {"k": 1_000, "m": 1_000_000}.get(val[-1:], 1)
+    return int(float(val[:-1] if scale > 1 else val) * scale)
+
+
+def parse_mix(val: str | None) -> dict[str, float]:
+    mix = dict(DEFAULT_MIX)
+    for part in (val or "").split(","):
+        if not part.strip():
+            continue
+        key, _, weight = part.partition("=")
+        key = key.strip()
+        if key not in mix:
+            raise argparse.ArgumentTypeError(f"unknown kind {key!r} (expected one of {', '.join(mix)})")
+        mix[key] = float(weight)
+    return mix
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Generate a synthetic MoneyWiz DB at a given scale (for benchmarks)")
+    ap.add_argument("--out", type=Path, required=True, help="Destination sqlite file")
+    ap.add_argument("--rows", type=parse_count, default=100_000, help="ZSYNCOBJECT rows, e.g. 10k, 1m (default 100k)")
+    ap.add_argument(
+        "--template",
+        type=Path,
+        default=REPO_ROOT / "tests/test_db.sqlite",
+        help="DB providing the schema and entity ids (default tests/test_db.sqlite)",
+    )
+    ap.add_argument("--users", type=int, default=1)
+    ap.add_argument("--accounts", type=int, default=15, help="Accounts per user (a quarter are investment accounts)")
+    ap.add_argument("--categories", type=int, default=80, help="Categories per user")
+    ap.add_argument("--payees", type=int, default=0, help="Payees per user (default: rows/500, 40..5000)")
+    ap.add_argument("--tags", type=int, default=40, help="Tags per user")
+    ap.add_argument("--years", type=int, default=10, help="History length in years")
+    ap.add_argument("--end", type=str, default="2025-12-31", help="Date of the newest transaction (YYYY-MM-DD)")
+    ap.add_argument("--mix", type=str, help="Event weights, e.g. withdraw=0.6,transfer=0.2 (others keep defaults)")
+    ap.add_argument(
+        "--descriptions",
+        type=Path,
+        default=REPO_ROOT / "transactions.ita.json",
+        help="JSON list with 'description' keys used for payee names (default transactions.ita.json)",
+    )
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--format", choices=["table", "json"], default="table")
+    args = ap.parse_args()
+
+    if not args.template.exists():
+        raise SystemExit(f"Template database not found: {args.template}")
+    try:
+        mix = parse_mix(args.mix)
+    except argparse.ArgumentTypeError as exc:
+        ap.error(str(exc))
+    config = SyntheticConfig(
+        rows=args.rows,
+        users=max(args.users, 1),
+        accounts=max(args.accounts, 2),
+        categories=max(args.categories, 2),
+        payees=max(args.payees, 0),
+        tags=max(args.tags, 0),
+        years=max(args.years, 1),
+        end=date.fromisoformat(args.end),
+        seed=args.seed,
+        mix=mix,
+        descriptions=load_descriptions(args.descriptions),
+    )
+    report = (lambda _msg: None) if args.format == "json" else print
+    t0 = time.perf_counter()
+    stats = generate(args.template, args.out, config, report)
+    elapsed = time.perf_counter() - t0
+    if args.format == "json":
+        print(json.dumps({"out": str(args.out), "seconds": round(elapsed, 3), **stats}, indent=2))
+        return 0
+    for key, value in stats.items():
+        print(f"  * {key}: {value}")
+    print(f"Generated {args.out} ({stats['ZSYNCOBJECT']} objects) in {elapsed:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -2,11 +2,10 @@
 from __future__ import annotations
 
 import argparse
-import os
 from pathlib import Path
-import json
 
-from moneywiz_api.moneywiz_api import MoneywizApi
+from moneywiz_tools import open_api
+from moneywiz_tools.output import add_format_argument, run, write_rows
 
 
 def default_db() -> Path:
@@ -17,10 +16,10 @@ def main() -> int:
     ap = argparse.ArgumentParser(description="List MoneyWiz investment holdings for an account")
     ap.add_argument("--db", type=Path, default=default_db(), help="Path to MoneyWiz sqlite DB")
     ap.add_argument("--account", type=int, required=True, help="Account ID to list holdings for")
-    ap.add_argument("--format", choices=["table", "json"], default="table")
+    add_format_argument(ap)
     args = ap.parse_args()
 
-    api = MoneywizApi(args.db)
+    api = open_api(args.db)
     holdings = api.investment_holding_manager.get_holdings_for_account(args.account)
 
     rows = [
@@ -33,14 +32,9 @@ def main() -> int:
         for h in holdings
     ]
 
-    if args.format == "json":
-        print(json.dumps(rows, indent=2))
-    else:
-        print("account\tsymbol\tnumber_of_shares\tdescription")
-        for r in rows:
-            print(f"{r['account']}\t{r['symbol']}\t{r['number_of_shares']}\t{r['description']}")
+    write_rows(args.format, rows, ["account", "symbol", "number_of_shares", "description"], widths=args.table_widths)
     return 0
 
 
 if __name__ == "__main__":
-    raise SystemExit(main())
+    run(main)
@@ -3,11 +3,18 @@ from __future__ import annotations
 
 import json
 import os
-from collections import defaultdict
+import sys
 from pathlib import Path
-from typing import Any, Dict, List, Set
+from typing import Any, Dict, List
 
-from moneywiz_api.moneywiz_api import MoneywizApi
+from moneywiz_tools import open_api
+from moneywiz_tools.profiler import (
+    DEFAULT_LOW_CARDINALITY,
+    DEFAULT_SAMPLE_SIZE,
+    DEFAULT_TOP,
+    Profiler,
+    display_value,
+)
 
 
 def default_db() -> Path:
@@ -18,133 +25,135 @@ def default_db() -> Path:
     )
 
 
+def parse_list(val: str | None) -> list[str]:
+    return [v.strip() for v in (val or "").split(",") if v.strip()]
+
+
 def main() -> int:
     import argparse
 
-    ap = argparse.ArgumentParser(description="Inspect available transaction information")
+    ap = argparse.ArgumentParser(
+        description="Profile transaction columns and relationships (computed in SQL, no models)"
+    )
     ap.add_argument("--db", type=Path, default=default_db(), help="Path to MoneyWiz sqlite DB")
-    ap.add_argument("--limit", type=int, default=0, help="Limit number of transactions scanned (0 = all)")
+    ap.add_argument("--limit", type=int, default=0, help="Only profile the newest N rows (0 = all)")
+    ap.add_argument("--type", type=str, help="Comma-separated typenames to profile (default: listed transaction types)")
+    ap.add_argument("--all-entities", action="store_true", help="Profile every entity in ZSYNCOBJECT, not just transactions")
+    ap.add_argument(
+        "--sample-size",
+        type=int,
+        default=DEFAULT_SAMPLE_SIZE,
+        help=f"Reservoir sample per type for distinct estimates (default {DEFAULT_SAMPLE_SIZE})",
+    )
+    ap.add_argument(
+        "--low-cardinality",
+        type=int,
+        default=DEFAULT_LOW_CARDINALITY,
+        help=f"Show top values for columns with at most N distinct values (default {DEFAULT_LOW_CARDINALITY})",
+    )
+    ap.add_argument("--top", type=int, default=DEFAULT_TOP, help=f"Top values per column (default {DEFAULT_TOP})")
+    ap.add_argument("--samples", type=int, default=1, help="Example rows per type, drawn from the sample (default 1)")
+    ap.add_argument("--seed", type=int, default=0, help="Seed for the reservoir sample")
     ap.add_argument("--format", choices=["table", "json"], default="table")
     args = ap.parse_args()
 
-    api = MoneywizApi(args.db)
-    txs = api.transaction_manager.get_all()
-    if args.limit and args.limit > 0:
-        txs = txs[-args.limit :]
-
-    # Collect union of fields per subtype and common fields
-    by_type_fields: Dict[str, Set[str]] = defaultdict(set)
-    common_fields: Set[str] = set()
-    first = True
-
-    # Relationship flags
-    has_categories = 0
-    has_tags = 0
-    has_refund_links = 0
-
-    # Sample values for representative fields
-    samples_by_type: Dict[str, Dict[str, Any]] = {}
-
-    for t in txs:
-        ttype = type(t).__name__
-        rec = t.as_dict()
-        keys = set(rec.keys())
-        by_type_fields[ttype].update(keys)
-        if first:
-            common_fields = keys.copy()
-            first = False
-        else:
-            common_fields &= keys
-
-        # Track relationships
-        if api.transaction_manager.category_for_transaction(t.id):
-            has_categories += 1
-        if api.transaction_manager.tags_for_transaction(t.id):
-            has_tags += 1
-        if ttype == "RefundTransaction":
-            if api.transaction_manager.original_transaction_for_refund_transaction(t.id):
-                has_refund_links += 1
-
-        # Save sample values for first time we see a type
-        if ttype not in samples_by_type:
-            # add some computed/related info
-            rec2 = dict(rec)
-            rec2["__type__"] = ttype
-            cats = api.transaction_manager.category_for_transaction(t.id)
-            if cats:
-                rec2["__categories__"] = [(int(c), str(a)) for (c, a) in cats]
-            tags = api.transaction_manager.tags_for_transaction(t.id)
-            if tags:
-                rec2["__tags__"] = [int(x) for x in tags]
-            if ttype == "RefundTransaction":
-                orig = api.transaction_manager.original_transaction_for_refund_transaction(t.id)
-                if orig:
-                    rec2["__refund_original_withdraw_id__"] = int(orig)
-            samples_by_type[ttype] = rec2
-
-    # Prepare output
+    api = open_api(args.db)
+    if args.type:
+        typenames = parse_list(args.type)
+        unknown = [t for t in typenames if t not in api.accessor._typename_to_ent]
+        if unknown:
+            ap.error(f"unknown type(s): {', '.join(unknown)}")
+    elif args.all_entities:
+        typenames = [
+            api.accessor.typename_for(row["Z_ENT"])
+            for row in api.accessor._con.execute("SELECT DISTINCT Z_ENT FROM ZSYNCOBJECT ORDER BY Z_ENT")
+        ]
+    else:
+        typenames = [t for t in api.transaction_manager.listed_typenames() if t in api.accessor._typename_to_ent]
+
+    profiles = Profiler(
+        api.accessor,
+        typenames,
+        limit=max(args.limit, 0),
+        sample_size=args.sample_size,
+        low_cardinality=args.low_cardinality,
+        top=args.top,
+        samples=max(args.samples, 0),
+        seed=args.seed,
+    ).run()
+
+    populated = [{c.column for c in p.columns} for p in profiles]
+    common = sorted(set.intersection(*populated)) if populated else []
+    totals = {
+        "has_categories_count": sum(p.relationships["with_categories"] for p in profiles),
+        "has_tags_count": sum(p.relationships["with_tags"] for p in profiles),
+        "has_refund_links_count": sum(p.relationships["with_refund_links"] for p in profiles),
+    }
+
     if args.format == "json":
         print(
             json.dumps(
                 {
-                    "common_fields": sorted(common_fields),
-                    "types": {k: sorted(v) for k, v in sorted(by_type_fields.items())},
-                    "relationships": {
-                        "has_categories_count": has_categories,
-                        "has_tags_count": has_tags,
-                        "has_refund_links_count": has_refund_links,
-                    },
-                    "samples": samples_by_type,
+                    "common_columns": common,
+                    "types": {p.typename: p.as_dict() for p in profiles},
+                    "relationships": totals,
+                    "samples": {p.typename: p.samples for p in profiles if p.samples},
                 },
                 indent=2,
             )
         )
         return 0
 
-    # Human-readable text
-    print("== Common fields across all transactions ==")
-    print(", ".join(sorted(common_fields)))
-    print()
-
-    print("== Fields by transaction type ==")
-    for ttype, fields in sorted(by_type_fields.items()):
-        print(f"- {ttype}:")
-        print(f"  {', '.join(sorted(fields))}")
+    print("== Columns populated in every type ==")
+    print(", ".join(common))
     print()
 
-    print("== Relationship availability (counts) ==")
-    print(f"- category assignments present: {has_categories}")
-    print(f"- tags present: {has_tags}")
-    print(f"- refund→withdraw links present: {has_refund_links}")
-    print()
-
-    print("== Sample record per type (with related info) ==")
-    def _sanitize(obj: Any):
-        try:
-            from decimal import Decimal
-        except Exception:
-            Decimal = None  # type: ignore
-        try:
-            from datetime import datetime
-        except Exception:
-            datetime = None  # type: ignore
-        if isinstance(obj, dict):
-            return {k: _sanitize(v) for k, v in obj.items()}
-        if isinstance(obj, list):
-            return [_sanitize(x) for x in obj]
-        if Decimal is not None and isinstance(obj, Decimal):
-            return str(obj)
-        if datetime is not None and isinstance(obj, datetime):
-            return obj.isoformat(sep=" ", timespec="seconds")
-        return obj
-
-    for ttype, sample in sorted(samples_by_type.items()):
-        print(f"-- {ttype}:")
-        print(json.dumps(_sanitize(sample), indent=2, sort_keys=True))
+    for p in profiles:
+        rel = p.relationships
+        print(f"== {p.typename} (Z_ENT {p.ent}): {p.rows} rows, {p.sampled} sampled, {p.empty_columns} empty columns ==")
+        print(
+            f"relationships: with_categories={rel['with_categories']} category_splits={rel['category_splits']} "
+            f"with_tags={rel['with_tags']} tag_links={rel['tag_links']} "
+            f"with_refund_links={rel['with_refund_links']}"
+        )
+        headers = ["column", "field", "non_null", "ratio", "distinct", "min", "max", "top"]
+        print("\t".join(headers))
+        for c in p.columns:
+            distinct = "?" if c.distinct is None else f"{c.distinct}" if c.distinct_exact else f"~{c.distinct}"
+            top = ", ".join(f"{display_value(v)}={n}" for v, n in c.top)
+            if c.top and c.other:
+                top += f", other={c.other}"
+            cells: List[Any] = [
+                c.column,
+                c.field or "",
+                c.non_null,
+                f"{c.ratio:.3f}",
+                distinct,
+                display_value(c.min),
+                display_value(c.max),
+                top,
+            ]
+            print("\t".join(str(x) for x in cells))
         print()
 
+    samples: Dict[str, List[Dict[str, Any]]] = {p.typename: p.samples for p in profiles if p.samples}
+    if samples:
+        print("== Sample records per type (with related info) ==")
+        for typename, rows in samples.items():
+            for row in rows:
+                print(f"-- {typename}:")
+                print(json.dumps(row, indent=2, sort_keys=True))
+                print()
+
     return 0
 
 
 if __name__ == "__main__":
-    raise SystemExit(main())
+    try:
+        raise SystemExit(main())
+    except BrokenPipeError:
+        # Allow piping to tools like `head` without noisy tracebacks.
+        try:
+            sys.stdout.close()
+        finally:
+            raise SystemExit(0)
@@ -5,7 +5,7 @@ import os
 import sys
 from pathlib import Path
 
-from moneywiz_api.moneywiz_api import MoneywizApi
+from moneywiz_tools import open_api
 
 
 def main() -> int:
@@ -14,7 +14,7 @@ def main() -> int:
         Path(sys.argv[1]) if len(sys.argv) > 1 else Path(__file__).resolve().parents[1] / "tests/test_db.sqlite"
     )
 
-    api = MoneywizApi(db_path)
+    api = open_api(db_path)
     users = api.accessor.get_users()
 
     printed_any = False
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""Single entry point for ``moneywiz.sh``: run a subcommand in this process.
+
+    moneywiz.py <command> [args...]
+
+The command's script is executed with ``runpy`` as ``__main__`` (so its own
+``if __name__ == "__main__"`` handling, e.g. BrokenPipe, still applies)
+instead of ``moneywiz.sh`` exec-ing a separate interpreter per script. Read
+commands are first offered to a running resident server (``server.py``).
+
+Set ``MONEYWIZ_TTFO=1`` to print the time to first output to stderr, or
+``MONEYWIZ_TTFO=/path/file`` to append it there as a JSON line.
+``moneywiz.sh`` exports ``MONEYWIZ_T0`` (``$EPOCHREALTIME``, bash 5+) so the
+figure includes launcher overhead; without it the clock starts when this
+module is imported.
+
+``MONEYWIZ_PROFILE`` / ``MONEYWIZ_PSTATS`` / ``MONEYWIZ_TRACE_SQL`` (set by
+``moneywiz.sh --profile`` / ``--profile-out`` / ``--trace-sql``) run the
+command locally, never through the server, with per-phase timings, a
+cProfile dump and/or a per-statement SQL log (see ``moneywiz_tools.trace``).
+"""
+from __future__ import annotations
+
+import os
+import sys
+import time
+
+_T_IMPORT = time.time()
+
+import server  # noqa: E402  (stdlib-only; shares the read-command table)
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Subcommand -> script under scripts/.
+COMMANDS = {
+    "shell": "run_moneywiz_cli.py",
+    "users": "users.py",
+    "accounts": "accounts.py",
+    "categories": "categories.py",
+    "payees": "payees.py",
+    "tags": "tags.py",
+    "transactions": "transactions.py",
+    "holdings": "holdings.py",
+    "record": "record.py",
+    "stats": "stats.py",
+    "summary": "summary.py",
+    "inspect-transactions": "inspect_transactions.py",
+    "insert": "insert.py",
+    "update": "update.py",
+    "delete": "delete.py",
+    "safe-delete": "safe_delete.py",
+    "rename": "rename.py",
+    "assign-categories": "assign_categories.py",
+    "assign-tags": "assign_tags.py",
+    "link-refund": "link_refund.py",
+    "reassign-payees-by-id": "reassign_payees_by_id.py",
+    "changes": "changes.py",
+    "report": "report.py",
+    "balances": "balances.py",
+    "export": "export.py",
+    "search": "search.py",
+    "create-test-db": "create_test_db.py",
+    "sanitize-test-db": "sanitize_test_db.py",
+    "generate-db": "generate_db.py",
+    "benchmark": "benchmark.py",
+    "schema": "introspect_db.py",
+    "server": "server.py",
+}
+
+
+def _start_time() -> float:
+    # $EPOCHREALTIME uses the locale's decimal separator.
+    t0 = os.environ.get("MONEYWIZ_T0", "").replace(",", ".")
+    try:
+        return float(t0)
+    except ValueError:
+        return _T_IMPORT
+
+
+class TTFO:
+    """Records when the first byte of output is produced."""
+
+    def __init__(self, command: str, target: str) -> None:
+        self.command = command
+        self.target = target
+        self.t0 = _start_time()
+        self.first: float | None = None
+
+    def mark(self) -> None:
+        if self.first is None:
+            self.first = time.time()
+
+    def report(self) -> None:
+        if self.first is None:
+            self.mark()
+        ms = round((self.first - self.t0) * 1000, 1)
+        if self.target in ("1", "true", "yes"):
+            print(f"ttfo_ms={ms} command={self.command}", file=sys.stderr)
+            return
+        import json
+
+        with open(self.target, "a", encoding="utf-8") as fh:
+            fh.write(json.dumps({"command": self.command, "ttfo_ms": ms, "at": time.time()}) + "\n")
+
+
+class _MarkingStream:
+    """stdout proxy that tells ``TTFO`` about the first write."""
+
+    def __init__(self, stream, ttfo: TTFO) -> None:
+        self._stream = stream
+        self._ttfo = ttfo
+
+    def write(self, s):
+        if s:
+            self._ttfo.mark()
+        return self._stream.write(s)
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+def main() -> int:
+    if len(sys.argv) < 2 or sys.argv[1] not in COMMANDS:
+        known = ", ".join(sorted(COMMANDS))
+        print(f"usage: moneywiz.py <command> [args...]\ncommands: {known}", file=sys.stderr)
+        return 2
+    command, args = sys.argv[1], sys.argv[2:]
+
+    ttfo = None
+    if os.environ.get("MONEYWIZ_TTFO"):
+        ttfo = TTFO(command, os.environ["MONEYWIZ_TTFO"])
+        sys.stdout = _MarkingStream(sys.stdout, ttfo)
+    session = None
+    if any(os.environ.get(k) for k in ("MONEYWIZ_PROFILE", "MONEYWIZ_PSTATS", "MONEYWIZ_TRACE_SQL")):
+        from moneywiz_tools.trace import from_environ
+
+        session = from_environ(command, started=_start_time())
+    try:
+        if session is not None:
+            session.start()
+            try:
+                return run(command, args)
+            finally:
+                session.stop()
+        if command in server.COMMANDS and not os.environ.get("MONEYWIZ_NO_SERVER"):
+            code = server.call(
+                server.default_socket(), command, args, on_output=ttfo.mark if ttfo else None
+            )
+            if code != server.NOT_SERVED:
+                return code
+        return run(command, args)
+    finally:
+        if ttfo is not None:
+            ttfo.report()
+
+
+def run(command: str, args: list[str]) -> int:
+    import runpy
+
+    script = os.path.join(SCRIPTS_DIR, COMMANDS[command])
+    sys.argv = [script, *args]
+    try:
+        runpy.run_path(script, run_name="__main__")
+    except SystemExit as exc:
+        if exc.code is None or isinstance(exc.code, int):
+            return exc.code or 0
+        raise
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,8 @@
+"""Shared helpers for the scripts under ``scripts/``.
+
+Scripts are executed directly (``python scripts/<name>.py``), so this package
+is importable because ``scripts/`` is the first entry on ``sys.path``.
+"""
+from moneywiz_tools.lazy import LazyMoneywizApi, open_api
+
+__all__ = ["LazyMoneywizApi", "open_api"]
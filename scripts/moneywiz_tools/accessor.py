@@ -0,0 +1,256 @@
+"""DatabaseAccessor extensions used by the lazy API."""
+from __future__ import annotations
+
+import json
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+from moneywiz_api.database_accessor import DatabaseAccessor
+from moneywiz_api.managers.transaction_manager import TransactionManager
+from moneywiz_api.model.raw_data_handler import RawDataHandler as RDH
+from moneywiz_api.types import ID
+from moneywiz_api.utils import get_date
+
+from moneywiz_tools.connection import DictRows, shared_connection
+from moneywiz_tools.trace import phase
+
+# Transaction ids are bound as one JSON array and expanded with json_each(),
+# so a prefetch is a fixed number of statements however many ids it covers
+# (and never hits SQLITE_MAX_VARIABLE_NUMBER).
+_IDS = "(SELECT value FROM json_each(?))"
+
+
+@dataclass
+class TransactionRelations:
+    """Related data for a set of transactions, keyed by transaction id.
+
+    ``categories``/``tags``/``refund_original`` use the same value shapes as
+    ``TransactionManager.category_for_transaction()``,
+    ``tags_for_transaction()`` and
+    ``original_transaction_for_refund_transaction()`` (lists keep table
+    order, as upstream does); ids without related rows are simply absent.
+    """
+
+    account_name: Dict[ID, str] = field(default_factory=dict)
+    payee_name: Dict[ID, str] = field(default_factory=dict)
+    categories: Dict[ID, List[Tuple[ID, Decimal]]] = field(default_factory=dict)
+    tags: Dict[ID, List[ID]] = field(default_factory=dict)
+    refund_original: Dict[ID, ID] = field(default_factory=dict)
+
+
+class ToolsAccessor(DatabaseAccessor):
+    """``DatabaseAccessor`` with filtered, SQL-side transaction queries.
+
+    Reads through the process-wide read-only connection for the DB
+    (``shared_connection()``); ``connection`` is that connection with tuple
+    rows, ``_con`` the dict-row view the upstream queries and models expect.
+    """
+
+    def __init__(self, db_path: Path | str, immutable: bool | None = None) -> None:
+        # Not DatabaseAccessor.__init__: it opens a read-write connection of
+        # its own with a per-row dict factory.
+        self.connection = shared_connection(db_path, immutable)
+        self._con = DictRows(self.connection)
+        self._ent_to_typename: Dict[int, str] = self._load_primarykey()
+        self._typename_to_ent: Dict[str, int] = {v: k for k, v in self._ent_to_typename.items()}
+        self._balance_indexes: Dict[ID, Any] = {}
+
+    def close(self) -> None:
+        """Drop this accessor's state; the shared connection stays open for
+        the rest of the process (see ``connection.close_shared``)."""
+        self._balance_indexes.clear()
+
+    def balance_index(self, account: ID, decimals: int = 2, rebuild: bool = False) -> Any:
+        """``BalanceIndex`` for ``account``: built on first use, then extended
+        with the account's transactions whose ``Z_PK`` is above its high-water
+        mark on every later call (see ``balances.py``)."""
+        from moneywiz_tools.balances import BalanceIndex  # NumPy only when used
+
+        index = self._balance_indexes.get(account)
+        if index is None or rebuild or index.decimals != decimals:
+            row = self._con.execute(
+                "SELECT ZOPENINGBALANCE FROM ZSYNCOBJECT WHERE Z_PK = ?", (account,)
+            ).fetchone()
+            if row is None:
+                raise ValueError(f"Unknown account {account}")
+            index = BalanceIndex(account, row["ZOPENINGBALANCE"], decimals)
+            self._balance_indexes[account] = index
+        ents = [
+            self.ent_for(name)
+            for name in TransactionManager().ents
+            if name != "TransferBudgetTransaction" and name in self._typename_to_ent
+        ]
+        rows = self._con.execute(
+            "SELECT Z_PK, ZDATE1, ZAMOUNT1 FROM ZSYNCOBJECT "
+            f"WHERE ZACCOUNT2 = ? AND Z_PK > ? AND Z_ENT IN ({','.join('?' * len(ents))})",
+            [account, index.high_water, *ents],
+        )
+        index.extend((r["Z_PK"], r["ZDATE1"], r["ZAMOUNT1"]) for r in rows)
+        return index
+
+    def query_objects(self, typenames: List[str]) -> List[Any]:
+        with phase("load"):
+            return super().query_objects(typenames)
+
+    def transactions_where(
+        self,
+        typenames: Sequence[str],
+        account: ID | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        accounts: Sequence[ID] | None = None,
+        ids: Sequence[ID] | None = None,
+    ) -> tuple[str, list[Any]]:
+        """``WHERE`` condition and parameters for the transaction filters.
+
+        ``account``/``accounts`` use the ``ZACCOUNT2`` index; dates compare
+        against the raw Apple-epoch ``ZDATE1`` column so no row needs
+        converting to filter. Both date bounds are inclusive. ``ids`` keeps
+        only those primary keys (bound as one JSON array, so any number fits).
+        """
+        ents = [self.ent_for(t) for t in typenames]
+        where = [f"Z_ENT IN ({','.join('?' * len(ents))})"]
+        params: list[Any] = list(ents)
+        if account is not None:
+            where.append("ZACCOUNT2 = ?")
+            params.append(account)
+        if accounts is not None:
+            where.append(f"ZACCOUNT2 IN ({','.join('?' * len(accounts))})")
+            params.extend(accounts)
+        if ids is not None:
+            where.append("Z_PK IN (SELECT value FROM json_each(?))")
+            params.append(json.dumps(list(ids)))
+        if since is not None:
+            where.append("ZDATE1 >= ?")
+            params.append(get_date(since))
+        if until is not None:
+            where.append("ZDATE1 <= ?")
+            params.append(get_date(until))
+        return " AND ".join(where), params
+
+    def transactions_sql(
+        self,
+        typenames: Sequence[str],
+        account: ID | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        limit: int | None = None,
+        newest_first: bool = True,
+        accounts: Sequence[ID] | None = None,
+        ids: Sequence[ID] | None = None,
+    ) -> tuple[str, list[Any]]:
+        """Compile transaction filters into one ``SELECT`` over ``ZSYNCOBJECT``
+        (see ``transactions_where``)."""
+        where, params = self.transactions_where(typenames, account, since, until, accounts, ids)
+        order = "DESC" if newest_first else "ASC"
+        sql = f"SELECT * FROM ZSYNCOBJECT WHERE {where} ORDER BY ZDATE1 {order}, Z_PK {order}"
+        if limit is not None and limit > 0:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return sql, params
+
+    def query_transactions(self, typenames: Sequence[str], **filters: Any) -> list[Any]:
+        """Raw transaction rows matching ``filters`` (see ``transactions_sql``)."""
+        sql, params = self.transactions_sql(typenames, **filters)
+        return self._con.execute(sql, params).fetchall()
+
+    def iter_transactions(
+        self, typenames: Sequence[str], batch_size: int = 256, **filters: Any
+    ) -> Iterator[List[Any]]:
+        """Like ``query_transactions`` but yields rows in ``fetchmany`` batches."""
+        sql, params = self.transactions_sql(typenames, **filters)
+        cur = self._con.cursor()
+        cur.execute(sql, params)
+        try:
+            while True:
+                with phase("load"):
+                    rows = cur.fetchmany(batch_size)
+                if not rows:
+                    return
+                yield rows
+        finally:
+            cur.close()
+
+    def transaction_relations(
+        self,
+        ids: Iterable[ID],
+        names: bool = True,
+        categories: bool = True,
+        tags: bool = True,
+        refunds: bool = True,
+    ) -> TransactionRelations:
+        """Resolve related rows for ``ids`` in one set-based query per kind.
+
+        Account and payee names come from a single self-join on
+        ``ZSYNCOBJECT``; splits, tags and refund links each take one query
+        against their link table, using its transaction-id index.
+        """
+        rel = TransactionRelations()
+        ids_json = json.dumps(sorted({int(i) for i in ids}))
+        if ids_json == "[]":
+            return rel
+        cur = self._con.cursor()
+        if names:
+            res = cur.execute(
+                f"""
+            SELECT t.Z_PK AS tx, a.Z_PK AS account_pk, a.ZNAME AS account_name,
+                   p.Z_PK AS payee_pk, p.ZNAME5 AS payee_name
+            FROM ZSYNCOBJECT t
+            LEFT JOIN ZSYNCOBJECT a ON a.Z_PK = t.ZACCOUNT2
+            LEFT JOIN ZSYNCOBJECT p ON p.Z_PK = t.ZPAYEE2
+            WHERE t.Z_PK IN {_IDS}
+            """,
+                (ids_json,),
+            )
+            for row in res.fetchall():
+                if row["account_pk"] is not None:
+                    rel.account_name[row["tx"]] = row["account_name"]
+                if row["payee_pk"] is not None:
+                    rel.payee_name[row["tx"]] = row["payee_name"]
+        if categories:
+            splits: Dict[ID, List[Tuple[ID, Decimal]]] = defaultdict(list)
+            res = cur.execute(
+                f"""
+            SELECT ZTRANSACTION, ZCATEGORY, ZAMOUNT FROM ZCATEGORYASSIGMENT
+            WHERE ZTRANSACTION IN {_IDS}
+            ORDER BY Z_PK
+            """,
+                (ids_json,),
+            )
+            for row in res.fetchall():
+                splits[row["ZTRANSACTION"]].append(
+                    (row["ZCATEGORY"], RDH.get_decimal(row["ZAMOUNT"]))
+                )
+            rel.categories = dict(splits)
+        if tags:
+            by_tx: Dict[ID, List[ID]] = defaultdict(list)
+            table, tx_col, tag_col = self._get_tags_table_info()
+            res = cur.execute(
+                f"""
+            SELECT {tx_col} AS tx, {tag_col} AS tag FROM "{table}"
+            WHERE {tx_col} IN {_IDS}
+            ORDER BY rowid
+            """,
+                (ids_json,),
+            )
+            for row in res.fetchall():
+                by_tx[row["tx"]].append(row["tag"])
+            rel.tags = dict(by_tx)
+        if refunds:
+            res = cur.execute(
+                f"""
+            SELECT ZREFUNDTRANSACTION, ZWITHDRAWTRANSACTION
+            FROM ZWITHDRAWREFUNDTRANSACTIONLINK
+            WHERE ZREFUNDTRANSACTION IN {_IDS}
+            """,
+                (ids_json,),
+            )
+            for row in res.fetchall():
+                rel.refund_original[row["ZREFUNDTRANSACTION"]] = row[
+                    "ZWITHDRAWTRANSACTION"
+                ]
+        return rel
@@ -0,0 +1,375 @@
+"""Columnar aggregation over transactions.
+
+``Aggregator`` reads the handful of columns a report needs (``Z_PK``,
+``Z_ENT``, ``ZDATE1``, ``ZAMOUNT1``, ``ZACCOUNT2``, ``ZPAYEE2``) straight
+into NumPy arrays, plus the ``ZCATEGORYASSIGMENT`` splits and the ``Z_<n>TAGS``
+links when those dimensions are asked for. No models are built.
+
+Amounts are summed as int64 minor units (``round(amount * 10**decimals)``
+per row), so totals are exact. Grouping by ``category`` uses split
+amounts, with unsplit transactions under category 0; grouping by ``tag``
+counts a transaction once per tag, untagged ones under tag 0. Periods are
+local calendar buckets, as with ``datetime`` fields elsewhere.
+
+Amounts are in each account's currency; group by ``currency`` (or
+``account``) when accounts differ.
+
+The unfiltered columns are kept in the snapshot cache (see ``cache.py``)
+under the same DB fingerprint as the manager snapshots, so only the first
+report after a change scans ``ZSYNCOBJECT``; filters are applied as NumPy
+masks.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Sequence
+
+import numpy as np
+
+from moneywiz_tools.accessor import ToolsAccessor
+from moneywiz_tools.cache import SnapshotCache, cache_enabled
+from moneywiz_tools.epoch import CUTOFF, PERIODS, local_seconds, period_keys, period_label
+from moneywiz_tools.lazy import LISTED_EXCLUDED_TYPENAMES
+
+DIMENSIONS = ("period", "account", "category", "payee", "tag", "currency", "type", "user")
+
+# Dimensions whose keys are ZSYNCOBJECT ids, with the column holding their name.
+_NAME_COLUMNS = {"account": "ZNAME", "category": "ZNAME2", "payee": "ZNAME5", "tag": "ZNAME6"}
+
+_TX_DTYPE = np.dtype(
+    [
+        ("id", np.int64),
+        ("ent", np.int64),
+        ("date", np.float64),
+        ("amount", np.float64),
+        ("account", np.int64),
+        ("payee", np.int64),
+    ]
+)
+_LINK_DTYPE = np.dtype([("tx", np.int64), ("value", np.int64), ("amount", np.float64)])
+
+
+def _in(values: Sequence[Any]) -> str:
+    return ",".join("?" * len(values))
+
+
+def to_minor(amounts: np.ndarray, decimals: int) -> np.ndarray:
+    """Float amounts -> int64 minor units, rounding half away from zero (as SQL ROUND)."""
+    scaled = amounts * 10**decimals
+    return np.trunc(scaled + np.copysign(0.5, scaled)).astype(np.int64)
+
+
+def _expand(rows: np.ndarray, link_tx: np.ndarray, n: int) -> tuple[np.ndarray, np.ndarray]:
+    """Repeat each row once per link of its transaction (once if it has none).
+
+    ``link_tx`` is sorted. Returns ``source`` (index into ``rows``) and ``pos``
+    (index into the links, -1 for rows without any) per output row.
+    """
+    counts = np.bincount(link_tx, minlength=n)
+    starts = np.cumsum(counts) - counts
+    per_row = counts[rows]
+    repeat = np.maximum(per_row, 1)
+    source = np.repeat(np.arange(len(rows)), repeat)
+    offset = np.arange(len(source)) - np.repeat(np.cumsum(repeat) - repeat, repeat)
+    pos = np.where(per_row[source] > 0, starts[rows[source]] + offset, -1)
+    return source, pos
+
+
+def _take(values: np.ndarray, pos: np.ndarray, fallback: Any) -> np.ndarray:
+    """``values[pos]`` where ``pos >= 0``, else ``fallback``."""
+    if not len(values):
+        return np.broadcast_to(np.asarray(fallback, dtype=np.int64), pos.shape).copy()
+    return np.where(pos >= 0, values[np.maximum(pos, 0)], fallback)
+
+
+def _group(dims: list[str], keys: dict[str, np.ndarray], amounts: np.ndarray, decimals: int) -> Report:
+    """Sum ``amounts`` per distinct key combination (int64, exact)."""
+    if not len(amounts):
+        empty = np.empty(0, dtype=np.int64)
+        return Report(dims, {d: empty for d in dims}, empty, empty, decimals)
+    code = np.zeros(len(amounts), dtype=np.int64)
+    for dim in dims:
+        uniq, inverse = np.unique(keys[dim], return_inverse=True)
+        code = code * len(uniq) + inverse.reshape(-1)
+    order = np.argsort(code, kind="stable")
+    ordered = code[order]
+    starts = np.flatnonzero(np.r_[True, ordered[1:] != ordered[:-1]])
+    sums = np.add.reduceat(amounts[order], starts)
+    counts = np.diff(np.r_[starts, len(order)])
+    first = order[starts]
+    return Report(dims, {d: keys[d][first] for d in dims}, sums, counts, decimals)
+
+
+@dataclass
+class Report:
+    """Grouped totals: one entry per distinct key combination, sorted by key."""
+
+    dimensions: list[str]
+    keys: dict[str, np.ndarray]
+    amounts: np.ndarray
+    counts: np.ndarray
+    decimals: int
+    labels: dict[str, dict[int, str]] = field(default_factory=dict)
+    period: str = "month"
+
+    def __len__(self) -> int:
+        return len(self.amounts)
+
+    def label(self, dim: str, key: int) -> str | int:
+        if dim == "period":
+            return period_label(key, self.period)
+        if dim in ("currency", "type"):
+            return self.labels[dim].get(key, "")
+        return key
+
+    def amount(self, minor: int) -> float:
+        return round(int(minor) / 10**self.decimals, self.decimals)
+
+    def rows(self) -> list[dict[str, Any]]:
+        out = []
+        for i in range(len(self)):
+            row: dict[str, Any] = {}
+            for dim in self.dimensions:
+                key = int(self.keys[dim][i])
+                row[dim] = self.label(dim, key)
+                if dim in _NAME_COLUMNS:
+                    row[f"{dim}_name"] = self.labels[dim].get(key)
+            row["amount"] = self.amount(self.amounts[i])
+            row["count"] = int(self.counts[i])
+            out.append(row)
+        return out
+
+    def pivot(self, column: str) -> tuple[list[str], list[dict[str, Any]]]:
+        """Cross-tab with one amount column per ``column`` value plus ``total``."""
+        if column not in self.dimensions:
+            raise ValueError(f"pivot dimension '{column}' is not grouped by")
+        row_dims = [d for d in self.dimensions if d != column]
+        col_keys = np.unique(self.keys[column])
+        col_labels = [str(self.label(column, int(k))) for k in col_keys]
+        col_index = np.searchsorted(col_keys, self.keys[column])
+        if row_dims:
+            stacked = np.stack([self.keys[d] for d in row_dims], axis=1)
+            row_keys, row_index = np.unique(stacked, axis=0, return_inverse=True)
+            row_index = row_index.reshape(-1)
+        else:
+            row_keys = np.zeros((1, 0), dtype=np.int64)
+            row_index = np.zeros(len(self), dtype=np.int64)
+        grid = np.zeros((len(row_keys), len(col_keys)), dtype=np.int64)
+        np.add.at(grid, (row_index, col_index), self.amounts)
+        headers = []
+        for dim in row_dims:
+            headers.append(dim)
+            if dim in _NAME_COLUMNS:
+                headers.append(f"{dim}_name")
+        headers += col_labels + ["total"]
+        rows = []
+        for r, keys in enumerate(row_keys):
+            row: dict[str, Any] = {}
+            for dim, key in zip(row_dims, keys):
+                row[dim] = self.label(dim, int(key))
+                if dim in _NAME_COLUMNS:
+                    row[f"{dim}_name"] = self.labels[dim].get(int(key))
+            for label, minor in zip(col_labels, grid[r]):
+                row[label] = self.amount(minor)
+            row["total"] = self.amount(grid[r].sum())
+            rows.append(row)
+        return headers, rows
+
+
+class Aggregator:
+    def __init__(self, db_path: Path | str, cache: bool | None = None) -> None:
+        self.db_path = Path(db_path).resolve()
+        self.accessor = ToolsAccessor(self.db_path)
+        self._con = self.accessor.connection
+        self._ents: dict[str, tuple[int, int]] = {
+            name: (ent, sup)
+            for ent, name, sup in self._con.execute('SELECT Z_ENT, Z_NAME, Z_SUPER FROM "Z_PRIMARYKEY"')
+        }
+        if cache is None:
+            cache = cache_enabled()
+        self.cache = SnapshotCache(self.db_path, self.accessor) if cache else None
+        self._columns: dict[str, dict[str, np.ndarray]] = {}
+
+    def close(self) -> None:
+        self.accessor.close()
+
+    def transaction_typenames(self, listed: bool = True) -> list[str]:
+        """Sub-entities of ``Transaction`` (by default as listed by ``transactions``)."""
+        root = self._ents.get("Transaction", (None, None))[0]
+        return [
+            name
+            for name, (_, sup) in self._ents.items()
+            if root is not None
+            and sup == root
+            and not (listed and name in LISTED_EXCLUDED_TYPENAMES)
+        ]
+
+    def _read(self, name: str) -> dict[str, np.ndarray]:
+        """Unfiltered column set ``name``, from the snapshot cache when current."""
+        if name in self._columns:
+            return self._columns[name]
+        arrays = self.cache.restore_arrays(f"columns-{name}") if self.cache else None
+        if arrays is None:
+            arrays = self._query(name)
+            if self.cache is not None:
+                try:
+                    self.cache.store_arrays(f"columns-{name}", arrays)
+                except OSError:
+                    pass
+        self._columns[name] = arrays
+        return arrays
+
+    def _query(self, name: str) -> dict[str, np.ndarray]:
+        if name == "transactions":
+            ents = [self._ents[t][0] for t in self.transaction_typenames(listed=False)]
+            # "+Z_ENT" keeps SQLite on a sequential table scan: nearly every
+            # row is a transaction, and index order means random page reads.
+            cur = self._con.execute(
+                "SELECT Z_PK, Z_ENT, IFNULL(ZDATE1, 0), IFNULL(ZAMOUNT1, 0), "
+                "IFNULL(ZACCOUNT2, 0), IFNULL(ZPAYEE2, 0) "
+                f"FROM ZSYNCOBJECT WHERE +Z_ENT IN ({_in(ents)})",
+                ents,
+            )
+            dtype = _TX_DTYPE
+        elif name == "splits":
+            cur = self._con.execute(
+                "SELECT ZTRANSACTION, IFNULL(ZCATEGORY, 0), IFNULL(ZAMOUNT, 0) "
+                "FROM ZCATEGORYASSIGMENT WHERE ZTRANSACTION IS NOT NULL"
+            )
+            dtype = _LINK_DTYPE
+        else:
+            # Z_<n>TAGS (Z_<n>TRANSACTIONS, Z_<m>TAGS): the numbers follow
+            # the entity ids of the DB's model version.
+            table, tx_col, tag_col = self.accessor._get_tags_table_info()
+            cur = self._con.execute(f'SELECT {tx_col}, {tag_col}, 0 FROM "{table}"')
+            dtype = _LINK_DTYPE
+        arr = np.fromiter(cur, dtype=dtype)
+        return {field: np.ascontiguousarray(arr[field]) for field in dtype.names}
+
+    def load(
+        self,
+        typenames: Sequence[str] | None = None,
+        accounts: Sequence[int] | None = None,
+        user: int | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        decimals: int = 2,
+    ) -> dict[str, np.ndarray]:
+        """Transaction columns (``id``, ``ent``, ``date``, ``account``, ``payee``
+        and ``amount`` in minor units) matching the filters, sorted by id."""
+        names = list(typenames or self.transaction_typenames())
+        unknown = [t for t in names if t not in self._ents]
+        if unknown:
+            raise ValueError(f"Unknown typename(s): {', '.join(unknown)}")
+        cols = self._read("transactions")
+        mask = np.isin(cols["ent"], [self._ents[t][0] for t in names])
+        if accounts:
+            mask &= np.isin(cols["account"], list(accounts))
+        if user is not None:
+            # ZUSER is the account owner column; only account ids can match.
+            owned = [pk for (pk,) in self._con.execute("SELECT Z_PK FROM ZSYNCOBJECT WHERE ZUSER = ?", (user,))]
+            mask &= np.isin(cols["account"], owned)
+        if since is not None:
+            mask &= cols["date"] >= since.timestamp() - CUTOFF
+        if until is not None:
+            mask &= cols["date"] <= until.timestamp() - CUTOFF
+        idx = np.flatnonzero(mask)
+        idx = idx[np.argsort(cols["id"][idx], kind="stable")]
+        out = {k: v[idx] for k, v in cols.items() if k != "amount"}
+        out["amount"] = to_minor(cols["amount"][idx], decimals)
+        return out
+
+    def _links(self, name: str, tx_ids: np.ndarray, decimals: int) -> dict[str, np.ndarray]:
+        """Link rows with ``tx`` mapped to an index into ``tx_ids`` (sorted) and
+        ordered by it; links to transactions outside ``tx_ids`` are dropped."""
+        links = self._read(name)
+        idx = np.searchsorted(tx_ids, links["tx"])
+        found = idx < len(tx_ids)
+        found[found] = tx_ids[idx[found]] == links["tx"][found]
+        order = np.argsort(idx[found], kind="stable")
+        return {
+            "tx": idx[found][order],
+            "value": links["value"][found][order],
+            "amount": to_minor(links["amount"][found][order], decimals),
+        }
+
+    def report(
+        self,
+        by: Sequence[str],
+        period: str = "month",
+        decimals: int = 2,
+        **filters: Any,
+    ) -> Report:
+        """Totals grouped by ``by`` (any of ``DIMENSIONS``); ``filters`` go to ``load()``."""
+        for dim in by:
+            if dim not in DIMENSIONS:
+                raise ValueError(f"Unknown dimension '{dim}' (expected one of {', '.join(DIMENSIONS)})")
+        if period not in PERIODS:
+            raise ValueError(f"Unknown period '{period}' (expected one of {', '.join(PERIODS)})")
+        tx = self.load(decimals=decimals, **filters)
+        n = len(tx["id"])
+        rows = np.arange(n)  # transaction index of each output row
+        amounts = tx["amount"]
+        split_keys: dict[str, np.ndarray] = {}
+
+        if "category" in by:
+            links = self._links("splits", tx["id"], decimals)
+            source, pos = _expand(rows, links["tx"], n)
+            rows, amounts = rows[source], _take(links["amount"], pos, amounts[source])
+            split_keys["category"] = _take(links["value"], pos, 0)
+        if "tag" in by:
+            links = self._links("tags", tx["id"], decimals)
+            source, pos = _expand(rows, links["tx"], n)
+            rows, amounts = rows[source], amounts[source]
+            split_keys = {k: v[source] for k, v in split_keys.items()}
+            split_keys["tag"] = _take(links["value"], pos, 0)
+
+        keys: dict[str, np.ndarray] = {}
+        labels: dict[str, dict[int, str]] = {}
+        for dim in by:
+            if dim == "period":
+                keys[dim] = period_keys(local_seconds(tx["date"])[rows], period)
+            elif dim in ("account", "payee"):
+                keys[dim] = tx[dim][rows]
+            elif dim in split_keys:
+                keys[dim] = split_keys[dim]
+            elif dim == "type":
+                keys[dim] = tx["ent"][rows]
+                labels[dim] = {ent: name for name, (ent, _) in self._ents.items()}
+            else:
+                keys[dim], labels[dim] = self._account_attribute(dim, tx["account"][rows])
+        report = _group(list(by), keys, amounts, decimals)
+        report.period = period
+        for dim in by:
+            if dim in _NAME_COLUMNS:
+                labels[dim] = self._names(dim, report.keys[dim])
+        report.labels = labels
+        return report
+
+    def _account_attribute(self, dim: str, accounts: np.ndarray) -> tuple[np.ndarray, dict[int, str]]:
+        uniq = np.unique(accounts)
+        column = "ZCURRENCYNAME" if dim == "currency" else "ZUSER"
+        values = dict(
+            self._con.execute(
+                f"SELECT Z_PK, {column} FROM ZSYNCOBJECT WHERE Z_PK IN (SELECT value FROM json_each(?))",
+                [str(uniq.tolist())],
+            )
+        )
+        if dim == "user":
+            mapped = np.array([values.get(int(a)) or 0 for a in uniq], dtype=np.int64)
+            return mapped[np.searchsorted(uniq, accounts)], {}
+        codes = sorted({v for v in values.values() if v})
+        code_of = {c: i + 1 for i, c in enumerate(codes)}
+        mapped = np.array([code_of.get(values.get(int(a)), 0) for a in uniq], dtype=np.int64)
+        return mapped[np.searchsorted(uniq, accounts)], {i: c for c, i in code_of.items()}
+
+    def _names(self, dim: str, keys: np.ndarray) -> dict[int, str]:
+        column = _NAME_COLUMNS[dim]
+        return dict(
+            self._con.execute(
+                f"SELECT Z_PK, {column} FROM ZSYNCOBJECT WHERE Z_PK IN (SELECT value FROM json_each(?))",
+                [str(np.unique(keys).tolist())],
+            )
+        )
@@ -0,0 +1,87 @@
+"""Per-account running balances with O(log n) as-of lookups.
+
+A ``BalanceIndex`` holds one account's transactions sorted by ``ZDATE1``
+(ties by ``Z_PK``) and the running balance after each of them, starting from
+the account's opening balance. ``balance_at(when)`` is a binary search.
+
+Amounts are int64 minor units (``10**decimals``), like ``report``. Which
+rows count follows ``TransactionManager.get_all_for_account()``: every
+transaction type except ``TransferBudgetTransaction``, summing ``ZAMOUNT1``.
+
+``extend(rows)`` adds rows with a higher ``Z_PK`` than any seen so far
+(appends). Rows dated after the last one are appended in O(k); back-dated
+ones are merged in and the running sums recomputed from the first of them.
+Edits and deletions of indexed rows are not seen; rebuild the index after
+those (``ToolsAccessor.balance_index(..., rebuild=True)``).
+"""
+from __future__ import annotations
+
+from datetime import datetime
+from decimal import Decimal
+from typing import Iterable, Tuple
+
+import numpy as np
+
+from moneywiz_tools.aggregate import to_minor
+from moneywiz_tools.epoch import CUTOFF
+
+# (Z_PK, ZDATE1, ZAMOUNT1) of one transaction.
+BalanceRow = Tuple[int, float, float]
+
+
+class BalanceIndex:
+    def __init__(self, account: int, opening_balance: float, decimals: int = 2) -> None:
+        self.account = account
+        self.decimals = decimals
+        self.opening = int(to_minor(np.array([opening_balance or 0.0]), decimals)[0])
+        self.ids = np.empty(0, dtype=np.int64)
+        self.dates = np.empty(0, dtype=np.float64)
+        self.amounts = np.empty(0, dtype=np.int64)
+        self.running = np.empty(0, dtype=np.int64)
+        self.high_water = 0  # highest Z_PK indexed
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def extend(self, rows: Iterable[BalanceRow]) -> int:
+        """Index new transactions; returns how many were added."""
+        new = np.fromiter(
+            ((pk, date or 0.0, amount or 0.0) for pk, date, amount in rows),
+            dtype=[("id", np.int64), ("date", np.float64), ("amount", np.float64)],
+        )
+        if not len(new):
+            return 0
+        new = new[np.lexsort((new["id"], new["date"]))]
+        amounts = to_minor(new["amount"], self.decimals)
+        self.high_water = max(self.high_water, int(new["id"].max()))
+        if not len(self.dates) or new["date"][0] >= self.dates[-1]:
+            base = self.running[-1] if len(self.running) else self.opening
+            self.ids = np.concatenate([self.ids, new["id"]])
+            self.dates = np.concatenate([self.dates, new["date"]])
+            self.amounts = np.concatenate([self.amounts, amounts])
+            self.running = np.concatenate([self.running, base + np.cumsum(amounts)])
+            return len(new)
+        # Back-dated: merge, then redo the running sums from the first change.
+        first = int(np.searchsorted(self.dates, new["date"][0], side="right"))
+        ids = np.concatenate([self.ids[first:], new["id"]])
+        dates = np.concatenate([self.dates[first:], new["date"]])
+        tail_amounts = np.concatenate([self.amounts[first:], amounts])
+        order = np.lexsort((ids, dates))
+        base = self.running[first - 1] if first else self.opening
+        self.ids = np.concatenate([self.ids[:first], ids[order]])
+        self.dates = np.concatenate([self.dates[:first], dates[order]])
+        self.amounts = np.concatenate([self.amounts[:first], tail_amounts[order]])
+        self.running = np.concatenate([self.running[:first], base + np.cumsum(tail_amounts[order])])
+        return len(new)
+
+    def minor_at(self, when: datetime | float) -> int:
+        """Balance in minor units including every transaction up to ``when``.
+
+        ``when`` is a local ``datetime`` or a raw ``ZDATE1`` value.
+        """
+        stamp = when.timestamp() - CUTOFF if isinstance(when, datetime) else float(when)
+        i = int(np.searchsorted(self.dates, stamp, side="right"))
+        return int(self.running[i - 1]) if i else self.opening
+
+    def balance_at(self, when: datetime | float) -> Decimal:
+        return Decimal(self.minor_at(when)).scaleb(-self.decimals)
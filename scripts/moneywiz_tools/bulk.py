@@ -0,0 +1,162 @@
+"""Batched ``ZSYNCOBJECT`` writes for bulk rewrites.
+
+``moneywiz_api.writes.WriteSession`` plans and runs one statement per row,
+which is fine for single edits but dominates the run time of bulk scripts
+such as ``reassign_payees_by_id.py`` (thousands of ``UPDATE``s and a
+``Z_PRIMARYKEY`` round-trip per insert). ``BulkWriter`` keeps the same
+surface (``dry_run``, ``planned``, ``transaction()``, ``close()``) but:
+
+- groups rows with the same column set into one ``executemany`` statement
+- reserves a whole ``Z_PK`` range per insert batch with a single
+  ``Z_PRIMARYKEY.Z_MAX`` bump on the root entity (Core Data allocates primary
+  keys for every ``ZSYNCOBJECT`` sub-entity from the root's counter)
+
+Reserved ids are returned in dry-run too, so previews can show the rows that
+would reference them; nothing is written unless ``dry_run=False``. Steps are
+recorded in a ``PlanRecorder`` (``planned``), one step per row.
+"""
+from __future__ import annotations
+
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Mapping
+
+from moneywiz_tools.connection import connect_ro
+from moneywiz_tools.plan import PlanRecorder
+
+# Core Data timestamps count seconds from 2001-01-01 UTC.
+APPLE_EPOCH_OFFSET = 978307200
+
+
+class BulkWriter:
+    def __init__(
+        self, db_path: Path | str, dry_run: bool = True, plan: PlanRecorder | None = None
+    ) -> None:
+        self.db_path = Path(db_path)
+        self.dry_run = dry_run
+        if dry_run:
+            self._con = connect_ro(self.db_path)
+        else:
+            # Transactions are managed explicitly in transaction().
+            self._con = sqlite3.connect(str(self.db_path), isolation_level=None)
+        self.planned = plan if plan is not None else PlanRecorder()
+        self._ents: dict[str, tuple[int, int]] = {}
+        self._reserved_max: int | None = None
+
+    def close(self) -> None:
+        self._con.close()
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        if self.dry_run:
+            yield
+            return
+        # IMMEDIATE takes the write lock up front so the Z_MAX read used for
+        # key reservation cannot race another writer.
+        self._con.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._con.execute("ROLLBACK")
+            raise
+        self._con.execute("COMMIT")
+
+    def _run(self, sql: str, params: list[tuple[Any, ...]], label: str | None = None) -> None:
+        self.planned.record_many(sql, params, label)
+        if not self.dry_run:
+            self._con.executemany(sql, params)
+
+    def _ent(self, typename: str) -> tuple[int, int]:
+        """(Z_ENT, root Z_ENT) for ``typename``."""
+        if typename not in self._ents:
+            rows = {
+                name: (ent, sup)
+                for ent, name, sup in self._con.execute(
+                    'SELECT Z_ENT, Z_NAME, Z_SUPER FROM "Z_PRIMARYKEY"'
+                )
+            }
+            if typename not in rows:
+                raise ValueError(f"Unknown typename '{typename}' in Z_PRIMARYKEY")
+            by_ent = {ent: sup for ent, sup in rows.values()}
+            ent = root = rows[typename][0]
+            while by_ent.get(root):
+                root = by_ent[root]
+            self._ents[typename] = (ent, root)
+        return self._ents[typename]
+
+    def reserve_pks(self, typename: str, count: int) -> range:
+        """Allocate ``count`` consecutive ``Z_PK`` values for ``typename``."""
+        _, root = self._ent(typename)
+        if self._reserved_max is None:
+            (z_max,) = self._con.execute(
+                'SELECT Z_MAX FROM "Z_PRIMARYKEY" WHERE Z_ENT = ?', (root,)
+            ).fetchone()
+            # Never hand out a key that is already taken, even if Z_MAX lags.
+            (pk_max,) = self._con.execute('SELECT MAX(Z_PK) FROM "ZSYNCOBJECT"').fetchone()
+            self._reserved_max = max(z_max or 0, pk_max or 0)
+        start = self._reserved_max + 1
+        self._reserved_max += count
+        self._run(
+            'UPDATE "Z_PRIMARYKEY" SET Z_MAX = ? WHERE Z_ENT = ?',
+            [(self._reserved_max, root)],
+        )
+        return range(start, start + count)
+
+    def bulk_insert_syncobject(
+        self, typename: str, rows: Iterable[Mapping[str, Any]]
+    ) -> list[int]:
+        """Insert ``rows`` as ``typename`` objects; return their ``Z_PK``s in order.
+
+        ``Z_PK``, ``Z_ENT``, ``Z_OPT`` (1), ``ZGID`` (a new UUID) and
+        ``ZOBJECTCREATIONDATE`` (now) are filled unless a row provides them,
+        as ``WriteSession.insert_syncobject`` does.
+        """
+        rows = list(rows)
+        if not rows:
+            return []
+        ent, _ = self._ent(typename)
+        ids = list(self.reserve_pks(typename, len(rows)))
+        created = time.time() - APPLE_EPOCH_OFFSET
+        batches: dict[tuple[str, ...], list[tuple[Any, ...]]] = {}
+        for pk, fields in zip(ids, rows):
+            values = {
+                "Z_PK": pk,
+                "Z_ENT": ent,
+                "Z_OPT": 1,
+                "ZGID": str(uuid.uuid4()).upper(),
+                "ZOBJECTCREATIONDATE": created,
+            }
+            values.update(fields)
+            batches.setdefault(tuple(values), []).append(tuple(values.values()))
+        for columns, params in batches.items():
+            cols = ", ".join(columns)
+            marks = ", ".join("?" * len(columns))
+            self._run(
+                f'INSERT INTO "ZSYNCOBJECT" ({cols}) VALUES ({marks})', params, f"insert {typename}"
+            )
+        return ids
+
+    def bulk_update_syncobject(
+        self, rows: Iterable[tuple[int, Mapping[str, Any]]]
+    ) -> int:
+        """Apply ``(pk, fields)`` patches; return the number of rows planned."""
+        batches: dict[tuple[str, ...], list[tuple[Any, ...]]] = {}
+        count = 0
+        for pk, fields in rows:
+            if not fields:
+                continue
+            batches.setdefault(tuple(fields), []).append((*fields.values(), pk))
+            count += 1
+        for columns, params in batches.items():
+            # Z_OPT is the row's version counter; bump it like Core Data does
+            # so change feeds and the search index see the update.
+            assignments = ", ".join(f"{col} = ?" for col in columns)
+            self._run(
+                f'UPDATE "ZSYNCOBJECT" SET {assignments}, Z_OPT = COALESCE(Z_OPT, 0) + 1 WHERE Z_PK = ?',
+                params,
+                f"update ZSYNCOBJECT.{','.join(columns)}",
+            )
+        return count
@@ -0,0 +1,225 @@
+"""On-disk snapshots of loaded manager state.
+
+A snapshot is the pickled ``__dict__`` of a loaded manager (records, gid
+index and, for transactions, the relationship maps; a columnar
+``TransactionStore`` is pickled as its arrays). It is reused only while
+the database fingerprint is unchanged:
+
+- DB path, size and ``mtime_ns``
+- size and ``mtime_ns`` of the ``-wal`` file (MoneyWiz writes through WAL, so
+  the main file can stay untouched until a checkpoint)
+- every ``Z_PRIMARYKEY.Z_MAX`` (moves on each insert)
+- the installed ``moneywiz_api`` model sources (model classes are pickled)
+
+Snapshots live in ``$MONEYWIZ_CACHE_DIR``, else
+``$XDG_CACHE_HOME/moneywiz-tools``, else ``~/.cache/moneywiz-tools``. Set
+``MONEYWIZ_NO_CACHE=1`` to bypass them. The directory is capped at
+``MONEYWIZ_CACHE_MAX_MB`` (default 512); least recently used snapshots are
+evicted first.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+import tempfile
+from pathlib import Path
+from typing import Any
+
+import moneywiz_api
+
+from moneywiz_tools.accessor import ToolsAccessor
+
+# Bump when the snapshot layout changes.
+CACHE_VERSION = 3
+DEFAULT_MAX_MB = 512
+SUFFIX = ".snapshot"
+
+# Manager attributes that belong to the live session, not the snapshot.
+_TRANSIENT = ("_accessor", "_loaded", "_cache", "_tree")
+
+
+def _pack_records(records: dict) -> tuple[list[str], list[tuple]]:
+    """Models with their raw rows stored sparsely.
+
+    ``_raw`` holds every ``ZSYNCOBJECT`` column (300+), almost all NULL, and
+    dominates snapshot size and load time. Non-NULL values are kept per
+    record; the shared column list restores key order and the NULLs.
+    """
+    columns: list[str] = []
+    for rec in records.values():
+        columns = list(rec._raw)
+        break
+    packed = []
+    for rec in records.values():
+        fields = {k: v for k, v in vars(rec).items() if k != "_raw"}
+        raw = rec._raw
+        if list(raw) == columns:
+            raw = {k: v for k, v in raw.items() if v is not None}
+            packed.append((type(rec), fields, raw, True))
+        else:
+            packed.append((type(rec), fields, raw, False))
+    return columns, packed
+
+
+def _unpack_records(columns: list[str], packed: list[tuple]) -> dict:
+    template = dict.fromkeys(columns)
+    records = {}
+    for cls, fields, raw, sparse in packed:
+        if sparse:
+            full = template.copy()
+            full.update(raw)
+            raw = full
+        obj = cls.__new__(cls)
+        obj.__dict__.update(fields)
+        obj._raw = raw
+        records[obj.id] = obj
+    return records
+
+
+def cache_enabled() -> bool:
+    return os.environ.get("MONEYWIZ_NO_CACHE", "").strip().lower() in ("", "0", "false", "no")
+
+
+def cache_dir() -> Path:
+    explicit = os.environ.get("MONEYWIZ_CACHE_DIR")
+    if explicit:
+        return Path(explicit).expanduser()
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return Path(base) / "moneywiz-tools"
+
+
+def _stat_key(path: Path) -> tuple[int, int] | None:
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+def _models_key() -> list[tuple[str, int]]:
+    model_dir = Path(moneywiz_api.__file__).resolve().parent / "model"
+    return sorted((p.name, p.stat().st_mtime_ns) for p in model_dir.glob("*.py"))
+
+
+def db_fingerprint(db_path: Path | str, accessor: ToolsAccessor) -> str:
+    """Hex digest identifying the current content of ``db_path``."""
+    path = Path(db_path).resolve()
+    z_max = accessor._con.execute(
+        'SELECT Z_ENT, Z_MAX FROM "Z_PRIMARYKEY" ORDER BY Z_ENT'
+    ).fetchall()
+    key = (
+        CACHE_VERSION,
+        str(path),
+        _stat_key(path),
+        _stat_key(path.with_name(path.name + "-wal")),
+        [(row["Z_ENT"], row["Z_MAX"]) for row in z_max],
+        _models_key(),
+    )
+    return hashlib.sha256(repr(key).encode()).hexdigest()
+
+
+class SnapshotCache:
+    """Per-database snapshot store shared by the managers of one API."""
+
+    def __init__(self, db_path: Path | str, accessor: ToolsAccessor, directory: Path | None = None) -> None:
+        self.db_path = Path(db_path).resolve()
+        self.accessor = accessor
+        self.directory = directory or cache_dir()
+        self._fingerprint: str | None = None
+
+    @property
+    def fingerprint(self) -> str:
+        # Computed once per process: a command sees one consistent DB state.
+        if self._fingerprint is None:
+            self._fingerprint = db_fingerprint(self.db_path, self.accessor)
+        return self._fingerprint
+
+    def path_for(self, name: str) -> Path:
+        db_key = hashlib.sha256(str(self.db_path).encode()).hexdigest()[:16]
+        return self.directory / f"{db_key}-{name}{SUFFIX}"
+
+    def restore(self, name: str, manager: Any) -> bool:
+        """Load ``manager`` state from its snapshot; False on miss or mismatch."""
+        path = self.path_for(name)
+        try:
+            with path.open("rb") as fh:
+                fingerprint, state = pickle.load(fh)
+        except FileNotFoundError:
+            return False
+        except Exception:
+            # Truncated or written by an incompatible version: rebuild it.
+            path.unlink(missing_ok=True)
+            return False
+        if fingerprint != self.fingerprint:
+            return False
+        records = state["_records"]
+        if isinstance(records, tuple):
+            state["_records"] = _unpack_records(*records)
+        else:
+            # A TransactionStore pickles its arrays as they are.
+            records.attach(manager._accessor)
+        manager.__dict__.update(state)
+        os.utime(path)  # LRU order for eviction
+        return True
+
+    def store(self, name: str, manager: Any) -> None:
+        state = {k: v for k, v in vars(manager).items() if k not in _TRANSIENT}
+        if isinstance(state["_records"], dict):
+            state["_records"] = _pack_records(state["_records"])
+        self._write(name, lambda fh: pickle.dump((self.fingerprint, state), fh, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def restore_arrays(self, name: str) -> dict[str, Any] | None:
+        """NumPy arrays stored by ``store_arrays``; None on miss or mismatch."""
+        import numpy as np
+
+        path = self.path_for(name)
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if str(data["__fingerprint__"]) != self.fingerprint:
+                    return None
+                arrays = {k: data[k] for k in data.files if k != "__fingerprint__"}
+        except FileNotFoundError:
+            return None
+        except Exception:
+            path.unlink(missing_ok=True)
+            return None
+        os.utime(path)
+        return arrays
+
+    def store_arrays(self, name: str, arrays: dict[str, Any]) -> None:
+        import numpy as np
+
+        self._write(name, lambda fh: np.savez(fh, __fingerprint__=np.array(self.fingerprint), **arrays))
+
+    def _write(self, name: str, dump: Any) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True, mode=0o700)
+        path = self.path_for(name)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=path.name, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                dump(fh)
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        evict(self.directory)
+
+
+def evict(directory: Path, max_bytes: int | None = None) -> None:
+    """Delete least recently used snapshots until ``directory`` fits the cap."""
+    if max_bytes is None:
+        max_bytes = int(float(os.environ.get("MONEYWIZ_CACHE_MAX_MB", DEFAULT_MAX_MB)) * 1024 * 1024)
+    entries = []
+    for path in directory.glob(f"*{SUFFIX}"):
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((st.st_mtime_ns, st.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        path.unlink(missing_ok=True)
+        total -= size
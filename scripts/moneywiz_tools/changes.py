@@ -0,0 +1,181 @@
+"""Incremental change feed over ``ZSYNCOBJECT``.
+
+A checkpoint is a small SQLite file holding ``(Z_PK, ZGID, Z_OPT, Z_ENT)``
+for every object seen on the last run. Core Data bumps ``Z_OPT`` on each
+save of an object, so comparing the live table against the checkpoint
+yields:
+
+- ``insert``: a ``Z_PK`` not in the checkpoint, or one whose ``ZGID`` changed
+- ``update``: same ``Z_PK`` and ``ZGID``, different ``Z_OPT``
+- ``delete``: a checkpointed ``(Z_PK, ZGID)`` that is gone
+
+The comparison is a join inside SQLite (the source DB is ``ATTACH``-ed read
+only), so Python only sees the delta. When the DB file, its ``-wal`` and all
+``Z_PRIMARYKEY.Z_MAX`` values are unchanged since the checkpoint, the scan is
+skipped entirely.
+
+Category splits, tags and refund links live in their own tables and are not
+part of the feed.
+
+    with ChangeFeed(db_path, checkpoint) as feed:
+        for change in feed.pending():
+            ...
+        feed.advance()
+
+Without ``advance()`` the checkpoint is left as it was.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Iterator
+
+from moneywiz_tools.cache import _stat_key, cache_dir
+
+CHECKPOINT_VERSION = 1
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS objects (pk INTEGER PRIMARY KEY, gid TEXT, opt INTEGER, ent INTEGER)",
+    "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)",
+)
+
+_DELTA = """
+INSERT INTO temp.delta (op, pk, gid, opt, ent)
+SELECT 'delete', o.pk, o.gid, o.opt, o.ent
+FROM main.objects o LEFT JOIN src.ZSYNCOBJECT s ON s.Z_PK = o.pk
+WHERE s.Z_PK IS NULL OR s.ZGID IS NOT o.gid
+UNION ALL
+SELECT CASE WHEN o.pk IS NULL OR o.gid IS NOT s.ZGID THEN 'insert' ELSE 'update' END,
+       s.Z_PK, s.ZGID, s.Z_OPT, s.Z_ENT
+FROM src.ZSYNCOBJECT s LEFT JOIN main.objects o ON o.pk = s.Z_PK
+WHERE o.pk IS NULL OR o.gid IS NOT s.ZGID OR o.opt IS NOT s.Z_OPT
+"""
+
+
+def default_checkpoint(db_path: Path | str) -> Path:
+    db_key = hashlib.sha256(str(Path(db_path).resolve()).encode()).hexdigest()[:16]
+    return cache_dir() / f"{db_key}-changes.sqlite"
+
+
+def _json_value(value: Any) -> Any:
+    return value.hex() if isinstance(value, bytes) else value
+
+
+class ChangeFeed:
+    def __init__(self, db_path: Path | str, checkpoint: Path | str | None = None) -> None:
+        self.db_path = Path(db_path).resolve()
+        self.checkpoint = Path(checkpoint) if checkpoint else default_checkpoint(self.db_path)
+        self.checkpoint.parent.mkdir(parents=True, exist_ok=True)
+        self._con = sqlite3.connect(self.checkpoint.resolve().as_uri(), uri=True, isolation_level=None)
+        for stmt in _SCHEMA:
+            self._con.execute(stmt)
+        meta = dict(self._con.execute("SELECT key, value FROM meta"))
+        if meta.get("db") not in (None, str(self.db_path)):
+            self._con.close()
+            raise ValueError(f"Checkpoint {self.checkpoint} belongs to {meta['db']}")
+        if meta.get("version") not in (None, str(CHECKPOINT_VERSION)):
+            self._con.close()
+            raise ValueError(f"Checkpoint {self.checkpoint} has unsupported version {meta['version']}")
+        self._meta = meta
+        self._con.execute("ATTACH DATABASE ? AS src", (f"{self.db_path.as_uri()}?mode=ro",))
+        # One read transaction across both files: the delta, the emitted rows
+        # and the state recorded by advance() all see the same DB snapshot.
+        self._con.execute("BEGIN")
+        self._types = dict(self._con.execute("SELECT Z_ENT, Z_NAME FROM src.Z_PRIMARYKEY"))
+        self._state = self._source_state()
+        self._staged = False
+
+    def __enter__(self) -> ChangeFeed:
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    @property
+    def initial(self) -> bool:
+        """True when there is no previous checkpoint (everything is new)."""
+        return "state" not in self._meta
+
+    @property
+    def last_run(self) -> float | None:
+        value = self._meta.get("updated_at")
+        return float(value) if value is not None else None
+
+    def _source_state(self) -> str:
+        z_max = self._con.execute("SELECT Z_ENT, Z_MAX FROM src.Z_PRIMARYKEY ORDER BY Z_ENT").fetchall()
+        wal = self.db_path.with_name(self.db_path.name + "-wal")
+        return json.dumps([_stat_key(self.db_path), _stat_key(wal), z_max])
+
+    def _stage(self) -> None:
+        if self._staged:
+            return
+        self._con.execute(
+            "CREATE TEMP TABLE IF NOT EXISTS delta (op TEXT, pk INTEGER, gid TEXT, opt INTEGER, ent INTEGER)"
+        )
+        self._con.execute("DELETE FROM temp.delta")
+        if self._meta.get("state") != self._state:
+            self._con.execute(_DELTA)
+        self._staged = True
+
+    def counts(self) -> dict[str, int]:
+        self._stage()
+        counts = {"insert": 0, "update": 0, "delete": 0}
+        counts.update(self._con.execute("SELECT op, COUNT(*) FROM temp.delta GROUP BY op"))
+        return counts
+
+    def pending(self, data: bool = True) -> Iterator[dict[str, Any]]:
+        """Changes since the checkpoint: deletes first, then inserts/updates by ``Z_PK``.
+
+        With ``data`` each insert/update carries the row's non-NULL columns.
+        """
+        self._stage()
+        if data:
+            cur = self._con.execute(
+                "SELECT d.op, d.pk, d.gid, d.opt, d.ent, s.* FROM temp.delta d "
+                "LEFT JOIN src.ZSYNCOBJECT s ON s.Z_PK = d.pk AND d.op != 'delete' "
+                "ORDER BY d.op != 'delete', d.pk"
+            )
+            columns = [col[0] for col in cur.description[5:]]
+        else:
+            cur = self._con.execute(
+                "SELECT op, pk, gid, opt, ent FROM temp.delta ORDER BY op != 'delete', pk"
+            )
+        for row in cur:
+            op, pk, gid, opt, ent = row[:5]
+            change = {"op": op, "id": pk, "gid": gid, "type": self._types.get(ent), "opt": opt}
+            if data and op != "delete":
+                change["data"] = {
+                    col: _json_value(value)
+                    for col, value in zip(columns, row[5:])
+                    if value is not None
+                }
+            yield change
+
+    def advance(self) -> None:
+        """Record the current DB state as the new checkpoint."""
+        self._stage()
+        self._con.execute(
+            "DELETE FROM main.objects WHERE pk IN (SELECT pk FROM temp.delta WHERE op = 'delete')"
+        )
+        self._con.execute(
+            "INSERT OR REPLACE INTO main.objects (pk, gid, opt, ent) "
+            "SELECT pk, gid, opt, ent FROM temp.delta WHERE op != 'delete'"
+        )
+        meta = {
+            "version": str(CHECKPOINT_VERSION),
+            "db": str(self.db_path),
+            "state": self._state,
+            "updated_at": repr(time.time()),
+        }
+        self._con.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", meta.items())
+        self._con.execute("COMMIT")
+        self._meta = meta
+        self._staged = False
+
+    def close(self) -> None:
+        if self._con.in_transaction:
+            self._con.execute("ROLLBACK")
+        self._con.close()
@@ -0,0 +1,140 @@
+"""Read-only SQLite connections for the scripts and the lazy API.
+
+``connect_ro()`` opens ``file:...?mode=ro`` with a 1 GiB ``mmap_size`` and
+a 64 MiB page cache, and returns plain tuple rows. ``immutable=True`` (or
+``MONEYWIZ_IMMUTABLE=1``) adds ``immutable=1`` for copies nothing writes to
+(backups, test DBs): SQLite then skips locking and change detection. Never
+use it on the live MoneyWiz DB.
+
+``shared_connection()`` keeps one such connection per DB file and process,
+so the lazy managers, ``Aggregator`` and the scripts' own queries reuse it.
+It is reopened when the file is replaced (new inode) or in a forked child,
+and closed at exit.
+
+The ``moneywiz_api`` models need ``{column: value}`` rows. ``DictRows``
+wraps a connection for that code and builds each dict with one
+``dict(zip(names, row))`` from the column names read once per query, instead
+of walking ``cursor.description`` (rebuilt on every access) for every row.
+"""
+from __future__ import annotations
+
+import atexit
+import os
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, Iterator, Tuple
+
+MMAP_SIZE = 1 << 30
+CACHE_KIB = 64 * 1024
+
+_POOL: Dict[Tuple[Path, bool], Tuple[sqlite3.Connection, Tuple[int, int]]] = {}
+
+
+def immutable_default() -> bool:
+    return bool(os.environ.get("MONEYWIZ_IMMUTABLE"))
+
+
+def ro_uri(db_path: Path | str, immutable: bool = False) -> str:
+    uri = f"{Path(db_path).resolve().as_uri()}?mode=ro"
+    return uri + "&immutable=1" if immutable else uri
+
+
+def connect_ro(db_path: Path | str, immutable: bool | None = None) -> sqlite3.Connection:
+    """New tuned read-only connection to ``db_path`` (tuple rows)."""
+    if immutable is None:
+        immutable = immutable_default()
+    con = sqlite3.connect(ro_uri(db_path, immutable), uri=True)
+    # Rows are wide (300+ columns); memory-mapped reads cut the scan time.
+    con.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+    con.execute(f"PRAGMA cache_size = -{CACHE_KIB}")
+    return con
+
+
+def _file_id(path: Path) -> Tuple[int, int]:
+    st = path.stat()
+    return st.st_dev, st.st_ino
+
+
+def shared_connection(db_path: Path | str, immutable: bool | None = None) -> sqlite3.Connection:
+    """The process-wide read-only connection for ``db_path``; do not close it
+    or change its ``row_factory`` (set one per cursor instead)."""
+    if immutable is None:
+        immutable = immutable_default()
+    path = Path(db_path).resolve()
+    key = (path, immutable)
+    file_id = _file_id(path)
+    pooled = _POOL.get(key)
+    if pooled is not None:
+        con, pooled_id = pooled
+        if pooled_id == file_id:
+            return con
+        # Replaced on disk (e.g. by create-test-db): the old handle would
+        # keep reading the previous file.
+        con.close()
+    con = connect_ro(path, immutable)
+    _POOL[key] = (con, file_id)
+    return con
+
+
+def close_shared() -> None:
+    for con, _ in _POOL.values():
+        con.close()
+    _POOL.clear()
+
+
+atexit.register(close_shared)
+# A forked child (export workers) must not share the parent's handles;
+# it opens its own on first use.
+os.register_at_fork(after_in_child=_POOL.clear)
+
+
+def columns(cursor: sqlite3.Cursor) -> Dict[str, int]:
+    """Column name -> tuple index for the current query of ``cursor``."""
+    return {d[0]: i for i, d in enumerate(cursor.description or ())}
+
+
+def _dict_rows(cursor: sqlite3.Cursor) -> sqlite3.Cursor:
+    desc = cursor.description
+    if desc is not None:
+        names = tuple(d[0] for d in desc)
+        cursor.row_factory = lambda _cur, row: dict(zip(names, row))
+    return cursor
+
+
+class _DictCursor:
+    """Cursor whose rows are dicts; everything else is the wrapped cursor's."""
+
+    __slots__ = ("_cur",)
+
+    def __init__(self, cur: sqlite3.Cursor) -> None:
+        self._cur = cur
+
+    def execute(self, sql: str, parameters: Any = ()) -> "_DictCursor":
+        _dict_rows(self._cur.execute(sql, parameters))
+        return self
+
+    def executemany(self, sql: str, seq_of_parameters: Any) -> "_DictCursor":
+        self._cur.executemany(sql, seq_of_parameters)
+        return self
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self._cur)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._cur, name)
+
+
+class DictRows:
+    """``execute()``/``cursor()`` view of a connection yielding dict rows."""
+
+    def __init__(self, con: sqlite3.Connection) -> None:
+        self.connection = con
+
+    def execute(self, sql: str, parameters: Any = ()) -> sqlite3.Cursor:
+        return _dict_rows(self.connection.execute(sql, parameters))
+
+    def cursor(self) -> _DictCursor:
+        return _DictCursor(self.connection.cursor())
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.connection, name)
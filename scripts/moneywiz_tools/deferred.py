@@ -0,0 +1,274 @@
+"""Transaction models that convert dates and amounts on first access.
+
+The ``moneywiz_api`` models turn every ``ZDATE1``/``ZOBJECTCREATIONDATE``
+into a ``datetime`` and every amount, share count and rate into a
+``Decimal`` in ``__init__``. ``deferred_class(cls)`` is a subclass of ``cls``
+with the same name and fields whose datetime and decimal fields keep the
+raw column value and convert it the first time the attribute is read. The
+result is stored in the instance ``__dict__``, so later reads are plain
+attribute lookups.
+
+The models' own ``__init__`` fixes and ``validate()`` still run at load.
+They see ``_Pending`` stand-ins that convert only when used in arithmetic or
+comparisons (``amount * original_amount > 0``); a field that is only checked
+with ``is not None`` (both dates, in every model) stays raw.
+
+``build(cls, row)`` also resolves each class's field specs once, instead of
+walking the MRO for every row (``SchemaMappedRow._fields_for``).
+``iso_datetimes(txs)`` formats the ``datetime`` of a whole batch with one
+``epoch.to_isoformat`` call, from the raw values still parked on the models.
+"""
+from __future__ import annotations
+
+import dataclasses
+import operator
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Sequence
+
+import numpy as np
+
+from moneywiz_api.managers.transaction_manager import TransactionManager
+from moneywiz_api.model.raw_data_handler import RawDataHandler as RDH
+from moneywiz_api.model.schema_mapped_row import FieldSpec, SchemaMappedRow
+
+from moneywiz_tools.epoch import to_isoformat
+
+# Raw values not yet converted, by attribute name.
+PARKED = "_deferred"
+
+_CONVERTERS = (RDH.get_datetime, RDH.get_decimal, RDH.get_nullable_decimal)
+_MISSING = object()
+
+
+class _Pending:
+    """Unconverted value seen by ``__init__`` fixes and ``validate()``."""
+
+    __slots__ = ("raw", "convert", "value")
+
+    def __init__(self, raw: Any, convert: Callable[[Any], Any]) -> None:
+        self.raw = raw
+        self.convert = convert
+        self.value = _MISSING
+
+    def get(self) -> Any:
+        if self.value is _MISSING:
+            self.value = self.convert(self.raw)
+        return self.value
+
+    def __bool__(self) -> bool:
+        if self.value is _MISSING:
+            # A datetime is always true; Decimal(str(x)) is zero iff x is.
+            return self.convert is RDH.get_datetime or bool(self.raw)
+        return bool(self.get())
+
+    def __float__(self) -> float:
+        return float(self.get())
+
+    def __int__(self) -> int:
+        return int(self.get())
+
+    def __hash__(self) -> int:
+        return hash(self.get())
+
+    def __str__(self) -> str:
+        return str(self.get())
+
+    def __repr__(self) -> str:
+        return repr(self.get())
+
+    def __format__(self, spec: str) -> str:
+        return format(self.get(), spec)
+
+
+def _unwrap(value: Any) -> Any:
+    return value.get() if type(value) is _Pending else value
+
+
+def _binary(op: Callable[[Any, Any], Any]) -> Callable[[_Pending, Any], Any]:
+    return lambda self, other: op(self.get(), _unwrap(other))
+
+
+def _reflected(op: Callable[[Any, Any], Any]) -> Callable[[_Pending, Any], Any]:
+    return lambda self, other: op(_unwrap(other), self.get())
+
+
+def _compare(op: Callable[[Any, Any], Any]) -> Callable[[_Pending, Any], Any]:
+    def method(self: _Pending, other: Any) -> Any:
+        # Decimal(str(x)) orders against an integer exactly as the float x
+        # does (the shortest repr rounds back to x), so sign checks like
+        # ``amount > 0`` need no conversion.
+        if self.value is _MISSING and self.convert is not RDH.get_datetime:
+            if type(other) is Decimal and not other:
+                other = 0  # the fixes' ``rate == Decimal(0)``
+            if type(other) is int and -_EXACT < other < _EXACT:
+                return op(self.raw, other)
+        return op(self.get(), _unwrap(other))
+
+    return method
+
+
+_EXACT = 1 << 53
+
+for _name in ("eq", "ne", "lt", "le", "gt", "ge"):
+    setattr(_Pending, f"__{_name}__", _compare(getattr(operator, _name)))
+for _name in ("add", "sub", "mul", "truediv", "floordiv", "mod", "pow"):
+    setattr(_Pending, f"__{_name}__", _binary(getattr(operator, _name)))
+for _name in ("add", "sub", "mul", "truediv", "floordiv", "mod", "pow"):
+    setattr(_Pending, f"__r{_name}__", _reflected(getattr(operator, _name)))
+for _name in ("neg", "pos", "abs"):
+    setattr(_Pending, f"__{_name}__", (lambda op: lambda self: op(self.get()))(getattr(operator, _name)))
+
+
+def _defer(convert: Callable[[Any], Any]) -> Callable[[Any], Any]:
+    def defer(raw: Any) -> Any:
+        if type(raw) is float or type(raw) is int:
+            return _Pending(raw, convert)
+        # NULL or a bad value: convert now, so errors surface at load as before.
+        return convert(raw)
+
+    return defer
+
+
+class _Converted:
+    """Non-data descriptor: convert the parked raw value on first read."""
+
+    def __init__(self, name: str, convert: Callable[[Any], Any]) -> None:
+        self.name = name
+        self.convert = convert
+
+    def __get__(self, obj: Any, owner: type | None = None) -> Any:
+        if obj is None:
+            return self
+        d = obj.__dict__
+        try:
+            raw = d[PARKED].pop(self.name)
+        except KeyError:
+            raise AttributeError(self.name) from None
+        value = d[self.name] = self.convert(raw)
+        return value
+
+
+class _Deferred:
+    """Mixin for the ``deferred_class()`` subclasses."""
+
+    _DEFERRED: tuple = ()
+
+    def __init__(self, row: Any) -> None:
+        super().__init__(row)  # type: ignore[call-arg]
+        self._park()
+
+    def _park(self) -> None:
+        d = self.__dict__
+        parked = d.setdefault(PARKED, {})
+        for name, _ in self._DEFERRED:
+            value = d.get(name)
+            if type(value) is _Pending:
+                if value.value is _MISSING:
+                    del d[name]
+                    parked[name] = value.raw
+                else:
+                    d[name] = value.value
+
+    def validate(self) -> None:
+        d = self.__dict__
+        parked = d.get(PARKED)
+        if parked:
+            for name, convert in self._DEFERRED:
+                if name in parked:
+                    d[name] = _Pending(parked.pop(name), convert)
+        try:
+            super().validate()  # type: ignore[misc]
+        finally:
+            self._park()
+
+    def __eq__(self, other: object) -> bool:
+        return model_eq(self, other)
+
+    __hash__ = None  # type: ignore[assignment]
+
+
+def model_eq(view: Any, other: object) -> bool:
+    """``==`` for a model subclass (deferred model or columnar view): equal
+    to the plain model, a deferred model or a columnar view with the same
+    compared field values. Dataclass ``__eq__`` wants the exact same class.
+    """
+    model_cls = type(view).__bases__[1]
+    if not isinstance(other, model_cls) or type(other).__name__ != model_cls.__name__:
+        return NotImplemented
+    names = [f.name for f in dataclasses.fields(model_cls) if f.compare]
+    return all(getattr(view, n) == getattr(other, n) for n in names)
+
+
+_CLASSES: Dict[type, type] = {}
+_FIELDS: Dict[type, Dict[str, FieldSpec]] = {}
+
+
+def deferred_class(model_cls: type) -> type:
+    """The lazily converting subclass of ``model_cls`` (created once)."""
+    cls = _CLASSES.get(model_cls)
+    if cls is not None:
+        return cls
+    specs = SchemaMappedRow._fields_for(model_cls)
+    overrides: Dict[str, FieldSpec] = {}
+    deferred = []
+    ns: Dict[str, Any] = {"__module__": __name__, "__qualname__": model_cls.__name__}
+    for f in dataclasses.fields(model_cls):
+        key = f.name.lstrip("_")  # Record keeps ent/created_at as _ent/_created_at
+        spec = specs.get(key)
+        if spec is None or spec.converter not in _CONVERTERS:
+            continue
+        overrides[key] = FieldSpec(spec.aliases, _defer(spec.converter))
+        deferred.append((f.name, spec.converter))
+        ns[f.name] = _Converted(f.name, spec.converter)
+    ns["FIELDS"] = overrides
+    ns["_DEFERRED"] = tuple(deferred)
+    cls = type(model_cls.__name__, (_Deferred, model_cls), ns)
+    _CLASSES[model_cls] = cls
+    _FIELDS[cls] = SchemaMappedRow._fields_for(cls)
+    # Module attribute, so pickled models (snapshots) find their class.
+    globals()[cls.__name__] = cls
+    return cls
+
+
+class _Row(SchemaMappedRow):
+    # SchemaMappedRow with the field specs resolved ahead of time.
+    def __init__(self, raw_row: Dict[str, Any], fields: Dict[str, FieldSpec]) -> None:
+        self.raw_row = raw_row
+        self.fields = fields
+
+
+def build(model_cls: type, row: Dict[str, Any]) -> Any:
+    """Validated ``deferred_class(model_cls)`` instance for a raw dict row."""
+    cls = deferred_class(model_cls)
+    obj = cls.__new__(cls)
+    # The model's own __init__ and validate() with the stand-ins in place,
+    # then a single pass to park the ones nothing converted.
+    model_cls.__init__(obj, _Row(row, _FIELDS[cls]))
+    model_cls.validate(obj)
+    obj._park()
+    return obj
+
+
+def parked(obj: Any, name: str) -> Any:
+    """Raw value of attribute ``name`` if not converted yet, else None."""
+    d = getattr(obj, "__dict__", None)
+    if not d:
+        return None
+    return d.get(PARKED, {}).get(name)
+
+
+def iso_datetimes(txs: Sequence[Any], sep: str = "T", timespec: str = "auto") -> List[str]:
+    """``t.datetime.isoformat(sep, timespec)`` for every transaction in ``txs``.
+
+    Raw dates still parked are converted in one vectorised call; anything
+    else (converted already, plain models, columnar views) per row.
+    """
+    raw = np.array([parked(t, "datetime") for t in txs], dtype=np.float64)
+    out = to_isoformat(raw, sep=sep, timespec=timespec)
+    for i in np.flatnonzero(np.isnan(raw)):
+        out[i] = txs[i].datetime.isoformat(sep=sep, timespec=timespec)
+    return out
+
+
+for _cls in TransactionManager().ents.values():
+    deferred_class(_cls)
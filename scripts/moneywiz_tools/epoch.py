@@ -0,0 +1,143 @@
+"""Vectorised Apple-epoch conversions for NumPy columns.
+
+``ZDATE1`` and friends are seconds since 2001-01-01. ``moneywiz_api.utils``
+turns one value at a time into a naive local ``datetime``
+(``datetime.fromtimestamp(value + _CUTOFF)``); these helpers produce the same
+wall-clock values for whole arrays, calling ``time.localtime`` once per
+distinct day rather than once per row. ``to_datetimes``/``to_isoformat``
+round to microseconds exactly as ``fromtimestamp`` does.
+"""
+from __future__ import annotations
+
+import time
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+# Same reference as moneywiz_api.utils._CUTOFF (2001-01-01 00:00 local time).
+CUTOFF = datetime(2001, 1, 1, 0, 0, 0).timestamp()
+
+PERIODS = ("day", "week", "month", "quarter", "year", "all")
+
+_DAY = 86400
+
+
+def _utcoffset(ts: float) -> int:
+    return time.localtime(ts).tm_gmtoff
+
+
+def local_seconds(values: np.ndarray) -> np.ndarray:
+    """Apple-epoch floats -> int64 local wall-clock seconds since 1970-01-01.
+
+    ``local_seconds(v) // 86400`` is the day number of
+    ``get_datetime(v).date()``; NaN inputs are treated as 0.
+    """
+    unix = np.floor(np.nan_to_num(np.asarray(values, dtype=np.float64)) + CUTOFF).astype(np.int64)
+    return _to_local(unix)
+
+
+def _to_local(unix: np.ndarray) -> np.ndarray:
+    """int64 Unix seconds -> int64 local wall-clock seconds."""
+    if not len(unix):
+        return unix
+    days = unix // _DAY
+    uniq, inverse = np.unique(days, return_inverse=True)
+    # Offset at the start of each day and of the day after; consecutive days
+    # share the probe, so a dense range costs about one localtime() per day.
+    probes = np.union1d(uniq, uniq + 1)
+    at = np.fromiter((_utcoffset(int(d) * _DAY) for d in probes), dtype=np.int64, count=len(probes))
+    start = at[np.searchsorted(probes, uniq)]
+    end = at[np.searchsorted(probes, uniq + 1)]
+    offsets = start[inverse.reshape(-1)]
+    # Days containing an offset change (DST): resolve those rows one by one.
+    for i in np.flatnonzero((start != end)[inverse.reshape(-1)]):
+        offsets[i] = _utcoffset(int(unix[i]))
+    return unix + offsets
+
+
+def _local_us(values: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Local wall-clock microseconds since 1970 and the NaN mask."""
+    ts = np.asarray(values, dtype=np.float64) + CUTOFF
+    missing = np.isnan(ts)
+    # fromtimestamp(): modf(), fraction * 1e6 rounded half-even, carry.
+    frac, whole = np.modf(np.where(missing, 0.0, ts))
+    us = np.rint(frac * 1e6)
+    whole = whole + (us >= 1e6) - (us < 0)
+    us = np.where(us >= 1e6, us - 1e6, np.where(us < 0, us + 1e6, us))
+    local = _to_local(whole.astype(np.int64))
+    return local * 1_000_000 + us.astype(np.int64), missing
+
+
+def to_datetimes(values: np.ndarray) -> list[datetime | None]:
+    """Apple-epoch floats -> naive local datetimes, equal to
+    ``get_datetime(v)`` for every ``v``; NaN gives None."""
+    stamps, missing = _local_us(values)
+    out = stamps.astype("datetime64[us]").astype(object).tolist()
+    for i in np.flatnonzero(missing):
+        out[i] = None
+    return out
+
+
+def to_isoformat(values: np.ndarray, sep: str = "T", timespec: str = "auto") -> list[str | None]:
+    """Apple-epoch floats -> ``get_datetime(v).isoformat(sep, timespec)``.
+
+    ``timespec`` is ``auto``, ``seconds`` or ``microseconds``; NaN gives None.
+    """
+    if timespec not in ("auto", "seconds", "microseconds"):
+        raise ValueError(f"Unknown timespec value: {timespec}")
+    stamps, missing = _local_us(values)
+    stamps = stamps.astype("datetime64[us]")
+    if timespec == "seconds":
+        text = np.datetime_as_string(stamps.astype("datetime64[s]"), unit="s")
+    else:
+        text = np.datetime_as_string(stamps, unit="us")
+        if timespec == "auto":
+            # isoformat() drops a zero fraction.
+            whole = stamps.astype(np.int64) % 1_000_000 == 0
+            text = np.where(whole, text.astype("U19"), text)
+    if sep != "T" and len(sep) == 1 and len(text):
+        # Fixed-width strings: overwrite the 'T' column in place.
+        text = np.ascontiguousarray(text)
+        chars = text.view("U1").reshape(len(text), -1)
+        chars[:, 10] = sep
+    out = text.tolist()
+    if sep != "T" and len(sep) != 1:
+        out = [t[:10] + sep + t[11:] for t in out]
+    for i in np.flatnonzero(missing):
+        out[i] = None
+    return out
+
+
+def period_keys(local: np.ndarray, period: str) -> np.ndarray:
+    """int64 bucket per row of ``local_seconds()`` output; see ``period_label``."""
+    days = local // _DAY
+    if period == "day":
+        return days
+    if period == "week":
+        # 1970-01-01 was a Thursday; weeks start on Monday.
+        return days - (days + 3) % 7
+    if period == "all":
+        return np.zeros_like(days)
+    months = days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+    if period == "month":
+        return months
+    if period == "quarter":
+        return months // 3
+    if period == "year":
+        return months // 12
+    raise ValueError(f"Unknown period '{period}' (expected one of {', '.join(PERIODS)})")
+
+
+def period_label(key: int, period: str) -> str:
+    if period == "day":
+        return (date(1970, 1, 1) + timedelta(days=int(key))).isoformat()
+    if period == "week":
+        year, week, _ = (date(1970, 1, 1) + timedelta(days=int(key))).isocalendar()
+        return f"{year}-W{week:02d}"
+    if period == "month":
+        return f"{1970 + key // 12}-{key % 12 + 1:02d}"
+    if period == "quarter":
+        return f"{1970 + key // 4}-Q{key % 4 + 1}"
+    if period == "year":
+        return str(1970 + key)
+    return "all"
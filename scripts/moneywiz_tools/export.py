@@ -0,0 +1,218 @@
+"""Partitioned transaction export, one file per partition.
+
+``plan()`` splits the selected transactions by account or by account owner
+(``ZUSER`` of the account row), optionally further by local calendar year,
+using one grouped query over ``ZSYNCOBJECT`` (plus ``ZDATE1`` for the years),
+so the row count of every partition is known up front.
+
+``export_partition()`` writes one partition and is what the
+``ProcessPoolExecutor`` workers of ``export.py`` run: each worker process
+opens its own read-only connection (``shared_connection()`` is per process,
+and dropped in forked children), streams its ``ZACCOUNT2`` slice oldest
+first with ``query_batches(accounts=...)`` and writes CSV or NDJSON through
+``output.write_rows`` (Parquet through ``pyarrow``, when installed) into a
+temporary file that is renamed into place when complete.
+"""
+from __future__ import annotations
+
+import itertools
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+import numpy as np
+
+from moneywiz_api.types import ID
+
+from moneywiz_tools.accessor import ToolsAccessor
+from moneywiz_tools.deferred import iso_datetimes
+from moneywiz_tools.epoch import local_seconds, period_keys, period_label
+from moneywiz_tools.lazy import open_api
+from moneywiz_tools.output import cell, write_rows
+
+FORMATS = ("csv", "ndjson", "parquet")
+PARTITIONS = ("account", "user")
+
+COLUMNS = ["id", "datetime", "account", "account_name", "payee", "payee_name", "amount", "description"]
+
+# Rows per Parquet row group write.
+_PARQUET_ROWS = 4096
+
+
+@dataclass(frozen=True)
+class Partition:
+    """One output file: the transactions of ``accounts`` between the bounds."""
+
+    name: str
+    accounts: Tuple[ID, ...]
+    since: datetime | None
+    until: datetime | None
+    rows: int
+
+
+@dataclass(frozen=True)
+class Result:
+    partition: str
+    path: str
+    rows: int
+    seconds: float
+    pid: int
+
+
+def parquet_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def plan(
+    accessor: ToolsAccessor,
+    typenames: Sequence[str],
+    by: str = "account",
+    per_year: bool = False,
+    accounts: Sequence[ID] | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+) -> List[Partition]:
+    """Partitions of the matching transactions, largest first.
+
+    Transactions without an account (or, with ``per_year``, without a date)
+    are not exported.
+    """
+    if by not in PARTITIONS:
+        raise ValueError(f"Unknown partitioning '{by}' (expected one of {', '.join(PARTITIONS)})")
+    where, params = accessor.transactions_where(typenames, since=since, until=until, accounts=accounts)
+    where += " AND ZACCOUNT2 IS NOT NULL"
+    con = accessor.connection
+    counts: Dict[Tuple[ID, int | None], int] = {}
+    if per_year:
+        where += " AND ZDATE1 IS NOT NULL"
+        data = np.array(
+            con.execute(f"SELECT ZACCOUNT2, ZDATE1 FROM ZSYNCOBJECT WHERE {where}", params).fetchall(),
+            dtype=np.float64,
+        ).reshape(-1, 2)
+        years = period_keys(local_seconds(data[:, 1]), "year")
+        pairs, n = np.unique(np.stack([data[:, 0].astype(np.int64), years], axis=1), axis=0, return_counts=True)
+        for (account, year), c in zip(pairs.tolist(), n.tolist()):
+            counts[(account, int(period_label(year, "year")))] = c
+    else:
+        sql = f"SELECT ZACCOUNT2, COUNT(*) FROM ZSYNCOBJECT WHERE {where} GROUP BY ZACCOUNT2"
+        for account, c in con.execute(sql, params):
+            counts[(account, None)] = c
+
+    groups: Dict[Tuple[Any, int | None], List[ID]] = {}
+    sizes: Dict[Tuple[Any, int | None], int] = {}
+    owner: Dict[ID, Any] = {}
+    if by == "user":
+        ids = sorted({a for a, _ in counts})
+        owner = dict(
+            con.execute(
+                f"SELECT Z_PK, ZUSER FROM ZSYNCOBJECT WHERE Z_PK IN ({','.join('?' * len(ids))})", ids
+            )
+        )
+    for (account, year), c in sorted(counts.items()):
+        key = (owner.get(account) if by == "user" else account, year)
+        groups.setdefault(key, []).append(account)
+        sizes[key] = sizes.get(key, 0) + c
+
+    parts = []
+    for (key, year), members in groups.items():
+        lo, hi = since, until
+        name = f"{by}-{key if key is not None else 'none'}"
+        if year is not None:
+            name += f"-{year}"
+            lo = max(lo, datetime(year, 1, 1)) if lo else datetime(year, 1, 1)
+            end = datetime(year, 12, 31, 23, 59, 59, 999999)
+            hi = min(hi, end) if hi else end
+        parts.append(Partition(name, tuple(members), lo, hi, sizes[(key, year)]))
+    # Longest first, so the pool is not left waiting on one big file at the end.
+    parts.sort(key=lambda p: (-p.rows, p.name))
+    return parts
+
+
+def _rows(api: Any, part: Partition, typenames: Sequence[str], categories: bool, tags: bool) -> Iterator[dict]:
+    tm = api.transaction_manager
+    batches = tm.query_batches(
+        accounts=part.accounts,
+        since=part.since,
+        until=part.until,
+        typenames=typenames,
+        newest_first=False,
+    )
+    for txs in batches:
+        related = tm.prefetch([t.id for t in txs], categories=categories, tags=tags, refunds=False)
+        when = iso_datetimes(txs, sep=" ", timespec="seconds")
+        for t, w in zip(txs, when):
+            item = {
+                "id": t.id,
+                "datetime": w,
+                "account": getattr(t, "account", None),
+                "account_name": related.account_name.get(t.id),
+                "payee": getattr(t, "payee", None),
+                "payee_name": related.payee_name.get(t.id),
+                "amount": str(t.amount),
+                "description": t.description,
+            }
+            if categories:
+                item["categories"] = [
+                    {"category_id": cid, "amount": str(amt)} for cid, amt in related.categories.get(t.id, [])
+                ]
+            if tags:
+                item["tags"] = related.tags.get(t.id, [])
+            yield item
+
+
+def _write_parquet(rows: Iterator[dict], columns: List[str], path: Path) -> int:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    ints = {"id", "account", "payee"}
+    schema = pa.schema([(c, pa.int64() if c in ints else pa.string()) for c in columns])
+    n = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        for chunk in iter(lambda: list(itertools.islice(rows, _PARQUET_ROWS)), []):
+            # Lists (categories, tags) as the same JSON text as in CSV cells.
+            data = {
+                c: [r.get(c) if c in ints else (None if r.get(c) is None else cell(r[c])) for r in chunk]
+                for c in columns
+            }
+            writer.write_table(pa.Table.from_pydict(data, schema=schema))
+            n += len(chunk)
+    return n
+
+
+def export_partition(
+    db_path: str,
+    part: Partition,
+    out_dir: str,
+    fmt: str,
+    typenames: Sequence[str],
+    categories: bool = False,
+    tags: bool = False,
+) -> Result:
+    """Write ``part`` to ``out_dir/<name>.<fmt>``; runs in a worker process."""
+    started = time.perf_counter()
+    api = open_api(db_path)
+    columns = list(COLUMNS)
+    if categories:
+        columns.append("categories")
+    if tags:
+        columns.append("tags")
+    path = Path(out_dir) / f"{part.name}.{fmt}"
+    tmp = path.with_name(path.name + ".tmp")
+    rows = _rows(api, part, typenames, categories, tags)
+    try:
+        if fmt == "parquet":
+            n = _write_parquet(rows, columns, tmp)
+        else:
+            with open(tmp, "w", encoding="utf-8", newline="") as fh:
+                n = write_rows(fmt, rows, columns, out=fh, ensure_ascii=False)
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
+    return Result(part.name, str(path), n, time.perf_counter() - started, os.getpid())
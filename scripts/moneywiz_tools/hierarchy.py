@@ -0,0 +1,125 @@
+"""Category hierarchy flattened once into closure and nested-set form.
+
+``CategoryManager.get_name_chain()`` walks ``ZPARENTCATEGORY`` on every call,
+so anything that resolves many categories (``categories --full-name``,
+roll-ups to top-level categories) repeats the same walks. ``CategoryTree``
+does one depth-first pass over the forest and keeps, per category:
+
+- ``depth`` (0 for top-level categories) and ``path`` (names, root first)
+- ``ancestors`` (ids, root first): the closure table, one row per category
+- ``pre``/``post``: pre- and post-order numbers. ``order[pre]`` is the
+  category and its descendants are the contiguous slice that follows it, so
+  "all descendants of X" is a range and ``a`` contains ``d`` exactly when
+  ``pre[a] < pre[d]`` and ``post[d] < post[a]``.
+
+Siblings are ordered by name, then id. A parent id that is not a known
+category makes its child a top-level category; a parent cycle is broken at
+its lowest id, which becomes top-level.
+"""
+from __future__ import annotations
+
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+from moneywiz_api.model.category import Category
+from moneywiz_api.types import ID
+
+
+class CategoryTree:
+    def __init__(self, categories: Iterable[Category]) -> None:
+        cats = {c.id: c for c in categories}
+        children: Dict[Optional[ID], List[ID]] = {}
+        for c in cats.values():
+            parent = c.parent_id if c.parent_id in cats and c.parent_id != c.id else None
+            children.setdefault(parent, []).append(c.id)
+        for ids in children.values():
+            ids.sort(key=lambda i: (cats[i].name or "", i))
+
+        self.parent: Dict[ID, Optional[ID]] = {}
+        self.depth: Dict[ID, int] = {}
+        self.path: Dict[ID, Tuple[str, ...]] = {}
+        self.ancestors: Dict[ID, Tuple[ID, ...]] = {}
+        self.pre: Dict[ID, int] = {}
+        self.post: Dict[ID, int] = {}
+        self.order: List[ID] = []
+        self._end: List[int] = []  # _end[pre[x]]: one past x's last descendant in order
+
+        roots = list(children.get(None, ()))
+        while True:
+            for root in roots:
+                self._visit(root, cats, children)
+            # Categories left over only sit on parent cycles.
+            rest = [i for i in cats if i not in self.pre]
+            if not rest:
+                break
+            root = min(rest)
+            children[cats[root].parent_id].remove(root)
+            roots = [root]
+
+    def _visit(self, root: ID, cats: Mapping[ID, Category], children: Mapping[Optional[ID], List[ID]]) -> None:
+        post = len(self.post)
+        stack: List[Tuple[ID, Optional[ID], bool]] = [(root, None, False)]
+        while stack:
+            node, parent, done = stack.pop()
+            if done:
+                self._end[self.pre[node]] = len(self.order)
+                self.post[node] = post
+                post += 1
+                continue
+            self.parent[node] = parent
+            if parent is None:
+                self.depth[node] = 0
+                self.path[node] = (cats[node].name,)
+                self.ancestors[node] = ()
+            else:
+                self.depth[node] = self.depth[parent] + 1
+                self.path[node] = self.path[parent] + (cats[node].name,)
+                self.ancestors[node] = self.ancestors[parent] + (parent,)
+            self.pre[node] = len(self.order)
+            self.order.append(node)
+            self._end.append(0)
+            stack.append((node, parent, True))
+            stack.extend((child, node, False) for child in reversed(children.get(node, ())))
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def __contains__(self, category_id: object) -> bool:
+        return category_id in self.pre
+
+    def name_chain(self, category_id: ID) -> List[str]:
+        """Names from the top-level category down; ``[]`` for unknown ids."""
+        return list(self.path.get(category_id, ()))
+
+    def path_string(self, category_id: ID, sep: str = "/") -> str:
+        return sep.join(self.path.get(category_id, ()))
+
+    def root(self, category_id: ID) -> ID:
+        """Top-level category containing ``category_id`` (itself if top-level)."""
+        ancestors = self.ancestors[category_id]
+        return ancestors[0] if ancestors else category_id
+
+    def descendants(self, category_id: ID, include_self: bool = False) -> List[ID]:
+        """Every category below ``category_id``, in pre-order."""
+        start = self.pre[category_id]
+        return self.order[start if include_self else start + 1 : self._end[start]]
+
+    def is_descendant(self, category_id: ID, ancestor_id: ID) -> bool:
+        return self.pre[ancestor_id] < self.pre[category_id] and self.post[category_id] < self.post[ancestor_id]
+
+    def closure(self) -> Iterator[Tuple[ID, ID, int]]:
+        """(ancestor, descendant, distance) rows, including (x, x, 0)."""
+        for node in self.order:
+            chain = self.ancestors[node] + (node,)
+            for distance, ancestor in enumerate(reversed(chain)):
+                yield ancestor, node, distance
+
+    def rollup(self, values: Mapping[ID, int | float]) -> Dict[ID, int | float]:
+        """Subtree totals: each category's own value plus all its descendants'.
+
+        One prefix sum over the pre-order, then one subtraction per category.
+        Ids in ``values`` that are not categories are ignored.
+        """
+        prefix = [0]
+        for node in self.order:
+            prefix.append(prefix[-1] + values.get(node, 0))
+        return {node: prefix[self._end[i]] - prefix[i] for i, node in enumerate(self.order)}
@@ -0,0 +1,342 @@
+"""Lazy, per-entity loading for the MoneyWiz API.
+
+``MoneywizApi()`` loads every manager up front, which means parsing every
+transaction even when a command only lists tags. ``LazyMoneywizApi`` exposes
+the same attributes (``accessor``, ``account_manager``, ``payee_manager``, ...)
+but each manager reads its own ``Z_ENT`` slice of ``ZSYNCOBJECT`` the first
+time its records are needed. Loaded state is snapshotted to disk (see
+``moneywiz_tools.cache``) and reused while the database is unchanged.
+"""
+from __future__ import annotations
+
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Sequence
+
+from moneywiz_api.database_accessor import DatabaseAccessor
+from moneywiz_api.managers.account_manager import AccountManager
+from moneywiz_api.managers.category_manager import CategoryManager
+from moneywiz_api.managers.investment_holding_manager import InvestmentHoldingManager
+from moneywiz_api.managers.payee_manager import PayeeManager
+from moneywiz_api.managers.tag_manager import TagManager
+from moneywiz_api.managers.transaction_manager import TransactionManager
+from moneywiz_api.model.transaction import Transaction
+from moneywiz_api.types import ID
+
+from moneywiz_tools.accessor import ToolsAccessor, TransactionRelations
+from moneywiz_tools.cache import SnapshotCache, cache_enabled
+from moneywiz_tools.changes import ChangeFeed
+from moneywiz_tools.deferred import build as build_model
+from moneywiz_tools.hierarchy import CategoryTree
+from moneywiz_tools.trace import phase
+from moneywiz_tools.txstore import TransactionStore, store_default
+
+# get_all()/get_all_for_account() skip budget transfers; query() does the same
+# unless typenames are given explicitly.
+LISTED_EXCLUDED_TYPENAMES: tuple[str, ...] = ("TransferBudgetTransaction",)
+
+
+class _LazyLoadMixin:
+    """Defer ``RecordManager.load()`` until records are first requested."""
+
+    snapshot_name: str
+
+    def __init__(self, accessor: DatabaseAccessor, cache: SnapshotCache | None = None) -> None:
+        super().__init__()
+        self._accessor = accessor
+        self._cache = cache
+        self._loaded = False
+
+    def ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        with phase("cache"):
+            restored = self._cache is not None and self._cache.restore(self.snapshot_name, self)
+        if not restored:
+            with phase("parse"):
+                self.load(self._accessor)
+            if self._cache is not None:
+                try:
+                    with phase("cache"):
+                        self._cache.store(self.snapshot_name, self)
+                except OSError:
+                    # An unwritable cache dir only costs the next run a reload.
+                    pass
+        self._loaded = True
+
+    def records(self):
+        self.ensure_loaded()
+        return super().records()
+
+    def get(self, record_id: ID):
+        self.ensure_loaded()
+        return super().get(record_id)
+
+    def get_by_gid(self, gid: str):
+        self.ensure_loaded()
+        return super().get_by_gid(gid)
+
+
+class LazyAccountManager(_LazyLoadMixin, AccountManager):
+    snapshot_name = "account"
+
+
+class LazyPayeeManager(_LazyLoadMixin, PayeeManager):
+    snapshot_name = "payee"
+
+
+class LazyCategoryManager(_LazyLoadMixin, CategoryManager):
+    """Categories plus a ``CategoryTree`` built once, on first use."""
+
+    snapshot_name = "category"
+
+    def __init__(self, accessor: DatabaseAccessor, cache: SnapshotCache | None = None) -> None:
+        super().__init__(accessor, cache)
+        self._tree: CategoryTree | None = None
+
+    def tree(self) -> CategoryTree:
+        """Depth, path, closure and pre/post-order numbers (see ``hierarchy.py``)."""
+        if self._tree is None:
+            records = self.records().values()
+            with phase("enrich"):
+                self._tree = CategoryTree(records)
+        return self._tree
+
+    def get_name_chain(self, category_id: ID) -> list[str]:
+        return self.tree().name_chain(category_id)
+
+    def get_descendants(self, category_id: ID, include_self: bool = False) -> list[ID]:
+        return self.tree().descendants(category_id, include_self=include_self)
+
+
+class LazyTagManager(_LazyLoadMixin, TagManager):
+    snapshot_name = "tag"
+
+
+class LazyInvestmentHoldingManager(_LazyLoadMixin, InvestmentHoldingManager):
+    snapshot_name = "investment_holding"
+
+
+class LazyTransactionManager(_LazyLoadMixin, TransactionManager):
+    """Transactions plus relationship maps, each loaded on first use.
+
+    Category/tag/refund lookups only read their auxiliary tables; they do not
+    force every transaction row to be parsed. Models are built with
+    ``deferred.build()``: dates and amounts convert on first access.
+
+    ``store="columnar"`` (default: ``MONEYWIZ_TRANSACTION_STORE``) keeps the
+    loaded records in a ``TransactionStore`` instead of one model per row;
+    ``records()`` then maps ids to slotted views (see ``txstore.py``).
+    """
+
+    snapshot_name = "transaction"
+    _accessor: ToolsAccessor
+
+    def __init__(
+        self, accessor: ToolsAccessor, cache: SnapshotCache | None = None, store: str | None = None
+    ) -> None:
+        super().__init__(accessor, cache)
+        self._relationships_loaded = False
+        self.columnar = (store or store_default()) == "columnar"
+        if self.columnar:
+            self.snapshot_name = "transaction-columnar"
+
+    def load(self, db_accessor: DatabaseAccessor) -> None:
+        # TransactionManager.load(), with deferred models (see deferred.py) or
+        # the columnar store.
+        if self.columnar:
+            self._records = TransactionStore.load(db_accessor, self.ents)
+            self._gid_to_id = {}
+        else:
+            ents = self.ents
+            for record in db_accessor.query_objects(list(ents)):
+                typename = db_accessor.typename_for(record["Z_ENT"])
+                assert typename in ents, f"Unknown typename {typename} for record {record}"
+                self.add(build_model(ents[typename], record))
+        self.category_assignment = db_accessor.get_category_assignment()
+        self.refund_maps = db_accessor.get_refund_maps()
+        self.tags_map = db_accessor.get_tags_map()
+        self._relationships_loaded = True
+
+    def get_by_gid(self, gid: str):
+        self.ensure_loaded()
+        if self.columnar:
+            record_id = self._records.id_for_gid(gid)
+            return None if record_id is None else self._records.get(record_id)
+        return super().get_by_gid(gid)
+
+    def ensure_relationships(self) -> None:
+        if self._relationships_loaded:
+            return
+        with phase("enrich"):
+            self.category_assignment = self._accessor.get_category_assignment()
+            self.refund_maps = self._accessor.get_refund_maps()
+            self.tags_map = self._accessor.get_tags_map()
+        self._relationships_loaded = True
+
+    def category_for_transaction(self, transaction_id: ID):
+        self.ensure_relationships()
+        return super().category_for_transaction(transaction_id)
+
+    def tags_for_transaction(self, transaction_id: ID):
+        self.ensure_relationships()
+        return super().tags_for_transaction(transaction_id)
+
+    def original_transaction_for_refund_transaction(self, transaction_id: ID):
+        self.ensure_relationships()
+        return super().original_transaction_for_refund_transaction(transaction_id)
+
+    def listed_typenames(self) -> list[str]:
+        return [t for t in self.ents if t not in LISTED_EXCLUDED_TYPENAMES]
+
+    def query(
+        self,
+        account: ID | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        typenames: Sequence[str] | None = None,
+        limit: int | None = None,
+        newest_first: bool = True,
+        accounts: Sequence[ID] | None = None,
+        ids: Sequence[ID] | None = None,
+    ) -> list[Transaction]:
+        """Filtered transactions, newest first by default.
+
+        Filtering, ordering and ``limit`` run in SQLite, and models are built
+        only for the rows returned, so ``query(limit=20)`` does not depend on
+        the size of the history. Already-loaded models are reused.
+        ``accounts`` keeps the rows of any of several accounts, ``ids`` only
+        the given transactions.
+        """
+        with phase("load"):
+            rows = self._accessor.query_transactions(
+                list(typenames or self.listed_typenames()),
+                account=account,
+                since=since,
+                until=until,
+                limit=limit,
+                newest_first=newest_first,
+                accounts=accounts,
+                ids=ids,
+            )
+        with phase("parse"):
+            return [self.build(row) for row in rows]
+
+    def query_batches(
+        self,
+        account: ID | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        typenames: Sequence[str] | None = None,
+        limit: int | None = None,
+        newest_first: bool = True,
+        accounts: Sequence[ID] | None = None,
+        ids: Sequence[ID] | None = None,
+        batch_size: int = 256,
+    ) -> Iterator[list[Transaction]]:
+        """``query()`` as a stream of model batches read from an open cursor.
+
+        Only one batch of rows and models is alive at a time, so callers that
+        write each batch out before asking for the next run in bounded memory.
+        """
+        for rows in self._accessor.iter_transactions(
+            list(typenames or self.listed_typenames()),
+            batch_size=batch_size,
+            account=account,
+            since=since,
+            until=until,
+            limit=limit,
+            newest_first=newest_first,
+            accounts=accounts,
+            ids=ids,
+        ):
+            with phase("parse"):
+                batch = [self.build(row) for row in rows]
+            yield batch
+
+    def prefetch(self, ids: Iterable[ID], **kinds: bool) -> TransactionRelations:
+        """Account/payee names, splits, tags and refund links for ``ids``.
+
+        Costs a constant number of queries regardless of ``len(ids)``, and
+        does not load the full relationship maps. ``kinds`` (``names``,
+        ``categories``, ``tags``, ``refunds``) can switch parts off.
+        """
+        with phase("enrich"):
+            return self._accessor.transaction_relations(ids, **kinds)
+
+    def build(self, row: Any) -> Transaction:
+        # A columnar view would read ``_raw`` back; the row is already here.
+        if self._loaded and not self.columnar:
+            existing = self._records.get(row["Z_PK"])
+            if existing is not None:
+                return existing
+        return build_model(self.ents[self._accessor.typename_for(row["Z_ENT"])], row)
+
+
+class LazyMoneywizApi:
+    """Drop-in replacement for ``MoneywizApi`` in read-only scripts."""
+
+    def __init__(
+        self, db_file: Path | str, cache: bool | None = None, transaction_store: str | None = None
+    ) -> None:
+        self.db_path = Path(db_file).resolve()
+        with phase("connect"):
+            self.accessor = ToolsAccessor(db_file)
+        if cache is None:
+            cache = cache_enabled()
+        self.cache = SnapshotCache(db_file, self.accessor) if cache else None
+        self.account_manager = LazyAccountManager(self.accessor, self.cache)
+        self.payee_manager = LazyPayeeManager(self.accessor, self.cache)
+        self.category_manager = LazyCategoryManager(self.accessor, self.cache)
+        self.transaction_manager = LazyTransactionManager(self.accessor, self.cache, transaction_store)
+        self.investment_holding_manager = LazyInvestmentHoldingManager(self.accessor, self.cache)
+        self.tag_manager = LazyTagManager(self.accessor, self.cache)
+
+    def managers(self) -> dict[str, Any]:
+        return {
+            "account": self.account_manager,
+            "payee": self.payee_manager,
+            "category": self.category_manager,
+            "transaction": self.transaction_manager,
+            "investment_holding": self.investment_holding_manager,
+            "tag": self.tag_manager,
+        }
+
+    def load(self) -> None:
+        """Load every manager eagerly (same end state as ``MoneywizApi()``)."""
+        for manager in self.managers().values():
+            manager.ensure_loaded()
+
+    def changes(self, checkpoint: Path | str | None = None) -> ChangeFeed:
+        """Change feed for this DB against ``checkpoint`` (see ``changes.py``)."""
+        return ChangeFeed(self.db_path, checkpoint)
+
+
+# APIs kept warm by the resident server (scripts/server.py), by resolved path.
+_WARM: dict[Path, LazyMoneywizApi] = {}
+
+
+def register_warm(api: LazyMoneywizApi) -> None:
+    """Make ``open_api()`` return ``api`` for its DB in this process."""
+    _WARM[api.db_path] = api
+
+
+def unregister_warm(api: LazyMoneywizApi) -> None:
+    if _WARM.get(api.db_path) is api:
+        del _WARM[api.db_path]
+
+
+def open_api(
+    db_file: Path | str, cache: bool | None = None, transaction_store: str | None = None
+) -> LazyMoneywizApi:
+    """Open a MoneyWiz DB for reading; managers load on first access.
+
+    ``cache`` defaults to on unless ``MONEYWIZ_NO_CACHE`` is set;
+    ``transaction_store`` (``models``/``columnar``) to
+    ``MONEYWIZ_TRANSACTION_STORE``. Inside the resident server the
+    already-loaded API for ``db_file`` is returned.
+    """
+    warm = _WARM.get(Path(db_file).resolve())
+    if warm is not None:
+        return warm
+    return LazyMoneywizApi(db_file, cache=cache, transaction_store=transaction_store)
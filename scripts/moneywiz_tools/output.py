@@ -0,0 +1,201 @@
+"""Row output shared by the read scripts.
+
+Every listing is an iterable of dicts written in one of ``FORMATS``:
+
+- ``tsv``: header line, then tab-separated cells (the scripts' classic output)
+- ``table``: the same cells in fixed-width columns under a dashed rule
+- ``csv``: header row, then RFC 4180 rows
+- ``json``: one array, byte-identical to ``json.dumps(rows, indent=2)``
+- ``ndjson``: one JSON object per line
+
+Rows are consumed as they arrive and stdout is flushed every
+``FLUSH_ROWS`` rows, so a long listing starts printing straight away and
+only the rows in flight are kept in memory. The one exception is the column
+widths of ``table``: by default they come from the first ``SAMPLE_ROWS``
+rows (exact for anything shorter; a longer cell further down just pushes its
+line out), and ``--table-widths spool`` makes them exact by writing the
+cells to a temporary file and printing them on a second pass.
+
+Cells are ``""`` for None, compact JSON for lists and dicts and ``str()``
+otherwise. ``run(main)`` is the scripts' ``__main__`` wrapper: a reader that
+goes away early (``| head``) ends the command quietly with status 0.
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+import tempfile
+from typing import IO, Any, Callable, Dict, Iterable, Iterator, List, NoReturn, Sequence, Union
+
+FORMATS = ("table", "tsv", "csv", "json", "ndjson")
+WIDTHS = ("sample", "spool")
+
+# Rows used to size the table columns in "sample" mode.
+SAMPLE_ROWS = 1000
+# Rows written between flushes.
+FLUSH_ROWS = 256
+
+# Column names, or a function from the set of keys seen in the rows to them.
+Headers = Union[Sequence[str], Callable[[set], List[str]]]
+
+
+def add_format_argument(
+    ap: argparse.ArgumentParser,
+    default: str = "tsv",
+    choices: Sequence[str] = FORMATS,
+    help: str | None = None,
+) -> None:
+    """Add ``--format`` (and ``--table-widths`` when ``table`` is offered)."""
+    ap.add_argument("--format", choices=list(choices), default=default, help=help)
+    if "table" in choices:
+        ap.add_argument(
+            "--table-widths",
+            choices=WIDTHS,
+            default="sample",
+            help=f"Size table columns from the first {SAMPLE_ROWS} rows (default) or from "
+            "every row via a temporary file (exact, prints once all rows are read)",
+        )
+
+
+def cell(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, (list, dict)):
+        return json.dumps(value)
+    return str(value)
+
+
+def write_rows(
+    fmt: str,
+    rows: Iterable[Dict[str, Any]],
+    headers: Headers | None = None,
+    out: IO[str] | None = None,
+    ensure_ascii: bool = True,
+    widths: str = "sample",
+) -> int:
+    """Write ``rows`` to ``out`` (default stdout) in ``fmt``; return the row count.
+
+    ``headers`` picks and orders the columns of ``table``/``tsv``/``csv``
+    (``json``/``ndjson`` always write whole rows). When it is a function, it
+    is given the keys of the leading rows (all rows with ``widths="spool"``)
+    and returns the columns; when None, the keys are used in first-seen order.
+    """
+    out = sys.stdout if out is None else out
+    if fmt == "json":
+        return _json(rows, out, ensure_ascii)
+    if fmt == "ndjson":
+        return _ndjson(rows, out, ensure_ascii)
+    if fmt == "table" and widths == "spool":
+        return _spooled_table(rows, headers, out)
+    if fmt not in ("table", "tsv", "csv"):
+        raise ValueError(f"unknown format {fmt!r}")
+    rows = iter(rows)
+    head = list(itertools.islice(rows, SAMPLE_ROWS))
+    cols = _resolve(headers, head)
+    body = itertools.chain(head, rows)
+    if fmt == "csv":
+        writer = csv.writer(out, lineterminator="\n")
+        writer.writerow(cols)
+        line: Callable[[List[str]], Any] = writer.writerow
+    elif fmt == "tsv":
+        out.write("\t".join(cols) + "\n")
+        line = lambda cells: out.write("\t".join(cells) + "\n")  # noqa: E731
+    else:
+        sizes = [len(h) for h in cols]
+        for r in head:
+            for i, h in enumerate(cols):
+                sizes[i] = max(sizes[i], len(cell(r.get(h))))
+        line = _table_line(out, sizes)
+        line(cols)
+        line(["-" * len(h) for h in cols])
+    return _drain(([cell(r.get(h)) for h in cols] for r in body), line, out)
+
+
+def _resolve(headers: Headers | None, rows: Iterable[Dict[str, Any]]) -> List[str]:
+    if headers is not None and not callable(headers):
+        return list(headers)
+    seen: Dict[str, None] = {}
+    for r in rows:
+        seen.update(dict.fromkeys(r))
+    return list(seen) if headers is None else headers(set(seen))
+
+
+def _table_line(out: IO[str], sizes: List[int]) -> Callable[[List[str]], Any]:
+    def line(cells: List[str]) -> None:
+        out.write("  ".join(c.ljust(w) for c, w in zip(cells, sizes)) + "\n")
+
+    return line
+
+
+def _drain(lines: Iterator[List[str]], line: Callable[[List[str]], Any], out: IO[str]) -> int:
+    n = 0
+    for n, cells in enumerate(lines, 1):
+        line(cells)
+        if n % FLUSH_ROWS == 0:
+            out.flush()
+    out.flush()
+    return n
+
+
+def _spooled_table(rows: Iterable[Dict[str, Any]], headers: Headers | None, out: IO[str]) -> int:
+    # Pass 1 renders every cell once, keeping the widest per key; pass 2
+    # reads the cells back and pads them. Only the widths stay in memory.
+    sizes: Dict[str, int] = {}
+    with tempfile.TemporaryFile("w+", encoding="utf-8") as spool:
+        for r in rows:
+            cells = {k: cell(v) for k, v in r.items()}
+            for k, v in cells.items():
+                if len(v) > sizes.get(k, -1):
+                    sizes[k] = len(v)
+            spool.write(json.dumps(cells) + "\n")
+        if headers is None or callable(headers):
+            cols = list(sizes) if headers is None else headers(set(sizes))
+        else:
+            cols = list(headers)
+        line = _table_line(out, [max(len(h), sizes.get(h, 0)) for h in cols])
+        line(cols)
+        line(["-" * len(h) for h in cols])
+        spool.seek(0)
+        return _drain(([c.get(h, "") for h in cols] for c in map(json.loads, spool)), line, out)
+
+
+def _json(rows: Iterable[Dict[str, Any]], out: IO[str], ensure_ascii: bool) -> int:
+    # json.dumps(rows, indent=2) one element at a time: every line of an
+    # element is indented two more spaces (JSON strings never hold a raw
+    # newline, so re-indenting the dumped text is safe).
+    n = 0
+    for n, r in enumerate(rows, 1):
+        text = json.dumps(r, indent=2, ensure_ascii=ensure_ascii).replace("\n", "\n  ")
+        out.write(("[\n  " if n == 1 else ",\n  ") + text)
+        if n % FLUSH_ROWS == 0:
+            out.flush()
+    out.write("\n]\n" if n else "[]\n")
+    out.flush()
+    return n
+
+
+def _ndjson(rows: Iterable[Dict[str, Any]], out: IO[str], ensure_ascii: bool) -> int:
+    n = 0
+    for n, r in enumerate(rows, 1):
+        out.write(json.dumps(r, ensure_ascii=ensure_ascii) + "\n")
+        if n % FLUSH_ROWS == 0:
+            out.flush()
+    out.flush()
+    return n
+
+
+def run(main: Callable[[], int | None]) -> NoReturn:
+    """``raise SystemExit(main())``, ending quietly when stdout's reader has gone."""
+    try:
+        code = main()
+    except BrokenPipeError:
+        # The interpreter flushes stdout once more on exit; point it at
+        # /dev/null so that flush does not fail (and print) as well.
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        code = 0
+    raise SystemExit(code)
@@ -0,0 +1,118 @@
+"""Compact record of planned write SQL.
+
+A plan is mostly the same few statements with different parameters (one
+``UPDATE ... SET ZPAYEE2 = ?`` per transaction). ``PlanRecorder`` stores each
+SQL template once and only the parameter tuple per step, can stream steps to
+an NDJSON sink as they are produced, and summarises them per template:
+
+    {"template": 0, "sql": "UPDATE ...", "label": "update ZSYNCOBJECT.ZPAYEE2"}
+    {"t": 0, "params": [11148, 11111]}
+
+A template line is written before its first step. With a sink the steps are
+not kept in memory unless ``keep=True``.
+
+``append()`` takes any step with ``.sql`` / ``.params``; ``writes.py``
+feeds it ``WriteSession.planned`` after the session has run.
+"""
+from __future__ import annotations
+
+import json
+import re
+import sys
+from typing import IO, Any, Iterable, Iterator, NamedTuple
+
+_SQL_SHAPE = re.compile(
+    r'^\s*(?:(INSERT)\s+INTO|(UPDATE)|(DELETE)\s+FROM)\s+"?(\w+)"?(?:\s+SET\s+(.*?)\s+WHERE)?',
+    re.I | re.S,
+)
+
+
+class PlannedStep(NamedTuple):
+    sql: str
+    params: Any
+
+
+def describe(sql: str) -> str:
+    """Short label for a statement: ``update ZSYNCOBJECT.ZPAYEE2``."""
+    m = _SQL_SHAPE.match(sql)
+    if not m:
+        return " ".join(sql.split())[:60]
+    verb = (m.group(1) or m.group(2) or m.group(3)).lower()
+    table = m.group(4)
+    if m.group(5):
+        columns = ",".join(part.split("=")[0].strip() for part in m.group(5).split(","))
+        return f"{verb} {table}.{columns}"
+    return f"{verb} {table}"
+
+
+class PlanRecorder:
+    def __init__(self, out: IO[str] | None = None, keep: bool | None = None) -> None:
+        self.out = out
+        self.keep = out is None if keep is None else keep
+        self._ids: dict[str, int] = {}
+        self.sql: list[str] = []
+        self.labels: list[str] = []
+        self.counts: list[int] = []
+        self._steps: list[tuple[int, Any]] = []
+
+    def _template(self, sql: str, label: str | None) -> int:
+        tid = self._ids.get(sql)
+        if tid is None:
+            tid = self._ids[sql] = len(self.sql)
+            self.sql.append(sql)
+            self.labels.append(label or describe(sql))
+            self.counts.append(0)
+            if self.out is not None:
+                self._write({"template": tid, "sql": sql, "label": self.labels[tid]})
+        return tid
+
+    def _write(self, obj: dict[str, Any]) -> None:
+        self.out.write(json.dumps(obj, default=str) + "\n")
+
+    def record(self, sql: str, params: Any = None, label: str | None = None) -> None:
+        self.record_many(sql, [params], label)
+
+    def record_many(self, sql: str, rows: Iterable[Any], label: str | None = None) -> None:
+        """One step per parameter row of an ``executemany``."""
+        tid = self._template(sql, label)
+        n = 0
+        for params in rows:
+            n += 1
+            if self.keep:
+                self._steps.append((tid, params))
+            if self.out is not None:
+                self._write({"t": tid, "params": params})
+        self.counts[tid] += n
+        if self.out is not None:
+            self.out.flush()
+
+    def append(self, step: Any) -> None:
+        """``list.append`` for objects with ``.sql`` / ``.params``."""
+        self.record(step.sql, step.params)
+
+    def __len__(self) -> int:
+        return sum(self.counts)
+
+    def __iter__(self) -> Iterator[PlannedStep]:
+        for tid, params in self._steps:
+            yield PlannedStep(self.sql[tid], params)
+
+    def summary(self) -> list[str]:
+        """``"<count> x <label>"`` per template, in first-seen order."""
+        width = len(str(max(self.counts, default=0)))
+        return [f"{count:>{width}} x {label}" for count, label in zip(self.counts, self.labels)]
+
+
+def open_sink(path: str | None) -> IO[str] | None:
+    """``--plan-out`` target: ``-`` for stdout, else a file (truncated)."""
+    if path is None:
+        return None
+    if path == "-":
+        return sys.stdout
+    return open(path, "w", encoding="utf-8")
+
+
+def report_stream(sink: IO[str] | None) -> IO[str]:
+    """Where the human-readable report goes: stderr when the plan itself is
+    streamed to stdout (``--plan-out -``), so stdout stays pure NDJSON."""
+    return sys.stderr if sink is sys.stdout else sys.stdout
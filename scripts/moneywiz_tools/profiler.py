@@ -0,0 +1,450 @@
+"""Per-entity column and relationship profile of ``ZSYNCOBJECT``, in SQL.
+
+No models are built. For every profiled ``Z_ENT`` the ``Profiler`` reports,
+per column: the non-null count and ratio, min/max, a distinct-count
+estimate and, for low-cardinality columns, the most frequent values with
+exact counts. Relationship counts (category splits, tags, refund links)
+come from one grouped join per table.
+
+The work is three passes:
+
+1. ``Z_ENT, Z_PK`` from the ``Z_ENT`` index, keeping a seeded reservoir
+   sample of ``sample_size`` ids per entity. The sampled rows are copied to
+   a temp table.
+2. Distinct counts on the sample, as frequency profiles (how many values
+   were seen once, how many more than once), scaled up with the GEE
+   estimator ``sqrt(N/n) * f1 + sum(f2+)``; a column whose sampled values
+   are all different is taken to be unique. Entities that fit in the sample
+   get exact counts. Columns with at most ``low_cardinality`` values in the
+   sample contribute those values as top-value candidates.
+3. One grouped scan of ``ZSYNCOBJECT`` computing ``COUNT``/``MIN``/``MAX``
+   of the columns seen in the sample and an exact count for each candidate
+   value. Values never seen in the sample are counted under ``other``.
+   Columns empty in the whole sample are only tested for NULL there; in the
+   rare case one is set somewhere, a second scan aggregates them over just
+   those rows.
+
+Columns that are non-null for an entity but empty in its sample have no
+distinct estimate (``None``).
+"""
+from __future__ import annotations
+
+import json
+import math
+import random
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from moneywiz_api.managers.account_manager import AccountManager
+from moneywiz_api.managers.category_manager import CategoryManager
+from moneywiz_api.managers.investment_holding_manager import InvestmentHoldingManager
+from moneywiz_api.managers.payee_manager import PayeeManager
+from moneywiz_api.managers.tag_manager import TagManager
+from moneywiz_api.managers.transaction_manager import TransactionManager
+from moneywiz_api.model.schema_mapped_row import SchemaMappedRow
+from moneywiz_api.types import ID
+
+from moneywiz_tools.accessor import ToolsAccessor
+
+DEFAULT_SAMPLE_SIZE = 2_000
+DEFAULT_LOW_CARDINALITY = 12
+DEFAULT_TOP = 5
+
+# Result expressions per statement in pass 3 (SQLITE_MAX_COLUMN is 2000).
+_MAX_EXPRESSIONS = 900
+# Longest text/blob shown for min/max/top values.
+_MAX_VALUE_LEN = 60
+
+
+@dataclass
+class ColumnProfile:
+    column: str
+    field: Optional[str]  # model field reading this column, if any
+    non_null: int
+    ratio: float
+    distinct: Optional[int]
+    distinct_exact: bool
+    min: Any
+    max: Any
+    top: List[Tuple[Any, int]] = field(default_factory=list)  # low-cardinality columns only
+    other: int = 0  # non-null rows whose value is not in ``top``
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "column": self.column,
+            "field": self.field,
+            "non_null": self.non_null,
+            "ratio": round(self.ratio, 4),
+            "distinct": self.distinct,
+            "distinct_exact": self.distinct_exact,
+            "min": display_value(self.min),
+            "max": display_value(self.max),
+            "top": [[display_value(v), n] for v, n in self.top],
+            "other": self.other,
+        }
+
+
+@dataclass
+class EntityProfile:
+    typename: str
+    ent: int
+    rows: int
+    sampled: int
+    columns: List[ColumnProfile] = field(default_factory=list)  # non-null columns only
+    empty_columns: int = 0
+    relationships: Dict[str, int] = field(default_factory=dict)
+    samples: List[Dict[str, Any]] = field(default_factory=list)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "ent": self.ent,
+            "rows": self.rows,
+            "sampled": self.sampled,
+            "empty_columns": self.empty_columns,
+            "relationships": self.relationships,
+            "columns": [c.as_dict() for c in self.columns],
+        }
+
+
+def display_value(value: Any) -> Any:
+    """JSON-friendly, length-capped form of a raw column value."""
+    if isinstance(value, bytes):
+        value = value.hex()
+    if isinstance(value, str) and len(value) > _MAX_VALUE_LEN:
+        value = value[: _MAX_VALUE_LEN - 1] + "…"
+    return value
+
+
+def _q(column: str) -> str:
+    return '"' + column.replace('"', '""') + '"'
+
+
+def _model_fields() -> Dict[str, Dict[str, str]]:
+    """typename -> {column: model field} for every model the managers know."""
+    managers = (
+        AccountManager(),
+        PayeeManager(),
+        CategoryManager(),
+        TagManager(),
+        InvestmentHoldingManager(),
+        TransactionManager(),
+    )
+    out: Dict[str, Dict[str, str]] = {}
+    for manager in managers:
+        for typename, model_cls in manager.ents.items():
+            columns: Dict[str, str] = {}
+            for name, spec in SchemaMappedRow._fields_for(model_cls).items():
+                for alias in spec.aliases:
+                    columns.setdefault(alias, name)
+            out[typename] = columns
+    return out
+
+
+def _coalesce(columns: Sequence[str]) -> str:
+    """First non-NULL of ``columns``, nested in groups of 100 (older SQLite
+    caps function arguments at 127)."""
+    exprs = [_q(c) for c in columns]
+    while len(exprs) > 1:
+        groups = [exprs[i : i + 100] for i in range(0, len(exprs), 100)]
+        exprs = [f"coalesce({', '.join(g)})" if len(g) > 1 else g[0] for g in groups]
+    return exprs[0]
+
+
+def gee_estimate(total: int, sampled: int, singletons: int, distinct: int) -> int:
+    """Distinct values among ``total`` rows from a ``sampled``-row sample
+    with ``distinct`` values, ``singletons`` of them seen once (GEE)."""
+    if sampled >= total or not sampled:
+        return distinct
+    if singletons == sampled:
+        return total  # no repeats at all: treat as a key column
+    estimate = math.sqrt(total / sampled) * singletons + (distinct - singletons)
+    return max(distinct, min(total, round(estimate)))
+
+
+class Profiler:
+    def __init__(
+        self,
+        accessor: ToolsAccessor,
+        typenames: Sequence[str],
+        limit: int = 0,
+        sample_size: int = DEFAULT_SAMPLE_SIZE,
+        low_cardinality: int = DEFAULT_LOW_CARDINALITY,
+        top: int = DEFAULT_TOP,
+        samples: int = 0,
+        seed: int = 0,
+    ) -> None:
+        self.accessor = accessor
+        self._con = accessor.connection
+        self.typenames = list(typenames)
+        self.ents = [accessor.ent_for(t) for t in self.typenames]
+        self.limit = limit
+        self.sample_size = max(sample_size, samples, 1)
+        self.low_cardinality = low_cardinality
+        self.top = top
+        self.samples = samples
+        self.seed = seed
+        self.columns = [d[0] for d in self._con.execute("SELECT * FROM ZSYNCOBJECT LIMIT 0").description]
+
+    # Rows in scope: the requested entities, optionally only the newest
+    # ``limit`` of them by ZDATE1.
+    def _scope(self, alias: str = "") -> Tuple[str, List[Any]]:
+        prefix = f"{alias}." if alias else ""
+        marks = ",".join("?" * len(self.ents))
+        sql = f"{prefix}Z_ENT IN ({marks})"
+        params: List[Any] = list(self.ents)
+        if self.limit:
+            sql += (
+                f" AND {prefix}Z_PK IN (SELECT Z_PK FROM ZSYNCOBJECT WHERE Z_ENT IN ({marks})"
+                " ORDER BY ZDATE1 DESC, Z_PK DESC LIMIT ?)"
+            )
+            params += [*self.ents, self.limit]
+        return sql, params
+
+    def _tuples(self, sql: str, params: Iterable[Any] = ()) -> List[tuple]:
+        # accessor.connection has plain tuple rows: no per-row dict for wide results
+        return self._con.execute(sql, list(params)).fetchall()
+
+    def run(self) -> List[EntityProfile]:
+        if not self.ents:
+            return []
+        try:
+            counts, reservoirs = self._reservoirs()
+            sampled_pks = [pk for pks in reservoirs.values() for pk in pks]
+            self._con.execute("DROP TABLE IF EXISTS temp.profile_sample")
+            self._con.execute(
+                "CREATE TEMP TABLE profile_sample AS SELECT * FROM ZSYNCOBJECT "
+                "WHERE Z_PK IN (SELECT value FROM json_each(?))",
+                (json.dumps(sampled_pks),),
+            )
+            sampled, sample_stats, candidates = self._sample_stats()
+            full = self._full_pass(sampled, candidates)
+            relationships = self._relationships()
+            fields = _model_fields()
+
+            profiles = []
+            for typename, ent in zip(self.typenames, self.ents):
+                if not counts.get(ent):
+                    continue
+                profile = EntityProfile(typename, ent, counts[ent], len(reservoirs[ent]))
+                stats = full[ent]
+                for column in self.columns:
+                    non_null, lo, hi = stats[column]
+                    if not non_null:
+                        profile.empty_columns += 1
+                        continue
+                    profile.columns.append(
+                        self._column_profile(
+                            ent, column, non_null, lo, hi, counts[ent], sample_stats, candidates, stats,
+                            fields.get(typename, {}).get(column),
+                        )
+                    )
+                profile.relationships = {k: v.get(ent, 0) for k, v in relationships.items()}
+                profile.samples = self._examples(reservoirs[ent])
+                profiles.append(profile)
+            return profiles
+        finally:
+            self._con.execute("DROP TABLE IF EXISTS temp.profile_sample")
+
+    def _reservoirs(self) -> Tuple[Dict[int, int], Dict[int, List[ID]]]:
+        """Pass 1: row count and a uniform sample of ``Z_PK`` per entity."""
+        rng = random.Random(self.seed)
+        k = self.sample_size
+        counts: Dict[int, int] = dict.fromkeys(self.ents, 0)
+        reservoirs: Dict[int, List[ID]] = {ent: [] for ent in self.ents}
+        scope, params = self._scope()
+        for ent, pk in self._tuples(f"SELECT Z_ENT, Z_PK FROM ZSYNCOBJECT WHERE {scope}", params):
+            seen = counts[ent]
+            counts[ent] = seen + 1
+            if seen < k:
+                reservoirs[ent].append(pk)
+            else:
+                j = rng.randrange(seen + 1)
+                if j < k:
+                    reservoirs[ent][j] = pk
+        return counts, reservoirs
+
+    def _sample_stats(
+        self,
+    ) -> Tuple[List[str], Dict[Tuple[int, str], Tuple[int, int, int]], Dict[Tuple[int, str], List[Any]]]:
+        """Pass 2: the columns non-null anywhere in the sample, ``(ent,
+        column) -> (non-null, distinct, seen once)`` in the sample, and the
+        sampled values of low-cardinality columns."""
+        present = self._tuples(
+            "SELECT Z_ENT, " + ", ".join(f"COUNT({_q(c)})" for c in self.columns)
+            + " FROM temp.profile_sample GROUP BY Z_ENT"
+        )
+        sampled = [c for i, c in enumerate(self.columns, 1) if any(row[i] for row in present)]
+        stats: Dict[Tuple[int, str], Tuple[int, int, int]] = {}
+        candidates: Dict[Tuple[int, str], List[Any]] = {}
+        for column in sampled:
+            col = _q(column)
+            freq = self._tuples(
+                f"SELECT Z_ENT, SUM(n), COUNT(*), SUM(n = 1) FROM ("
+                f"SELECT Z_ENT, {col}, COUNT(*) AS n FROM temp.profile_sample "
+                f"WHERE {col} IS NOT NULL GROUP BY Z_ENT, {col}) GROUP BY Z_ENT"
+            )
+            low = []
+            for ent, non_null, distinct, once in freq:
+                stats[(ent, column)] = (non_null, distinct, once)
+                if distinct <= self.low_cardinality:
+                    low.append(ent)
+            if low:
+                rows = self._tuples(
+                    f"SELECT Z_ENT, {col} FROM temp.profile_sample WHERE {col} IS NOT NULL "
+                    f"AND Z_ENT IN ({','.join('?' * len(low))}) GROUP BY Z_ENT, {col}",
+                    low,
+                )
+                for ent, value in rows:
+                    candidates.setdefault((ent, column), []).append(value)
+        return sampled, stats, candidates
+
+    def _full_pass(
+        self, sampled: List[str], candidates: Dict[Tuple[int, str], List[Any]]
+    ) -> Dict[int, Dict[Any, Any]]:
+        """Pass 3: per entity, ``column -> (non-null, min, max)`` and
+        ``(column, value) -> exact count`` for every candidate.
+
+        Reading a column costs about the same whether or not it is NULL, so
+        only the columns seen in the sample are aggregated over every row.
+        The rest are checked with one ``coalesce()`` per row, and aggregated
+        only over the (rare) rows where one of them is set.
+        """
+        exprs = self._min_max(sampled)
+        # Output is grouped by Z_ENT already, so each (column, value) is
+        # counted once for all entities that have it as a candidate.
+        pairs = {(column, value) for (_, column), values in candidates.items() for value in values}
+        for column, value in sorted(pairs, key=lambda cv: (cv[0], str(cv[1]))):
+            exprs.append((("top", column, value), f"SUM({_q(column)} = ?)", [value]))
+        rest = [c for c in self.columns if c not in set(sampled)]
+        if rest:
+            exprs.append((("rest",), f"SUM({_coalesce(rest)} IS NOT NULL)", []))
+        raw = self._aggregate(exprs)
+        with_rest = [ent for ent, values in raw.items() if values.get(("rest",))]
+        if with_rest:
+            extra = self._aggregate(self._min_max(rest), f" AND {_coalesce(rest)} IS NOT NULL")
+            for ent in with_rest:
+                raw[ent].update(extra.get(ent, {}))
+
+        out: Dict[int, Dict[Any, Any]] = {}
+        for ent in self.ents:
+            values = raw.get(ent, {})
+            stats: Dict[Any, Any] = {}
+            for column in self.columns:
+                stats[column] = (
+                    values.get((column, "count")) or 0,
+                    values.get((column, "min")),
+                    values.get((column, "max")),
+                )
+            for key, value in values.items():
+                if key[0] == "top":
+                    stats[key[1:]] = value or 0
+            out[ent] = stats
+        return out
+
+    @staticmethod
+    def _min_max(columns: Iterable[str]) -> List[Tuple[Any, str, List[Any]]]:
+        exprs: List[Tuple[Any, str, List[Any]]] = []
+        for column in columns:
+            col = _q(column)
+            exprs.append(((column, "count"), f"COUNT({col})", []))
+            exprs.append(((column, "min"), f"MIN({col})", []))
+            exprs.append(((column, "max"), f"MAX({col})", []))
+        return exprs
+
+    def _aggregate(self, exprs: List[Tuple[Any, str, List[Any]]], where: str = "") -> Dict[int, Dict[Any, Any]]:
+        """``ent -> {key: value}`` for ``(key, sql, params)`` aggregates over
+        the rows in scope, as few statements as the column limit allows."""
+        scope, scope_params = self._scope()
+        raw: Dict[int, Dict[Any, Any]] = {}
+        for start in range(0, len(exprs), _MAX_EXPRESSIONS):
+            chunk = exprs[start : start + _MAX_EXPRESSIONS]
+            params = [p for _, _, ps in chunk for p in ps] + scope_params
+            sql = (
+                "SELECT Z_ENT, " + ", ".join(sql for _, sql, _ in chunk)
+                + f" FROM ZSYNCOBJECT WHERE {scope}{where} GROUP BY Z_ENT"
+            )
+            for row in self._tuples(sql, params):
+                values = raw.setdefault(row[0], {})
+                for (key, _, _), value in zip(chunk, row[1:]):
+                    values[key] = value
+        return raw
+
+    def _column_profile(
+        self,
+        ent: int,
+        column: str,
+        non_null: int,
+        lo: Any,
+        hi: Any,
+        rows: int,
+        sample_stats: Dict[Tuple[int, str], Tuple[int, int, int]],
+        candidates: Dict[Tuple[int, str], List[Any]],
+        stats: Dict[Any, Any],
+        field_name: Optional[str],
+    ) -> ColumnProfile:
+        sampled = sample_stats.get((ent, column))
+        if sampled is None:
+            distinct, exact = None, False
+        else:
+            n, d, once = sampled
+            exact = n >= non_null
+            distinct = gee_estimate(non_null, n, once, d)
+        top: List[Tuple[Any, int]] = []
+        other = 0
+        values = candidates.get((ent, column))
+        if values:
+            counted = sorted(((v, stats.get((column, v), 0)) for v in values), key=lambda vc: -vc[1])
+            top = [vc for vc in counted if vc[1]][: self.top]
+            other = non_null - sum(n for _, n in top)
+        return ColumnProfile(column, field_name, non_null, non_null / rows, distinct, exact, lo, hi, top, other)
+
+    def _examples(self, pks: List[ID]) -> List[Dict[str, Any]]:
+        if not self.samples or not pks:
+            return []
+        rng = random.Random(self.seed)
+        picked = sorted(rng.sample(pks, min(self.samples, len(pks))))
+        rows = self.accessor._con.execute(
+            "SELECT * FROM temp.profile_sample WHERE Z_PK IN (SELECT value FROM json_each(?)) ORDER BY Z_PK",
+            (json.dumps(picked),),
+        ).fetchall()
+        related = self.accessor.transaction_relations(picked, names=False)
+        out = []
+        for row in rows:
+            rec = {k: display_value(v) for k, v in row.items() if v is not None}
+            pk = row["Z_PK"]
+            if pk in related.categories:
+                rec["__categories__"] = [(int(c), str(a)) for c, a in related.categories[pk]]
+            if pk in related.tags:
+                rec["__tags__"] = [int(t) for t in related.tags[pk]]
+            if pk in related.refund_original:
+                rec["__refund_original_withdraw_id__"] = int(related.refund_original[pk])
+            out.append(rec)
+        return out
+
+    def _relationships(self) -> Dict[str, Dict[int, int]]:
+        """Grouped joins: per entity, how many rows have splits/tags/refund
+        links, and how many split and tag rows there are."""
+        scope, params = self._scope("s")
+        tags_table, tx_col, _ = self.accessor._get_tags_table_info()
+        queries = {
+            ("with_categories", "category_splits"): (
+                "SELECT s.Z_ENT, COUNT(DISTINCT a.ZTRANSACTION), COUNT(*) FROM ZCATEGORYASSIGMENT a "
+                f"JOIN ZSYNCOBJECT s ON s.Z_PK = a.ZTRANSACTION WHERE {scope} GROUP BY s.Z_ENT"
+            ),
+            ("with_tags", "tag_links"): (
+                f'SELECT s.Z_ENT, COUNT(DISTINCT t.{tx_col}), COUNT(*) FROM "{tags_table}" t '
+                f"JOIN ZSYNCOBJECT s ON s.Z_PK = t.{tx_col} WHERE {scope} GROUP BY s.Z_ENT"
+            ),
+            ("with_refund_links", "refund_links"): (
+                "SELECT s.Z_ENT, COUNT(DISTINCT l.ZREFUNDTRANSACTION), COUNT(*) "
+                "FROM ZWITHDRAWREFUNDTRANSACTIONLINK l "
+                f"JOIN ZSYNCOBJECT s ON s.Z_PK = l.ZREFUNDTRANSACTION WHERE {scope} GROUP BY s.Z_ENT"
+            ),
+        }
+        out: Dict[str, Dict[int, int]] = {}
+        for (rows_key, links_key), sql in queries.items():
+            out[rows_key], out[links_key] = {}, {}
+            for ent, with_rows, links in self._tuples(sql, params):
+                out[rows_key][ent] = with_rows
+                out[links_key][ent] = links
+        return out
@@ -0,0 +1,222 @@
+"""Copy-and-sanitize pipeline behind ``create-test-db`` / ``sanitize-test-db``.
+
+The copy uses the SQLite online backup API from a read-only source
+connection, so it takes a consistent snapshot even of a DB in WAL mode and
+reports progress per batch of pages. Sanitizing then costs two passes per
+table, whatever the number of rules: one aggregate ``SELECT`` counts the
+non-NULL values of every ruled column, and one ``UPDATE`` rewrites them all
+with a ``CASE`` expression per column. Both run under bulk pragmas
+(``journal_mode=OFF``, ``synchronous=OFF``), so they are only meant for a
+throwaway copy, and a final ``VACUUM`` drops the pages that still hold the
+original text.
+"""
+from __future__ import annotations
+
+import os
+import sqlite3
+from pathlib import Path
+from typing import Callable, Dict, List, Literal, Tuple
+
+from moneywiz_tools.subset import SubsetSpec, extract_subset
+
+Rule = Literal["CLEAR", "EMAIL"] | str
+
+SANITIZE_RULES: dict[str, Rule] = {
+    "ZNAME": "ACCOUNT",
+    "ZNAME2": "CAT",
+    "ZNAME5": "PAYEE",
+    "ZNAME6": "TAG",
+    "ZDESC": "DESC",
+    "ZDESC2": "DESC",
+    "ZDESC3": "DESC",
+    "ZNOTES1": "CLEAR",
+    "ZACCOUNTNUMBER": "ACC",
+    "ZCARDNUMBER": "CARD",
+    "ZEMAIL": "EMAIL",
+    "ZUSEREMAIL": "EMAIL",
+    "ZGID": "ZGID",
+}
+
+USER_RULES: dict[str, Rule] = {
+    "ZSYNCLOGIN": "user",
+    "ZEMAIL": "EMAIL",
+}
+
+# Some builds keep payee names in a dedicated table.
+PAYEE_RULES: dict[str, Rule] = {
+    "ZNAME": "PAYEE",
+}
+
+TABLE_RULES: dict[str, dict[str, Rule]] = {
+    "ZSYNCOBJECT": SANITIZE_RULES,
+    "ZUSER": USER_RULES,
+    "ZPAYEE": PAYEE_RULES,
+}
+
+# Pages copied per backup step (16 MiB with the default 4 KiB page size).
+BACKUP_STEP_PAGES = 4096
+
+Report = Callable[[str], None]
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _rule_expr(rule: Rule) -> Tuple[str, List[str]]:
+    """SQL for a sanitized value (the column is known to be non-NULL)."""
+    rule_upper = rule.upper()
+    if rule_upper == "CLEAR":
+        return "NULL", []
+    if rule_upper == "EMAIL":
+        return "'user_' || Z_PK || '@example.com'", []
+    return "? || Z_PK", [f"{rule}_"]
+
+
+def copy_database(src: Path, dest: Path, report: Report | None = None) -> int:
+    """Copy ``src`` into a new file at ``dest`` with the backup API; returns
+    the number of pages copied."""
+    src_con = sqlite3.connect(f"{Path(src).resolve().as_uri()}?mode=ro", uri=True)
+    dest_con = sqlite3.connect(str(dest))
+    last = [-1]
+
+    def progress(status: int, remaining: int, total: int) -> None:
+        if report is None or not total:
+            return
+        pct = (total - remaining) * 100 // total
+        if pct // 10 != last[0] // 10 or remaining == 0:
+            last[0] = pct
+            report(f"- copy: {pct}% ({total - remaining}/{total} pages)")
+
+    try:
+        src_con.backup(dest_con, pages=BACKUP_STEP_PAGES, progress=progress)
+        (pages,) = dest_con.execute("PRAGMA page_count").fetchone()
+    finally:
+        dest_con.close()
+        src_con.close()
+    return pages
+
+
+def bulk_pragmas(con: sqlite3.Connection) -> None:
+    """No rollback journal, no fsync: a crash leaves a copy to throw away."""
+    con.execute("PRAGMA journal_mode=OFF")
+    con.execute("PRAGMA synchronous=OFF")
+    con.execute("PRAGMA temp_store=MEMORY")
+    con.execute("PRAGMA cache_size=-65536")
+
+
+def sanitize_table(
+    con: sqlite3.Connection,
+    table: str,
+    rules: dict[str, Rule],
+    summary: Dict[str, int],
+    report: Report = print,
+) -> None:
+    columns = {
+        row[0].upper(): row[0] for row in con.execute("SELECT name FROM pragma_table_info(?)", (table,))
+    }
+    if not columns:
+        report(f"- {table}: table missing, skipping")
+        return
+    present = [(columns[c.upper()], rule) for c, rule in rules.items() if c.upper() in columns]
+    for column in rules:
+        if column.upper() not in columns:
+            report(f"- {table}.{column}: column missing, skipping")
+    if not present:
+        return
+
+    qtable = _quote(table)
+    counts = con.execute(
+        "SELECT " + ", ".join(f"COUNT({_quote(c)})" for c, _ in present) + f" FROM {qtable}"
+    ).fetchone()
+    assignments: List[str] = []
+    params: List[str] = []
+    touched: List[str] = []
+    for (column, rule), count in zip(present, counts):
+        if not count:
+            report(f"- {table}.{column}: no data to sanitize")
+            continue
+        expr, expr_params = _rule_expr(rule)
+        qcol = _quote(column)
+        assignments.append(f"{qcol} = CASE WHEN {qcol} IS NOT NULL THEN {expr} END")
+        params.extend(expr_params)
+        touched.append(qcol)
+        key = f"{table}.{column}"
+        summary[key] = summary.get(key, 0) + count
+    if not assignments:
+        return
+    con.execute(
+        f"UPDATE {qtable} SET {', '.join(assignments)} WHERE "
+        + " OR ".join(f"{c} IS NOT NULL" for c in touched),
+        params,
+    )
+    for (column, _), count in zip(present, counts):
+        if count:
+            report(f"- {table}.{column}: sanitized {count} entr{'y' if count == 1 else 'ies'}")
+
+
+def vacuum(con: sqlite3.Connection, report: Report = print) -> None:
+    report("- vacuum: rewriting the file without the freed pages")
+    con.execute("VACUUM")
+    # Leave an ordinary rollback-journal DB behind.
+    con.execute("PRAGMA journal_mode=DELETE")
+
+
+def sanitize_in_place(db: Path, report: Report = print, compact: bool = True) -> Dict[str, int]:
+    con = sqlite3.connect(str(db), isolation_level=None)
+    try:
+        bulk_pragmas(con)
+        con.execute("BEGIN")
+        summary: Dict[str, int] = {}
+        for table, rules in TABLE_RULES.items():
+            sanitize_table(con, table, rules, summary, report)
+        con.execute("COMMIT")
+        if compact:
+            vacuum(con, report)
+    finally:
+        con.close()
+    return summary
+
+
+def print_summary(summary: Dict[str, int], report: Report = print) -> int:
+    """Per-column summary; returns the total number of entries touched."""
+    report("\nSanitized columns summary:")
+    if summary:
+        for key in sorted(summary):
+            count = summary[key]
+            report(f"  * {key}: {count} entr{'y' if count == 1 else 'ies'} updated")
+    else:
+        report("  * No columns required updates; database already sanitized")
+    return sum(summary.values())
+
+
+def create_test_db(
+    src: Path,
+    dest: Path,
+    sanitize: bool = False,
+    report: Report = print,
+    subset: SubsetSpec | None = None,
+) -> Dict[str, int] | None:
+    """Snapshot ``src`` (or the ``subset`` of it, see ``subset.py``) into
+    ``dest``, optionally sanitized, via a temp file next to it, so an
+    interrupted run never leaves a half-written ``dest``."""
+    dest = Path(dest)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dest.with_name(dest.name + ".tmp")
+    for side in ("", "-wal", "-shm", "-journal"):
+        tmp.with_name(tmp.name + side).unlink(missing_ok=True)
+    summary = None
+    try:
+        if subset is None:
+            copy_database(src, tmp, report)
+        else:
+            extract_subset(src, tmp, subset, report)
+        if sanitize:
+            summary = sanitize_in_place(tmp, report)
+        for side in ("-wal", "-shm", "-journal"):
+            dest.with_name(dest.name + side).unlink(missing_ok=True)
+        os.replace(tmp, dest)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return summary
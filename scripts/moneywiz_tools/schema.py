@@ -0,0 +1,276 @@
+"""SQLite schema model for ``schema`` / ``introspect_db.py``.
+
+Columns, foreign keys and indexes of every table are read with three
+queries that join ``sqlite_master`` against the table-valued
+``pragma_table_info`` / ``pragma_foreign_key_list`` / ``pragma_index_list``
++ ``pragma_index_info`` functions, instead of a ``PRAGMA`` per table and per
+index.
+
+The structure is cached (``cache_dir()``, see ``cache.py``) under a
+fingerprint of ``sqlite_master`` (type, name, table and ``sql`` of every
+object), so it is only re-read after a schema change. Row counts depend on
+the data, not the schema: exact counts are cached next to it and reused
+while the DB file and its ``-wal`` keep their size and mtime. Approximate
+counts (``approx=True``) come from ``sqlite_stat1`` when ``ANALYZE`` has
+filled it, otherwise from ``MAX(rowid)``, an upper bound that is exact for
+tables nothing was deleted from. Neither scans the table.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List
+
+from moneywiz_tools.cache import _stat_key, cache_dir, cache_enabled
+from moneywiz_tools.connection import connect_ro
+
+# Bump when the cached layout changes.
+SCHEMA_CACHE_VERSION = 1
+
+
+@dataclass
+class Column:
+    cid: int
+    name: str
+    type: str
+    notnull: int
+    dflt_value: Any
+    pk: int
+
+
+@dataclass
+class ForeignKey:
+    id: int
+    seq: int
+    table: str
+    from_col: str
+    to_col: str
+    on_update: str
+    on_delete: str
+    match: str
+
+
+@dataclass
+class IndexCol:
+    seqno: int
+    cid: int
+    name: str
+
+
+@dataclass
+class Index:
+    name: str
+    unique: int
+    origin: str
+    partial: int
+    cols: List[IndexCol]
+
+
+@dataclass
+class Table:
+    name: str
+    sql: str | None
+    columns: List[Column] = field(default_factory=list)
+    foreign_keys: List[ForeignKey] = field(default_factory=list)
+    indexes: List[Index] = field(default_factory=list)
+    row_count: int | None = None
+    row_count_approx: bool = False
+    without_rowid: bool = False
+
+
+@dataclass
+class Schema:
+    fingerprint: str
+    tables: List[Table]
+    from_cache: bool = False
+
+
+def schema_fingerprint(con: sqlite3.Connection) -> str:
+    h = hashlib.sha256()
+    for row in con.execute("SELECT type, name, tbl_name, sql FROM sqlite_master ORDER BY type, name"):
+        h.update(json.dumps(list(row)).encode())
+    return h.hexdigest()
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def fetch_structure(con: sqlite3.Connection) -> List[Table]:
+    tables: Dict[str, Table] = {}
+    for name, sql in con.execute("SELECT name, sql FROM sqlite_master WHERE type='table' ORDER BY name"):
+        tables[name] = Table(
+            name=name, sql=sql, without_rowid="WITHOUT ROWID" in (sql or "").upper()
+        )
+
+    for tname, cid, name, ctype, notnull, dflt, pk in con.execute(
+        "SELECT m.name, c.cid, c.name, c.type, c.\"notnull\", c.dflt_value, c.pk "
+        "FROM sqlite_master m JOIN pragma_table_info(m.name) c "
+        "WHERE m.type='table' ORDER BY m.name, c.cid"
+    ):
+        tables[tname].columns.append(Column(cid, name, ctype or "", notnull, dflt, pk))
+
+    try:
+        fk_rows = con.execute(
+            "SELECT m.name, f.id, f.seq, f.\"table\", f.\"from\", f.\"to\", f.on_update, f.on_delete, f.match "
+            "FROM sqlite_master m JOIN pragma_foreign_key_list(m.name) f "
+            "WHERE m.type='table' ORDER BY m.name, f.id, f.seq"
+        ).fetchall()
+    except sqlite3.DatabaseError:
+        fk_rows = []
+    for tname, *fk in fk_rows:
+        tables[tname].foreign_keys.append(ForeignKey(*fk))
+
+    # PRAGMA index_list order (newest index first), then key columns in order.
+    indexes: Dict[tuple[str, str], Index] = {}
+    for tname, seq, iname, unique, origin, partial, seqno, cid, cname in con.execute(
+        "SELECT m.name, il.seq, il.name, il.\"unique\", il.origin, il.partial, ii.seqno, ii.cid, ii.name "
+        "FROM sqlite_master m JOIN pragma_index_list(m.name) il "
+        "LEFT JOIN pragma_index_info(il.name) ii "
+        "WHERE m.type='table' ORDER BY m.name, il.seq, ii.seqno"
+    ):
+        index = indexes.get((tname, iname))
+        if index is None:
+            index = indexes[(tname, iname)] = Index(iname, unique, origin, partial, [])
+            tables[tname].indexes.append(index)
+        if seqno is not None:
+            index.cols.append(IndexCol(seqno, cid, cname))
+    return list(tables.values())
+
+
+def exact_counts(con: sqlite3.Connection, tables: List[Table]) -> Dict[str, int | None]:
+    counts: Dict[str, int | None] = {}
+    for t in tables:
+        try:
+            counts[t.name] = con.execute(f"SELECT COUNT(1) FROM {_quote(t.name)}").fetchone()[0]
+        except sqlite3.DatabaseError:
+            counts[t.name] = None
+    return counts
+
+
+def approx_counts(con: sqlite3.Connection, tables: List[Table]) -> Dict[str, int | None]:
+    stat1: Dict[str, int] = {}
+    try:
+        for tbl, stat in con.execute("SELECT tbl, stat FROM sqlite_stat1"):
+            # First number of each entry is the table's row count.
+            rows = int((stat or "0").split()[0])
+            stat1[tbl] = max(stat1.get(tbl, 0), rows)
+    except (sqlite3.DatabaseError, ValueError):
+        stat1 = {}
+    counts: Dict[str, int | None] = {}
+    for t in tables:
+        if t.name in stat1:
+            counts[t.name] = stat1[t.name]
+            continue
+        try:
+            if t.without_rowid:
+                counts[t.name] = con.execute(f"SELECT COUNT(1) FROM {_quote(t.name)}").fetchone()[0]
+            else:
+                counts[t.name] = con.execute(f"SELECT MAX(rowid) FROM {_quote(t.name)}").fetchone()[0] or 0
+        except sqlite3.DatabaseError:
+            counts[t.name] = None
+    return counts
+
+
+def _cache_path(fingerprint: str) -> Path:
+    return cache_dir() / f"schema-{fingerprint[:32]}.json"
+
+
+def _data_key(db_path: Path) -> list:
+    wal = db_path.with_name(db_path.name + "-wal")
+    # As it reads back from JSON (lists, not tuples).
+    return json.loads(json.dumps([str(db_path), _stat_key(db_path), _stat_key(wal)]))
+
+
+def _read_cache(path: Path) -> Dict[str, Any] | None:
+    try:
+        with path.open("r", encoding="utf-8") as fh:
+            data = json.load(fh)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError):
+        path.unlink(missing_ok=True)
+        return None
+    return data if data.get("version") == SCHEMA_CACHE_VERSION else None
+
+
+def _write_cache(path: Path, data: Dict[str, Any]) -> None:
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True, mode=0o700)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            json.dump(data, fh)
+        os.replace(tmp, path)
+    except OSError:
+        # An unwritable cache dir only costs the next run a re-read.
+        pass
+
+
+def _tables_from_json(items: List[Dict[str, Any]]) -> List[Table]:
+    tables = []
+    for t in items:
+        tables.append(
+            Table(
+                name=t["name"],
+                sql=t["sql"],
+                columns=[Column(**c) for c in t["columns"]],
+                foreign_keys=[ForeignKey(**fk) for fk in t["foreign_keys"]],
+                indexes=[
+                    Index(i["name"], i["unique"], i["origin"], i["partial"], [IndexCol(**c) for c in i["cols"]])
+                    for i in t["indexes"]
+                ],
+                without_rowid=t["without_rowid"],
+            )
+        )
+    return tables
+
+
+def load_schema(db_path: Path | str, approx: bool = False, cache: bool | None = None) -> Schema:
+    """Schema of ``db_path`` with row counts; structure and exact counts are
+    served from the cache when the fingerprints match."""
+    db_path = Path(db_path).resolve()
+    if cache is None:
+        cache = cache_enabled()
+    con = connect_ro(db_path)
+    try:
+        con.execute("BEGIN")  # one snapshot for the fingerprint, structure and counts
+        fingerprint = schema_fingerprint(con)
+        path = _cache_path(fingerprint)
+        cached = _read_cache(path) if cache else None
+        from_cache = cached is not None
+        dirty = not from_cache
+        if cached is not None:
+            tables = _tables_from_json(cached["tables"])
+        else:
+            tables = fetch_structure(con)
+            cached = {
+                "version": SCHEMA_CACHE_VERSION,
+                "fingerprint": fingerprint,
+                "tables": [
+                    {k: v for k, v in asdict(t).items() if k not in ("row_count", "row_count_approx")}
+                    for t in tables
+                ],
+            }
+
+        data_key = _data_key(db_path)
+        if approx:
+            counts = approx_counts(con, tables)
+        elif cached.get("counts", {}).get("key") == data_key:
+            counts = cached["counts"]["rows"]
+        else:
+            counts = exact_counts(con, tables)
+            cached["counts"] = {"key": data_key, "rows": counts}
+            dirty = True
+        for t in tables:
+            t.row_count = counts.get(t.name)
+            t.row_count_approx = approx
+        if cache and dirty:
+            _write_cache(path, cached)
+    finally:
+        con.close()
+    return Schema(fingerprint=fingerprint, tables=tables, from_cache=from_cache)
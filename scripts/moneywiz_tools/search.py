@@ -0,0 +1,324 @@
+"""Full-text search index over transactions, kept in a sidecar SQLite file.
+
+The index is an FTS5 table with the trigram tokenizer, one row per
+transaction (``rowid`` = ``Z_PK``) and one column per text source:
+
+- ``description``: ``ZDESC2``
+- ``notes``: ``ZNOTES1``
+- ``payee``: ``ZNAME5`` of the payee (``ZPAYEE2``)
+- ``categories``: ``ZNAME2`` of every category the transaction is split into
+- ``tags``: ``ZNAME6`` of every tag linked to it
+
+Trigrams make every term a case-insensitive substring match. ``fuzzy=True``
+instead ORs the trigrams of the query terms, so a misspelt term still finds
+rows sharing most of its trigrams, best first (bm25; description weighs
+most).
+
+The sidecar sits next to the MoneyWiz DB (``<name>.search.sqlite``), or in
+the cache directory when that folder is not writable. The MoneyWiz DB is
+only ever attached read-only. ``refresh()`` brings the index up to date
+incrementally. It compares ``Z_PK``/``Z_OPT`` of transactions, payees,
+categories and tags, the ``Z_PK``/``Z_OPT`` of the category splits and the
+tag links against the copies kept in the sidecar, and re-indexes only the
+transactions that changed or whose payee, category or tag names, splits or
+tag links did. When the DB file, its ``-wal`` and ``Z_PRIMARYKEY.Z_MAX``
+are unchanged since the last refresh, the comparison is skipped entirely.
+
+    with SearchIndex(db_path) as index:
+        index.refresh()
+        for tx_id, score in index.search("ristorante", limit=20):
+            ...
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, List, Sequence, Tuple
+
+from moneywiz_api.managers.transaction_manager import TransactionManager
+from moneywiz_api.types import ID
+
+from moneywiz_tools.cache import _stat_key, cache_dir
+from moneywiz_tools.lazy import LISTED_EXCLUDED_TYPENAMES
+from moneywiz_tools.subset import tags_table
+
+INDEX_VERSION = 1
+
+COLUMNS = ("description", "notes", "payee", "categories", "tags")
+# bm25 weight per column, in COLUMNS order.
+WEIGHTS = (4.0, 2.0, 3.0, 1.0, 1.0)
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)",
+    # Indexed transactions and the payees, categories and tags they name.
+    "CREATE TABLE IF NOT EXISTS objects (pk INTEGER PRIMARY KEY, opt INTEGER, ent INTEGER)",
+    "CREATE TABLE IF NOT EXISTS splits (pk INTEGER PRIMARY KEY, opt INTEGER, tx INTEGER, category INTEGER)",
+    "CREATE TABLE IF NOT EXISTS links (tx INTEGER, tag INTEGER, PRIMARY KEY (tx, tag)) WITHOUT ROWID",
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS fts USING fts5({', '.join(COLUMNS)}, tokenize='trigram')",
+)
+
+
+def default_index(db_path: Path | str) -> Path:
+    """``<db>.search.sqlite`` beside the DB, else a per-DB file in the cache directory."""
+    path = Path(db_path).resolve()
+    if os.access(path.parent, os.W_OK):
+        return path.with_name(f"{path.stem}.search.sqlite")
+    db_key = hashlib.sha256(str(path).encode()).hexdigest()[:16]
+    return cache_dir() / f"{db_key}-search.sqlite"
+
+
+def _quote(term: str) -> str:
+    return '"' + term.replace('"', '""') + '"'
+
+
+def _like(term: str) -> str:
+    return "%" + re.sub(r"([%_\\])", r"\\\1", term) + "%"
+
+
+class SearchIndex:
+    def __init__(self, db_path: Path | str, index_path: Path | str | None = None) -> None:
+        self.db_path = Path(db_path).resolve()
+        self.path = Path(index_path) if index_path else default_index(self.db_path)
+        if self.path.resolve() == self.db_path:
+            raise ValueError("The search index must not be the MoneyWiz DB itself")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._con = sqlite3.connect(self.path.resolve().as_uri(), uri=True, isolation_level=None, timeout=30)
+        for stmt in _SCHEMA:
+            self._con.execute(stmt)
+        meta = dict(self._con.execute("SELECT key, value FROM meta"))
+        if meta.get("db") not in (None, str(self.db_path)):
+            self._con.close()
+            raise ValueError(f"Search index {self.path} belongs to {meta['db']}")
+        if meta.get("version") not in (None, str(INDEX_VERSION)):
+            # Derived data only: start over.
+            self._con.close()
+            self.path.unlink()
+            self.__init__(db_path, index_path)  # type: ignore[misc]
+            return
+        self._con.execute("ATTACH DATABASE ? AS src", (f"{self.db_path.as_uri()}?mode=ro",))
+        types = dict(self._con.execute("SELECT Z_NAME, Z_ENT FROM src.Z_PRIMARYKEY"))
+        listed = [t for t in TransactionManager().ents if t not in LISTED_EXCLUDED_TYPENAMES]
+        self._tx_ents = [types[t] for t in listed if t in types]
+        self._name_ents = [types[t] for t in ("Payee", "Category", "Tag") if t in types]
+        self._tags = tags_table(self._con, "src")
+
+    def __enter__(self) -> SearchIndex:
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._con.in_transaction:
+            self._con.execute("ROLLBACK")
+        self._con.close()
+
+    def _source_state(self) -> str:
+        z_max = self._con.execute("SELECT Z_ENT, Z_MAX FROM src.Z_PRIMARYKEY ORDER BY Z_ENT").fetchall()
+        wal = self.db_path.with_name(self.db_path.name + "-wal")
+        return json.dumps([_stat_key(self.db_path), _stat_key(wal), z_max])
+
+    def refresh(self, rebuild: bool = False) -> int:
+        """Bring the index up to date; returns the number of transactions re-indexed."""
+        con = self._con
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            state = self._source_state()
+            meta = dict(con.execute("SELECT key, value FROM meta"))
+            if rebuild:
+                for table in ("objects", "splits", "links", "fts"):
+                    con.execute(f"DELETE FROM main.{table}")
+            elif meta.get("state") == state:
+                con.execute("ROLLBACK")
+                return 0
+            count = self._reindex(self._dirty())
+            meta = {
+                "version": str(INDEX_VERSION),
+                "db": str(self.db_path),
+                "state": state,
+                "updated_at": repr(time.time()),
+            }
+            con.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", meta.items())
+            if rebuild:
+                con.execute("INSERT INTO fts (fts) VALUES ('optimize')")
+            con.execute("COMMIT")
+        except BaseException:
+            if con.in_transaction:
+                con.execute("ROLLBACK")
+            raise
+        return count
+
+    def _dirty(self) -> str:
+        """Fill ``temp.dirty`` with the transactions to re-index and update
+        the sidecar's copies of ``Z_PK``/``Z_OPT``, splits and tag links."""
+        con = self._con
+        tx_in = ",".join(map(str, self._tx_ents)) or "NULL"
+        all_in = ",".join(map(str, self._tx_ents + self._name_ents)) or "NULL"
+        con.execute("CREATE TEMP TABLE IF NOT EXISTS dirty (tx INTEGER PRIMARY KEY)")
+        con.execute("CREATE TEMP TABLE IF NOT EXISTS changed (pk INTEGER, ent INTEGER)")
+        con.execute("DELETE FROM temp.dirty")
+        con.execute("DELETE FROM temp.changed")
+
+        # Objects: new or changed Z_OPT (or type), and gone.
+        con.execute(
+            f"""
+            INSERT INTO temp.changed (pk, ent)
+            SELECT s.Z_PK, s.Z_ENT FROM src.ZSYNCOBJECT s LEFT JOIN main.objects o ON o.pk = s.Z_PK
+            WHERE s.Z_ENT IN ({all_in}) AND (o.pk IS NULL OR o.opt IS NOT s.Z_OPT OR o.ent IS NOT s.Z_ENT)
+            UNION ALL
+            SELECT o.pk, o.ent FROM main.objects o LEFT JOIN src.ZSYNCOBJECT s ON s.Z_PK = o.pk
+            WHERE s.Z_PK IS NULL OR s.Z_ENT IS NOT o.ent
+            """
+        )
+        con.execute(f"INSERT OR IGNORE INTO temp.dirty SELECT pk FROM temp.changed WHERE ent IN ({tx_in})")
+        # Transactions naming a changed payee, category or tag.
+        con.execute(
+            f"""
+            INSERT OR IGNORE INTO temp.dirty
+            SELECT t.Z_PK FROM src.ZSYNCOBJECT t
+            WHERE t.ZPAYEE2 IN (SELECT pk FROM temp.changed) AND t.Z_ENT IN ({tx_in})
+            UNION
+            SELECT ZTRANSACTION FROM src.ZCATEGORYASSIGMENT
+            WHERE ZCATEGORY IN (SELECT pk FROM temp.changed) AND ZTRANSACTION IS NOT NULL
+            """
+        )
+        if self._tags is not None:
+            table, tx_col, tag_col = self._tags
+            con.execute(
+                f'INSERT OR IGNORE INTO temp.dirty SELECT {tx_col} FROM src."{table}" '
+                f"WHERE {tag_col} IN (SELECT pk FROM temp.changed)"
+            )
+        con.execute(
+            "DELETE FROM main.objects WHERE pk IN (SELECT pk FROM temp.changed) "
+            f"AND pk NOT IN (SELECT Z_PK FROM src.ZSYNCOBJECT WHERE Z_ENT IN ({all_in}))"
+        )
+        con.execute(
+            "INSERT OR REPLACE INTO main.objects (pk, opt, ent) "
+            "SELECT Z_PK, Z_OPT, Z_ENT FROM src.ZSYNCOBJECT "
+            f"WHERE Z_PK IN (SELECT pk FROM temp.changed) AND Z_ENT IN ({all_in})"
+        )
+
+        # Category splits: old and new owner of every changed split.
+        split_delta = """
+            SELECT s.Z_PK AS pk, s.Z_OPT AS opt, s.ZTRANSACTION AS tx, s.ZCATEGORY AS category
+            FROM src.ZCATEGORYASSIGMENT s LEFT JOIN main.splits o ON o.pk = s.Z_PK
+            WHERE o.pk IS NULL OR o.opt IS NOT s.Z_OPT OR o.tx IS NOT s.ZTRANSACTION
+               OR o.category IS NOT s.ZCATEGORY
+        """
+        con.execute(
+            f"""
+            INSERT OR IGNORE INTO temp.dirty
+            SELECT tx FROM ({split_delta}) WHERE tx IS NOT NULL
+            UNION
+            SELECT o.tx FROM main.splits o LEFT JOIN src.ZCATEGORYASSIGMENT s ON s.Z_PK = o.pk
+            WHERE o.tx IS NOT NULL AND (s.Z_PK IS NULL OR s.ZTRANSACTION IS NOT o.tx)
+            """
+        )
+        con.execute("DELETE FROM main.splits WHERE pk NOT IN (SELECT Z_PK FROM src.ZCATEGORYASSIGMENT)")
+        con.execute(f"INSERT OR REPLACE INTO main.splits (pk, opt, tx, category) {split_delta}")
+
+        # Tag links (a plain join table, no Z_OPT): added and removed pairs.
+        if self._tags is not None:
+            table, tx_col, tag_col = self._tags
+            source = f'SELECT {tx_col}, {tag_col} FROM src."{table}"'
+            con.execute(
+                f"""
+                INSERT OR IGNORE INTO temp.dirty
+                SELECT tx FROM (SELECT {tx_col} AS tx, {tag_col} AS tag FROM src."{table}"
+                                EXCEPT SELECT tx, tag FROM main.links)
+                UNION
+                SELECT tx FROM (SELECT tx, tag FROM main.links EXCEPT {source})
+                """
+            )
+            con.execute("DELETE FROM main.links")
+            con.execute(f"INSERT INTO main.links (tx, tag) {source}")
+        return "temp.dirty"
+
+    def _reindex(self, dirty: str) -> int:
+        con = self._con
+        tx_in = ",".join(map(str, self._tx_ents)) or "NULL"
+        if self._tags is not None:
+            table, tx_col, tag_col = self._tags
+            tags = (
+                f'(SELECT group_concat(g.ZNAME6, \' \') FROM src."{table}" l '
+                f"JOIN src.ZSYNCOBJECT g ON g.Z_PK = l.{tag_col} WHERE l.{tx_col} = t.Z_PK)"
+            )
+        else:
+            tags = "NULL"
+        con.execute(f"DELETE FROM main.fts WHERE rowid IN (SELECT tx FROM {dirty})")
+        cur = con.execute(
+            f"""
+            INSERT INTO main.fts (rowid, {', '.join(COLUMNS)})
+            SELECT t.Z_PK, t.ZDESC2, t.ZNOTES1, p.ZNAME5,
+                   (SELECT group_concat(c.ZNAME2, ' ') FROM src.ZCATEGORYASSIGMENT a
+                    JOIN src.ZSYNCOBJECT c ON c.Z_PK = a.ZCATEGORY WHERE a.ZTRANSACTION = t.Z_PK),
+                   {tags}
+            FROM {dirty} d
+            JOIN src.ZSYNCOBJECT t ON t.Z_PK = d.tx AND t.Z_ENT IN ({tx_in})
+            LEFT JOIN src.ZSYNCOBJECT p ON p.Z_PK = t.ZPAYEE2
+            """
+        )
+        return cur.rowcount
+
+    def search(
+        self,
+        text: str,
+        fuzzy: bool = False,
+        columns: Sequence[str] | None = None,
+        limit: int | None = None,
+    ) -> List[Tuple[ID, float]]:
+        """``(transaction id, score)`` pairs for ``text``, best match first.
+
+        Every whitespace-separated term must occur (as a substring, in any
+        of ``columns``); terms under three characters, which have no
+        trigram, are checked with ``LIKE``. With ``fuzzy`` any shared
+        trigram counts and rows sharing more rank higher.
+        """
+        columns = list(columns or COLUMNS)
+        unknown = [c for c in columns if c not in COLUMNS]
+        if unknown:
+            raise ValueError(f"Unknown search column(s): {', '.join(unknown)} (expected {', '.join(COLUMNS)})")
+        terms = text.split()
+        if not terms:
+            return []
+        if fuzzy:
+            grams = sorted({t.lower()[i : i + 3] for t in terms if len(t) >= 3 for i in range(len(t) - 2)})
+            long_terms = [" OR ".join(_quote(g) for g in grams)] if grams else []
+            short_terms = [t for t in terms if len(t) < 3] if not grams else []
+        else:
+            long_terms = [_quote(t) for t in terms if len(t) >= 3]
+            short_terms = [t for t in terms if len(t) < 3]
+        where: List[str] = []
+        params: List[str] = []
+        if long_terms:
+            expr = " AND ".join(f"({t})" for t in long_terms)
+            if len(columns) < len(COLUMNS):
+                expr = "{" + " ".join(columns) + "} : (" + expr + ")"
+            where.append("fts MATCH ?")
+            params.append(expr)
+        text_of = " || ' ' || ".join(f"coalesce({c}, '')" for c in columns)
+        for t in short_terms:
+            where.append(f"({text_of}) LIKE ? ESCAPE '\\'")
+            params.append(_like(t))
+        weights = ", ".join(str(w) for w in WEIGHTS)
+        score = f"-bm25(fts, {weights})" if "fts MATCH ?" in where else "0.0"
+        sql = f"SELECT rowid, {score} AS score FROM main.fts WHERE {' AND '.join(where)} ORDER BY score DESC, rowid DESC"
+        if limit is not None and limit > 0:
+            sql += f" LIMIT {int(limit)}"
+        return [(int(pk), float(s)) for pk, s in self._con.execute(sql, params)]
+
+    def stats(self) -> dict:
+        meta = dict(self._con.execute("SELECT key, value FROM meta"))
+        (rows,) = self._con.execute("SELECT COUNT(*) FROM main.fts").fetchone()
+        return {
+            "index": str(self.path),
+            "db": str(self.db_path),
+            "transactions": rows,
+            "bytes": self.path.stat().st_size,
+            "updated_at": float(meta["updated_at"]) if "updated_at" in meta else None,
+        }
@@ -0,0 +1,319 @@
+"""Referentially closed subsets of a MoneyWiz DB, for small test databases.
+
+Seed transactions are chosen by user, account, date window and/or the newest
+N. The kept set is then closed over the reference graph, one frontier at a
+time, so each object is examined once:
+
+- to-one references between ``ZSYNCOBJECT`` rows: account, payee,
+  transfer counterpart (``ZSENDERTRANSACTION`` / ``ZRECIPIENTTRANSACTION``),
+  parent category, investment holding, and every column Core Data pairs
+  with an entity column (``Z9_ACCOUNT`` -> ``ZACCOUNT``);
+- ``ZCATEGORYASSIGMENT`` rows of kept transactions, and their categories;
+- tag links (``Z_<n>TAGS``) of kept transactions, and their tags;
+- ``ZWITHDRAWREFUNDTRANSACTIONLINK`` rows of kept refunds, and the
+  original withdrawal.
+
+The destination gets the full schema, the kept rows, the ``ZUSER`` rows they
+belong to, the Core Data metadata tables, and ``Z_PRIMARYKEY.Z_MAX`` set to
+the largest ``Z_PK`` left in each root entity's table. Tables not listed
+here (budgets, info cards, sync commands, ...) are created empty.
+"""
+from __future__ import annotations
+
+import re
+import sqlite3
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from moneywiz_tools.epoch import CUTOFF
+
+# To-one references that have no Core Data entity column next to them.
+REFERENCE_COLUMNS: Tuple[str, ...] = (
+    "ZACCOUNT2",
+    "ZPAYEE2",
+    "ZSENDERTRANSACTION",
+    "ZRECIPIENTTRANSACTION",
+    "ZSENDERACCOUNT",
+    "ZRECIPIENTACCOUNT1",
+    "ZPARENTCATEGORY",
+    "ZINVESTMENTHOLDING",
+    "ZFROMINVESTMENTHOLDING",
+    "ZTOINVESTMENTHOLDING",
+    "ZINVESTMENTACCOUNT",
+)
+
+# Copied whole: Core Data bookkeeping and per-install settings.
+METADATA_TABLES: Tuple[str, ...] = ("Z_METADATA", "Z_MODELCACHE", "Z_PRIMARYKEY", "ZCOMMONSETTINGS")
+
+Report = Callable[[str], None]
+
+
+@dataclass
+class SubsetSpec:
+    users: List[int] = field(default_factory=list)
+    accounts: List[int] = field(default_factory=list)
+    since: datetime | None = None
+    until: datetime | None = None
+    max_transactions: int = 0
+
+    def describe(self) -> str:
+        parts = []
+        if self.users:
+            parts.append("users=" + ",".join(map(str, self.users)))
+        if self.accounts:
+            parts.append("accounts=" + ",".join(map(str, self.accounts)))
+        if self.since:
+            parts.append(f"since={self.since.date().isoformat()}")
+        if self.until:
+            parts.append(f"until={self.until.date().isoformat()}")
+        if self.max_transactions:
+            parts.append(f"newest {self.max_transactions}")
+        return " ".join(parts) or "everything"
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _columns(con: sqlite3.Connection, table: str, schema: str = "main") -> List[str]:
+    return [row[0] for row in con.execute(f"SELECT name FROM {schema}.pragma_table_info(?)", (table,))]
+
+
+def reference_columns(columns: Sequence[str]) -> List[str]:
+    """``ZSYNCOBJECT`` columns that hold the ``Z_PK`` of another object."""
+    present = set(columns)
+    refs = [c for c in REFERENCE_COLUMNS if c in present]
+    for c in columns:
+        match = re.fullmatch(r"Z\d+_(\w+)", c)
+        if match and f"Z{match.group(1)}" in present and f"Z{match.group(1)}" not in refs:
+            refs.append(f"Z{match.group(1)}")
+    return refs
+
+
+def user_columns(columns: Sequence[str]) -> List[str]:
+    """``ZUSER``, ``ZUSER3``, ...: each entity points at its owner with its own column."""
+    return [c for c in columns if re.fullmatch(r"ZUSER\d*", c)]
+
+
+def tags_table(con: sqlite3.Connection, schema: str = "main") -> Tuple[str, str, str] | None:
+    """(table, transaction column, tag column) of the transaction tag links,
+    found the same way ``DatabaseAccessor._get_tags_table_info`` does."""
+    tables = []
+    for (name,) in con.execute(f"SELECT name FROM {schema}.sqlite_master WHERE type = 'table'"):
+        match = re.fullmatch(r"Z_(\d+)TAGS", name)
+        if match:
+            tables.append((int(match.group(1)), name))
+    if not tables:
+        return None
+    table = max(tables)[1]
+    columns = _columns(con, table, schema)
+    tx = [c for c in columns if re.fullmatch(r"Z_\d+TRANSACTIONS", c)]
+    tag = [c for c in columns if re.fullmatch(r"Z_\d+TAGS", c)]
+    if len(tx) != 1 or len(tag) != 1:
+        return None
+    return table, tx[0], tag[0]
+
+
+def _entity_family(con: sqlite3.Connection, name: str) -> List[int]:
+    """``Z_ENT`` of ``name`` and all of its sub-entities."""
+    rows = con.execute(
+        """
+        WITH RECURSIVE sub(ent) AS (
+            SELECT Z_ENT FROM src.Z_PRIMARYKEY WHERE Z_NAME = ?
+            UNION SELECT p.Z_ENT FROM src.Z_PRIMARYKEY p JOIN sub ON p.Z_SUPER = sub.ent
+        )
+        SELECT ent FROM sub
+        """,
+        (name,),
+    ).fetchall()
+    return [r[0] for r in rows]
+
+
+def fix_primary_keys(con: sqlite3.Connection) -> None:
+    """Set ``Z_PRIMARYKEY.Z_MAX`` of every root entity to the largest ``Z_PK``
+    in its table (``SyncObject`` -> ``ZSYNCOBJECT``), as Core Data expects."""
+    tables = {r[0] for r in con.execute("SELECT name FROM main.sqlite_master WHERE type = 'table'")}
+    for ent, name in con.execute("SELECT Z_ENT, Z_NAME FROM main.Z_PRIMARYKEY WHERE Z_SUPER = 0").fetchall():
+        table = f"Z{name.upper()}"
+        if table not in tables:
+            continue
+        (top,) = con.execute(f"SELECT COALESCE(MAX(Z_PK), 0) FROM main.{_quote(table)}").fetchone()
+        con.execute("UPDATE main.Z_PRIMARYKEY SET Z_MAX = ? WHERE Z_ENT = ?", (top, ent))
+
+
+class SubsetExtractor:
+    """Builds the subset inside a fresh destination file (``dest``) with the
+    source attached read-only as ``src``."""
+
+    def __init__(self, src: Path, dest: Path, spec: SubsetSpec, report: Report = print) -> None:
+        self.spec = spec
+        self.report = report
+        self.con = sqlite3.connect(str(dest), isolation_level=None)
+        self.con.execute("ATTACH DATABASE ? AS src", (f"{Path(src).resolve().as_uri()}?mode=ro",))
+        self.columns = _columns(self.con, "ZSYNCOBJECT", "src")
+        self.refs = reference_columns(self.columns)
+        self.users = user_columns(self.columns)
+
+    def close(self) -> None:
+        self.con.close()
+
+    # -- seed ---------------------------------------------------------------
+
+    def _seed(self) -> int:
+        con, spec = self.con, self.spec
+        ents = _entity_family(con, "Transaction")
+        where = [f"Z_ENT IN ({','.join('?' * len(ents))})"]
+        params: List[object] = list(ents)
+        accounts = list(spec.accounts)
+        if spec.users:
+            account_ents = _entity_family(con, "Account")
+            owned = {
+                r[0]
+                for r in con.execute(
+                    f"SELECT Z_PK FROM src.ZSYNCOBJECT WHERE Z_ENT IN ({','.join('?' * len(account_ents))}) AND ("
+                    + " OR ".join(f"{c} IN ({','.join('?' * len(spec.users))})" for c in self.users)
+                    + ")",
+                    [*account_ents, *(u for _ in self.users for u in spec.users)],
+                )
+            }
+            accounts = [a for a in accounts if a in owned] if accounts else sorted(owned)
+        if spec.users or spec.accounts:
+            con.executemany("INSERT OR IGNORE INTO temp.seed_accounts VALUES (?)", [(a,) for a in accounts])
+            where.append("ZACCOUNT2 IN (SELECT pk FROM temp.seed_accounts)")
+        if spec.since:
+            where.append("ZDATE1 >= ?")
+            params.append(spec.since.timestamp() - CUTOFF)
+        if spec.until:
+            where.append("ZDATE1 <= ?")
+            params.append(spec.until.timestamp() - CUTOFF)
+        sql = f"SELECT Z_PK FROM src.ZSYNCOBJECT WHERE {' AND '.join(where)} ORDER BY ZDATE1 DESC, Z_PK DESC"
+        if spec.max_transactions:
+            sql += f" LIMIT {int(spec.max_transactions)}"
+        con.execute(f"INSERT INTO temp.frontier {sql}", params)
+        # The selected accounts are kept even without transactions in range.
+        con.execute("INSERT OR IGNORE INTO temp.frontier SELECT pk FROM temp.seed_accounts")
+        return con.execute("SELECT COUNT(*) FROM temp.frontier").fetchone()[0]
+
+    # -- closure ------------------------------------------------------------
+
+    def _close(self) -> None:
+        con = self.con
+        tags = tags_table(con, "src")
+        rounds = 0
+        while True:
+            con.execute("DELETE FROM temp.frontier WHERE pk IS NULL OR pk IN (SELECT pk FROM temp.keep)")
+            added = con.execute("INSERT INTO temp.keep SELECT pk FROM temp.frontier").rowcount
+            if not added:
+                break
+            rounds += 1
+            con.execute("DELETE FROM temp.next")
+            picks = ", ".join(f"o.{c}" for c in self.refs)
+            # One read of each new object yields all of its references.
+            con.execute(
+                f"""
+                INSERT OR IGNORE INTO temp.next
+                SELECT value FROM (SELECT json_array({picks}) AS refs FROM src.ZSYNCOBJECT o
+                                   JOIN temp.frontier f ON f.pk = o.Z_PK), json_each(refs)
+                WHERE value IS NOT NULL
+                """
+            )
+            con.execute(
+                """
+                INSERT OR IGNORE INTO temp.next
+                SELECT a.ZCATEGORY FROM src.ZCATEGORYASSIGMENT a JOIN temp.frontier f ON f.pk = a.ZTRANSACTION
+                """
+            )
+            if tags:
+                table, tx_col, tag_col = tags
+                con.execute(
+                    f"INSERT OR IGNORE INTO temp.next SELECT t.{tag_col} FROM src.{_quote(table)} t "
+                    f"JOIN temp.frontier f ON f.pk = t.{tx_col}"
+                )
+            con.execute(
+                """
+                INSERT OR IGNORE INTO temp.next
+                SELECT l.ZWITHDRAWTRANSACTION FROM src.ZWITHDRAWREFUNDTRANSACTIONLINK l
+                JOIN temp.frontier f ON f.pk = l.ZREFUNDTRANSACTION
+                """
+            )
+            con.execute("DELETE FROM temp.frontier")
+            con.execute("INSERT INTO temp.frontier SELECT pk FROM temp.next")
+        self.report(f"- closure: {con.execute('SELECT COUNT(*) FROM temp.keep').fetchone()[0]} objects in {rounds} rounds")
+
+    # -- copy ---------------------------------------------------------------
+
+    def _create_schema(self) -> None:
+        con = self.con
+        objects = con.execute(
+            "SELECT type, name, sql FROM src.sqlite_master WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%' "
+            "ORDER BY CASE type WHEN 'table' THEN 0 WHEN 'index' THEN 1 ELSE 2 END"
+        ).fetchall()
+        for _type, _name, sql in objects:
+            con.execute(sql)
+
+    def _copy(self, table: str, where: str = "", params: Sequence[object] = ()) -> int:
+        q = _quote(table)
+        sql = f"INSERT INTO main.{q} SELECT * FROM src.{q}" + (f" WHERE {where}" if where else "")
+        count = self.con.execute(sql, params).rowcount
+        self.report(f"- {table}: {count} rows")
+        return count
+
+    def _copy_rows(self) -> Dict[str, int]:
+        con = self.con
+        tables = {r[0] for r in con.execute("SELECT name FROM src.sqlite_master WHERE type = 'table'")}
+        counts: Dict[str, int] = {}
+        counts["ZSYNCOBJECT"] = self._copy("ZSYNCOBJECT", "Z_PK IN (SELECT pk FROM temp.keep)")
+        if "ZUSER" in tables and self.users:
+            owners = " UNION ".join(f"SELECT {c} FROM main.ZSYNCOBJECT" for c in self.users)
+            counts["ZUSER"] = self._copy("ZUSER", f"Z_PK IN ({owners})")
+        if "ZCATEGORYASSIGMENT" in tables:
+            counts["ZCATEGORYASSIGMENT"] = self._copy(
+                "ZCATEGORYASSIGMENT", "ZTRANSACTION IN (SELECT pk FROM temp.keep)"
+            )
+        tags = tags_table(con, "src")
+        if tags:
+            table, tx_col, _ = tags
+            counts[table] = self._copy(table, f"{tx_col} IN (SELECT pk FROM temp.keep)")
+        if "ZWITHDRAWREFUNDTRANSACTIONLINK" in tables:
+            counts["ZWITHDRAWREFUNDTRANSACTIONLINK"] = self._copy(
+                "ZWITHDRAWREFUNDTRANSACTIONLINK",
+                "ZREFUNDTRANSACTION IN (SELECT pk FROM temp.keep) AND ZWITHDRAWTRANSACTION IN (SELECT pk FROM temp.keep)",
+            )
+        if "ZIMAGE" in tables:
+            counts["ZIMAGE"] = self._copy("ZIMAGE", "ZTRANSACTION IN (SELECT pk FROM temp.keep)")
+        if "ZINVESTMENTACCOUNTTOTALVALUE" in tables:
+            counts["ZINVESTMENTACCOUNTTOTALVALUE"] = self._copy(
+                "ZINVESTMENTACCOUNTTOTALVALUE", "ZINVESTMENTACCOUNT IN (SELECT pk FROM temp.keep)"
+            )
+        for table in METADATA_TABLES:
+            if table in tables:
+                counts[table] = self._copy(table)
+        return counts
+
+    def run(self) -> Dict[str, int]:
+        con = self.con
+        con.execute("PRAGMA journal_mode=OFF")
+        con.execute("PRAGMA synchronous=OFF")
+        for name in ("keep", "frontier", "next", "seed_accounts"):
+            con.execute(f"CREATE TEMP TABLE {name} (pk INTEGER PRIMARY KEY)")
+        con.execute("BEGIN")
+        seeded = self._seed()
+        self.report(f"- seed: {seeded} objects ({self.spec.describe()})")
+        self._close()
+        self._create_schema()
+        counts = self._copy_rows()
+        fix_primary_keys(con)
+        con.execute("COMMIT")
+        return counts
+
+
+def extract_subset(src: Path, dest: Path, spec: SubsetSpec, report: Report = print) -> Dict[str, int]:
+    """Write the closed subset of ``src`` selected by ``spec`` into the new
+    file ``dest``; returns rows copied per table."""
+    extractor = SubsetExtractor(src, dest, spec, report)
+    try:
+        return extractor.run()
+    finally:
+        extractor.close()
@@ -0,0 +1,466 @@
+"""Synthetic MoneyWiz databases at a chosen scale, for benchmarks.
+
+The schema, ``Z_PRIMARYKEY`` entity ids and Core Data metadata come from a
+template DB (the bundled ``tests/test_db.sqlite`` by default); only the
+objects are generated. Every object fills the columns its ``moneywiz_api``
+model reads, with values that pass the model's ``validate()``:
+
+- users, each with accounts (cheque, saving, cash, credit card and, from
+  four accounts up, investment accounts with holdings), a category tree
+  (1 = expenses, 2 = income), payees and tags;
+- transactions in date order over ``years`` up to ``end``: withdrawals,
+  deposits, transfer pairs (``ZSENDERTRANSACTION`` / ``ZRECIPIENTTRANSACTION``),
+  refunds linked through ``ZWITHDRAWREFUNDTRANSACTIONLINK``, reconciles and
+  investment buys/sells, in the proportions of ``mix``;
+- category splits (``ZCATEGORYASSIGMENT``, summing to the amount) and tag
+  links (``Z_<n>TAGS``).
+
+Output is deterministic for a given config and seed. Rows are inserted with
+``executemany`` under ``journal_mode=OFF`` / ``synchronous=OFF``, and the
+template's indexes are created once at the end.
+"""
+from __future__ import annotations
+
+import json
+import os
+import random
+import sqlite3
+from bisect import bisect
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import date, datetime, time
+from itertools import accumulate
+from pathlib import Path
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from moneywiz_tools.epoch import CUTOFF
+from moneywiz_tools.subset import fix_primary_keys, tags_table
+
+# Share of transaction events per kind; a transfer writes two rows.
+DEFAULT_MIX: Dict[str, float] = {
+    "withdraw": 0.58,
+    "deposit": 0.14,
+    "transfer": 0.15,
+    "refund": 0.04,
+    "reconcile": 0.01,
+    "buy": 0.05,
+    "sell": 0.03,
+}
+
+METADATA_TABLES: Tuple[str, ...] = ("Z_PRIMARYKEY", "Z_METADATA", "Z_MODELCACHE")
+
+FLUSH_ROWS = 50_000
+
+Report = Callable[[str], None]
+
+ACCOUNT_COLS = (
+    "Z_PK", "Z_ENT", "Z_OPT", "ZDISPLAYORDER", "ZGROUPID", "ZUSER", "ZSTATEMENTENDDAY",
+    "ZOBJECTCREATIONDATE", "ZOPENINGBALANCE", "ZGID", "ZCURRENCYNAME", "ZINFO", "ZNAME",
+)
+CATEGORY_COLS = ("Z_PK", "Z_ENT", "Z_OPT", "ZTYPE2", "ZPARENTCATEGORY", "ZUSER3", "ZOBJECTCREATIONDATE", "ZGID", "ZNAME2")
+PAYEE_COLS = ("Z_PK", "Z_ENT", "Z_OPT", "ZUSER7", "ZOBJECTCREATIONDATE", "ZGID", "ZNAME5")
+TAG_COLS = ("Z_PK", "Z_ENT", "Z_OPT", "ZUSER8", "ZOBJECTCREATIONDATE", "ZGID", "ZNAME6")
+HOLDING_COLS = (
+    "Z_PK", "Z_ENT", "Z_OPT", "ZINVESTMENTACCOUNT", "Z9_INVESTMENTACCOUNT", "ZOBJECTCREATIONDATE", "ZGID",
+    "ZOPENNINGNUMBEROFSHARES", "ZNUMBEROFSHARES", "ZSYMBOL", "ZHOLDINGTYPE", "ZDESC",
+    "ZISPRICEPERSHAREAVAILABLEONLINE", "ZINVESTMENTOBJECTTYPE", "ZCOSTBASISOFMISSINGOBSHARES",
+)
+TX_COLS = (
+    "Z_PK", "Z_ENT", "Z_OPT", "ZRECONCILED", "ZACCOUNT2", "Z9_ACCOUNT2", "ZOBJECTCREATIONDATE",
+    "ZAMOUNT1", "ZDATE1", "ZGID", "ZDESC2",
+)
+PAYEE_TX_COLS = TX_COLS + ("ZPAYEE2", "ZORIGINALAMOUNT", "ZORIGINALCURRENCY", "ZNOTES1")
+TRANSFER_W_COLS = TX_COLS + (
+    "ZRECIPIENTACCOUNT1", "Z9_RECIPIENTACCOUNT1", "ZRECIPIENTTRANSACTION", "ZORIGINALAMOUNT",
+    "ZORIGINALEXCHANGERATE", "ZORIGINALRECIPIENTAMOUNT", "ZORIGINALCURRENCY", "ZORIGINALRECIPIENTCURRENCY",
+)
+TRANSFER_D_COLS = TX_COLS + (
+    "ZSENDERACCOUNT", "Z9_SENDERACCOUNT", "ZSENDERTRANSACTION", "ZORIGINALAMOUNT",
+    "ZORIGINALEXCHANGERATE", "ZORIGINALSENDERAMOUNT", "ZORIGINALCURRENCY", "ZORIGINALSENDERCURRENCY",
+)
+RECONCILE_COLS = TX_COLS + ("ZRECONCILEAMOUNT",)
+INVESTMENT_COLS = TX_COLS + ("ZINVESTMENTHOLDING", "ZNUMBEROFSHARES", "ZPRICEPERSHARE1", "ZFEE2")
+
+ACCOUNT_KINDS = ("BankChequeAccount", "BankSavingAccount", "CashAccount", "CreditCardAccount")
+HOLDING_TYPES = ("Stock", "ETF", "Fund", "Bond")
+
+
+@dataclass
+class SyntheticConfig:
+    rows: int = 100_000  # ZSYNCOBJECT rows, lookups included
+    users: int = 1
+    accounts: int = 15  # per user
+    categories: int = 80  # per user
+    payees: int = 0  # per user; 0 = scale with rows (40..5000)
+    tags: int = 40  # per user
+    years: int = 10
+    end: date = date(2025, 12, 31)
+    currency: str = "EUR"
+    split_ratio: float = 0.8  # share of withdraw/deposit/refund with category splits
+    tag_ratio: float = 0.3
+    seed: int = 0
+    mix: Dict[str, float] = field(default_factory=lambda: dict(DEFAULT_MIX))
+    descriptions: List[str] = field(default_factory=list)
+
+    def payees_per_user(self) -> int:
+        return self.payees or max(40, min(5000, self.rows // 500))
+
+
+def load_descriptions(path: Path) -> List[str]:
+    """Description strings from a JSON list of objects (``transactions.ita.json``)."""
+    try:
+        with Path(path).open("r", encoding="utf-8") as fh:
+            items = json.load(fh)
+    except (OSError, ValueError):
+        return []
+    seen: Dict[str, None] = {}
+    for item in items if isinstance(items, list) else []:
+        desc = item.get("description") if isinstance(item, dict) else None
+        if isinstance(desc, str) and desc.strip():
+            seen.setdefault(desc.strip(), None)
+    return list(seen)
+
+
+class _Table:
+    """Buffered ``executemany`` into one column layout of one table."""
+
+    def __init__(self, con: sqlite3.Connection, table: str, cols: Sequence[str], present: Sequence[str]) -> None:
+        have = set(present)
+        self.keep = [i for i, c in enumerate(cols) if c in have]
+        self.project = len(self.keep) != len(cols)
+        kept = [cols[i] for i in self.keep]
+        self.sql = f'INSERT INTO "{table}" ({", ".join(kept)}) VALUES ({", ".join("?" * len(kept))})'
+        self.con = con
+        self.rows: List[tuple] = []
+        self.written = 0
+
+    def add(self, row: tuple) -> None:
+        self.rows.append(row)
+        if len(self.rows) >= FLUSH_ROWS:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.rows:
+            return
+        rows = self.rows
+        if self.project:
+            keep = self.keep
+            rows = [tuple(r[i] for i in keep) for r in rows]
+        self.con.executemany(self.sql, rows)
+        self.written += len(rows)
+        self.rows = []
+
+
+class SyntheticGenerator:
+    def __init__(self, template: Path, dest: Path, config: SyntheticConfig, report: Report = print) -> None:
+        self.config = config
+        self.report = report
+        self.rng = random.Random(config.seed)
+        self.con = sqlite3.connect(str(dest), isolation_level=None)
+        self.con.execute("ATTACH DATABASE ? AS tpl", (f"{Path(template).resolve().as_uri()}?mode=ro",))
+        self.ents = dict(self.con.execute("SELECT Z_NAME, Z_ENT FROM tpl.Z_PRIMARYKEY"))
+        self.pk = 0
+        self.link_pk = 0
+        self.assign_pk = 0
+        end = datetime.combine(config.end, time(23, 59, 59)).timestamp() - CUTOFF
+        self.start = end - config.years * 365.25 * 86400
+        self.end = end
+        self.descriptions = config.descriptions or [f"Shop {i}" for i in range(500)]
+
+    # -- helpers ------------------------------------------------------------
+
+    def _next_pk(self) -> int:
+        self.pk += 1
+        return self.pk
+
+    def _gid(self) -> str:
+        h = "%032X" % self.rng.getrandbits(128)
+        return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+    def _pick(self, n: int) -> int:
+        """Index in ``range(n)``, skewed towards the front (log-uniform)."""
+        return min(n - 1, int(n ** self.rng.random()) - 1)
+
+    def _schema(self) -> None:
+        con = self.con
+        for (sql,) in con.execute(
+            "SELECT sql FROM tpl.sqlite_master WHERE type = 'table' AND sql IS NOT NULL AND name NOT LIKE 'sqlite_%'"
+        ).fetchall():
+            con.execute(sql)
+        tables = {r[0] for r in con.execute("SELECT name FROM main.sqlite_master WHERE type = 'table'")}
+        for table in METADATA_TABLES:
+            if table in tables:
+                con.execute(f'INSERT INTO main."{table}" SELECT * FROM tpl."{table}"')
+        present = [r[0] for r in con.execute("SELECT name FROM main.pragma_table_info('ZSYNCOBJECT')")]
+        self.tables: Dict[str, _Table] = {
+            name: _Table(con, "ZSYNCOBJECT", cols, present)
+            for name, cols in (
+                ("account", ACCOUNT_COLS),
+                ("category", CATEGORY_COLS),
+                ("payee", PAYEE_COLS),
+                ("tag", TAG_COLS),
+                ("holding", HOLDING_COLS),
+                ("payee_tx", PAYEE_TX_COLS),
+                ("transfer_w", TRANSFER_W_COLS),
+                ("transfer_d", TRANSFER_D_COLS),
+                ("reconcile", RECONCILE_COLS),
+                ("investment", INVESTMENT_COLS),
+            )
+        }
+        assign_cols = [r[0] for r in con.execute("SELECT name FROM main.pragma_table_info('ZCATEGORYASSIGMENT')")]
+        self.tables["assignment"] = _Table(
+            con,
+            "ZCATEGORYASSIGMENT",
+            ("Z_PK", "Z_ENT", "Z_OPT", "ZCATEGORY", "ZTRANSACTION", "Z36_TRANSACTION", "ZAMOUNT"),
+            assign_cols,
+        )
+        link_cols = [r[0] for r in con.execute("SELECT name FROM main.pragma_table_info('ZWITHDRAWREFUNDTRANSACTIONLINK')")]
+        self.tables["refund_link"] = _Table(
+            con,
+            "ZWITHDRAWREFUNDTRANSACTIONLINK",
+            ("Z_PK", "Z_ENT", "Z_OPT", "ZREFUNDTRANSACTION", "ZWITHDRAWTRANSACTION"),
+            link_cols,
+        )
+        tags = tags_table(con, "main")
+        if tags:
+            table, tx_col, tag_col = tags
+            self.tables["tag_link"] = _Table(con, table, (tx_col, tag_col), (tx_col, tag_col))
+
+    # -- lookups ------------------------------------------------------------
+
+    def _lookups(self) -> List[dict]:
+        cfg, rng, ents = self.config, self.rng, self.ents
+        created = self.start
+        users: List[dict] = []
+        for u in range(1, cfg.users + 1):
+            self.con.execute(
+                "INSERT INTO ZUSER (Z_PK, Z_ENT, Z_OPT, ZSYNCLOGIN) VALUES (?, ?, 1, ?)",
+                (u, ents.get("User", 0), f"user{u}@example.com"),
+            )
+            owner = {"id": u, "accounts": [], "investment": [], "expense": [], "income": [], "payees": [], "tags": []}
+            n_investment = cfg.accounts // 4 if cfg.accounts >= 4 else 0
+            for i in range(cfg.accounts):
+                kind = "InvestmentAccount" if i >= cfg.accounts - n_investment else ACCOUNT_KINDS[i % len(ACCOUNT_KINDS)]
+                pk = self._next_pk()
+                self.tables["account"].add(
+                    (pk, ents[kind], 1, i, 1, u, 1, created, float(rng.choice((0, 100, 250, 1000))),
+                     self._gid(), cfg.currency, "", f"Account {u}.{i}")
+                )
+                account = {"id": pk, "ent": ents[kind], "holdings": [], "recent": deque(maxlen=64)}
+                (owner["investment"] if kind == "InvestmentAccount" else owner["accounts"]).append(account)
+            for account in owner["investment"]:
+                for h in range(rng.randint(3, 8)):
+                    pk = self._next_pk()
+                    symbol = "".join(rng.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZ") for _ in range(rng.randint(3, 4)))
+                    self.tables["holding"].add(
+                        (pk, ents["InvestmentHolding"], 1, account["id"], account["ent"], created, self._gid(),
+                         0.0, 0.0, symbol, rng.choice(HOLDING_TYPES), f"{symbol} holding", 0, 0, 0.0)
+                    )
+                    account["holdings"].append((pk, symbol))
+            roots: Dict[int, List[int]] = {1: [], 2: []}
+            for i in range(cfg.categories):
+                ctype = 2 if i % 4 == 3 else 1
+                parent = None
+                if roots[ctype] and rng.random() < 0.7:
+                    parent = rng.choice(roots[ctype])
+                pk = self._next_pk()
+                self.tables["category"].add(
+                    (pk, ents["Category"], 1, ctype, parent, u, created, self._gid(), f"Category {u}.{i}")
+                )
+                if parent is None or rng.random() < 0.2:
+                    roots[ctype].append(pk)
+                owner["expense" if ctype == 1 else "income"].append(pk)
+            descs = self.descriptions
+            for i in range(cfg.payees_per_user()):
+                pk = self._next_pk()
+                name = descs[i % len(descs)] + ("" if i < len(descs) else f" {i // len(descs)}")
+                self.tables["payee"].add((pk, ents["Payee"], 1, u, created, self._gid(), name))
+                owner["payees"].append((pk, name))
+            for i in range(cfg.tags):
+                pk = self._next_pk()
+                self.tables["tag"].add((pk, ents["Tag"], 1, u, created, self._gid(), f"tag{u}.{i}"))
+                owner["tags"].append(pk)
+            users.append(owner)
+        return users
+
+    # -- transactions -------------------------------------------------------
+
+    def _splits(self, tx: int, tx_ent: int, amount: float, categories: List[int]) -> None:
+        if not categories or self.rng.random() >= self.config.split_ratio:
+            return
+        rng = self.rng
+        k = 1 if rng.random() < 0.75 else (2 if rng.random() < 0.8 else 3)
+        cents = round(amount * 100)
+        parts = []
+        left = cents
+        for _ in range(k - 1):
+            part = round(cents * rng.uniform(0.2, 0.6))
+            if not part or abs(part) >= abs(left):
+                break
+            parts.append(part)
+            left -= part
+        parts.append(left)
+        table = self.tables["assignment"]
+        ent = self.ents.get("CategoryAssigment", 0)
+        for part in parts:
+            self.assign_pk += 1
+            table.add((self.assign_pk, ent, 1, categories[self._pick(len(categories))], tx, tx_ent, part / 100))
+
+    def _tags(self, tx: int, tags: List[int]) -> None:
+        if not tags or "tag_link" not in self.tables or self.rng.random() >= self.config.tag_ratio:
+            return
+        chosen = {tags[self._pick(len(tags))] for _ in range(self.rng.randint(1, 2))}
+        for tag in chosen:
+            self.tables["tag_link"].add((tx, tag))
+
+    def _transactions(self, users: List[dict]) -> Dict[str, int]:
+        cfg, rng, ents = self.config, self.rng, self.ents
+        budget = cfg.rows - self.pk
+        per_event = 1 + cfg.mix.get("transfer", 0) / max(sum(cfg.mix.values()), 1e-9)
+        events = max(int(budget / per_event), 0)
+        span = self.end - self.start
+        kinds = list(cfg.mix)
+        cum_weights = list(accumulate(cfg.mix[k] for k in kinds))
+        counts: Dict[str, int] = {k: 0 for k in kinds}
+        payee_tx, transfer_w, transfer_d = self.tables["payee_tx"], self.tables["transfer_w"], self.tables["transfer_d"]
+        currency = cfg.currency
+        i = 0
+        while self.pk < cfg.rows:
+            when = self.start + (min(i, events - 1) + rng.random()) * span / max(events, 1)
+            i += 1
+            owner = users[rng.randrange(len(users))] if len(users) > 1 else users[0]
+            accounts = owner["accounts"]
+            kind = kinds[bisect(cum_weights, rng.random() * cum_weights[-1])]
+            if kind == "transfer" and (len(accounts) < 2 or self.pk + 2 > cfg.rows):
+                kind = "withdraw"
+            if kind in ("buy", "sell") and not owner["investment"]:
+                kind = "withdraw"
+            if kind == "refund":
+                account = accounts[self._pick(len(accounts))]
+                if not account["recent"]:
+                    kind = "withdraw"
+            reconciled = 1 if when < self.end - 60 * 86400 and rng.random() < 0.9 else 0
+            counts[kind] += 1
+
+            if kind in ("withdraw", "deposit"):
+                account = accounts[self._pick(len(accounts))]
+                payee, name = owner["payees"][self._pick(len(owner["payees"]))]
+                if kind == "withdraw":
+                    amount = -round(max(min(rng.lognormvariate(3.2, 1.1), 5000.0), 0.01), 2)
+                    ent, categories = ents["WithdrawTransaction"], owner["expense"]
+                else:
+                    amount = round(max(rng.lognormvariate(6.5, 1.0), 0.01), 2)
+                    ent, categories = ents["DepositTransaction"], owner["income"]
+                pk = self._next_pk()
+                notes = f"note {pk}" if rng.random() < 0.15 else None
+                payee_tx.add(
+                    (pk, ent, 1, reconciled, account["id"], account["ent"], when, amount, when, self._gid(),
+                     name, payee, amount, currency, notes)
+                )
+                if kind == "withdraw":
+                    account["recent"].append((pk, amount, payee, name))
+                self._splits(pk, ent, amount, categories)
+                self._tags(pk, owner["tags"])
+            elif kind == "refund":
+                original, spent, payee, name = rng.choice(account["recent"])
+                amount = round(max(abs(spent) * rng.choice((1.0, 0.5, rng.random())), 0.01), 2)
+                ent = ents["RefundTransaction"]
+                pk = self._next_pk()
+                payee_tx.add(
+                    (pk, ent, 1, reconciled, account["id"], account["ent"], when, amount, when, self._gid(),
+                     f"Refund {name}", payee, amount, currency, None)
+                )
+                self.link_pk += 1
+                self.tables["refund_link"].add(
+                    (self.link_pk, ents.get("WithdrawRefundTransactionLink", 0), 1, pk, original)
+                )
+                self._splits(pk, ent, amount, owner["expense"])
+            elif kind == "transfer":
+                src, dst = rng.sample(accounts, 2)
+                amount = round(max(rng.lognormvariate(5.0, 1.0), 0.01), 2)
+                w, d = self._next_pk(), self._next_pk()
+                transfer_w.add(
+                    (w, ents["TransferWithdrawTransaction"], 1, reconciled, src["id"], src["ent"], when, -amount,
+                     when, self._gid(), "Transfer", dst["id"], dst["ent"], d, -amount, 1.0, amount, currency, currency)
+                )
+                transfer_d.add(
+                    (d, ents["TransferDepositTransaction"], 1, reconciled, dst["id"], dst["ent"], when, amount,
+                     when, self._gid(), "Transfer", src["id"], src["ent"], w, amount, 1.0, -amount, currency, currency)
+                )
+            elif kind == "reconcile":
+                account = accounts[self._pick(len(accounts))]
+                pk = self._next_pk()
+                self.tables["reconcile"].add(
+                    (pk, ents["ReconcileTransaction"], 1, 1, account["id"], account["ent"], when, 0.0, when,
+                     self._gid(), "Reconcile", round(rng.uniform(0, 20000), 2))
+                )
+            else:
+                account = rng.choice(owner["investment"])
+                holding, symbol = rng.choice(account["holdings"])
+                shares = rng.randint(1, 50)
+                price = round(rng.uniform(5, 500), 2)
+                fee = rng.choice((0.0, 0.0, 1.5, 4.95))
+                if kind == "buy":
+                    amount, ent = -round(shares * price + fee, 2), ents["InvestmentBuyTransaction"]
+                else:
+                    amount, ent = round(shares * price - fee, 2), ents["InvestmentSellTransaction"]
+                pk = self._next_pk()
+                self.tables["investment"].add(
+                    (pk, ent, 1, reconciled, account["id"], account["ent"], when, amount, when, self._gid(),
+                     f"{kind.capitalize()} {symbol}", holding, float(shares), price, fee)
+                )
+            if i % 200_000 == 0:
+                self.report(f"- transactions: {self.pk}/{cfg.rows} rows")
+        return counts
+
+    # -- driver -------------------------------------------------------------
+
+    def run(self) -> Dict[str, int]:
+        con = self.con
+        con.execute("PRAGMA journal_mode=OFF")
+        con.execute("PRAGMA synchronous=OFF")
+        con.execute("PRAGMA cache_size=-131072")
+        con.execute("BEGIN")
+        self._schema()
+        users = self._lookups()
+        self.report(f"- lookups: {self.pk} rows for {len(users)} user(s)")
+        counts = self._transactions(users)
+        for table in self.tables.values():
+            table.flush()
+        self.report("- indexes")
+        for (sql,) in con.execute(
+            "SELECT sql FROM tpl.sqlite_master WHERE type IN ('index', 'trigger', 'view') AND sql IS NOT NULL"
+        ).fetchall():
+            con.execute(sql)
+        fix_primary_keys(con)
+        con.execute("COMMIT")
+        con.execute("DETACH DATABASE tpl")
+        stats = {"ZSYNCOBJECT": self.pk, **{f"events.{k}": v for k, v in counts.items()}}
+        stats["ZCATEGORYASSIGMENT"] = self.tables["assignment"].written
+        stats["ZWITHDRAWREFUNDTRANSACTIONLINK"] = self.tables["refund_link"].written
+        if "tag_link" in self.tables:
+            stats["tag_links"] = self.tables["tag_link"].written
+        return stats
+
+    def close(self) -> None:
+        self.con.close()
+
+
+def generate(template: Path, dest: Path, config: SyntheticConfig, report: Report = print) -> Dict[str, int]:
+    """Write a synthetic DB to ``dest`` (via ``dest.tmp``); returns row counts."""
+    dest = Path(dest)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dest.with_name(dest.name + ".tmp")
+    tmp.unlink(missing_ok=True)
+    generator = SyntheticGenerator(template, tmp, config, report)
+    try:
+        stats = generator.run()
+    except BaseException:
+        generator.close()
+        tmp.unlink(missing_ok=True)
+        raise
+    generator.close()
+    for side in ("-wal", "-shm", "-journal"):
+        dest.with_name(dest.name + side).unlink(missing_ok=True)
+    os.replace(tmp, dest)
+    return stats
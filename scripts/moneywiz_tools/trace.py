@@ -0,0 +1,429 @@
+"""Per-phase timings and SQL tracing behind ``--profile`` / ``--trace-sql``.
+
+Library code marks its phases with ``phase(name)``: ``connect`` (opening the
+DB and reading ``Z_PRIMARYKEY``), ``cache`` (snapshot restore), ``load``
+(reading rows), ``parse`` (building models), ``enrich`` (names, splits,
+tags, trees) and ``render`` (formatting and writing output). Phases nest and
+each one is charged its own time only, so a manager load reads as ``parse``
+plus the ``load`` of its query. ``phase()`` costs one global lookup while
+profiling is off.
+
+SQL tracing replaces ``sqlite3.connect`` for the process, so every
+connection (``ToolsAccessor``, ``WriteSession``, ``BulkWriter``, ...) is made
+with ``TracedConnection``. Statements are reported as they finish, with the
+time spent inside ``execute``/``fetch*`` calls and the number of rows
+fetched (or changed, for DML). ``set_trace_callback`` supplies the expanded
+SQL text, and statements Python does not issue through a cursor (implicit
+``BEGIN``, ``executescript``) are reported untimed.
+
+Both are switched on by ``moneywiz.py`` from the environment: see
+``from_environ()``.
+"""
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, TextIO
+
+# Order of the profile table; unknown phases follow.
+PHASES = ("startup", "connect", "cache", "load", "parse", "enrich", "render")
+
+# Longest statement text printed to stderr (files get the full text).
+MAX_SQL_CHARS = 240
+
+_TIMER: "PhaseTimer | None" = None
+
+
+class PhaseTimer:
+    """Exclusive wall time per phase name."""
+
+    def __init__(self) -> None:
+        self.seconds: Dict[str, float] = {}
+        self.calls: Dict[str, int] = {}
+        # [name, start, time spent in nested phases]
+        self._stack: List[list] = []
+
+    def enter(self, name: str) -> None:
+        self._stack.append([name, time.perf_counter(), 0.0])
+
+    def exit(self) -> None:
+        name, start, nested = self._stack.pop()
+        elapsed = time.perf_counter() - start
+        self.add(name, elapsed - nested)
+        if self._stack:
+            self._stack[-1][2] += elapsed
+
+    def add(self, name: str, seconds: float, calls: int = 1) -> None:
+        self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+        self.calls[name] = self.calls.get(name, 0) + calls
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    timer = _TIMER
+    if timer is None:
+        yield
+        return
+    timer.enter(name)
+    try:
+        yield
+    finally:
+        timer.exit()
+
+
+def _is_begin(sql: str) -> bool:
+    return sql.lstrip().upper().startswith("BEGIN")
+
+
+class _Statement:
+    __slots__ = ("sql", "text", "seconds", "rows", "executions")
+
+    def __init__(self, sql: str) -> None:
+        self.sql = sql
+        self.text: str | None = None
+        self.seconds = 0.0
+        self.rows = 0
+        self.executions = 0
+
+
+class SQLTracer:
+    """Collects finished statements and writes one line (or JSON line) each."""
+
+    def __init__(self, target: str) -> None:
+        self.target = target
+        self.statements = 0
+        self.seconds = 0.0
+        self.rows = 0
+        self._pending: _Statement | None = None
+        self._open: Dict[int, _Statement] = {}
+        self._out: TextIO | None = None
+
+    # Called by SQLite (set_trace_callback) when a statement starts running.
+    def on_trace(self, sql: str) -> None:
+        stmt = self._pending
+        if stmt is None:
+            self._emit(sql, None, None)
+            return
+        if stmt.executions == 1 and _is_begin(stmt.text or "") and not _is_begin(stmt.sql):
+            # sqlite3 ran an implicit BEGIN first; the statement itself follows.
+            self._emit(stmt.text or "", None, None)
+            stmt.text = sql
+            return
+        stmt.executions += 1
+        if stmt.text is None:
+            stmt.text = sql
+
+    def begin(self, sql: str) -> _Statement:
+        stmt = self._pending = _Statement(sql)
+        return stmt
+
+    def end_call(self) -> None:
+        self._pending = None
+
+    def hold(self, cursor: Any, stmt: _Statement) -> None:
+        self._open[id(cursor)] = stmt
+
+    def release(self, cursor: Any) -> _Statement | None:
+        return self._open.pop(id(cursor), None)
+
+    def finish(self, stmt: _Statement) -> None:
+        self.statements += 1
+        self.seconds += stmt.seconds
+        self.rows += stmt.rows
+        text = stmt.text or stmt.sql
+        if stmt.executions > 1:
+            text = f"{stmt.sql.strip()} [x{stmt.executions}]"
+        self._emit(text, stmt.seconds, stmt.rows)
+
+    def flush(self) -> None:
+        for stmt in list(self._open.values()):
+            self.finish(stmt)
+        self._open.clear()
+        if self._out is not None and self._out is not sys.stderr:
+            self._out.close()
+        self._out = None
+
+    def summary(self) -> Dict[str, Any]:
+        return {"statements": self.statements, "seconds": round(self.seconds, 6), "rows": self.rows}
+
+    def _emit(self, text: str, seconds: float | None, rows: int | None) -> None:
+        if self.target in ("1", "true", "yes"):
+            flat = " ".join(text.split())
+            if len(flat) > MAX_SQL_CHARS:
+                flat = flat[: MAX_SQL_CHARS - 3] + "..."
+            timing = f"{seconds * 1000:9.3f} ms {rows:7d} rows" if seconds is not None else f"{'-':>12} {'':>12}"
+            print(f"sql {timing}  {flat}", file=sys.stderr)
+            return
+        if self._out is None:
+            self._out = open(self.target, "a", encoding="utf-8")
+        record = {"sql": text, "ms": None if seconds is None else round(seconds * 1000, 3), "rows": rows, "at": time.time()}
+        self._out.write(json.dumps(record) + "\n")
+
+
+class TracedCursor(sqlite3.Cursor):
+    """Times ``execute*``/``fetch*`` and counts rows for ``SQLTracer``."""
+
+    def _tracer(self) -> SQLTracer:
+        return self.connection._mw_tracer  # type: ignore[attr-defined]
+
+    def _done(self) -> None:
+        tracer = self._tracer()
+        stmt = tracer.release(self)
+        if stmt is not None:
+            tracer.finish(stmt)
+
+    def _run(self, run: Callable[[], Any], sql: str) -> "TracedCursor":
+        tracer = self._tracer()
+        self._done()
+        stmt = tracer.begin(sql)
+        t0 = time.perf_counter()
+        try:
+            run()
+        finally:
+            stmt.seconds += time.perf_counter() - t0
+            tracer.end_call()
+        if self.description is None:
+            stmt.rows = max(self.rowcount, 0)
+            tracer.finish(stmt)
+        else:
+            tracer.hold(self, stmt)
+        return self
+
+    def execute(self, sql: str, parameters: Any = ()) -> "TracedCursor":
+        return self._run(lambda: super(TracedCursor, self).execute(sql, parameters), sql)
+
+    def executemany(self, sql: str, seq_of_parameters: Any) -> "TracedCursor":
+        return self._run(lambda: super(TracedCursor, self).executemany(sql, seq_of_parameters), sql)
+
+    def _fetch(self, fetch: Callable[[], Any], count: Callable[[Any], int], last: Callable[[Any], bool]) -> Any:
+        stmt = self._tracer()._open.get(id(self))
+        if stmt is None:
+            return fetch()
+        t0 = time.perf_counter()
+        try:
+            result = fetch()
+        except StopIteration:
+            stmt.seconds += time.perf_counter() - t0
+            self._done()
+            raise
+        stmt.seconds += time.perf_counter() - t0
+        stmt.rows += count(result)
+        if last(result):
+            self._done()
+        return result
+
+    def __next__(self) -> Any:
+        return self._fetch(lambda: super(TracedCursor, self).__next__(), lambda _r: 1, lambda _r: False)
+
+    def fetchone(self) -> Any:
+        return self._fetch(
+            lambda: super(TracedCursor, self).fetchone(), lambda r: r is not None, lambda r: r is None
+        )
+
+    def fetchmany(self, size: int | None = None) -> list:
+        size = self.arraysize if size is None else size
+        return self._fetch(
+            lambda: super(TracedCursor, self).fetchmany(size), len, lambda r: len(r) < size
+        )
+
+    def fetchall(self) -> list:
+        return self._fetch(lambda: super(TracedCursor, self).fetchall(), len, lambda _r: True)
+
+    def close(self) -> None:
+        self._done()
+        super().close()
+
+    def __del__(self) -> None:
+        try:
+            self._done()
+        except Exception:
+            pass
+
+
+class TracedConnection(sqlite3.Connection):
+    """Connection whose cursors (including ``execute()`` shortcuts) trace."""
+
+    _mw_tracer: SQLTracer
+
+    def cursor(self, factory: Any = None) -> Any:  # type: ignore[override]
+        return super().cursor(factory or TracedCursor)
+
+    def execute(self, sql: str, parameters: Any = ()) -> Any:  # type: ignore[override]
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql: str, seq_of_parameters: Any) -> Any:  # type: ignore[override]
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def _timed(self, sql: str, run: Callable[[], None]) -> None:
+        tracer = self._mw_tracer
+        stmt = tracer.begin(sql)
+        t0 = time.perf_counter()
+        try:
+            run()
+        finally:
+            stmt.seconds = time.perf_counter() - t0
+            tracer.end_call()
+        if stmt.executions:
+            tracer.finish(stmt)
+
+    def commit(self) -> None:
+        self._timed("COMMIT", super().commit)
+
+    def rollback(self) -> None:
+        self._timed("ROLLBACK", super().rollback)
+
+
+def install_sql_trace(tracer: SQLTracer) -> Callable[[], None]:
+    """Route every later ``sqlite3.connect`` through ``tracer``; returns an
+    undo function."""
+    original = sqlite3.connect
+
+    def connect(*args: Any, **kwargs: Any) -> sqlite3.Connection:
+        custom = "factory" in kwargs or len(args) > 5
+        if not custom:
+            kwargs["factory"] = TracedConnection
+        with phase("connect"):
+            con = original(*args, **kwargs)
+        if not custom:
+            con._mw_tracer = tracer  # type: ignore[attr-defined]
+        con.set_trace_callback(tracer.on_trace)
+        return con
+
+    sqlite3.connect = connect  # type: ignore[assignment]
+
+    def undo() -> None:
+        sqlite3.connect = original  # type: ignore[assignment]
+
+    return undo
+
+
+class _RenderStream:
+    """stdout proxy that charges writes to the ``render`` phase."""
+
+    def __init__(self, stream: TextIO) -> None:
+        self._stream = stream
+
+    def write(self, s: str) -> int:
+        with phase("render"):
+            return self._stream.write(s)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._stream, name)
+
+
+class Session:
+    """One profiled and/or SQL-traced command run (see ``from_environ``)."""
+
+    def __init__(
+        self,
+        command: str,
+        profile: str | None = None,
+        trace_sql: str | None = None,
+        pstats: str | None = None,
+        started: float | None = None,
+    ) -> None:
+        self.command = command
+        self.profile = profile
+        self.pstats = pstats
+        self.tracer = SQLTracer(trace_sql) if trace_sql else None
+        self.started = started
+        self.timer = PhaseTimer()
+        self._undo: Callable[[], None] | None = None
+        self._cprofile: Any = None
+        self._stdout: TextIO | None = None
+        self._t0 = 0.0
+
+    def start(self) -> None:
+        global _TIMER
+        _TIMER = self.timer
+        self._t0 = time.perf_counter()
+        if self.started is not None:
+            self.timer.add("startup", max(time.time() - self.started, 0.0))
+        if self.tracer is not None:
+            self._undo = install_sql_trace(self.tracer)
+        self._stdout = sys.stdout
+        sys.stdout = _RenderStream(sys.stdout)  # type: ignore[assignment]
+        if self.pstats:
+            import cProfile
+
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+
+    def stop(self) -> None:
+        global _TIMER
+        if self._cprofile is not None:
+            self._cprofile.disable()
+        total = time.perf_counter() - self._t0
+        _TIMER = None
+        if self._stdout is not None:
+            try:
+                sys.stdout.flush()
+            except (OSError, ValueError):
+                pass
+            sys.stdout = self._stdout
+        if self._undo is not None:
+            self._undo()
+        if self.tracer is not None:
+            self.tracer.flush()
+        if self._cprofile is not None:
+            self._cprofile.dump_stats(self.pstats)
+            print(f"profile: cProfile stats written to {self.pstats} (python -m pstats {self.pstats})", file=sys.stderr)
+        if self.profile:
+            self.report(total)
+        elif self.tracer is not None:
+            s = self.tracer.summary()
+            print(
+                f"sql: {s['statements']} statements, {s['seconds'] * 1000:.1f} ms, {s['rows']} rows",
+                file=sys.stderr,
+            )
+
+    def phases(self, total: float) -> Dict[str, Dict[str, Any]]:
+        seconds = dict(self.timer.seconds)
+        startup = seconds.get("startup", 0.0)
+        seconds["other"] = max(total - (sum(seconds.values()) - startup), 0.0)
+        order = [p for p in PHASES if p in seconds]
+        order += sorted(p for p in seconds if p not in PHASES and p != "other") + ["other"]
+        return {
+            name: {"seconds": round(seconds[name], 6), "calls": self.timer.calls.get(name, 0)}
+            for name in order
+        }
+
+    def report(self, total: float) -> None:
+        phases = self.phases(total)
+        wall = total + phases.get("startup", {}).get("seconds", 0.0)
+        if self.profile not in ("1", "true", "yes"):
+            record = {"command": self.command, "total_s": round(wall, 6), "phases": phases, "at": time.time()}
+            if self.tracer is not None:
+                record["sql"] = self.tracer.summary()
+            with open(self.profile, "a", encoding="utf-8") as fh:
+                fh.write(json.dumps(record) + "\n")
+            return
+        print(f"profile: {self.command} {wall:.3f} s", file=sys.stderr)
+        for name, p in phases.items():
+            share = p["seconds"] / wall * 100 if wall else 0.0
+            calls = f"{p['calls']:>7}" if p["calls"] else f"{'':>7}"
+            print(f"  {name:<8} {p['seconds']:9.4f} s {share:5.1f}% {calls}", file=sys.stderr)
+        if self.tracer is not None:
+            s = self.tracer.summary()
+            print(
+                f"  sql      {s['seconds']:9.4f} s        {s['statements']:>7} statements, {s['rows']} rows"
+                " (inside the phases above)",
+                file=sys.stderr,
+            )
+
+
+def from_environ(command: str, started: float | None = None) -> Session | None:
+    """``Session`` configured by ``MONEYWIZ_PROFILE`` (``1`` for a table on
+    stderr, or a file to append a JSON line to), ``MONEYWIZ_PSTATS`` (file
+    for a cProfile dump) and ``MONEYWIZ_TRACE_SQL`` (``1`` for stderr, or a
+    file for JSON lines); ``None`` when none is set."""
+    profile = os.environ.get("MONEYWIZ_PROFILE") or None
+    pstats = os.environ.get("MONEYWIZ_PSTATS") or None
+    trace_sql = os.environ.get("MONEYWIZ_TRACE_SQL") or None
+    if not (profile or pstats or trace_sql):
+        return None
+    return Session(command, profile=profile, trace_sql=trace_sql, pstats=pstats, started=started)
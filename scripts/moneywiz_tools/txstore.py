@@ -0,0 +1,496 @@
+"""Array-backed transaction records (``MONEYWIZ_TRANSACTION_STORE=columnar``).
+
+A loaded ``TransactionManager`` keeps one dataclass per transaction, and each
+keeps its whole ``ZSYNCOBJECT`` row (300+ columns, almost all NULL) in
+``_raw``. ``TransactionStore`` keeps one NumPy array per model field instead:
+
+- ids and references (account, payee, holdings, linked transactions) as
+  int64, NULL as ``INT_NULL``
+- ``Decimal`` amounts, shares and rates as float64, NULL as NaN. SQLite
+  stores them as binary floats and the models build them with
+  ``Decimal(str(value))``, so the float gives back the model's exact value;
+  fixed-point minor units would round rates and share counts.
+- dates as float64 Apple-epoch seconds, converted with the models' own
+  ``get_datetime`` when read
+- descriptions, notes, symbols and currencies as int32 codes into one
+  interned string table, NULL as -1; flags as int8
+
+Each row is still built once as its model and validated while loading, from
+only the columns the models read. A field value that its array cannot give
+back exactly (the models' "fixes" that clamp a fee to 0, an integral amount
+that would come back as ``'5.0'`` instead of ``'5'``) is kept in a per-field
+override dict, so every value read from the store equals the model's.
+
+``records()`` maps ``Z_PK`` to views: one ``__slots__`` subclass per model
+class with the same name, fields as properties, ``isinstance`` checks,
+``validate()``, ``filtered()`` and ``as_dict()`` intact. Views are created on
+access and hold only the store and a row index; ``_raw`` is read back from
+the DB when asked for.
+"""
+from __future__ import annotations
+
+import dataclasses
+import os
+from collections.abc import ItemsView, Mapping, ValuesView
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterator, List, Sequence, Tuple
+
+import numpy as np
+
+from moneywiz_api.model.raw_data_handler import RawDataHandler as RDH
+from moneywiz_api.model.schema_mapped_row import SchemaMappedRow
+from moneywiz_api.types import GID, ID
+
+from moneywiz_tools.deferred import model_eq
+from moneywiz_tools.trace import phase
+
+INT_NULL = np.iinfo(np.int64).min
+STR_NULL = -1
+BOOL_NULL = -1
+BATCH = 4096
+STORES = ("models", "columnar")
+
+# Dataclass fields that are not model data: ``_raw`` is fetched on demand.
+_RAW = "_raw"
+_MISSING = object()
+
+
+def store_default() -> str:
+    """``MONEYWIZ_TRANSACTION_STORE`` (``models`` unless set to ``columnar``)."""
+    value = os.environ.get("MONEYWIZ_TRANSACTION_STORE", "").strip().lower()
+    return value if value in STORES else "models"
+
+
+def _spec_name(field_name: str) -> str:
+    # Record keeps ``ent``/``created_at`` as ``_ent``/``_created_at``.
+    return field_name.lstrip("_")
+
+
+def _field_kind(spec: Any, declared: Dict[str, str]) -> str:
+    converter = spec.converter
+    if converter is RDH.get_datetime:
+        return "datetime"
+    if converter in (RDH.get_decimal, RDH.get_nullable_decimal):
+        return "decimal"
+    if converter is not None:
+        return "bool"  # is_one_field
+    decl = next((declared[a] for a in spec.aliases if a in declared), "").upper()
+    if "INT" in decl:
+        return "int"
+    if any(t in decl for t in ("CHAR", "TEXT", "CLOB")):
+        return "str"
+    if any(t in decl for t in ("REAL", "FLOA", "DOUB")):
+        return "float"
+    return "object"
+
+
+_DTYPES = {
+    "int": np.int64,
+    "bool": np.int8,
+    "str": np.int32,
+    "decimal": np.float64,
+    "float": np.float64,
+    "datetime": np.float64,
+}
+_NULLS = {
+    "int": INT_NULL,
+    "bool": BOOL_NULL,
+    "str": STR_NULL,
+    "decimal": np.nan,
+    "float": np.nan,
+    "datetime": np.nan,
+}
+
+
+class _Column:
+    """Encoder for one field while loading; chunks are joined in ``finish``."""
+
+    def __init__(self, name: str, kind: str, alias: str | None, strings: "_Strings") -> None:
+        self.name = name
+        self.kind = kind
+        self.alias = alias  # raw column, for datetimes
+        self.strings = strings
+        self.chunks: List[np.ndarray] = []
+        self.values: List[Any] = []
+        self.overrides: Dict[int, Any] = {}
+
+    def add(self, row_index: int, value: Any, raw: Dict[str, Any]) -> None:
+        kind = self.kind
+        enc: Any = _MISSING
+        if value is None:
+            enc = _NULLS.get(kind, None)
+        elif kind == "decimal":
+            if type(value) is Decimal:
+                f = float(value)
+                if repr(f) == str(value):
+                    enc = f
+        elif kind == "datetime":
+            source = raw.get(self.alias)
+            if type(source) in (float, int) and RDH.get_datetime(float(source)) == value:
+                enc = float(source)
+        elif kind == "int":
+            if type(value) is int and value != INT_NULL and -(1 << 63) <= value < (1 << 63):
+                enc = value
+        elif kind == "bool":
+            if type(value) is bool:
+                enc = int(value)
+        elif kind == "str":
+            if type(value) is str:
+                enc = self.strings.code(value)
+        elif kind == "float":
+            if type(value) is float and value == value:
+                enc = value
+        else:
+            enc = value
+        if enc is _MISSING:
+            self.overrides[row_index] = value
+            enc = _NULLS.get(kind, None)
+        self.values.append(enc)
+
+    def pad(self) -> None:
+        self.values.append(_NULLS.get(self.kind, None))
+
+    def flush(self) -> None:
+        if self.kind in _DTYPES and self.values:
+            self.chunks.append(np.array(self.values, dtype=_DTYPES[self.kind]))
+            self.values = []
+
+    def finish(self) -> Any:
+        self.flush()
+        if self.kind not in _DTYPES:
+            return self.values
+        if not self.chunks:
+            return np.empty(0, dtype=_DTYPES[self.kind])
+        return np.concatenate(self.chunks)
+
+
+class _Strings:
+    """Interned string table shared by every text field of a store."""
+
+    def __init__(self) -> None:
+        self.table: List[str] = []
+        self._codes: Dict[str, int] = {}
+
+    def code(self, value: str) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.table)
+            self.table.append(value)
+        return code
+
+
+def _decoder(kind: str, array: Any, strings: List[str]) -> Callable[[int], Any]:
+    """``index -> field value`` for one column (overrides aside)."""
+    if kind == "decimal":
+        def get(i: int) -> Any:
+            f = array.item(i)
+            return None if f != f else Decimal(repr(f))
+    elif kind == "datetime":
+        def get(i: int) -> Any:
+            f = array.item(i)
+            return None if f != f else RDH.get_datetime(f)
+    elif kind == "int":
+        def get(i: int) -> Any:
+            v = array.item(i)
+            return None if v == INT_NULL else v
+    elif kind == "bool":
+        def get(i: int) -> Any:
+            v = array.item(i)
+            return None if v == BOOL_NULL else v == 1
+    elif kind == "str":
+        def get(i: int) -> Any:
+            c = array.item(i)
+            return None if c == STR_NULL else strings[c]
+    elif kind == "float":
+        def get(i: int) -> Any:
+            f = array.item(i)
+            return None if f != f else f
+    else:
+        def get(i: int) -> Any:
+            return array[i]
+    return get
+
+
+class _View:
+    """Base of the per-model view classes built by ``TransactionStore``."""
+
+    __slots__ = ("_store", "_i")
+
+    @property
+    def _raw(self) -> Dict[str, Any]:
+        return self._store.raw_row(self._i)
+
+    def as_dict(self) -> Dict[str, Any]:
+        # Same keys as Record.as_dict(), without reading ``_raw``.
+        return {
+            f.name: getattr(self, f.name)
+            for f in dataclasses.fields(self)
+            if f.name not in ("_raw", "_ent", "_created_at")
+        }
+
+    def __eq__(self, other: object) -> bool:
+        return model_eq(self, other)
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __reduce_ex__(self, protocol: Any) -> Any:
+        # Pickles as the equivalent model, not as a reference to the store.
+        model = self._store.model(self._i)
+        return _unpickle_model, (type(model), vars(model))
+
+
+def _unpickle_model(model_cls: type, state: Dict[str, Any]) -> Any:
+    obj = model_cls.__new__(model_cls)
+    obj.__dict__.update(state)
+    return obj
+
+
+def _field_property(getter: Callable[[int], Any], overrides: Dict[int, Any]) -> property:
+    if overrides:
+        def fget(self: _View) -> Any:
+            value = overrides.get(self._i, _MISSING)
+            return getter(self._i) if value is _MISSING else value
+    else:
+        def fget(self: _View) -> Any:
+            return getter(self._i)
+    return property(fget)
+
+
+class TransactionStore(Mapping):
+    """``Z_PK`` -> transaction view over column arrays (see module docstring).
+
+    Build with ``TransactionStore.load(accessor, ents)``; ``attach()`` a
+    ``ToolsAccessor`` after unpickling so ``_raw`` can be read back.
+    """
+
+    def __init__(
+        self,
+        ids: np.ndarray,
+        kinds: np.ndarray,
+        classes: Sequence[type],
+        columns: Dict[str, Tuple[str, Any]],
+        overrides: Dict[str, Dict[int, Any]],
+        strings: List[str],
+        accessor: Any = None,
+    ) -> None:
+        self.ids = ids
+        self.kinds = kinds
+        self.classes = list(classes)
+        self.columns = columns
+        self.overrides = overrides
+        self.strings = strings
+        self._accessor = accessor
+        self._views: List[type] | None = None
+        self._by_gid: Dict[GID, int] | None = None
+        # Rows keep the DB's scan order; lookups go through the sorted ids.
+        self._order = np.argsort(ids, kind="stable")
+        self._sorted = ids[self._order]
+        if len(ids) > 1 and not np.all(self._sorted[1:] > self._sorted[:-1]):
+            raise RuntimeError("Duplicate Z_PK in transaction rows")
+
+    @classmethod
+    def load(cls, accessor: Any, ents: Dict[str, type], batch_size: int = BATCH) -> "TransactionStore":
+        """Read every transaction of ``ents`` (typename -> model class)."""
+        con = accessor.connection
+        declared = {
+            name: decl or ""
+            for _, name, decl, *_ in con.execute("PRAGMA table_info(ZSYNCOBJECT)")
+        }
+        present = [(t, c) for t, c in ents.items() if t in accessor._typename_to_ent]
+        classes = [c for _, c in present]
+        ent_kind = {accessor.ent_for(t): k for k, (t, _) in enumerate(present)}
+
+        # Every dataclass field of every class, and the raw columns they read.
+        specs: Dict[str, Any] = {}
+        for model_cls in classes:
+            fields = SchemaMappedRow._fields_for(model_cls)
+            for f in dataclasses.fields(model_cls):
+                if f.name != _RAW and f.name not in specs:
+                    specs[f.name] = fields[_spec_name(f.name)]
+        wanted = []
+        for spec in specs.values():
+            wanted.extend(a for a in spec.aliases if a in declared and a not in wanted)
+        if "Z_ENT" not in wanted:
+            wanted.append("Z_ENT")
+
+        strings = _Strings()
+        builders = {}
+        for name, spec in specs.items():
+            kind = _field_kind(spec, declared)
+            alias = next((a for a in spec.aliases if a in declared), None)
+            builders[name] = _Column(name, kind, alias, strings)
+        own = [[builders[f.name] for f in dataclasses.fields(c) if f.name != _RAW] for c in classes]
+        absent = [[b for b in builders.values() if b not in fields] for fields in own]
+        ids: List[int] = []
+        kinds: List[int] = []
+
+        # Same filter and (unspecified) order as DatabaseAccessor.query_objects,
+        # so records() iterates like the models' dict.
+        cur = con.cursor()
+        cur.execute(
+            f"SELECT {', '.join(wanted)} FROM ZSYNCOBJECT "
+            f"WHERE Z_ENT IN ({','.join('?' * len(ent_kind))})",
+            list(ent_kind),
+        )
+        try:
+            while True:
+                with phase("load"):
+                    rows = cur.fetchmany(batch_size)
+                if not rows:
+                    break
+                for values in rows:
+                    raw = dict(zip(wanted, values))
+                    k = ent_kind[raw["Z_ENT"]]
+                    model_cls = classes[k]
+                    obj = model_cls(raw)
+                    obj.validate()
+                    i = len(ids)
+                    ids.append(obj.id)
+                    kinds.append(k)
+                    for column in own[k]:
+                        column.add(i, getattr(obj, column.name), raw)
+                    for column in absent[k]:
+                        column.pad()
+                for column in builders.values():
+                    column.flush()
+        finally:
+            cur.close()
+
+        id_array = np.array(ids, dtype=np.int64)
+        columns = {name: (b.kind, b.finish()) for name, b in builders.items()}
+        overrides = {name: b.overrides for name, b in builders.items() if b.overrides}
+        store = cls(
+            id_array, np.array(kinds, dtype=np.int8), classes, columns, overrides, strings.table, accessor
+        )
+        store._check_gids()
+        return store
+
+    def _check_gids(self) -> None:
+        by_gid = self._gid_index()
+        if len(by_gid) != len(self.ids):
+            raise RuntimeError("Duplicate gid in transaction rows")
+
+    # -- pickling / accessor ---------------------------------------------------
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = dict(self.__dict__)
+        state.update(_accessor=None, _views=None, _by_gid=None)
+        del state["_order"], state["_sorted"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._order = np.argsort(self.ids, kind="stable")
+        self._sorted = self.ids[self._order]
+
+    def attach(self, accessor: Any) -> None:
+        """Use ``accessor`` to read ``_raw`` rows back (after unpickling)."""
+        self._accessor = accessor
+
+    # -- Mapping ---------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __iter__(self) -> Iterator[ID]:
+        return iter(self.ids.tolist())
+
+    def __contains__(self, key: object) -> bool:
+        return self.index_of(key) is not None
+
+    def __getitem__(self, key: ID) -> Any:
+        i = self.index_of(key)
+        if i is None:
+            raise KeyError(key)
+        return self.view(i)
+
+    def get(self, key: ID, default: Any = None) -> Any:
+        i = self.index_of(key)
+        return default if i is None else self.view(i)
+
+    def values(self) -> ValuesView:
+        return _Values(self)
+
+    def items(self) -> ItemsView:
+        return _Items(self)
+
+    def index_of(self, key: object) -> int | None:
+        if not isinstance(key, (int, np.integer)) or isinstance(key, bool):
+            return None
+        j = int(np.searchsorted(self._sorted, key))
+        if j < len(self._sorted) and self._sorted[j] == key:
+            return int(self._order[j])
+        return None
+
+    def id_for_gid(self, gid: GID) -> ID | None:
+        i = self._gid_index().get(gid)
+        return None if i is None else int(self.ids[i])
+
+    def _gid_index(self) -> Dict[GID, int]:
+        if self._by_gid is None:
+            get = _decoder(*self.columns["gid"], self.strings)
+            overrides = self.overrides.get("gid", {})
+            self._by_gid = {
+                (overrides[i] if i in overrides else get(i)): i for i in range(len(self.ids))
+            }
+        return self._by_gid
+
+    # -- rows ------------------------------------------------------------------
+
+    def view(self, i: int) -> Any:
+        if self._views is None:
+            self._views = [self._view_class(c) for c in self.classes]
+        obj = object.__new__(self._views[self.kinds.item(i)])
+        obj._store = self
+        obj._i = i
+        return obj
+
+    def _view_class(self, model_cls: type) -> type:
+        ns: Dict[str, Any] = {"__slots__": (), "__module__": model_cls.__module__}
+        for f in dataclasses.fields(model_cls):
+            if f.name == _RAW:
+                continue
+            kind, array = self.columns[f.name]
+            getter = _decoder(kind, array, self.strings)
+            ns[f.name] = _field_property(getter, self.overrides.get(f.name, {}))
+        view_cls = type(model_cls.__name__, (_View, model_cls), ns)
+        view_cls.__qualname__ = model_cls.__qualname__
+        return view_cls
+
+    def model(self, i: int) -> Any:
+        """Row ``i`` as a plain model object (with its full ``_raw``)."""
+        model_cls = self.classes[self.kinds.item(i)]
+        obj = model_cls.__new__(model_cls)
+        view = self.view(i)
+        for f in dataclasses.fields(model_cls):
+            setattr(obj, f.name, getattr(view, f.name))
+        return obj
+
+    def raw_row(self, i: int) -> Dict[str, Any]:
+        if self._accessor is None:
+            raise RuntimeError("TransactionStore has no accessor to read _raw from; call attach()")
+        row = self._accessor._con.execute(
+            "SELECT * FROM ZSYNCOBJECT WHERE Z_PK = ?", (self.ids.item(i),)
+        ).fetchone()
+        return dict(row) if row is not None else {}
+
+    def nbytes(self) -> int:
+        """Approximate size of the arrays and string table in bytes."""
+        total = self.ids.nbytes + self.kinds.nbytes
+        for _, array in self.columns.values():
+            total += getattr(array, "nbytes", 8 * len(array))
+        total += sum(49 + len(s) for s in self.strings)
+        return total
+
+
+class _Values(ValuesView):
+    # Walks rows by index instead of looking every key up again.
+    def __iter__(self) -> Iterator[Any]:
+        store = self._mapping
+        return (store.view(i) for i in range(len(store)))
+
+
+class _Items(ItemsView):
+    def __iter__(self) -> Iterator[Tuple[ID, Any]]:
+        store = self._mapping
+        return ((pk, store.view(i)) for i, pk in enumerate(store.ids.tolist()))
@@ -3,10 +3,13 @@ from __future__ import annotations
 
 import argparse
 import sqlite3
+import sys
 from pathlib import Path
 from typing import Any
 
-from moneywiz_api.writes import WriteSession
+from moneywiz_tools.bulk import BulkWriter
+from moneywiz_tools.connection import shared_connection
+from moneywiz_tools.plan import PlanRecorder, open_sink, report_stream
 
 
 def default_db() -> Path:
@@ -33,26 +36,13 @@ PAYEE_RELEVANT_EMPTY_TYPENAMES: tuple[str, ...] = (
 )
 
 
-def _dict_connection(db_path: Path) -> sqlite3.Connection:
-    con = sqlite3.connect(str(db_path), uri=True)
-
-    def dict_factory(cursor, row):
-        record = {}
-        for idx, col in enumerate(cursor.description):
-            record[col[0]] = row[idx]
-        return record
-
-    con.row_factory = dict_factory
-    return con
-
-
 def _ent_for(con: sqlite3.Connection, typename: str) -> int:
     row = con.execute(
         "SELECT Z_ENT FROM Z_PRIMARYKEY WHERE Z_NAME = ? LIMIT 1", (typename,)
     ).fetchone()
     if not row:
         raise ValueError(f"Unknown typename '{typename}' in Z_PRIMARYKEY")
-    return int(row["Z_ENT"])
+    return int(row[0])
 
 
 def _ents_for(con: sqlite3.Connection, typenames: tuple[str, ...]) -> list[int]:
@@ -86,35 +76,46 @@ def main() -> int:
     )
     ap.add_argument("--apply", action="store_true", help="Apply changes (default: dry-run preview)")
     ap.add_argument("--quiet", action="store_true", help="Suppress per-transaction logs; show only the summary")
-    ap.add_argument("--show-plan", action="store_true", help="Print planned SQL (useful for debugging)")
+    ap.add_argument(
+        "--show-plan",
+        action="store_true",
+        help="Print the planned SQL grouped by statement, with step counts",
+    )
+    ap.add_argument(
+        "--plan-out",
+        metavar="FILE",
+        help="Stream every planned step as NDJSON to FILE ('-' for stdout) as it is produced",
+    )
     args = ap.parse_args()
     if args.from_payee_id is None and not args.from_empty_payee:
         ap.error("provide at least one selector: --from-payee-id ID and/or --from-empty-payee")
 
-    # Avoid MoneywizApi() here: it eagerly parses *all* transactions, and some
-    # real-world MoneyWiz DBs contain NULLs in fields that the upstream API
-    # currently asserts as non-null (e.g. TransferDepositTransaction.ZORIGINALAMOUNT).
-    con = _dict_connection(args.db)
-    session = WriteSession(args.db, dry_run=(not args.apply))
+    # Read the few columns we need directly rather than via open_api(): the
+    # transaction models assert non-null fields that some real-world MoneyWiz
+    # DBs leave NULL (e.g. TransferDepositTransaction.ZORIGINALAMOUNT).
+    con = shared_connection(args.db)
+    plan_out = open_sink(args.plan_out)
+    # With --plan-out - stdout carries only the NDJSON plan.
+    report = report_stream(plan_out)
+    # Only the grouped counts are printed; steps go to --plan-out if at all.
+    session = BulkWriter(
+        args.db, dry_run=(not args.apply), plan=PlanRecorder(out=plan_out, keep=False)
+    )
 
-    print("-- " + ("APPLY" if args.apply else "DRY-RUN") + " --")
+    print("-- " + ("APPLY" if args.apply else "DRY-RUN") + " --", file=report)
 
     # Build lookup (name,user) -> payee_id for exact matches
     payees_by_name_user: dict[tuple[str, int], int] = {}
     payee_ent = _ent_for(con, "Payee")
-    for row in con.execute(
+    payee_ids: set[int] = set()
+    for pk, name, user in con.execute(
         "SELECT Z_PK, ZNAME5, ZUSER7 FROM ZSYNCOBJECT WHERE Z_ENT = ?",
         (payee_ent,),
-    ).fetchall():
-        name = row.get("ZNAME5")
-        user = row.get("ZUSER7")
+    ):
+        payee_ids.add(int(pk))
         if name is None or user is None:
             continue
-        payees_by_name_user[(str(name), int(user))] = int(row["Z_PK"])
-    payee_ids = {int(row["Z_PK"]) for row in con.execute(
-        "SELECT Z_PK FROM ZSYNCOBJECT WHERE Z_ENT = ?",
-        (payee_ent,),
-    ).fetchall()}
+        payees_by_name_user[(str(name), int(user))] = int(pk)
     if args.empty_desc_target_payee_id is not None and args.empty_desc_target_payee_id not in payee_ids:
         raise ValueError(
             f"--empty-desc-target-payee-id {args.empty_desc_target_payee_id} is not a valid Payee id"
@@ -156,88 +157,96 @@ def main() -> int:
         ).fetchall()
 
         # Resolve account -> user for the accounts involved (transaction rows reference ZACCOUNT2).
-        account_ids = sorted(
-            {int(r["ZACCOUNT2"]) for r in tx_rows if r.get("ZACCOUNT2") is not None}
-        )
+        account_ids = sorted({int(account) for _, account, _, _ in tx_rows if account is not None})
         account_user_by_id: dict[int, int] = {}
         if account_ids:
             account_placeholders = ",".join("?" * len(account_ids))
-            for row in con.execute(
+            for pk, user in con.execute(
                 f"SELECT Z_PK, ZUSER FROM ZSYNCOBJECT WHERE Z_PK IN ({account_placeholders})",
                 account_ids,
-            ).fetchall():
-                if row.get("ZUSER") is None:
+            ):
+                if user is None:
                     continue
-                account_user_by_id[int(row["Z_PK"])] = int(row["ZUSER"])
-
-        for row in tx_rows:
-            tx_id = int(row["Z_PK"])
+                account_user_by_id[int(pk)] = int(user)
+
+        # Resolve every target first, then write in two batches: one INSERT
+        # per new payee shape and one UPDATE per column set (see BulkWriter).
+        new_payees: dict[tuple[str, int], list[int]] = {}
+        updates: list[tuple[int, int | tuple[str, int], str]] = []
+        for tx_pk, account_id, desc_raw, current_payee in tx_rows:
+            tx_id = int(tx_pk)
             processed += 1
 
-            account_id = row.get("ZACCOUNT2")
             if account_id is None:
                 if not args.quiet:
-                    print(f"Skip tx {tx_id}: account not found")
+                    print(f"Skip tx {tx_id}: account not found", file=report)
                 continue
 
             user_id = account_user_by_id.get(int(account_id))
             if user_id is None:
                 if not args.quiet:
-                    print(f"Skip tx {tx_id}: account user not found")
+                    print(f"Skip tx {tx_id}: account user not found", file=report)
                 continue
 
-            desc_raw = row.get("ZDESC2")
             desc = str(desc_raw).strip() if desc_raw is not None else ""
-            target_payee_id: int | None = None
+            target: int | tuple[str, int] | None = None
             if desc:
                 key = (desc, user_id)
-                target_payee_id = payees_by_name_user.get(key)
-                if target_payee_id is None:
-                    # Create payee with exact name for this user (if applying)
-                    new_id = session.insert_syncobject(
-                        "Payee", {"ZNAME5": desc, "ZUSER7": user_id}
-                    )
-                    if new_id is None:
-                        if not args.quiet:
-                            print(
-                                f"[PLAN] Create payee name='{desc}' user={user_id} and update tx {tx_id} (id will be assigned on apply)"
-                            )
-                        created += 1
-                        # Cannot update TX in dry-run without knowing the id; continue to next
-                        continue
-                    target_payee_id = new_id
-                    payees_by_name_user[key] = target_payee_id
-                    created += 1
-                    if not args.quiet:
-                        print(
-                            f"Created payee '{desc}' (id={target_payee_id}) for user {user_id}"
-                        )
+                target = payees_by_name_user.get(key)
+                if target is None:
+                    # Payee with the exact name for this user, created once below.
+                    new_payees.setdefault(key, []).append(tx_id)
+                    target = key
             elif args.empty_desc_target_payee_id is not None:
-                target_payee_id = args.empty_desc_target_payee_id
+                target = args.empty_desc_target_payee_id
             else:
                 if not args.quiet:
-                    print(f"Skip tx {tx_id}: empty description")
+                    print(f"Skip tx {tx_id}: empty description", file=report)
                 continue
 
-            if target_payee_id is None:
+            if target is None:
                 if not args.quiet:
-                    print(f"Skip tx {tx_id}: no target payee resolved")
+                    print(f"Skip tx {tx_id}: no target payee resolved", file=report)
                 continue
-            if row.get("ZPAYEE2") == target_payee_id:
+            if current_payee == target:
                 if not args.quiet:
-                    print(f"Skip tx {tx_id}: payee already {target_payee_id}")
+                    print(f"Skip tx {tx_id}: payee already {target}", file=report)
                 continue
+            updates.append((tx_id, target, desc))
+
+        keys = list(new_payees)
+        new_ids = session.bulk_insert_syncobject(
+            "Payee", ({"ZNAME5": name, "ZUSER7": user} for name, user in keys)
+        )
+        for (name, user), payee_id in zip(keys, new_ids):
+            payees_by_name_user[(name, user)] = payee_id
+            created += 1
+            if not args.quiet:
+                if args.apply:
+                    print(f"Created payee '{name}' (id={payee_id}) for user {user}", file=report)
+                else:
+                    print(
+                        f"[PLAN] Create payee name='{name}' user={user} (id={payee_id}) "
+                        f"for {len(new_payees[(name, user)])} transaction(s)",
+                        file=report,
+                    )
 
-            # Update transaction's payee reference
-            session.update_syncobject(tx_id, {"ZPAYEE2": target_payee_id})
-            updated += 1
-            # Always confirm in apply mode; in dry-run only if not quiet
-            if args.apply or not args.quiet:
+        resolved = [
+            (tx_id, payees_by_name_user[target] if isinstance(target, tuple) else target, desc)
+            for tx_id, target, desc in updates
+        ]
+        updated += session.bulk_update_syncobject(
+            (tx_id, {"ZPAYEE2": payee_id}) for tx_id, payee_id, _ in resolved
+        )
+        # Always confirm in apply mode; in dry-run only if not quiet
+        if args.apply or not args.quiet:
+            for tx_id, payee_id, desc in resolved:
                 if desc:
-                    print(f"Updated tx {tx_id} -> payee {target_payee_id} ('{desc}')")
+                    print(f"Updated tx {tx_id} -> payee {payee_id} ('{desc}')", file=report)
                 else:
                     print(
-                        f"Updated tx {tx_id} -> payee {target_payee_id} (empty description fallback)"
+                        f"Updated tx {tx_id} -> payee {payee_id} (empty description fallback)",
+                        file=report,
                     )
 
     if args.apply:
@@ -246,19 +255,26 @@ def main() -> int:
     else:
         run()
 
-    # Print planned/apply SQL steps
+    # Print planned/apply SQL steps, one line per statement template
     if args.show_plan:
-        print("\nPlanned SQL steps:")
-        for i, step in enumerate(session.planned, start=1):
-            print(f"[{i}] SQL: {step.sql}")
-            if step.params is not None:
-                print(f"    params: {step.params}")
-
-    print(f"\nSummary: processed={processed}, created={created}, updated={updated}")
-    con.close()
+        print("\nPlanned SQL steps:", file=report)
+        for line, sql in zip(session.planned.summary(), session.planned.sql):
+            print(line, file=report)
+            print(f"    SQL: {sql}", file=report)
+    if plan_out is not None and plan_out is not sys.stdout:
+        plan_out.close()
+
+    print(f"\nSummary: processed={processed}, created={created}, updated={updated}", file=report)
     session.close()
     return 0
 
 
 if __name__ == "__main__":
-    raise SystemExit(main())
+    try:
+        raise SystemExit(main())
+    except BrokenPipeError:
+        # Allow piping --plan-out - to tools like `head` without noisy tracebacks.
+        try:
+            sys.stdout.close()
+        finally:
+            raise SystemExit(0)
@@ -6,7 +6,7 @@ import os
 from pathlib import Path
 import json
 
-from moneywiz_api.moneywiz_api import MoneywizApi
+from moneywiz_tools import open_api
 
 
 def default_db() -> Path:
@@ -21,7 +21,7 @@ def main() -> int:
     group.add_argument("--gid", type=str, help="Record global ID (ZGID)")
     args = ap.parse_args()
 
-    api = MoneywizApi(args.db)
+    api = open_api(args.db)
     if args.id is not None:
         rec = api.accessor.get_record(args.id)
     else:
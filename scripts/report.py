@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+from datetime import datetime
+from pathlib import Path
+
+from moneywiz_tools.aggregate import DIMENSIONS, Aggregator
+from moneywiz_tools.epoch import PERIODS
+from moneywiz_tools.output import add_format_argument, run, write_rows
+
+
+def default_db() -> Path:
+    return Path(__file__).resolve().parents[1] / "tests/test_db.sqlite"
+
+
+def parse_date(val: str | None) -> datetime | None:
+    if not val:
+        return None
+    return datetime.fromisoformat(val)
+
+
+def parse_list(val: str | None) -> list[str]:
+    return [v.strip() for v in (val or "").split(",") if v.strip()]
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(
+        description="Transaction totals grouped by period, account, category, payee, tag, ..."
+    )
+    ap.add_argument("--db", type=Path, default=default_db(), help="Path to MoneyWiz sqlite DB")
+    ap.add_argument(
+        "--by",
+        default="period",
+        help=f"Comma-separated dimensions to group by ({', '.join(DIMENSIONS)}; default: period)",
+    )
+    ap.add_argument("--period", choices=PERIODS, default="month", help="Bucket size for 'period'")
+    ap.add_argument("--pivot", help="Spread this --by dimension into columns (cross-tab)")
+    ap.add_argument("--account", help="Comma-separated account IDs to include")
+    ap.add_argument("--user", type=int, help="Only accounts of this user")
+    ap.add_argument("--since", type=str, help="Include transactions from this ISO date (YYYY-MM-DD)")
+    ap.add_argument("--until", type=str, help="Include transactions up to this ISO date (YYYY-MM-DD)")
+    ap.add_argument(
+        "--type",
+        type=str,
+        help="Comma-separated transaction type names to include (default: all listed types)",
+    )
+    ap.add_argument("--decimals", type=int, default=2, help="Minor units per currency unit (10**N; default 2)")
+    add_format_argument(ap)
+    args = ap.parse_args()
+
+    by = parse_list(args.by)
+    unknown = [d for d in by if d not in DIMENSIONS]
+    if unknown:
+        ap.error(f"unknown dimension(s): {', '.join(unknown)}")
+    if args.pivot and args.pivot not in by:
+        ap.error("--pivot must be one of the --by dimensions")
+
+    agg = Aggregator(args.db)
+    try:
+        report = agg.report(
+            by,
+            period=args.period,
+            decimals=args.decimals,
+            typenames=parse_list(args.type) or None,
+            accounts=[int(a) for a in parse_list(args.account)] or None,
+            user=args.user,
+            since=parse_date(args.since),
+            until=parse_date(args.until),
+        )
+    except ValueError as exc:
+        ap.error(str(exc))
+    finally:
+        agg.close()
+
+    if args.pivot:
+        headers, rows = report.pivot(args.pivot)
+    else:
+        rows = report.rows()
+        headers = list(rows[0]) if rows else [*by, "amount", "count"]
+
+    write_rows(args.format, rows, headers, ensure_ascii=False, widths=args.table_widths)
+    return 0
+
+
+if __name__ == "__main__":
+    run(main)
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""``search QUERY``: full-text transaction search through the sidecar index.
+
+Lists the matches like ``transactions --search QUERY`` (every other
+``transactions`` option applies), or with ``--ids-only`` just the ranked
+transaction ids and scores, straight from the index.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from moneywiz_tools.output import add_format_argument, run, write_rows
+from moneywiz_tools.search import COLUMNS, SearchIndex
+
+
+def default_db() -> Path:
+    return Path(__file__).resolve().parents[1] / "tests/test_db.sqlite"
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(
+        description="Search transaction descriptions, notes, payee, category and tag names "
+        "(other options are passed on to 'transactions')"
+    )
+    ap.add_argument("query", help="Words that must all occur (substrings, any case)")
+    ap.add_argument("--db", type=Path, default=default_db(), help="Path to MoneyWiz sqlite DB")
+    ap.add_argument("--fuzzy", action="store_true", help="Also rank near matches (shared trigrams)")
+    ap.add_argument("--in", dest="columns", type=str, help=f"Comma-separated columns to search ({','.join(COLUMNS)})")
+    ap.add_argument("--limit", type=int, default=20, help="Max matches (0 = no limit; default 20)")
+    ap.add_argument("--ids-only", action="store_true", help="Print only ranked ids and scores, from the index")
+    ap.add_argument("--rebuild", action="store_true", help="Rebuild the index from scratch first")
+    add_format_argument(ap, default="table")
+    args, rest = ap.parse_known_args()
+
+    if args.ids_only and rest:
+        ap.error(f"unrecognized arguments with --ids-only: {' '.join(rest)}")
+    columns = [c.strip() for c in (args.columns or "").split(",") if c.strip()] or None
+    unknown = [c for c in columns or [] if c not in COLUMNS]
+    if unknown:
+        ap.error(f"unknown --in column(s): {', '.join(unknown)}")
+
+    started = time.perf_counter()
+    with SearchIndex(args.db) as index:
+        refreshed = index.refresh(rebuild=args.rebuild)
+        if refreshed:
+            print(f"search: indexed {refreshed} transactions in {time.perf_counter() - started:.2f} s", file=sys.stderr)
+        if args.ids_only:
+            hits = index.search(args.query, fuzzy=args.fuzzy, columns=columns, limit=args.limit or None)
+            rows = ({"id": pk, "score": round(score, 3)} for pk, score in hits)
+            write_rows(args.format, rows, ["id", "score"], widths=args.table_widths)
+            return 0
+
+    import transactions
+
+    argv = [sys.argv[0], "--db", str(args.db), "--search", args.query, "--limit", str(args.limit)]
+    argv += ["--format", args.format, "--table-widths", args.table_widths]
+    if args.fuzzy:
+        argv.append("--fuzzy")
+    if columns:
+        argv += ["--search-in", ",".join(columns)]
+    sys.argv = argv + rest
+    return transactions.main()
+
+
+if __name__ == "__main__":
+    run(main)
@@ -0,0 +1,432 @@
+#!/usr/bin/env python3
+"""Resident read server: keeps one DB's managers warm behind a Unix socket.
+
+    server.py start --db PATH     # fork into the background, wait until ready
+    server.py run --db PATH       # same, in the foreground
+    server.py status | stop
+    server.py call <command> [args...]
+
+``call`` is the client used by ``moneywiz.sh``: it forwards a read
+subcommand, streams back stdout/stderr and exits with the command's status.
+It exits 75 (EX_TEMPFAIL) without output when no server is listening, the
+server holds a different DB or was started with different behaviour
+variables (``ENV_KEYS``), so the caller can fall back to running the
+script directly.
+
+Commands run one at a time inside the server process: the script module's
+``main()`` is called with ``sys.argv`` set and stdout/stderr redirected to
+the socket, and ``open_api()`` hands it the warm API. Before every command
+the DB fingerprint (see ``moneywiz_tools.cache``) is re-checked and the API
+reloaded when the file has changed.
+
+The ``call`` path is kept to a handful of cheap stdlib imports (no
+argparse/pathlib/subprocess) since it runs once per forwarded command;
+``moneywiz_tools`` (and with it ``moneywiz_api``) is imported by the server
+alone.
+"""
+from __future__ import annotations
+
+import io
+import json
+import os
+import socket
+import struct
+import sys
+import time
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Subcommand -> script run in-process by the server.
+COMMANDS = {
+    "users": "users.py",
+    "accounts": "accounts.py",
+    "categories": "categories.py",
+    "payees": "payees.py",
+    "tags": "tags.py",
+    "transactions": "transactions.py",
+    "holdings": "holdings.py",
+    "record": "record.py",
+    "summary": "summary.py",
+    "report": "report.py",
+    "balances": "balances.py",
+}
+
+NOT_SERVED = 75  # EX_TEMPFAIL: caller should run the command itself
+# Variables that change what a command loads or prints; a request is only
+# served when the client's values match the server's.
+ENV_KEYS = ("MONEYWIZ_TRANSACTION_STORE", "MONEYWIZ_NO_CACHE", "MONEYWIZ_IMMUTABLE")
+_HEADER = struct.Struct(">cI")
+
+
+def default_socket() -> str:
+    # Mirrors moneywiz_tools.cache.cache_dir() without importing it.
+    explicit = os.environ.get("MONEYWIZ_SOCKET")
+    if explicit:
+        return os.path.expanduser(explicit)
+    base = os.environ.get("MONEYWIZ_CACHE_DIR")
+    if not base:
+        base = os.path.join(
+            os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+            "moneywiz-tools",
+        )
+    return os.path.join(os.path.expanduser(base), "server.sock")
+
+
+def _send(sock: socket.socket, kind: bytes, payload: bytes) -> None:
+    sock.sendall(_HEADER.pack(kind, len(payload)) + payload)
+
+
+def _recv_exact(rfile, n: int) -> bytes:
+    data = rfile.read(n)
+    if len(data) != n:
+        raise ConnectionError("server closed the connection")
+    return data
+
+
+def _connect(path: str, timeout: float | None = None) -> socket.socket | None:
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    if timeout is not None:
+        sock.settimeout(timeout)
+    try:
+        sock.connect(str(path))
+    except OSError:
+        sock.close()
+        return None
+    sock.settimeout(None)
+    return sock
+
+
+def _request(path: str, payload: dict) -> dict | None:
+    """Send a control request and return the decoded JSON reply."""
+    sock = _connect(path, timeout=5)
+    if sock is None:
+        return None
+    with sock, sock.makefile("rb") as rfile:
+        sock.sendall(json.dumps(payload).encode() + b"\n")
+        line = rfile.readline()
+    return json.loads(line) if line else None
+
+
+def _env() -> dict:
+    return {key: os.environ[key] for key in ENV_KEYS if key in os.environ}
+
+
+def _db_from_argv(argv: list[str]) -> str | None:
+    for i, arg in enumerate(argv):
+        if arg == "--db" and i + 1 < len(argv):
+            return os.path.abspath(argv[i + 1])
+        if arg.startswith("--db="):
+            return os.path.abspath(arg[len("--db="):])
+    return None
+
+
+# --------------------------------------------------------------------------
+# Client
+
+
+def call(path: str, command: str, argv: list[str], on_output=None) -> int:
+    db = _db_from_argv(argv)
+    if command not in COMMANDS or db is None:
+        return NOT_SERVED
+    sock = _connect(path)
+    if sock is None:
+        return NOT_SERVED
+    request = {"op": "run", "command": command, "argv": argv, "db": db, "cwd": os.getcwd(), "env": _env()}
+    out = sys.stdout.buffer
+    err = sys.stderr.buffer
+    with sock, sock.makefile("rb") as rfile:
+        sock.sendall(json.dumps(request).encode() + b"\n")
+        while True:
+            kind, size = _HEADER.unpack(_recv_exact(rfile, _HEADER.size))
+            if kind == b"x":
+                return size if size < 256 else 1
+            data = _recv_exact(rfile, size)
+            if kind == b"o" and on_output is not None:
+                on_output()
+                on_output = None
+            target = out if kind == b"o" else err
+            try:
+                target.write(data)
+                target.flush()
+            except BrokenPipeError:
+                # Reader went away (e.g. `| head`); dropping the socket stops the server side.
+                try:
+                    sys.stdout.close()
+                except BrokenPipeError:
+                    pass
+                return 0
+
+
+# --------------------------------------------------------------------------
+# Server
+
+
+class _FrameStream(io.TextIOBase):
+    """Text stream that forwards writes as framed chunks on a socket."""
+
+    def __init__(self, sock: socket.socket, kind: bytes, limit: int = 1 << 16) -> None:
+        self._sock = sock
+        self._kind = kind
+        self._limit = limit
+        self._buf = bytearray()
+
+    @property
+    def encoding(self) -> str:  # type: ignore[override]
+        return "utf-8"
+
+    def writable(self) -> bool:
+        return True
+
+    def isatty(self) -> bool:
+        return False
+
+    def write(self, s: str) -> int:
+        self._buf += s.encode("utf-8", "replace")
+        if len(self._buf) >= self._limit:
+            self.flush()
+        return len(s)
+
+    def flush(self) -> None:
+        if self._buf:
+            data, self._buf = bytes(self._buf), bytearray()
+            _send(self._sock, self._kind, data)
+
+
+class Server:
+    def __init__(self, db: str, path: str) -> None:
+        self.db = os.path.realpath(db)
+        self.path = path
+        self.env = _env()
+        self.started = time.time()
+        self.requests = 0
+        self.reloads = 0
+        self._modules: dict[str, object] = {}
+        self.api = None
+        self.fingerprint = ""
+        self._load()
+
+    def _load(self) -> None:
+        from moneywiz_tools.cache import db_fingerprint
+        from moneywiz_tools.lazy import LazyMoneywizApi, register_warm, unregister_warm
+
+        old = self.api
+        api = LazyMoneywizApi(self.db)
+        api.load()
+        self.fingerprint = db_fingerprint(self.db, api.accessor)
+        if old is not None:
+            unregister_warm(old)
+            old.accessor.close()
+        register_warm(api)
+        self.api = api
+
+    def refresh(self) -> None:
+        from moneywiz_tools.cache import db_fingerprint
+
+        if db_fingerprint(self.db, self.api.accessor) != self.fingerprint:
+            self._load()
+            self.reloads += 1
+
+    def _module(self, command: str):
+        mod = self._modules.get(command)
+        if mod is None:
+            import importlib.util
+
+            script = os.path.join(SCRIPTS_DIR, COMMANDS[command])
+            spec = importlib.util.spec_from_file_location(f"_moneywiz_cmd_{command}", script)
+            mod = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(mod)
+            self._modules[command] = mod
+        return mod
+
+    def run_command(self, conn: socket.socket, req: dict) -> None:
+        if (
+            req.get("command") not in COMMANDS
+            or os.path.realpath(req.get("db", "")) != self.db
+            or req.get("env", {}) != self.env
+        ):
+            conn.sendall(_HEADER.pack(b"x", NOT_SERVED))
+            return
+        self.refresh()
+        self.requests += 1
+        command = req["command"]
+        out = _FrameStream(conn, b"o")
+        err = _FrameStream(conn, b"e")
+        saved = sys.argv, sys.stdout, sys.stderr, os.getcwd()
+        code = 0
+        try:
+            os.chdir(req.get("cwd") or saved[3])
+            sys.argv = [os.path.join(SCRIPTS_DIR, COMMANDS[command]), *req.get("argv", [])]
+            sys.stdout, sys.stderr = out, err
+            try:
+                result = self._module(command).main()
+                code = int(result or 0)
+            except SystemExit as exc:
+                if exc.code is None:
+                    code = 0
+                elif isinstance(exc.code, int):
+                    code = exc.code
+                else:
+                    print(exc.code, file=err)
+                    code = 1
+            except (BrokenPipeError, ConnectionError):
+                raise
+            except Exception:
+                import traceback
+
+                traceback.print_exc(file=err)
+                code = 1
+            out.flush()
+            err.flush()
+        finally:
+            sys.argv, sys.stdout, sys.stderr = saved[0], saved[1], saved[2]
+            os.chdir(saved[3])
+        conn.sendall(_HEADER.pack(b"x", code & 0xFF))
+
+    def status(self) -> dict:
+        return {
+            "pid": os.getpid(),
+            "db": self.db,
+            "socket": self.path,
+            "uptime_s": round(time.time() - self.started, 1),
+            "requests": self.requests,
+            "reloads": self.reloads,
+            "env": self.env,
+        }
+
+    def serve(self) -> None:
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listener.bind(self.path)
+        os.chmod(self.path, 0o600)
+        listener.listen(16)
+        print(f"moneywiz server: {self.db} on {self.path} (pid {os.getpid()})", flush=True)
+        try:
+            while True:
+                conn, _ = listener.accept()
+                with conn, conn.makefile("rb") as rfile:
+                    try:
+                        line = rfile.readline()
+                        if not line:
+                            continue
+                        req = json.loads(line)
+                        op = req.get("op")
+                        if op == "run":
+                            self.run_command(conn, req)
+                        elif op == "status":
+                            conn.sendall(json.dumps(self.status()).encode() + b"\n")
+                        elif op == "stop":
+                            conn.sendall(json.dumps({"stopping": True}).encode() + b"\n")
+                            return
+                    except (BrokenPipeError, ConnectionError):
+                        # Client disconnected mid-command; nothing to clean up.
+                        pass
+        finally:
+            listener.close()
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+
+
+def _prepare_socket(path: str) -> bool:
+    """Remove a stale socket file; False when a server is already listening."""
+    if os.path.exists(path):
+        sock = _connect(path, timeout=1)
+        if sock is not None:
+            sock.close()
+            return False
+        os.unlink(path)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), mode=0o700, exist_ok=True)
+    return True
+
+
+def start(path: str, db: str, wait: float = 60.0) -> int:
+    import subprocess
+
+    if not _prepare_socket(path):
+        print(f"Server already running on {path}", file=sys.stderr)
+        return 1
+    log = os.path.splitext(path)[0] + ".log"
+    with open(log, "ab") as fh:
+        proc = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--socket", path, "run", "--db", db],
+            stdin=subprocess.DEVNULL,
+            stdout=fh,
+            stderr=fh,
+            start_new_session=True,
+        )
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            print(f"Server exited with status {proc.returncode}; see {log}", file=sys.stderr)
+            return 1
+        info = _request(path, {"op": "status"}) if os.path.exists(path) else None
+        if info is not None:
+            print(f"Server started (pid {info['pid']}) for {info['db']} on {path}")
+            return 0
+        time.sleep(0.05)
+    print(f"Server did not come up within {wait:.0f}s; see {log}", file=sys.stderr)
+    return 1
+
+
+def main() -> int:
+    # `call` forwards everything after the command untouched (argparse would
+    # otherwise claim options such as --db or --help), and skips argparse.
+    argv = sys.argv[1:]
+    sock_path = default_socket()
+    i = 0
+    while i < len(argv) and argv[i].startswith("--socket"):
+        if "=" in argv[i]:
+            sock_path = argv[i].split("=", 1)[1]
+            i += 1
+        elif i + 1 < len(argv):
+            sock_path = argv[i + 1]
+            i += 2
+        else:
+            break
+    if i + 1 < len(argv) and argv[i] == "call":
+        return call(sock_path, argv[i + 1], argv[i + 2 :])
+
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Resident MoneyWiz read server")
+    ap.add_argument("--socket", default=sock_path, help="Unix socket path")
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--db", help="Path to MoneyWiz sqlite DB")
+    sub = ap.add_subparsers(dest="op", required=True)
+    sub.add_parser("start", parents=[common], help="Start in the background")
+    sub.add_parser("run", parents=[common], help="Run in the foreground")
+    sub.add_parser("stop", parents=[common], help="Stop a running server")
+    sub.add_parser("status", parents=[common], help="Show server status")
+    call_p = sub.add_parser("call", help="Forward a read subcommand to the server")
+    call_p.add_argument("command")
+    call_p.add_argument("args", nargs=argparse.REMAINDER)
+    args = ap.parse_args(argv)
+
+    if args.op in ("start", "run"):
+        if args.db is None:
+            ap.error("--db is required")
+        if not os.path.isfile(args.db):
+            print(f"Error: Database file not found: {args.db}", file=sys.stderr)
+            return 1
+        if args.op == "start":
+            return start(args.socket, args.db)
+        if not _prepare_socket(args.socket):
+            print(f"Server already running on {args.socket}", file=sys.stderr)
+            return 1
+        Server(args.db, args.socket).serve()
+        return 0
+    if args.op == "status":
+        info = _request(args.socket, {"op": "status"})
+        if info is None:
+            print(f"No server on {args.socket}")
+            return 1
+        print(json.dumps(info, indent=2))
+        return 0
+    # stop
+    if _request(args.socket, {"op": "stop"}) is None:
+        print(f"No server on {args.socket}")
+        return 1
+    print("Server stopped")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -16,13 +16,13 @@ SRC = REPO_ROOT / "moneywiz-api" / "src"
 if str(SRC) not in sys.path:
     sys.path.insert(0, str(SRC))
 
-from moneywiz_api.moneywiz_api import MoneywizApi  # type: ignore
+from moneywiz_tools import open_api  # type: ignore
 from moneywiz_api.cli.helpers import ShellHelper  # type: ignore
 
 
 def main() -> int:
     db_path = REPO_ROOT / "tests" / "test_db.sqlite"
-    api = MoneywizApi(str(db_path))
+    api = open_api(str(db_path))
     helper = ShellHelper(api)
 
     # 1) Users table
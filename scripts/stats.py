@@ -5,7 +5,7 @@ import argparse
 import os
 from pathlib import Path
 
-from moneywiz_api.moneywiz_api import MoneywizApi
+from moneywiz_tools import open_api
 from moneywiz_api.cli.helpers import ShellHelper
 
 
@@ -19,7 +19,7 @@ def main() -> int:
     ap.add_argument("--out", type=Path, default=Path("data/stats"), help="Output directory")
     args = ap.parse_args()
 
-    api = MoneywizApi(args.db)
+    api = open_api(args.db)
     helper = ShellHelper(api)
     helper.write_stats_data_files(args.out)
     print(f"Wrote stats files under {args.out}")
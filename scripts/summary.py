@@ -5,7 +5,7 @@ import argparse
 import os
 from pathlib import Path
 
-from moneywiz_api.moneywiz_api import MoneywizApi
+from moneywiz_tools import open_api
 
 
 def default_db() -> Path:
@@ -21,7 +21,7 @@ def main() -> int:
     ap.add_argument("--db", type=Path, default=default_db(), help="Path to MoneyWiz sqlite DB")
     args = ap.parse_args()
 
-    api = MoneywizApi(args.db)
+    api = open_api(args.db)
     users = api.accessor.get_users()
     print(f"Users: {len(users)} -> {users}")
     print(f"Accounts: {len(api.account_manager.records())}")
@@ -2,11 +2,10 @@
 from __future__ import annotations
 
 import argparse
-import os
 from pathlib import Path
-import json
 
-from moneywiz_api.moneywiz_api import MoneywizApi
+from moneywiz_tools import open_api
+from moneywiz_tools.output import add_format_argument, run, write_rows
 
 
 def default_db() -> Path:
@@ -17,10 +16,10 @@ def main() -> int:
     ap = argparse.ArgumentParser(description="List MoneyWiz tags")
     ap.add_argument("--db", type=Path, default=default_db(), help="Path to MoneyWiz sqlite DB")
     ap.add_argument("--user", type=int, help="User ID to filter tags; omit to list all users")
-    ap.add_argument("--format", choices=["table", "json"], default="table")
+    add_format_argument(ap)
     args = ap.parse_args()
 
-    api = MoneywizApi(args.db)
+    api = open_api(args.db)
     records = api.tag_manager.records().values()
 
     rows = [
@@ -29,14 +28,9 @@ def main() -> int:
         if args.user is None or t.user == args.user
     ]
 
-    if args.format == "json":
-        print(json.dumps(rows, indent=2))
-    else:
-        print("user\tid\tname")
-        for r in rows:
-            print(f"{r['user']}\t{r['id']}\t{r['name']}")
+    write_rows(args.format, rows, ["user", "id", "name"], widths=args.table_widths)
     return 0
 
 
 if __name__ == "__main__":
-    raise SystemExit(main())
+    run(main)
@@ -2,12 +2,16 @@
 from __future__ import annotations
 
 import argparse
-import os
+import dataclasses
+import itertools
 from pathlib import Path
 from datetime import datetime
-import json
 
-from moneywiz_api.moneywiz_api import MoneywizApi
+from moneywiz_tools import open_api
+from moneywiz_tools.deferred import iso_datetimes
+from moneywiz_tools.output import add_format_argument, run, write_rows
+from moneywiz_tools.search import COLUMNS as SEARCH_COLUMNS, SearchIndex
+from moneywiz_tools.trace import phase
 
 
 def default_db() -> Path:
@@ -20,6 +24,88 @@ def parse_date(val: str | None) -> datetime | None:
     return datetime.fromisoformat(val)
 
 
+# Preferred leading columns when every top-level field is shown.
+PREFERRED_FIELDS = [
+    "id",
+    "datetime",
+    "account",
+    "account_name",
+    "payee",
+    "payee_name",
+    "amount",
+    "description",
+    "__type",
+]
+DEFAULT_FIELDS = ["id", "datetime", "account", "account_name", "amount", "description"]
+
+
+def model_field_names(api, typenames: list[str] | None) -> set[str]:
+    """Top-level ``as_dict()`` keys of the selected transaction models."""
+    names = typenames or api.transaction_manager.listed_typenames()
+    keys: set[str] = set()
+    for name in names:
+        cls = api.transaction_manager.ents[name]
+        keys.update(f.name for f in dataclasses.fields(cls) if not f.name.startswith("_"))
+    return keys
+
+
+def model_headers(args, api, typenames) -> list[str]:
+    """CSV and ``--all-fields`` columns, known before the first row is read."""
+    if args.all_fields:
+        # Derived from the model definitions rather than from the data.
+        keys = model_field_names(api, typenames)
+        keys |= {"id", "account", "account_name", "payee", "payee_name", "__type__"}
+        if args.with_categories:
+            keys.add("categories")
+        if args.with_tags:
+            keys.add("tags")
+        headers = [k for k in PREFERRED_FIELDS if k in keys]
+        return headers + [k for k in sorted(keys) if k not in headers]
+    headers = list(DEFAULT_FIELDS)
+    if args.with_categories:
+        headers.append("categories")
+    if args.with_tags:
+        headers.append("tags")
+    return headers
+
+
+def searched(api, query, ranked, batch_size: int = 256):
+    """Batches of the ``ranked`` search hits that pass the other filters,
+    best match first.
+
+    Hits are looked up ``batch_size`` ids at a time, and the limit counts
+    only the rows that pass, so a ``--limit`` stops reading early.
+    """
+    query = dict(query)
+    limit = query.pop("limit", None)
+    hits = iter(ranked)
+    while limit is None or limit > 0:
+        chunk = list(itertools.islice(hits, batch_size))
+        if not chunk:
+            return
+        order = {pk: n for n, pk in enumerate(chunk)}
+        txs = api.transaction_manager.query(ids=chunk, **query)
+        txs.sort(key=lambda t: order[t.id])
+        if limit is not None:
+            txs = txs[:limit]
+            limit -= len(txs)
+        if txs:
+            yield txs
+
+
+def enriched(batches, prefetch, enrich_all):
+    """Enriched rows, read and prefetched one cursor batch at a time.
+
+    Only the current batch of models, relations and row dicts is alive at
+    any point, so every format renders in bounded memory.
+    """
+    for txs in batches:
+        related = prefetch(txs)
+        with phase("enrich"):
+            items = enrich_all(txs, related)
+        yield from items
+
+
 def main() -> int:
     ap = argparse.ArgumentParser(description="List MoneyWiz transactions for an account")
     ap.add_argument("--db", type=Path, default=default_db(), help="Path to MoneyWiz sqlite DB")
@@ -36,6 +122,12 @@ def main() -> int:
         help="Max rows to output (0 = no limit; default 0)",
     )
     ap.add_argument("--until", type=str, help="Include transactions up to this ISO date (YYYY-MM-DD)")
+    ap.add_argument("--since", type=str, help="Include transactions from this ISO date (YYYY-MM-DD)")
+    ap.add_argument(
+        "--type",
+        type=str,
+        help="Comma-separated transaction type names to include (e.g. WithdrawTransaction,DepositTransaction)",
+    )
     ap.add_argument("--with-categories", action="store_true", help="Include category assignments")
     ap.add_argument("--with-tags", action="store_true", help="Include tags for each transaction")
     ap.add_argument(
@@ -53,19 +145,37 @@ def main() -> int:
         action="store_true",
         help="List available top-level fields for --fields (based on current selection)",
     )
-    ap.add_argument("--format", choices=["table", "json"], default="table")
+    ap.add_argument(
+        "--search",
+        type=str,
+        help="Only transactions matching this text (description, notes, payee, category and tag names), "
+        "best match first; adds a score column",
+    )
+    ap.add_argument("--fuzzy", action="store_true", help="With --search, also rank near matches (shared trigrams)")
+    ap.add_argument(
+        "--search-in",
+        type=str,
+        help=f"Comma-separated columns for --search (default: all of {','.join(SEARCH_COLUMNS)})",
+    )
+    add_format_argument(ap, default="table")
     args = ap.parse_args()
 
-    api = MoneywizApi(args.db)
-    until_dt = parse_date(args.until) or datetime.now()
-    if args.account is not None:
-        txs = api.transaction_manager.get_all_for_account(args.account, until=until_dt)
-    else:
-        txs = api.transaction_manager.get_all(until=until_dt)
-    # Sort newest first and apply optional limit (0 or negative means no limit)
-    txs = list(reversed(txs))
-    if args.limit and args.limit > 0:
-        txs = txs[: args.limit]
+    api = open_api(args.db)
+    typenames = None
+    if args.type:
+        typenames = [t.strip() for t in args.type.split(",") if t.strip()]
+        unknown = [t for t in typenames if t not in api.transaction_manager.ents]
+        if unknown:
+            ap.error(f"unknown transaction type(s): {', '.join(unknown)}")
+    # Newest first; account/date/type filters and the limit (0 or negative
+    # means no limit) run in SQL so only the returned rows are parsed.
+    query = dict(
+        account=args.account,
+        since=parse_date(args.since),
+        until=parse_date(args.until) or datetime.now(),
+        typenames=typenames,
+        limit=args.limit if args.limit and args.limit > 0 else None,
+    )
 
     def sanitize(obj):
         try:
@@ -86,33 +196,52 @@ def main() -> int:
             return obj.isoformat(sep=" ", timespec="seconds")
         return obj
 
-    rows: list[dict] = []
     need_enrich = bool(args.all_fields or args.fields or args.list_fields)
-    for t in txs:
+
+    scores = None
+    if args.search is not None:
+        columns = [c.strip() for c in (args.search_in or "").split(",") if c.strip()] or None
+        unknown = [c for c in columns or [] if c not in SEARCH_COLUMNS]
+        if unknown:
+            ap.error(f"unknown --search-in column(s): {', '.join(unknown)}")
+        with phase("search"), SearchIndex(args.db) as index:
+            index.refresh()
+            scores = dict(index.search(args.search, fuzzy=args.fuzzy, columns=columns))
+
+    def prefetch(txs):
+        # Names, splits and tags for every listed row in a fixed number of
+        # queries instead of per-row manager lookups.
+        return api.transaction_manager.prefetch(
+            [t.id for t in txs],
+            categories=args.with_categories,
+            tags=args.with_tags,
+            refunds=False,
+        )
+
+    def enrich_all(txs, related) -> list[dict]:
+        # Dates of the whole batch in one vectorised conversion.
+        when = iso_datetimes(txs, sep=" ", timespec="seconds")
+        return [enrich(t, related, w) for t, w in zip(txs, when)]
+
+    def enrich(t, related, when) -> dict:
         item: dict = {
             "id": t.id,
-            "datetime": t.datetime.isoformat(sep=" ", timespec="seconds"),
+            "datetime": when,
             "account": getattr(t, "account", None),
             "amount": str(t.amount),
             "description": t.description,
         }
+        if scores is not None:
+            item["score"] = round(scores[t.id], 3)
         # Add human-friendly account name
-        try:
-            acc = api.account_manager.get(getattr(t, "account", None))
-            if acc is not None:
-                item["account_name"] = acc.name
-        except Exception:
-            pass
+        if t.id in related.account_name:
+            item["account_name"] = related.account_name[t.id]
         # Add payee id and payee name (where applicable)
-        try:
-            payee_id = getattr(t, "payee", None)
-            if payee_id is not None:
-                item["payee"] = payee_id
-                p = api.payee_manager.get(payee_id)
-                if p is not None:
-                    item["payee_name"] = p.name
-        except Exception:
-            pass
+        payee_id = getattr(t, "payee", None)
+        if payee_id is not None:
+            item["payee"] = payee_id
+            if t.id in related.payee_name:
+                item["payee_name"] = related.payee_name[t.id]
         # Enrich with all known fields if requested or when fields/list-fields specified
         if need_enrich:
             item["__type__"] = type(t).__name__
@@ -145,12 +274,20 @@ def main() -> int:
                 pass
             # Do not merge raw DB columns into top-level; keep them under __raw/__raw_all
         if args.with_categories:
-            cats = api.transaction_manager.category_for_transaction(t.id) or []
+            cats = related.categories.get(t.id, [])
             item["categories"] = [{"category_id": cid, "amount": str(amt)} for cid, amt in cats]
         if args.with_tags:
-            tags = api.transaction_manager.tags_for_transaction(t.id) or []
-            item["tags"] = tags
-        rows.append(item)
+            item["tags"] = related.tags.get(t.id, [])
+        return item
+
+    headers = None
+    if args.fields:
+        headers = [h.strip() for h in args.fields.split(",") if h.strip()]
+    if scores is None:
+        batches = api.transaction_manager.query_batches(**query)
+    else:
+        batches = searched(api, query, scores)
+    rows = enriched(batches, prefetch, enrich_all)
 
     # If only listing columns, print union of keys and exit
     if args.list_fields:
@@ -164,59 +301,19 @@ def main() -> int:
             print(k)
         return 0
 
-    if args.format == "json":
-        print(json.dumps(rows, indent=2))
-    else:
-        # Determine headers
-        headers = None
-        if args.fields:
-            headers = [h.strip() for h in args.fields.split(",") if h.strip()]
-        # If --all-fields in table mode and no explicit headers, show all available top-level fields
-        if args.all_fields and not headers:
-            keys = set()
-            for r in rows:
-                keys.update(r.keys())
-            # Exclude nested raw payload keys
-            for k in ("__raw", "__raw_all"):
-                keys.discard(k)
-            # Prefer human-friendly order first, then the rest sorted
-            preferred = [
-                "id",
-                "datetime",
-                "account",
-                "account_name",
-                "payee",
-                "payee_name",
-                "amount",
-                "description",
-                "__type",
-            ]
-            remaining = [k for k in sorted(keys) if k not in preferred]
-            headers = [k for k in preferred if k in keys] + remaining
-        if not headers:
-            headers = ["id", "datetime", "account", "account_name", "amount", "description"]
-        # Pretty-print a fixed-width table that preserves empty fields
-        # Build matrix of string values
-        table_rows = []
-        for r in rows:
-            table_rows.append([str(r.get(h, "")) if r.get(h, "") is not None else "" for h in headers])
-
-        # Compute column widths
-        widths = []
-        for i, h in enumerate(headers):
-            col_vals = [row[i] for row in table_rows]
-            max_len = max([len(h)] + [len(v) for v in col_vals])
-            widths.append(max_len)
-
-        # Helpers to render a row
-        def render_row(cells):
-            return "  ".join(c.ljust(w) for c, w in zip(cells, widths))
-
-        # Print header, separator, and rows
-        print(render_row(headers))
-        print(render_row(["-" * len(h) for h in headers]))
-        for row in table_rows:
-            print(render_row(row))
+    if not headers:
+        # --all-fields columns come from the model definitions of the
+        # selected types, so a type first seen late in the rows (past the
+        # table width sample) still gets its columns.
+        if args.format == "csv" or args.all_fields:
+            headers = model_headers(args, api, typenames)
+        else:
+            headers = list(DEFAULT_FIELDS)
+        if scores is not None:
+            headers.append("score")
+    with phase("render"):
+        write_rows(args.format, rows, headers, widths=args.table_widths)
+    if args.format == "table":
         if args.with_categories:
             print("\n# categories: use --format json to see per-transaction details")
         if args.with_tags:
@@ -225,4 +322,4 @@ def main() -> int:
 
 
 if __name__ == "__main__":
-    raise SystemExit(main())
+    run(main)
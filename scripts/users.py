@@ -2,11 +2,10 @@
 from __future__ import annotations
 
 import argparse
-import os
 from pathlib import Path
-import json
 
-from moneywiz_api.moneywiz_api import MoneywizApi
+from moneywiz_tools import open_api
+from moneywiz_tools.output import add_format_argument, run, write_rows
 
 
 def default_db() -> Path:
@@ -17,21 +16,16 @@ def default_db() -> Path:
 def main() -> int:
     ap = argparse.ArgumentParser(description="List MoneyWiz users")
     ap.add_argument("--db", type=Path, default=default_db(), help="Path to MoneyWiz sqlite DB")
-    ap.add_argument("--format", choices=["table", "json"], default="table")
+    add_format_argument(ap)
     args = ap.parse_args()
 
-    api = MoneywizApi(args.db)
+    api = open_api(args.db)
     users = api.accessor.get_users()
 
     rows = [{"id": uid, "login_name": name} for uid, name in sorted(users.items())]
-    if args.format == "json":
-        print(json.dumps(rows, indent=2))
-    else:
-        print("id\tlogin_name")
-        for r in rows:
-            print(f"{r['id']}\t{r['login_name']}")
+    write_rows(args.format, rows, ["id", "login_name"], widths=args.table_widths)
     return 0
 
 
 if __name__ == "__main__":
-    raise SystemExit(main())
+    run(main)
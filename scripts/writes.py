@@ -3,11 +3,14 @@ from __future__ import annotations
 
 import argparse
 import json
+import sys
 from pathlib import Path
 from typing import Any
 
 from moneywiz_api.writes import WriteSession
 
+from moneywiz_tools.plan import PlanRecorder, open_sink, report_stream
+
 
 def load_fields(json_str: str | None) -> dict[str, Any]:
     if not json_str:
@@ -19,6 +22,11 @@ def main() -> int:
     ap = argparse.ArgumentParser(description="Preview (and optionally apply) writes to MoneyWiz DB")
     ap.add_argument("--db", type=Path, required=True, help="Path to MoneyWiz sqlite DB")
     ap.add_argument("--apply", action="store_true", help="Apply changes (default is dry-run preview)")
+    ap.add_argument(
+        "--plan-out",
+        metavar="FILE",
+        help="Stream planned steps as NDJSON to FILE ('-' for stdout) as they are produced",
+    )
 
     sub = ap.add_subparsers(dest="cmd", required=True)
 
@@ -78,6 +86,9 @@ def main() -> int:
     args = ap.parse_args()
 
     session = WriteSession(args.db, dry_run=(not args.apply))
+    plan_out = open_sink(args.plan_out)
+    # With --plan-out - stdout carries only the NDJSON plan.
+    report = report_stream(plan_out)
 
     def run() -> int:
         if args.cmd == "insert":
@@ -89,11 +100,11 @@ def main() -> int:
         elif args.cmd == "safe-delete":
             refs = session.safe_delete(args.id)
             if refs:
-                print("-- ABORT: References found; not deleting --")
+                print("-- ABORT: References found; not deleting --", file=report)
                 for r in refs:
                     samples = ", ".join(map(str, r.sample_ids)) if r.sample_ids else ""
                     suffix = f" (sample ids: {samples})" if samples else ""
-                    print(f"- {r.table}.{r.column}: {r.count}{suffix}")
+                    print(f"- {r.table}.{r.column}: {r.count}{suffix}", file=report)
                 return 2
         elif args.cmd == "rename":
             session.rename_entity(args.id, args.name, args.name_field)
@@ -114,12 +125,25 @@ def main() -> int:
     else:
         exit_code = run()
 
+    # Record the session's steps once they are all known: templates once,
+    # streamed to --plan-out, and counted for the summary.
+    plan = PlanRecorder(out=plan_out)
+    for step in session.planned:
+        plan.append(step)
+
     # Print the plan
-    print("-- " + ("APPLY" if args.apply else "DRY-RUN") + " --")
+    print("-- " + ("APPLY" if args.apply else "DRY-RUN") + " --", file=report)
     for i, step in enumerate(session.planned, start=1):
-        print(f"[{i}] SQL: {step.sql}")
+        print(f"[{i}] SQL: {step.sql}", file=report)
         if step.params is not None:
-            print(f"    params: {step.params}")
+            print(f"    params: {step.params}", file=report)
+
+    if len(plan) > 1:
+        print("-- SUMMARY --", file=report)
+        for line in plan.summary():
+            print(line, file=report)
+    if plan_out is not None and plan_out is not sys.stdout:
+        plan_out.close()
 
     session.close()
     return exit_code
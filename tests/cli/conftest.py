@@ -0,0 +1,9 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path_factory, monkeypatch):
+    """A fresh snapshot cache per test, never the user's ~/.cache/moneywiz-tools."""
+    path = tmp_path_factory.mktemp("cache")
+    monkeypatch.setenv("MONEYWIZ_CACHE_DIR", str(path))
+    return path
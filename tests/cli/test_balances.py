@@ -0,0 +1,43 @@
+import json
+import sqlite3
+import subprocess
+from datetime import datetime, time
+from pathlib import Path
+
+# ZDATE1 counts seconds from 2001-01-01 00:00 *local* time, like
+# moneywiz_tools.epoch.CUTOFF and upstream get_datetime().
+CUTOFF = datetime(2001, 1, 1).timestamp()
+
+
+def run(cmd):
+    return subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True)
+
+
+def expected_balances(db, as_of):
+    con = sqlite3.connect(db)
+    rows = con.execute(
+        "SELECT a.Z_PK, CAST(ROUND(COALESCE(a.ZOPENINGBALANCE, 0) * 100) AS INTEGER) + COALESCE(("
+        "  SELECT SUM(CAST(ROUND(t.ZAMOUNT1 * 100) AS INTEGER)) FROM ZSYNCOBJECT t"
+        "  WHERE t.ZACCOUNT2 = a.Z_PK AND t.ZDATE1 <= ? AND t.Z_ENT IN ("
+        "    SELECT Z_ENT FROM Z_PRIMARYKEY WHERE Z_NAME != 'TransferBudgetTransaction' AND Z_SUPER = "
+        "    (SELECT Z_ENT FROM Z_PRIMARYKEY WHERE Z_NAME = 'Transaction'))), 0) "
+        "FROM ZSYNCOBJECT a WHERE a.Z_PK IN (SELECT ZACCOUNT2 FROM ZSYNCOBJECT WHERE ZACCOUNT2 IS NOT NULL)",
+        (as_of.timestamp() - CUTOFF,),
+    ).fetchall()
+    con.close()
+    return dict(rows)
+
+
+def test_balances_as_of_match_summed_history():
+    repo_root = Path(__file__).resolve().parents[2]
+    script = repo_root / "moneywiz.sh"
+    db = repo_root / "tests/test_db.sqlite"
+
+    for day in ("2020-06-30", "2024-01-01"):
+        as_of = datetime.combine(datetime.fromisoformat(day).date(), time.max)
+        expected = expected_balances(db, as_of)
+        data = json.loads(run(["bash", str(script), "balances", "--as-of", day, "--format", "json"]).stdout)
+        assert data
+        for row in data:
+            if row["id"] in expected:
+                assert round(float(row["balance"]) * 100) == expected[row["id"]]
@@ -0,0 +1,47 @@
+import json
+import sqlite3
+import subprocess
+from pathlib import Path
+
+
+def run(cmd):
+    return subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True)
+
+
+def test_categories_tree_matches_parent_links():
+    repo_root = Path(__file__).resolve().parents[2]
+    script = repo_root / "moneywiz.sh"
+    con = sqlite3.connect(repo_root / "tests/test_db.sqlite")
+    (user,) = con.execute("SELECT MIN(Z_PK) FROM ZUSER").fetchone()
+    parents = dict(
+        con.execute(
+            "SELECT Z_PK, ZPARENTCATEGORY FROM ZSYNCOBJECT WHERE Z_ENT = "
+            "(SELECT Z_ENT FROM Z_PRIMARYKEY WHERE Z_NAME = 'Category') AND ZUSER3 = ?",
+            (user,),
+        ).fetchall()
+    )
+    con.close()
+
+    rows = json.loads(
+        run(["bash", str(script), "categories", "--user", str(user), "--tree", "--full-name", "--format", "json"]).stdout
+    )
+    assert sorted(r["id"] for r in rows) == sorted(parents)
+    by_id = {r["id"]: r for r in rows}
+    for r in rows:
+        chain = [r["name"]]
+        parent = parents[r["id"]]
+        while parent:
+            chain.insert(0, by_id[parent]["name"])
+            parent = parents[parent]
+        assert r["name_chain"] == "/".join(chain)
+        assert r["depth"] == len(chain) - 1
+        assert r["parent_id"] == parents[r["id"]]
+        # Descendants are the pre-order range right after the category.
+        below = [d for d in rows if r["pre"] < d["pre"] and d["post"] < r["post"]]
+        assert len(below) == r["descendants"]
+        assert [d["pre"] for d in below] == list(range(r["pre"] + 1, r["pre"] + 1 + r["descendants"]))
+
+    flat = json.loads(
+        run(["bash", str(script), "categories", "--user", str(user), "--full-name", "--format", "json"]).stdout
+    )
+    assert {r["id"]: r["name_chain"] for r in flat} == {r["id"]: r["name_chain"] for r in rows}
@@ -0,0 +1,47 @@
+import json
+import shutil
+import sqlite3
+import subprocess
+from pathlib import Path
+
+
+def run(cmd):
+    return subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True)
+
+
+def test_changes_reports_only_the_delta_since_checkpoint(tmp_path):
+    repo_root = Path(__file__).resolve().parents[2]
+    script = repo_root / "moneywiz.sh"
+    db = tmp_path / "copy.sqlite"
+    shutil.copy(repo_root / "tests/test_db.sqlite", db)
+    base = ["bash", str(script), "--db", str(db), "changes", "--checkpoint", str(tmp_path / "cp.sqlite")]
+
+    con = sqlite3.connect(db)
+    (total,) = con.execute("SELECT COUNT(*) FROM ZSYNCOBJECT").fetchone()
+    first = run(base + ["--ids-only"]).stdout.splitlines()
+    assert len(first) == total
+    assert {json.loads(line)["op"] for line in first} == {"insert"}
+    assert run(base).stdout == ""
+
+    updated, deleted = (row[0] for row in con.execute("SELECT Z_PK FROM ZSYNCOBJECT ORDER BY Z_PK LIMIT 2"))
+    (max_pk,) = con.execute("SELECT MAX(Z_PK) FROM ZSYNCOBJECT").fetchone()
+    con.execute("UPDATE ZSYNCOBJECT SET Z_OPT = Z_OPT + 1 WHERE Z_PK = ?", (updated,))
+    con.execute("DELETE FROM ZSYNCOBJECT WHERE Z_PK = ?", (deleted,))
+    con.execute(
+        "INSERT INTO ZSYNCOBJECT (Z_PK, Z_ENT, Z_OPT, ZGID) "
+        "SELECT ?, Z_ENT, 1, 'TEST-GID' FROM ZSYNCOBJECT WHERE Z_PK = ?",
+        (max_pk + 1, updated),
+    )
+    con.commit()
+    con.close()
+
+    peek = run(base + ["--peek"]).stdout
+    changes = [json.loads(line) for line in peek.splitlines()]
+    assert [(c["op"], c["id"]) for c in changes] == [
+        ("delete", deleted),
+        ("update", updated),
+        ("insert", max_pk + 1),
+    ]
+    assert changes[2]["data"]["ZGID"] == "TEST-GID"
+    assert run(base).stdout == peek
+    assert run(base + ["--summary"]).stdout.strip() == "insert=0 update=0 delete=0"
@@ -0,0 +1,31 @@
+import json
+import os
+import subprocess
+from pathlib import Path
+
+
+def run(cmd, env=None):
+    return subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True, env=env)
+
+
+def test_read_commands_share_one_tuned_connection(tmp_path):
+    repo_root = Path(__file__).resolve().parents[2]
+    script = repo_root / "moneywiz.sh"
+    env = {**os.environ, "MONEYWIZ_NO_CACHE": "1"}
+
+    for argv in (
+        ["transactions", "--limit", "20", "--with-categories", "--with-tags"],
+        ["report", "--by", "category"],
+        ["payees"],
+    ):
+        trace = tmp_path / f"{argv[0]}.jsonl"
+        plain = run(["bash", str(script), *argv], env=env).stdout
+        traced = run(["bash", str(script), "--trace-sql-out", str(trace), *argv], env=env).stdout
+        assert traced == plain
+        statements = [json.loads(line)["sql"] for line in trace.read_text().splitlines()]
+        # One connection per process, opened read-only with the tuned pragmas.
+        assert sum(s.startswith("PRAGMA mmap_size") for s in statements) == 1, argv
+        assert sum(s.startswith("PRAGMA cache_size") for s in statements) == 1, argv
+
+        immutable = run(["bash", str(script), *argv], env={**env, "MONEYWIZ_IMMUTABLE": "1"}).stdout
+        assert immutable == plain
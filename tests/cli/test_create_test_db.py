@@ -0,0 +1,98 @@
+import json
+import sqlite3
+import subprocess
+from pathlib import Path
+
+
+def run(cmd):
+    return subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True)
+
+
+def test_create_test_db_copies_and_sanitizes(tmp_path):
+    repo_root = Path(__file__).resolve().parents[2]
+    script = repo_root / "moneywiz.sh"
+    src = repo_root / "tests/test_db.sqlite"
+
+    plain = tmp_path / "plain.sqlite"
+    run(["bash", str(script), "--db", str(src), "create-test-db", "--out", str(plain)])
+    orig = sqlite3.connect(src)
+    copy = sqlite3.connect(plain)
+    for (table,) in orig.execute("SELECT name FROM sqlite_master WHERE type='table'"):
+        query = f"SELECT * FROM {table} ORDER BY rowid"
+        assert copy.execute(query).fetchall() == orig.execute(query).fetchall()
+    copy.close()
+
+    clean = tmp_path / "clean.sqlite"
+    out = run(["bash", str(script), "--db", str(src), "create-test-db", "--out", str(clean), "--sanitize"]).stdout
+    assert "Sanitized columns summary" in out
+    con = sqlite3.connect(clean)
+    assert con.execute("PRAGMA integrity_check").fetchone() == ("ok",)
+    assert con.execute("SELECT COUNT(*) FROM ZSYNCOBJECT").fetchone() == orig.execute(
+        "SELECT COUNT(*) FROM ZSYNCOBJECT"
+    ).fetchone()
+    assert con.execute("SELECT COUNT(ZNOTES1) FROM ZSYNCOBJECT").fetchone() == (0,)
+    for column, prefix in (("ZNAME2", "CAT_"), ("ZDESC2", "DESC_"), ("ZGID", "ZGID_")):
+        rows = con.execute(f"SELECT Z_PK, {column} FROM ZSYNCOBJECT WHERE {column} IS NOT NULL").fetchall()
+        expected = orig.execute(f"SELECT COUNT({column}) FROM ZSYNCOBJECT").fetchone()[0]
+        assert len(rows) == expected
+        assert all(value == f"{prefix}{pk}" for pk, value in rows)
+    logins = con.execute("SELECT Z_PK, ZSYNCLOGIN FROM ZUSER WHERE ZSYNCLOGIN IS NOT NULL").fetchall()
+    assert all(value == f"user_{pk}" for pk, value in logins)
+    con.close()
+    orig.close()
+
+
+
+def test_create_test_db_subset_is_closed(tmp_path):
+    repo_root = Path(__file__).resolve().parents[2]
+    script = repo_root / "moneywiz.sh"
+    src = repo_root / "tests/test_db.sqlite"
+    dest = tmp_path / "subset.sqlite"
+    run(["bash", str(script), "--db", str(src), "create-test-db", "--out", str(dest), "--subset", "--max-transactions", "100"])
+
+    orig = sqlite3.connect(src)
+    con = sqlite3.connect(dest)
+    tx_ents = [
+        ent
+        for (ent,) in orig.execute(
+            "SELECT Z_ENT FROM Z_PRIMARYKEY WHERE Z_SUPER = (SELECT Z_ENT FROM Z_PRIMARYKEY WHERE Z_NAME = 'Transaction')"
+        )
+    ]
+    marks = ",".join("?" * len(tx_ents))
+    newest = [
+        pk
+        for (pk,) in orig.execute(
+            f"SELECT Z_PK FROM ZSYNCOBJECT WHERE Z_ENT IN ({marks}) ORDER BY ZDATE1 DESC, Z_PK DESC LIMIT 100", tx_ents
+        )
+    ]
+    kept = {pk for (pk,) in con.execute("SELECT Z_PK FROM ZSYNCOBJECT")}
+    assert set(newest) <= kept
+    assert len(kept) < orig.execute("SELECT COUNT(*) FROM ZSYNCOBJECT").fetchone()[0]
+
+    # Every reference resolves inside the subset.
+    for column in ("ZACCOUNT2", "ZPAYEE2", "ZSENDERTRANSACTION", "ZRECIPIENTTRANSACTION", "ZPARENTCATEGORY"):
+        refs = {v for (v,) in con.execute(f"SELECT {column} FROM ZSYNCOBJECT WHERE {column} IS NOT NULL")}
+        assert refs <= kept, column
+    for query in (
+        "SELECT ZTRANSACTION FROM ZCATEGORYASSIGMENT",
+        "SELECT ZCATEGORY FROM ZCATEGORYASSIGMENT",
+        "SELECT Z_36TRANSACTIONS FROM Z_36TAGS",
+        "SELECT Z_35TAGS FROM Z_36TAGS",
+        "SELECT ZREFUNDTRANSACTION FROM ZWITHDRAWREFUNDTRANSACTIONLINK",
+        "SELECT ZWITHDRAWTRANSACTION FROM ZWITHDRAWREFUNDTRANSACTIONLINK",
+    ):
+        assert {v for (v,) in con.execute(query)} <= kept, query
+    # ... and no link of a kept transaction was dropped.
+    (assignments,) = orig.execute(
+        f"SELECT COUNT(*) FROM ZCATEGORYASSIGMENT WHERE ZTRANSACTION IN ({','.join(map(str, kept))})"
+    ).fetchone()
+    assert con.execute("SELECT COUNT(*) FROM ZCATEGORYASSIGMENT").fetchone() == (assignments,)
+    for name, table in (("SyncObject", "ZSYNCOBJECT"), ("CategoryAssigment", "ZCATEGORYASSIGMENT")):
+        (z_max,) = con.execute("SELECT Z_MAX FROM Z_PRIMARYKEY WHERE Z_NAME = ?", (name,)).fetchone()
+        assert z_max == con.execute(f"SELECT MAX(Z_PK) FROM {table}").fetchone()[0]
+    orig.close()
+    con.close()
+
+    # The subset loads through the API like the full DB.
+    rows = json.loads(run(["bash", str(script), "--db", str(dest), "transactions", "--format", "json"]).stdout)
+    assert set(newest) <= {r["id"] for r in rows}
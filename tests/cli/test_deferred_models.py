@@ -0,0 +1,61 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+
+def run(cmd, env=None):
+    return subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True, env=env)
+
+
+CHECK = """
+import dataclasses, pickle, random, sys
+import numpy as np
+from moneywiz_api.managers.transaction_manager import TransactionManager
+from moneywiz_api.utils import get_datetime
+from moneywiz_tools import open_api
+from moneywiz_tools.accessor import ToolsAccessor
+from moneywiz_tools.deferred import PARKED, iso_datetimes
+from moneywiz_tools.epoch import to_datetimes, to_isoformat
+
+db = sys.argv[1]
+eager = TransactionManager()
+eager.load(ToolsAccessor(db))
+lazy = open_api(db, cache=False).transaction_manager
+assert list(eager.records()) == list(lazy.records())
+parked = sum(len(t.__dict__[PARKED]) for t in lazy.records().values())
+assert parked >= 2 * len(lazy.records())  # both dates stay raw after load
+sample = pickle.loads(pickle.dumps(list(lazy.records().values())[:50]))
+for x, y in zip(eager.records().values(), lazy.records().values()):
+    assert type(y).__name__ == type(x).__name__ and isinstance(y, type(x))
+    for f in dataclasses.fields(x):
+        a, b = getattr(x, f.name), getattr(y, f.name)
+        assert type(a) is type(b) and a == b and str(a) == str(b), (x.id, f.name, a, b)
+    assert y == x and not y.__dict__[PARKED]
+for s in sample:
+    assert s == eager.get(s.id)
+
+txs = lazy.query(limit=200)
+assert iso_datetimes(txs, sep=" ", timespec="seconds") == [
+    t.datetime.isoformat(sep=" ", timespec="seconds") for t in txs
+]
+random.seed(7)
+values = [random.uniform(0, 9e8) for _ in range(5000)] + [float(random.randrange(9 * 10**8)) for _ in range(500)]
+values += [86400 * d + 3600 * h + 0.9999996 for d in range(7300, 7310) for h in range(24)] + [float("nan")]
+expected = [get_datetime(v) if v == v else None for v in values]
+assert to_datetimes(np.array(values)) == expected
+for spec in ("auto", "seconds", "microseconds"):
+    assert to_isoformat(np.array(values), " ", spec) == [
+        d.isoformat(" ", spec) if d else None for d in expected
+    ]
+print(len(txs))
+"""
+
+
+def test_deferred_models_match_eager_models():
+    repo_root = Path(__file__).resolve().parents[2]
+    pythonpath = os.pathsep.join([str(repo_root / "scripts"), str(repo_root / "moneywiz-api/src")])
+    for tz in ("UTC", "Europe/Rome", "America/New_York"):
+        env = {**os.environ, "PYTHONPATH": pythonpath, "MONEYWIZ_NO_CACHE": "1", "TZ": tz}
+        proc = run([sys.executable, "-c", CHECK, str(repo_root / "tests/test_db.sqlite")], env=env)
+        assert int(proc.stdout) == 200
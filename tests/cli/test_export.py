@@ -0,0 +1,59 @@
+import csv
+import json
+import subprocess
+from pathlib import Path
+
+
+def run(cmd):
+    return subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True)
+
+
+def test_export_per_account_matches_transactions(tmp_path):
+    repo_root = Path(__file__).resolve().parents[2]
+    script = repo_root / "moneywiz.sh"
+
+    listed = [
+        json.loads(line)
+        for line in run(["bash", str(script), "transactions", "--format", "ndjson", "--with-tags"]).stdout.splitlines()
+    ]
+    out = tmp_path / "by-account"
+    proc = run(["bash", str(script), "export", "--out", str(out), "--format", "ndjson", "--jobs", "2", "--with-tags"])
+    report = proc.stdout.splitlines()
+    assert report[0].split() == ["partition", "rows", "seconds", "pid", "path"]
+    assert "2 workers" in proc.stderr
+
+    exported = {}
+    for path in sorted(out.glob("account-*.ndjson")):
+        rows = [json.loads(line) for line in path.read_text().splitlines()]
+        account = int(path.stem.split("-")[1])
+        assert {r["account"] for r in rows} == {account}
+        assert [(r["datetime"], r["id"]) for r in rows] == sorted((r["datetime"], r["id"]) for r in rows)
+        exported.update((r["id"], r) for r in rows)
+    assert len(report) == 2 + len(list(out.glob("*.ndjson")))
+    assert not list(out.glob("*.tmp"))
+
+    assert sorted(exported) == sorted(t["id"] for t in listed)
+    for t in listed:
+        r = exported[t["id"]]
+        for key in ("datetime", "account", "account_name", "amount", "description", "tags"):
+            assert r[key] == t[key], (t["id"], key)
+        assert r["payee"] == t.get("payee") and r["payee_name"] == t.get("payee_name")
+
+
+def test_export_per_user_and_year(tmp_path):
+    repo_root = Path(__file__).resolve().parents[2]
+    script = repo_root / "moneywiz.sh"
+
+    total = len(run(["bash", str(script), "transactions", "--format", "ndjson"]).stdout.splitlines())
+    out = tmp_path / "by-user"
+    run(["bash", str(script), "export", "--out", str(out), "--by", "user", "--per-year", "--jobs", "1"])
+    files = sorted(out.glob("user-*.csv"))
+    assert len(files) > 1
+    count = 0
+    for path in files:
+        year = path.stem.split("-")[2]
+        with path.open(newline="") as fh:
+            rows = list(csv.DictReader(fh))
+        assert rows and all(r["datetime"].startswith(year) for r in rows)
+        count += len(rows)
+    assert count == total
@@ -0,0 +1,66 @@
+import json
+import sqlite3
+import subprocess
+from pathlib import Path
+
+
+def run(cmd):
+    return subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True)
+
+
+def test_generate_db_is_consistent(tmp_path):
+    repo_root = Path(__file__).resolve().parents[2]
+    script = repo_root / "moneywiz.sh"
+    out = tmp_path / "synthetic.sqlite"
+
+    stats = json.loads(
+        run(["bash", str(script), "generate-db", "--out", str(out), "--rows", "5k", "--users", "2", "--format", "json"]).stdout
+    )
+    con = sqlite3.connect(out)
+    assert con.execute("PRAGMA integrity_check").fetchone() == ("ok",)
+    (rows,) = con.execute("SELECT COUNT(*) FROM ZSYNCOBJECT").fetchone()
+    assert rows == 5000
+    assert stats["ZSYNCOBJECT"] == rows
+    for name, z_max in con.execute("SELECT Z_NAME, Z_MAX FROM Z_PRIMARYKEY WHERE Z_SUPER = 0"):
+        table = "Z" + name.upper()
+        assert z_max == con.execute(f"SELECT COALESCE(MAX(Z_PK), 0) FROM {table}").fetchone()[0]
+    # References resolve inside the generated DB.
+    for column in ("ZACCOUNT2", "ZPAYEE2", "ZSENDERTRANSACTION", "ZRECIPIENTTRANSACTION"):
+        dangling = con.execute(
+            f"SELECT COUNT(*) FROM ZSYNCOBJECT t WHERE t.{column} IS NOT NULL "
+            f"AND NOT EXISTS (SELECT 1 FROM ZSYNCOBJECT o WHERE o.Z_PK = t.{column})"
+        ).fetchone()
+        assert dangling == (0,), column
+    splits = con.execute(
+        "SELECT COUNT(*) FROM ZCATEGORYASSIGMENT a LEFT JOIN ZSYNCOBJECT c ON c.Z_PK = a.ZCATEGORY "
+        "WHERE c.Z_PK IS NULL"
+    ).fetchone()
+    assert splits == (0,)
+    con.close()
+
+    listed = json.loads(
+        run(["bash", str(script), "--db", str(out), "transactions", "--format", "json", "--with-categories"]).stdout
+    )
+    assert listed
+
+
+def test_benchmark_json(tmp_path):
+    repo_root = Path(__file__).resolve().parents[2]
+    script = repo_root / "moneywiz.sh"
+    baseline = tmp_path / "base.json"
+
+    cmd = [
+        "bash", str(script), "benchmark", "--scales", "2k", "--repeat", "1", "--only", "users,api:lazy-accounts",
+        "--workdir", str(tmp_path), "--format", "json",
+    ]
+    doc = json.loads(run([*cmd, "--save-baseline", str(baseline)]).stdout)
+    assert [(r["scale"], r["target"], r["ok"]) for r in doc["results"]] == [
+        (2000, "users", True),
+        (2000, "api:lazy-accounts", True),
+    ]
+    assert all(r["wall_s"] > 0 and r["peak_rss_mb"] > 0 for r in doc["results"])
+    assert json.loads(baseline.read_text())["results"] == doc["results"]
+
+    compared = json.loads(run([*cmd, "--baseline", str(baseline), "--threshold", "100"]).stdout)
+    assert compared["regressions"] == 0
+    assert all("ratio" in r for r in compared["results"])
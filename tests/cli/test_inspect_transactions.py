@@ -0,0 +1,54 @@
+import json
+import sqlite3
+import subprocess
+from pathlib import Path
+
+
+def run(cmd):
+    return subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True)
+
+
+def test_inspect_transactions_profile_matches_sql():
+    repo_root = Path(__file__).resolve().parents[2]
+    script = repo_root / "moneywiz.sh"
+    out = run(
+        ["bash", str(script), "inspect-transactions", "--sample-size", "50", "--samples", "2", "--format", "json"]
+    ).stdout
+    data = json.loads(out)
+
+    con = sqlite3.connect(repo_root / "tests/test_db.sqlite")
+    ents = dict(con.execute("SELECT Z_NAME, Z_ENT FROM Z_PRIMARYKEY"))
+    assert data["types"]
+    assert "TransferBudgetTransaction" not in data["types"]
+    for typename, profile in data["types"].items():
+        ent = ents[typename]
+        (rows,) = con.execute("SELECT COUNT(*) FROM ZSYNCOBJECT WHERE Z_ENT = ?", (ent,)).fetchone()
+        assert profile["rows"] == rows
+        assert profile["sampled"] == min(rows, 50)
+        columns = [d[0] for d in con.execute("SELECT * FROM ZSYNCOBJECT LIMIT 0").description]
+        counts = con.execute(
+            "SELECT " + ", ".join(f"COUNT({c})" for c in columns) + " FROM ZSYNCOBJECT WHERE Z_ENT = ?", (ent,)
+        ).fetchone()
+        assert {col["column"] for col in profile["columns"]} == {c for c, n in zip(columns, counts) if n}
+        for col in profile["columns"]:
+            c = col["column"]
+            non_null, distinct = con.execute(
+                f"SELECT COUNT({c}), COUNT(DISTINCT {c}) FROM ZSYNCOBJECT WHERE Z_ENT = ?", (ent,)
+            ).fetchone()
+            assert col["non_null"] == non_null
+            assert col["distinct"] is None or 1 <= col["distinct"] <= non_null
+            if col["distinct_exact"]:
+                assert col["distinct"] == distinct
+            for value, count in col["top"]:
+                (expected,) = con.execute(
+                    f"SELECT COUNT(*) FROM ZSYNCOBJECT WHERE Z_ENT = ? AND {c} = ?", (ent, value)
+                ).fetchone()
+                assert count == expected
+        (with_categories,) = con.execute(
+            "SELECT COUNT(DISTINCT a.ZTRANSACTION) FROM ZCATEGORYASSIGMENT a "
+            "JOIN ZSYNCOBJECT s ON s.Z_PK = a.ZTRANSACTION WHERE s.Z_ENT = ?",
+            (ent,),
+        ).fetchone()
+        assert profile["relationships"]["with_categories"] == with_categories
+        assert len(data["samples"][typename]) == min(rows, 2)
+    con.close()
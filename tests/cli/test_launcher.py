@@ -0,0 +1,22 @@
+import json
+import os
+import subprocess
+from pathlib import Path
+
+
+def test_bootstrap_stamp_and_ttfo_metric(tmp_path):
+    repo_root = Path(__file__).resolve().parents[2]
+    script = repo_root / "moneywiz.sh"
+    metrics = tmp_path / "ttfo.jsonl"
+    env = dict(os.environ, MONEYWIZ_TTFO=str(metrics), MONEYWIZ_NO_SERVER="1")
+    proc = subprocess.run(
+        ["bash", str(script), "users"], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True, env=env
+    )
+    assert proc.stdout.startswith("id\tlogin_name")
+
+    stamp = (repo_root / ".venv" / ".moneywiz-bootstrap").read_text()
+    assert stamp.startswith("v1 req=")
+
+    records = [json.loads(line) for line in metrics.read_text().splitlines()]
+    assert records[-1]["command"] == "users"
+    assert records[-1]["ttfo_ms"] > 0
@@ -0,0 +1,81 @@
+import csv
+import io
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+
+def run(cmd, env=None):
+    return subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True, env=env)
+
+
+CHECK = """
+import io, json
+from moneywiz_tools.output import write_rows
+
+rows = [{"id": i, "name": "n" * (i % 7), "note": None, "tags": [i, "é"]} for i in range(3000)]
+rows[2500]["name"] = "x" * 40  # past the width sample
+for ensure_ascii in (True, False):
+    for data in (rows, [], rows[:1]):
+        out = io.StringIO()
+        assert write_rows("json", iter(data), out=out, ensure_ascii=ensure_ascii) == len(data)
+        assert out.getvalue() == json.dumps(data, indent=2, ensure_ascii=ensure_ascii) + "\\n"
+
+sample, spool = io.StringIO(), io.StringIO()
+write_rows("table", iter(rows), ["id", "name", "note"], out=sample)
+write_rows("table", iter(rows), ["id", "name", "note"], out=spool, widths="spool")
+lines = spool.getvalue().splitlines()
+assert len({len(line) for line in lines}) == 1 and len(lines) == len(rows) + 2
+assert sample.getvalue().splitlines()[:2500] != lines[:2500]  # sampled widths are narrower
+assert [l.split() for l in sample.getvalue().splitlines()] == [l.split() for l in lines]
+
+out = io.StringIO()
+write_rows("tsv", iter(rows[:2]), lambda keys: sorted(keys), out=out)
+assert out.getvalue() == 'id\\tname\\tnote\\ttags\\n0\\t\\t\\t[0, "\\\\u00e9"]\\n1\\tn\\t\\t[1, "\\\\u00e9"]\\n'
+print("ok")
+"""
+
+
+def test_write_rows_formats():
+    repo_root = Path(__file__).resolve().parents[2]
+    pythonpath = os.pathsep.join(
+        [str(repo_root / "scripts"), str(repo_root / "moneywiz-api/src"), os.environ.get("PYTHONPATH", "")]
+    )
+    env = {**os.environ, "PYTHONPATH": pythonpath.rstrip(os.pathsep)}
+    assert run([sys.executable, "-c", CHECK], env=env).stdout == "ok\n"
+
+
+def test_transactions_formats_agree():
+    repo_root = Path(__file__).resolve().parents[2]
+    script = repo_root / "moneywiz.sh"
+    base = ["bash", str(script), "transactions", "--limit", "300", "--with-tags"]
+
+    rows = json.loads(run([*base, "--format", "json"]).stdout)
+    assert len(rows) == 300
+    ndjson = [json.loads(line) for line in run([*base, "--format", "ndjson"]).stdout.splitlines()]
+    assert ndjson == rows
+    parsed = list(csv.DictReader(io.StringIO(run([*base, "--format", "csv"]).stdout)))
+    assert [int(r["id"]) for r in parsed] == [r["id"] for r in rows]
+    tsv = run([*base, "--format", "tsv"]).stdout.splitlines()
+    assert tsv[0] == "id\tdatetime\taccount\taccount_name\tamount\tdescription"
+    assert [int(line.split("\t")[0]) for line in tsv[1:]] == [r["id"] for r in rows]
+
+    # 300 rows fit in the width sample, so both modes size columns exactly.
+    table = run([*base, "--format", "table"]).stdout
+    assert run([*base, "--format", "table", "--table-widths", "spool"]).stdout == table
+    assert table.splitlines()[1].startswith("--  ")
+
+
+def test_listing_stops_quietly_when_reader_exits():
+    repo_root = Path(__file__).resolve().parents[2]
+    script = repo_root / "moneywiz.sh"
+    env = {**os.environ, "MONEYWIZ_NO_SERVER": "1"}
+    for fmt in ("table", "tsv", "csv", "json", "ndjson"):
+        proc = run(
+            ["bash", "-o", "pipefail", "-c", f'bash "{script}" transactions --format {fmt} | head -n 2'],
+            env=env,
+        )
+        assert len(proc.stdout.splitlines()) == 2, fmt
+        assert proc.stderr == "", fmt
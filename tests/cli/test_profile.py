@@ -0,0 +1,47 @@
+import json
+import os
+import pstats
+import subprocess
+from pathlib import Path
+
+
+def run(cmd, env=None):
+    return subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True, env=env)
+
+
+def test_profile_and_trace_sql(tmp_path):
+    repo_root = Path(__file__).resolve().parents[2]
+    script = repo_root / "moneywiz.sh"
+    env = {**os.environ, "MONEYWIZ_NO_CACHE": "1"}
+    plain = run(["bash", str(script), "transactions", "--limit", "5"], env=env).stdout
+
+    trace = tmp_path / "sql.jsonl"
+    dump = tmp_path / "run.pstats"
+    proc = run(
+        [
+            "bash", str(script), "--profile", "--profile-out", str(dump), "--trace-sql-out", str(trace),
+            "transactions", "--limit", "5",
+        ],
+        env=env,
+    )
+    # Output is unchanged; the report goes to stderr.
+    assert proc.stdout == plain
+    assert "profile: transactions" in proc.stderr
+    for name in ("startup", "connect", "load", "parse", "enrich", "render", "other", "sql"):
+        assert f"  {name} " in proc.stderr, name
+    assert pstats.Stats(str(dump)).total_calls > 0
+
+    statements = [json.loads(line) for line in trace.read_text().splitlines()]
+    assert all({"sql", "ms", "rows"} <= set(s) for s in statements)
+    listed = [s for s in statements if "FROM ZSYNCOBJECT WHERE Z_ENT IN" in s["sql"] and "LIMIT 5" in s["sql"]]
+    assert len(listed) == 1 and listed[0]["rows"] == 5 and listed[0]["ms"] >= 0
+
+    # MONEYWIZ_PROFILE=FILE appends a JSON line instead of the table.
+    report = tmp_path / "profile.jsonl"
+    proc = run(["bash", str(script), "tags"], env={**env, "MONEYWIZ_PROFILE": str(report)})
+    assert "profile:" not in proc.stderr
+    (line,) = report.read_text().splitlines()
+    record = json.loads(line)
+    assert record["command"] == "tags"
+    assert record["phases"]["parse"]["calls"] == 1
+    assert record["total_s"] >= sum(p["seconds"] for p in record["phases"].values()) - 1e-3
@@ -0,0 +1,75 @@
+import json
+import shutil
+import sqlite3
+import subprocess
+from pathlib import Path
+
+
+def run(cmd):
+    return subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True)
+
+
+def test_reassign_payees_batches_inserts_and_updates(tmp_path):
+    repo_root = Path(__file__).resolve().parents[2]
+    script = repo_root / "moneywiz.sh"
+    db = tmp_path / "copy.sqlite"
+    shutil.copy(repo_root / "tests/test_db.sqlite", db)
+
+    con = sqlite3.connect(db)
+    (payee_ent,) = con.execute("SELECT Z_ENT FROM Z_PRIMARYKEY WHERE Z_NAME = 'Payee'").fetchone()
+    (payee_id,) = con.execute(
+        "SELECT ZPAYEE2 FROM ZSYNCOBJECT WHERE ZPAYEE2 IS NOT NULL "
+        "AND ZDESC2 IS NOT NULL AND TRIM(ZDESC2) != '' GROUP BY ZPAYEE2 "
+        "ORDER BY COUNT(*) DESC LIMIT 1"
+    ).fetchone()
+    (pk_max,) = con.execute("SELECT MAX(Z_PK) FROM ZSYNCOBJECT").fetchone()
+    opt_before = dict(con.execute("SELECT Z_PK, Z_OPT FROM ZSYNCOBJECT WHERE ZPAYEE2 = ?", (payee_id,)))
+    con.close()
+
+    base = ["bash", str(script), "reassign-payees-by-id", "--db", str(db), "--from-payee-id", str(payee_id)]
+    plan_file = tmp_path / "plan.ndjson"
+    preview = run(base + ["--quiet", "--show-plan", "--plan-out", str(plan_file)]).stdout
+    assert "Summary:" in preview
+    # One INSERT and one UPDATE template regardless of how many rows move.
+    assert preview.count("INSERT INTO") <= 1
+    assert preview.count('UPDATE "ZSYNCOBJECT"') == 1
+    records = [json.loads(line) for line in plan_file.read_text().splitlines()]
+    templates = {r["template"]: r for r in records if "template" in r}
+    steps = [r for r in records if "t" in r]
+    assert all(step["t"] in templates for step in steps)
+    updates = [s for s in steps if templates[s["t"]]["label"] == "update ZSYNCOBJECT.ZPAYEE2"]
+    assert f"{len(updates)} x update ZSYNCOBJECT.ZPAYEE2" in preview
+
+    # With the plan on stdout, the report moves to stderr and stdout stays NDJSON.
+    streamed = run(base + ["--show-plan", "--plan-out", "-"])
+    streamed_records = [json.loads(line) for line in streamed.stdout.splitlines()]
+    assert [r.get("sql") for r in streamed_records] == [r.get("sql") for r in records]
+    assert "Summary:" in streamed.stderr
+
+    run(base + ["--apply", "--quiet"])
+    con = sqlite3.connect(db)
+    moved = con.execute(
+        "SELECT t.ZDESC2, p.ZNAME5, p.Z_ENT FROM ZSYNCOBJECT t JOIN ZSYNCOBJECT p ON p.Z_PK = t.ZPAYEE2 "
+        "WHERE p.Z_PK > ?",
+        (pk_max,),
+    ).fetchall()
+    names = con.execute("SELECT ZNAME5, ZUSER7 FROM ZSYNCOBJECT WHERE Z_PK > ?", (pk_max,)).fetchall()
+    z_max = max(row[0] for row in con.execute("SELECT Z_MAX FROM Z_PRIMARYKEY"))
+    moved_ids = [
+        pk for (pk,) in con.execute(
+            "SELECT Z_PK FROM ZSYNCOBJECT WHERE ZPAYEE2 IS NOT ? AND Z_PK IN (SELECT value FROM json_each(?))",
+            (payee_id, json.dumps(list(opt_before))),
+        )
+    ]
+    opt_after = dict(
+        con.execute(
+            "SELECT Z_PK, Z_OPT FROM ZSYNCOBJECT WHERE Z_PK IN (SELECT value FROM json_each(?))",
+            (json.dumps(moved_ids),),
+        )
+    )
+    con.close()
+    assert all(desc.strip() == name and ent == payee_ent for desc, name, ent in moved)
+    assert len(names) == len(set(names))
+    assert z_max >= pk_max + len(names)
+    # Every reassigned row bumped its version counter.
+    assert moved_ids and all(opt_after[pk] == (opt_before[pk] or 0) + 1 for pk in moved_ids)
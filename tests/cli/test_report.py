@@ -0,0 +1,36 @@
+import json
+import sqlite3
+import subprocess
+from pathlib import Path
+
+
+def run(cmd):
+    return subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True)
+
+
+def test_report_totals_match_sql_and_pivot():
+    repo_root = Path(__file__).resolve().parents[2]
+    script = repo_root / "moneywiz.sh"
+    con = sqlite3.connect(repo_root / "tests/test_db.sqlite")
+    (expected,) = con.execute(
+        "SELECT SUM(CAST(ROUND(ZAMOUNT1 * 100) AS INTEGER)) FROM ZSYNCOBJECT WHERE Z_ENT IN ("
+        "SELECT Z_ENT FROM Z_PRIMARYKEY WHERE Z_NAME != 'TransferBudgetTransaction' AND Z_SUPER = "
+        "(SELECT Z_ENT FROM Z_PRIMARYKEY WHERE Z_NAME = 'Transaction'))"
+    ).fetchone()
+    con.close()
+
+    data = json.loads(run(["bash", str(script), "report", "--period", "all", "--format", "json"]).stdout)
+    assert len(data) == 1 and data[0]["period"] == "all"
+    assert round(data[0]["amount"] * 100) == expected
+
+    by_month = json.loads(run(["bash", str(script), "report", "--by", "period", "--format", "json"]).stdout)
+    assert [r["period"] for r in by_month] == sorted(r["period"] for r in by_month)
+    assert sum(round(r["amount"] * 100) for r in by_month) == expected
+
+    pivot = json.loads(
+        run(["bash", str(script), "report", "--by", "account,period", "--pivot", "period", "--format", "json"]).stdout
+    )
+    months = [r["period"] for r in by_month]
+    for month in months:
+        column = sum(round(row.get(month, 0) * 100) for row in pivot)
+        assert column == round(next(r["amount"] for r in by_month if r["period"] == month) * 100)
@@ -1,4 +1,5 @@
 import json
+import os
 import subprocess
 from pathlib import Path
 
@@ -20,3 +21,29 @@ def test_schema_outputs(tmp_path):
     # Expect to see Z_PRIMARYKEY table in dump
     assert any(t.get("name") == "Z_PRIMARYKEY" for t in data)
 
+
+
+def test_schema_cache_and_approx_counts(tmp_path, cache_dir):
+    repo_root = Path(__file__).resolve().parents[2]
+    script = repo_root / "moneywiz.sh"
+    env = dict(os.environ)
+
+    def dump(name, *extra):
+        out_json = tmp_path / f"{name}.json"
+        subprocess.run(
+            ["bash", str(script), "schema", "--out-md", str(tmp_path / f"{name}.md"), "--out-json", str(out_json), *extra],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True, env=env,
+        )
+        return json.loads(out_json.read_text())
+
+    exact = dump("exact")
+    assert len(list(cache_dir.glob("schema-*.json"))) == 1
+    assert dump("cached") == exact
+    approx = {t["name"]: t for t in dump("approx", "--approx-counts")}
+    for t in exact:
+        assert t["row_count_approx"] is False
+        assert approx[t["name"]]["row_count_approx"] is True
+        assert approx[t["name"]]["columns"] == t["columns"]
+        if t["row_count"] is not None:
+            # stat1 or MAX(rowid): never below the real count without deletes
+            assert approx[t["name"]]["row_count"] >= t["row_count"]
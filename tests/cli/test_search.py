@@ -0,0 +1,54 @@
+import json
+import os
+import shutil
+import sqlite3
+import subprocess
+from pathlib import Path
+
+
+def run(cmd, env=None):
+    return subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True, env=env)
+
+
+def test_search_ranks_and_refreshes_incrementally(tmp_path):
+    repo_root = Path(__file__).resolve().parents[2]
+    script = repo_root / "moneywiz.sh"
+    db = tmp_path / "db.sqlite"
+    shutil.copy(repo_root / "tests/test_db.sqlite", db)
+    env = {**os.environ, "MONEYWIZ_NO_SERVER": "1"}
+
+    def search(*args):
+        return run(["bash", str(script), "--db", str(db), "search", *args], env=env)
+
+    first = search("salary", "--ids-only", "--limit", "0", "--format", "ndjson")
+    assert "indexed" in first.stderr
+    assert (tmp_path / "db.search.sqlite").exists()
+    hits = [json.loads(line) for line in first.stdout.splitlines()]
+    con = sqlite3.connect(db)
+    expected = {pk for (pk,) in con.execute("SELECT Z_PK FROM ZSYNCOBJECT WHERE ZDESC2 LIKE '%salary%'")}
+    assert expected and {h["id"] for h in hits} >= expected
+    assert [h["score"] for h in hits] == sorted((h["score"] for h in hits), reverse=True)
+
+    # Listing goes through `transactions`, in rank order, with its filters.
+    listed = [json.loads(line) for line in search("salary", "--limit", "5", "--format", "ndjson").stdout.splitlines()]
+    assert [r["id"] for r in listed] == [h["id"] for h in hits[:5]]
+    assert all("Salary" in r["description"] and "score" in r for r in listed)
+    account = listed[0]["account"]
+    filtered = run(
+        ["bash", str(script), "transactions", "--db", str(db), "--search", "salary", "--account", str(account),
+         "--format", "ndjson"],
+        env=env,
+    ).stdout.splitlines()
+    assert filtered and all(json.loads(line)["account"] == account for line in filtered)
+
+    # Unchanged DB: nothing re-indexed. One edited row: only it.
+    assert "indexed" not in search("salary", "--ids-only").stderr
+    target = listed[0]["id"]
+    con.execute("UPDATE ZSYNCOBJECT SET ZDESC2 = 'Zanzibar ferry', Z_OPT = Z_OPT + 1 WHERE Z_PK = ?", (target,))
+    con.commit()
+    con.close()
+    proc = search("zanzibar", "--ids-only", "--format", "ndjson")
+    assert "indexed 1 transactions" in proc.stderr
+    assert [json.loads(line)["id"] for line in proc.stdout.splitlines()] == [target]
+    fuzzy = search("zanzibr", "--fuzzy", "--in", "description", "--ids-only", "--format", "ndjson").stdout
+    assert json.loads(fuzzy.splitlines()[0])["id"] == target
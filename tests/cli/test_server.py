@@ -0,0 +1,36 @@
+import json
+import os
+import subprocess
+from pathlib import Path
+
+
+def run(cmd, env):
+    return subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True, env=env)
+
+
+def test_server_forwards_reads_with_identical_output(tmp_path):
+    repo_root = Path(__file__).resolve().parents[2]
+    script = repo_root / "moneywiz.sh"
+    env = dict(os.environ, MONEYWIZ_SOCKET=str(tmp_path / "s.sock"))
+    env.pop("MONEYWIZ_NO_SERVER", None)
+    direct_env = dict(env, MONEYWIZ_NO_SERVER="1")
+    commands = [
+        ["users", "--format", "json"],
+        ["transactions", "--limit", "10", "--with-tags", "--format", "json"],
+        ["summary"],
+    ]
+
+    run(["bash", str(script), "server", "start"], env)
+    try:
+        for cmd in commands:
+            served = run(["bash", str(script), *cmd], env).stdout
+            direct = run(["bash", str(script), *cmd], direct_env).stdout
+            assert served == direct
+        # A different transaction store is not what the server loaded: run locally.
+        columnar = run(["bash", str(script), "summary"], dict(env, MONEYWIZ_TRANSACTION_STORE="columnar")).stdout
+        assert columnar == direct
+        status = json.loads(run(["bash", str(script), "server", "status"], env).stdout)
+        assert status["requests"] == len(commands)
+    finally:
+        run(["bash", str(script), "server", "stop"], env)
+    assert not (tmp_path / "s.sock").exists()
@@ -0,0 +1,23 @@
+import os
+import subprocess
+from pathlib import Path
+
+
+def run(cmd, env):
+    return subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True, env=env)
+
+
+def test_summary_reuses_snapshot_and_matches_uncached(cache_dir):
+    repo_root = Path(__file__).resolve().parents[2]
+    script = repo_root / "moneywiz.sh"
+    env = dict(os.environ)
+    env.pop("MONEYWIZ_NO_CACHE", None)
+
+    cold = run(["bash", str(script), "summary"], env).stdout
+    snapshots = sorted(p.name.split("-", 1)[1] for p in cache_dir.glob("*.snapshot"))
+    assert "transaction.snapshot" in snapshots
+    assert "account.snapshot" in snapshots
+
+    warm = run(["bash", str(script), "summary"], env).stdout
+    uncached = run(["bash", str(script), "summary"], dict(env, MONEYWIZ_NO_CACHE="1")).stdout
+    assert cold == warm == uncached
@@ -0,0 +1,51 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+
+def run(cmd, env=None):
+    return subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True, env=env)
+
+
+def test_columnar_transaction_store_matches_models(cache_dir):
+    repo_root = Path(__file__).resolve().parents[2]
+    script = repo_root / "moneywiz.sh"
+    env = {**os.environ, "MONEYWIZ_NO_SERVER": "1"}
+    env.pop("MONEYWIZ_NO_CACHE", None)
+    models = run(["bash", str(script), "summary"], env={**env, "MONEYWIZ_TRANSACTION_STORE": "models"}).stdout
+    assert "Transactions: " in models
+
+    columnar_env = {**env, "MONEYWIZ_TRANSACTION_STORE": "columnar"}
+    # First run loads and snapshots the arrays, the second restores them.
+    for _ in range(2):
+        assert run(["bash", str(script), "summary"], env=columnar_env).stdout == models
+    assert list(cache_dir.glob("*-transaction-columnar.snapshot"))
+
+    # Field values, types and order match the models exactly.
+    check = """
+import dataclasses, sys
+from moneywiz_tools import open_api
+db = sys.argv[1]
+models = open_api(db, cache=False, transaction_store="models").transaction_manager
+store = open_api(db, cache=False, transaction_store="columnar").transaction_manager
+assert list(models.records()) == list(store.records())
+for x, y in zip(models.records().values(), store.records().values()):
+    assert type(y).__name__ == type(x).__name__ and isinstance(y, models.ents[type(x).__name__])
+    for f in dataclasses.fields(x):
+        if f.name != "_raw":
+            a, b = getattr(x, f.name), getattr(y, f.name)
+            assert type(a) is type(b) and str(a) == str(b), (x.id, f.name, a, b)
+    assert y.as_dict() == x.as_dict()
+last = y
+assert last == x and last.filtered() == x.filtered()
+assert store.get_by_gid(x.gid).id == x.id
+assert [t.id for t in store.get_all()] == [t.id for t in models.get_all()]
+print(len(store.records()))
+"""
+    pythonpath = os.pathsep.join([str(repo_root / "scripts"), str(repo_root / "moneywiz-api/src")])
+    proc = run(
+        [sys.executable, "-c", check, str(repo_root / "tests/test_db.sqlite")],
+        env={**env, "PYTHONPATH": pythonpath},
+    )
+    assert int(proc.stdout) > 0
@@ -23,3 +23,15 @@ def test_transactions_all_fields_json():
     # Basic keys still present
     for k in ("id", "datetime", "amount", "description"):
         assert k in item
+
+
+def test_transactions_all_fields_table_columns_cover_every_row():
+    repo_root = Path(__file__).resolve().parents[2]
+    script = repo_root / "moneywiz.sh"
+    base = ["bash", str(script), "transactions", "--all-fields"]
+    # Columns come from the models, not from the first rows: a single row
+    # already gets every column a full listing could need.
+    one = run(base + ["--limit", "1", "--format", "tsv"]).stdout.splitlines()[0].split("\t")
+    listed = run(base + ["--list-fields"]).stdout.split()
+    assert set(listed) <= set(one)
+    assert run(base + ["--limit", "1", "--format", "csv"]).stdout.splitlines()[0].split(",") == one
@@ -0,0 +1,70 @@
+import json
+import subprocess
+from pathlib import Path
+
+
+def run(cmd):
+    return subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True)
+
+
+def test_transactions_limit_newest_first_and_type_filter():
+    repo_root = Path(__file__).resolve().parents[2]
+    script = repo_root / "moneywiz.sh"
+    proc = run(["bash", str(script), "transactions", "--limit", "5", "--format", "json"])
+    data = json.loads(proc.stdout)
+    assert 0 < len(data) <= 5
+    stamps = [item["datetime"] for item in data]
+    assert stamps == sorted(stamps, reverse=True)
+
+    proc = run([
+        "bash",
+        str(script),
+        "transactions",
+        "--limit",
+        "5",
+        "--type",
+        "WithdrawTransaction",
+        "--all-fields",
+        "--format",
+        "json",
+    ])
+    data = json.loads(proc.stdout)
+    assert all(item["__type__"] == "WithdrawTransaction" for item in data)
+
+
+def test_transactions_with_categories_and_tags_json_shape():
+    repo_root = Path(__file__).resolve().parents[2]
+    script = repo_root / "moneywiz.sh"
+    proc = run([
+        "bash",
+        str(script),
+        "transactions",
+        "--limit",
+        "20",
+        "--with-categories",
+        "--with-tags",
+        "--format",
+        "json",
+    ])
+    data = json.loads(proc.stdout)
+    assert data
+    for item in data:
+        assert isinstance(item["tags"], list)
+        assert all(set(c) == {"category_id", "amount"} for c in item["categories"])
+        assert "account_name" in item
+
+
+def test_transactions_streaming_formats_match_json():
+    repo_root = Path(__file__).resolve().parents[2]
+    script = repo_root / "moneywiz.sh"
+    base = ["bash", str(script), "transactions", "--limit", "25", "--with-tags"]
+    expected = json.loads(run(base + ["--format", "json"]).stdout)
+
+    proc = run(base + ["--format", "ndjson"])
+    lines = proc.stdout.splitlines()
+    assert [json.loads(line) for line in lines] == expected
+
+    proc = run(base + ["--format", "csv"])
+    header, *body = proc.stdout.splitlines()
+    assert header == "id,datetime,account,account_name,amount,description,tags"
+    assert [line.split(",", 1)[0] for line in body] == [str(item["id"]) for item in expected]